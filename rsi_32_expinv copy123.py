@@ -1,17 +1,26 @@
-import pyautogui
 import subprocess
 import time
 import os
 import sys
 import logging
+import threading
+import queue
+import importlib
+import re
+import json
+import socket
+import sqlite3
+import zlib
+import io
+import tempfile
+from collections import deque
+from contextlib import contextmanager
 import traceback
+import linecache
 from pathlib import Path
-import pandas as pd
-from openpyxl import load_workbook
-from pywinauto import Application, Desktop
 
-# Deshabilitar fail-safe de pyautogui para evitar errores cuando el mouse se mueve a las esquinas
-pyautogui.FAILSAFE = False
+# Inicio del proceso (para medir el arranque en frío hasta el primer expediente)
+INICIO_PROCESO = time.time()
 
 # Configurar logging
 logging.basicConfig(
@@ -24,45 +33,4193 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+class _LazyModule:
+    """
+    Módulo que se importa recién en su primer uso.
+
+    pandas, pyautogui y pywinauto tardan varios segundos en importarse; así el
+    arranque no los paga hasta que se usan (y pueden importarse en un hilo
+    mientras SIRAT se abre).
+    """
+
+    def __init__(self, nombre, al_cargar=None):
+        self._nombre = nombre
+        self._al_cargar = al_cargar
+        self._modulo = None
+        self._lock = threading.Lock()
+
+    def _cargar(self):
+        if self._modulo is None:
+            with self._lock:
+                if self._modulo is None:
+                    inicio = time.time()
+                    modulo = importlib.import_module(self._nombre)
+                    if self._al_cargar:
+                        self._al_cargar(modulo)
+                    self._modulo = modulo
+                    logger.info(f"Módulo '{self._nombre}' importado en {time.time() - inicio:.2f}s")
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargar(), atributo)
+
+
+def _configurar_pyautogui(modulo):
+    # Deshabilitar fail-safe de pyautogui para evitar errores cuando el mouse se mueve a las esquinas
+    modulo.FAILSAFE = False
+
+
+pd = _LazyModule("pandas")
+pyautogui = _LazyModule("pyautogui", al_cargar=_configurar_pyautogui)
+
+
+def load_workbook(*args, **kwargs):
+    """openpyxl.load_workbook (openpyxl se importa en el primer uso)"""
+    from openpyxl import load_workbook as _load_workbook
+    return _load_workbook(*args, **kwargs)
+
+
+# Grabación / reproducción de árboles UIA (ver UIARecorder y UIAReplay)
+UIA_GRABADOR = None
+UIA_REPRODUCCION = None
+
+
+def Desktop(*args, **kwargs):
+    """
+    pywinauto.Desktop (pywinauto se importa en el primer uso).
+    Con una grabación activa devuelve un Desktop que graba; en reproducción, el Desktop grabado.
+    """
+    if UIA_REPRODUCCION is not None:
+        return UIA_REPRODUCCION.desktop()
+    from pywinauto import Desktop as _Desktop
+    desktop = _Desktop(*args, **kwargs)
+    if UIA_GRABADOR is not None:
+        return UIA_GRABADOR.wrap(desktop)
+    return desktop
+
+
+def Application(*args, **kwargs):
+    """pywinauto.Application (pywinauto se importa en el primer uso; en reproducción, la grabación)"""
+    if UIA_REPRODUCCION is not None:
+        return _ApplicationReplay(UIA_REPRODUCCION)
+    from pywinauto import Application as _Application
+    return _Application(*args, **kwargs)
+
+
 # Rutas
 if getattr(sys, 'frozen', False):
     SCRIPT_DIR = Path(sys.executable).parent
 else:
     SCRIPT_DIR = Path(__file__).parent
 
-SHORTCUT_PATH = SCRIPT_DIR / "Actualiza RSIRAT.lnk"
-IMAGES_DIR = SCRIPT_DIR
+SHORTCUT_PATH = SCRIPT_DIR / "Actualiza RSIRAT.lnk"
+IMAGES_DIR = SCRIPT_DIR
+
+logger.info(f"Directorio de trabajo: {SCRIPT_DIR}")
+logger.info(f"Arquitectura Python: {'64-bit' if sys.maxsize > 2**32 else '32-bit'}")
+
+# Watchdog de SIRAT: presupuesto máximo (segundos) de cada paso antes de
+# considerar que SIRAT quedó colgado y reiniciar la sesión
+WATCHDOG_INTERVALO = 2.0
+PRESUPUESTOS_PASO = {
+    "apertura": 90,
+    "login": 90,
+    "navegacion": 120,
+    "expediente": 240,
+}
+MAX_REINICIOS_SESION = 3
+
+# Dependencias de login de SIRAT (clave usada al agrupar el Excel -> texto del campo dependencia)
+DEPENDENCIAS = {
+    "21": "0021 I.R. Lima - PRICO",
+    "23": "0023 I.R. Lima - MEPECO",
+}
+
+# Modo adjuntar: reutilizar una sesión de SIRAT ya abierta en vez de relanzar el acceso directo
+MODO_ADJUNTAR = True
+
+# Cambio de dependencia dentro del mismo proceso de SIRAT: opción del menú que vuelve
+# a la ventana de login, y tiempo máximo para que esta aparezca. Si no aparece, se cierran
+# los procesos de SIRAT y se espera hasta ESPERA_CIERRE_SIRAT a que desaparezcan antes de relanzar
+PATRON_CAMBIO_DEPENDENCIA = r"(?i)(cambi\w*\s+(de\s+)?dependencia|cerrar\s+sesi[oó]n|salir\s+de\s+la\s+sesi[oó]n)"
+ESPERA_LOGIN_CAMBIO = 10
+ESPERA_CIERRE_SIRAT = 10
+
+# Almacén durable de la campaña (SQLite): estado de cada expediente, leases y latidos
+# de los workers. R_EXPEDIENTES.xlsx es una exportación de este almacén.
+COLA_ARCHIVO = SCRIPT_DIR / "cola_expedientes.db"
+COLA_LEASE = 600  # Segundos que un worker retiene un expediente sin latido
+COLA_LATIDO = 30  # Cada cuántos segundos el worker renueva sus leases
+COLA_MAX_INTENTOS = 3
+COLA_INTERVALO_EXPORTACION = 10  # Cada cuántos segundos el coordinador vuelca resultados a R_EXPEDIENTES.xlsx
+
+# Caché de rutas del menú de SIRAT (índices de hijos desde la ventana hasta cada opción)
+NAVEGACION_ARCHIVO = SCRIPT_DIR / "navegacion_sirat.json"
+
+# Destinos del menú con atajo aprendido:
+#   accion:  "click", "doble" o "clics4" (los 4 clics de Exp. Cob. Coactiva - Individual)
+#   llegada: comprobación barata de que se llegó: ("elemento", siguiente opción del menú)
+#            o ("ventana", title_re); None = solo la espera
+#   espera:  segundos máximos de espera de la llegada (la espera fija del flujo original)
+NAVEGACION_DESTINOS = {
+    "Cobranza Coactiva": {"accion": "click", "llegada": ("elemento", "Exp. Cob. Coactiva - Individual"), "espera": 1.0},
+    "Exp. Cob. Coactiva - Individual": {"accion": "clics4", "llegada": ("ventana", ".*Selecci.n de Expediente.*"), "espera": 2.0},
+    "Proceso de Embargo": {"accion": "click", "llegada": ("elemento", "Trabar Embargo"), "espera": 2.0},
+    "Trabar Embargo": {"accion": "click", "llegada": None, "espera": 1.0},
+    "Accesos": {"accion": "click", "llegada": ("elemento", "Cambio de Expediente"), "espera": 1.0},
+    "Cambio de Expediente": {"accion": "doble", "llegada": ("ventana", ".*Selecci.n de Expediente.*"), "espera": 1.0},
+}
+
+# Grabación de árboles UIA: intervalo mínimo entre snapshots y tope de nodos por ventana
+GRABACION_INTERVALO = 0.25
+GRABACION_MAX_NODOS = 2000
+
+# Métodos cuyo nombre se registra como "llamador" en cada snapshot grabado
+_METODOS_UIA = re.compile(r"^(detect_|check_|click_|_click_|handle_|wait_for_|enter_|fill_|validate_executor|login|switch_)")
+
+# Esperas (segundos) tras lanzar el acceso directo: apertura de la ventana y carga antes del login
+ESPERA_APERTURA = 4
+ESPERA_CARGA = 3
+
+# Presupuesto total (segundos) por expediente y circuit breaker ante SIRAT degradado
+PRESUPUESTO_EXPEDIENTE = 300
+BREAKER_FALLOS_CONSECUTIVOS = 3
+BREAKER_BACKOFF_INICIAL = 30
+BREAKER_BACKOFF_MAXIMO = 600
+BREAKER_MAX_SONDEOS = 5
+
+# Gobernador de ritmo (AIMD): intervalo entre teclas y factor de las pausas entre pasos.
+# Cada expediente correcto acelera un paso fijo; cada fallo de verificación frena multiplicando.
+RITMO_ARCHIVO = SCRIPT_DIR / "ritmo_sirat.json"
+RITMO_INTERVALO_INICIAL = 0.05
+RITMO_INTERVALO_LIMITES = (0.01, 0.15)
+RITMO_FACTOR_LIMITES = (0.3, 2.0)
+RITMO_PASO_INTERVALO = 0.005
+RITMO_PASO_FACTOR = 0.05
+RITMO_RETROCESO = 1.5
+
+# Diagnóstico de fallos: anillo en memoria con las últimas capturas de pantalla (reducidas,
+# JPEG) y el árbol UIA de la ventana activa de SIRAT; se vuelca a disco solo ante un fallo
+DIAGNOSTICO_DIR = SCRIPT_DIR / "diagnostico"
+DIAGNOSTICO_CAPTURAS = 8
+DIAGNOSTICO_INTERVALO = 2.0
+DIAGNOSTICO_REDUCCION = 2
+DIAGNOSTICO_CALIDAD = 60
+DIAGNOSTICO_MAX_NODOS = 600
+DIAGNOSTICO_ESPERA_VOLCADO = 30
+DIAGNOSTICO_MAX_VOLCADOS = 20
+DIAGNOSTICO_COSTO_INICIAL = 0.25  # segundos estimados por captura hasta medir la primera
+
+# Informe de la corrida (JSON + HTML), actualizado durante la corrida como máximo cada INFORME_INTERVALO segundos
+INFORME_ARCHIVO = SCRIPT_DIR / "informe_corrida"
+INFORME_INTERVALO = 30
+INFORME_PASOS_TOP = 10
+
+# Perfilado de una corrida (--perfilado): cProfile determinista del trabajo Python y un
+# muestreo de pila del hilo principal (y de PERFILADO_HILOS) que reparte el tiempo real entre
+# esperas, UIA, openpyxl, pandas, etc. Los archivos llevan la huella del build para comparar versiones
+PERFILADO_DIR = SCRIPT_DIR / "perfilado"
+PERFILADO_INTERVALO = 0.01
+PERFILADO_PROFUNDIDAD = 40
+PERFILADO_TOP = 40
+PERFILADO_HILOS = ("ExpedientePrefetcher",)  # hilos que se muestrean además del principal (escritor de Excel)
+PERFILADO_CATEGORIAS = (
+    ("pywinauto", "UIA"),
+    ("comtypes", "UIA"),
+    ("openpyxl", "openpyxl"),
+    ("pandas", "pandas"),
+    ("pyautogui", "pyautogui"),
+    ("pyscreeze", "pyautogui"),
+    ("PIL", "pyautogui"),
+    ("threading.py", "espera (hilos)"),
+    ("queue.py", "espera (hilos)"),
+    ("subprocess.py", "subprocess"),
+)
+
+# Resultados que indican que SIRAT no respondió como se esperaba (cuentan como fallo)
+RESULTADOS_FALLO = ("RC NO DETECTADO", "RC NO EXTRAÍDO", "ERROR")
+
+# Resultados que indican un expediente o datos inválidos (estado "invalid" del almacén, no se reintentan)
+RESULTADOS_INVALIDO = ("EXP. INVALIDO", "NRO EXPEDIENTE INVALIDO", "FALTA ", "TIPO DE MEDIDA NO VÁLIDO", "TIPO NO VÁLIDO",
+                       "SIN EJECUTOR", "RUC INVALIDO")
+
+# Formato del número de expediente coactivo (13 dígitos, con ceros a la izquierda) y del RUC
+EXPEDIENTE_LONGITUD = 13
+RUC_PESOS = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
+RUC_PREFIJOS = ("10", "15", "16", "17", "20")
+
+# Grilla de "Selección de Expediente Coactivo": columnas (Saldos tiene sub-encabezados)
+COLUMNAS_SELECCION = ("Número", "Tipo", "Total", "Exigible", "Costas", "Fecha de Transferencia",
+                      "Medidas de Embargo", "Grupo")
+RESULTADO_SIN_EJECUTOR = "Sin ejecutor asignado"
+
+# Resultado de un expediente que agotó su presupuesto de tiempo (cuenta como fallo, queda para revisión)
+RESULTADO_PRESUPUESTO = "ERROR: PRESUPUESTO AGOTADO"
+
+# SIRAT rechaza (MONTO MAYOR) un monto que excede en más de este porcentaje el saldo del expediente
+MONTO_TOLERANCIA_SALDO = 0.20
+
+# Costo estimado (segundos) de pasar de un formulario de embargo a otro distinto
+# (menú + avisos de "Trabar Intervención en Información" <-> "Trabar Depósito sin Extracción")
+COSTO_CAMBIO_MEDIDA = 6.0
+
+# Cantidad de expedientes que el hilo de prefetch deja preparados por adelantado
+PREFETCH_PROFUNDIDAD = 3
+
+# Columnas de tiempos por expediente que se escriben junto a RESULTADO en R_EXPEDIENTES.xlsx
+COLUMNAS_METRICAS = ("INICIO", "FIN", "DURACION (s)", "EXCEL I/O (s)", "ESPERA DIALOGOS (s)", "INTENTOS",
+                     "RUTA DE DIALOGOS")
+
+# Registro de diálogos/mensajes de SIRAT. Cada definición:
+#   grupos:      el texto (en minúsculas) debe contener al menos una palabra de CADA grupo
+#   solo_texto:  solo se evalúan controles de tipo Text
+#   extraer:     regex cuyo grupo 1 es el dato del mensaje (número de RC), opcional
+#   respuesta:   tecla(s) con que se responde por defecto ("enter", "alt+s", "alt+a")
+#   intervalo:   espera entre snapshots mientras no aparece
+#   presupuesto: el timeout se recorta con el presupuesto del expediente
+#   verificando / detectado / nivel: mensajes de log
+DIALOGOS_SIRAT = {
+    "password_error": {
+        "grupos": [("no puede ser accedido", "estimado usuario", "aplicativo")],
+        "solo_texto": True, "respuesta": "enter", "intervalo": 0.3, "presupuesto": False,
+        "verificando": "Verificando si hay mensaje de error...",
+        "detectado": "Mensaje de error detectado: {texto}", "nivel": logging.ERROR,
+    },
+    "monto_aviso": {
+        "grupos": [("monto", "excede", "saldo", "expediente", "aviso", "error")],
+        "solo_texto": True, "respuesta": "enter", "intervalo": 0.3, "presupuesto": True,
+        "verificando": "Verificando si hay mensaje de aviso del MONTO...",
+        "detectado": "Mensaje de aviso detectado: {texto}", "nivel": logging.INFO,
+    },
+    "expediente_error": {
+        "grupos": [("expediente",), ("válido", "ingresado")],
+        "solo_texto": True, "respuesta": "enter", "intervalo": 0.3, "presupuesto": True,
+        "verificando": "Verificando si hay mensaje de error de expediente...",
+        "detectado": "Error de expediente detectado: {texto}", "nivel": logging.WARNING,
+    },
+    "expediente_aviso": {
+        "grupos": [("expediente",), ("ruc",), ("embargo",), ("activo",)],
+        "solo_texto": True, "respuesta": "alt+s",
+        "intervalo": 0.3, "presupuesto": True,
+        "verificando": "Verificando si hay mensaje de aviso de expediente (IEI)...",
+        "detectado": "Aviso de embargos activos detectado", "nivel": logging.WARNING,
+    },
+    "resolucion_coactiva": {
+        "grupos": [("se grabó",), ("resolución coactiva",)],
+        "solo_texto": True, "extraer": r"n[úu]mero\D*?(\d+)", "respuesta": "enter",
+        "intervalo": 0.3, "presupuesto": True,
+        "verificando": "Verificando si hay mensaje de Resolución Coactiva...",
+        "detectado": " MENSAJE DE RESOLUCIÓN COACTIVA DETECTADO: {texto:.100}...", "nivel": logging.WARNING,
+    },
+    "desea_continuar": {
+        "grupos": [("desea",), ("continuar",)],
+        "solo_texto": False, "respuesta": "alt+s", "intervalo": 0.1, "presupuesto": True,
+        "verificando": "Verificando si hay mensaje '¿ Desea Continuar ?'...",
+        "detectado": "Aviso '¿ Desea Continuar ?' detectado", "nivel": logging.WARNING,
+    },
+    "grabar_resolucion": {
+        "grupos": [("desea",), ("grabar",), ("resolucion", "coactiva")],
+        "solo_texto": False, "respuesta": "alt+s", "intervalo": 0.1, "presupuesto": True,
+        "verificando": "Verificando si hay mensaje '¿Desea Ud. grabar la Resolución?'...",
+        "detectado": "Aviso '¿Desea Ud. grabar Resolución?' detectado", "nivel": logging.WARNING,
+    },
+}
+
+# Un snapshot de textos se reutiliza entre detectores durante este tiempo (segundos)
+SNAPSHOT_VIGENCIA = 0.1
+
+# Profundidad máxima de los recorridos del árbol UIA (iter_uia)
+UIA_PROFUNDIDAD_MAX = 12
+
+
+def iter_uia(raiz, max_profundidad=UIA_PROFUNDIDAD_MAX, control_types=None, contador=None):
+    """
+    Recorre los descendientes de `raiz` en orden de documento (preorden, el mismo de
+    descendants() y de bulk_uia) y de forma perezosa: los hijos de un nodo se piden
+    recién cuando el recorrido llega a él, por lo que quien corta la iteración en el
+    primer resultado no materializa el resto del árbol. Así el i-ésimo elemento que
+    cumple un criterio es el mismo que con descendants() (found_index).
+
+    Args:
+        raiz: Ventana/elemento de pywinauto (o WindowSpecification)
+        max_profundidad: Niveles máximos bajo la raíz
+        control_types: Si se indica, solo se entregan elementos de esos tipos (el resto
+            igual se recorre, pero de ellos solo se consulta el control_type)
+        contador: Lista [n] donde se acumulan los elementos traídos de UIA (todos los
+            hijos de cada nodo expandido, se entreguen o no)
+
+    Genera:
+        - Elementos de pywinauto
+    """
+    def _hijos(nodo):
+        try:
+            hijos = nodo.children()
+        except Exception:
+            return iter(())
+        if contador is not None:
+            contador[0] += len(hijos)
+        return iter(hijos)
+
+    # Pila de iteradores de hijos: el tope es el nivel que se está recorriendo
+    pila = [(_hijos(raiz), 1)]
+    while pila:
+        hijos, profundidad = pila[-1]
+        hijo = next(hijos, None)
+        if hijo is None:
+            pila.pop()
+            continue
+        try:
+            if control_types is None or hijo.element_info.control_type in control_types:
+                yield hijo
+        except Exception:
+            pass
+        if profundidad < max_profundidad:
+            pila.append((_hijos(hijo), profundidad + 1))
+
+
+class _Rectangulo:
+    """Rectángulo local (mismos atributos/métodos que el RECT de pywinauto)"""
+
+    def __init__(self, valores):
+        self.left, self.top, self.right, self.bottom = valores or (0, 0, 0, 0)
+
+    def width(self):
+        return self.right - self.left
+
+    def height(self):
+        return self.bottom - self.top
+
+    def mid_point(self):
+        return ((self.left + self.right) // 2, (self.top + self.bottom) // 2)
+
+
+class ElementoCacheado:
+    """
+    Elemento UIA con sus propiedades ya traídas por un CacheRequest (Name, ControlType,
+    BoundingRectangle, AutomationId, ClassName): leerlas no cruza al proceso de SIRAT.
+    Las acciones (invoke, set_focus, parent, ...) se delegan al wrapper real de pywinauto,
+    que se crea recién cuando se necesita.
+    """
+
+    def __init__(self, elemento, tipos):
+        self.elemento = elemento
+        self.element_info = self
+        self.element = elemento  # element_info.element, como UIAElementInfo (bulk_uia sobre un cacheado)
+        self.name = elemento.CachedName or ""
+        self.control_type = tipos.get(elemento.CachedControlType)
+        self.automation_id = elemento.CachedAutomationId
+        self.class_name = elemento.CachedClassName
+        rect = elemento.CachedBoundingRectangle
+        self._rect = (rect.left, rect.top, rect.right, rect.bottom)
+        self._wrapper = None
+
+    def window_text(self):
+        return self.name
+
+    def rectangle(self):
+        return _Rectangulo(self._rect)
+
+    def wrapper_object(self):
+        if self._wrapper is None:
+            from pywinauto.controls.uiawrapper import UIAWrapper
+            from pywinauto.uia_element_info import UIAElementInfo
+            self._wrapper = UIAWrapper(UIAElementInfo(self.elemento))
+        return self._wrapper
+
+    def __getattr__(self, atributo):
+        return getattr(self.wrapper_object(), atributo)
+
+
+def bulk_uia(raiz):
+    """
+    Trae TODOS los descendientes de `raiz` con sus propiedades en una sola llamada
+    (IUIAutomation.CreateCacheRequest + FindAllBuildCache). El filtrado posterior
+    corre sobre datos locales.
+
+    Retorna:
+        - Lista de ElementoCacheado (en orden de documento)
+        - None si el CacheRequest no está disponible (el llamador usa iter_uia)
+    """
+    try:
+        from pywinauto.uia_defines import IUIA
+        uia = IUIA()
+        elemento_raiz = raiz.element_info.element
+        cache = uia.iuia.CreateCacheRequest()
+        for propiedad in ("UIA_NamePropertyId", "UIA_ControlTypePropertyId", "UIA_BoundingRectanglePropertyId",
+                          "UIA_AutomationIdPropertyId", "UIA_ClassNamePropertyId"):
+            cache.AddProperty(getattr(uia.UIA_dll, propiedad))
+        encontrados = elemento_raiz.FindAllBuildCache(uia.tree_scope["descendants"], uia.true_condition, cache)
+        tipos = uia.known_control_type_ids
+        return [ElementoCacheado(encontrados.GetElement(i), tipos) for i in range(encontrados.Length)]
+    except Exception:
+        return None
+
+
+def columna_por_geometria(encabezados, rect):
+    """
+    Columna de una celda de la grilla de selección: el encabezado más angosto que
+    contiene su centro horizontal (así "Total" gana a "Saldos").
+
+    Args:
+        encabezados: Lista de (nombre, rect)
+        rect: Rectángulo de la celda
+
+    Retorna:
+        - Nombre del encabezado, o None si ninguno la contiene
+    """
+    centro = (rect.left + rect.right) / 2
+    candidatos = [(r.right - r.left, nombre) for nombre, r in encabezados if r.left <= centro <= r.right]
+    return min(candidatos)[1] if candidatos else None
+
+
+def agrupar_por_renglon(celdas):
+    """
+    Agrupa en filas celdas sueltas (rect, texto): una celda pertenece a la fila en curso
+    si su centro vertical cae dentro de ella.
+
+    Retorna:
+        - Lista de filas (listas de (rect, texto)), de arriba hacia abajo
+    """
+    filas = []
+    for rect, texto in sorted(celdas, key=lambda celda: (celda[0].top, celda[0].left)):
+        centro = (rect.top + rect.bottom) / 2
+        if filas and filas[-1][0][0].top <= centro <= filas[-1][0][0].bottom:
+            filas[-1].append((rect, texto))
+        else:
+            filas.append([(rect, texto)])
+    return filas
+
+
+def registros_seleccion(encabezados, filas):
+    """
+    Registros de la grilla de selección a partir de sus filas.
+
+    Args:
+        encabezados: Lista de (nombre, rect) de los encabezados de columna
+        filas: Lista de filas, cada una una lista de celdas (rect, texto)
+
+    Retorna:
+        - Lista de dicts {columna: texto} con las COLUMNAS_SELECCION encontradas (una
+          columna cuyo encabezado o celda no se leyó no aparece en el dict)
+    """
+    registros = []
+    for celdas in filas:
+        registro = {}
+        for rect, texto in celdas:
+            columna = columna_por_geometria(encabezados, rect)
+            # Una celda y su texto interno comparten columna: gana el primero con contenido
+            if columna in COLUMNAS_SELECCION and not registro.get(columna):
+                registro[columna] = texto
+        if registro:
+            registros.append(registro)
+    return registros
+
+
+def _compilar_dialogo(definicion):
+    """Compila los grupos de palabras de un diálogo en una sola regex (un lookahead por grupo)"""
+    patron = "".join(
+        "(?=.*(?:" + "|".join(re.escape(palabra) for palabra in grupo) + "))"
+        for grupo in definicion["grupos"]
+    )
+    definicion["regex"] = re.compile("^" + patron, re.DOTALL)
+    if definicion.get("extraer"):
+        definicion["regex_extraer"] = re.compile(definicion["extraer"], re.IGNORECASE)
+    return definicion
+
+
+for _definicion in DIALOGOS_SIRAT.values():
+    _compilar_dialogo(_definicion)
+
+
+# Localizadores de las ventanas de SIRAT y de los campos del login
+VENTANA_SIRAT = ".*SIRAT.*"
+VENTANA_MENU = ".*Menú.*"
+CLASE_APLICACION = "TApplication"
+EJECUTABLES_SIRAT = ("rsirat.exe", "sirat.exe")
+AUTO_IDS_LOGIN = {"dependencia": "1001", "contrasena": "1005"}
+
+
+def _compilar_ventanas():
+    """Compila los title_re de SIRAT para los filtros por título hechos sin UIA (find_sirat_windows)"""
+    global REGEX_VENTANA_SIRAT, REGEX_VENTANA_MENU
+    REGEX_VENTANA_SIRAT = re.compile(VENTANA_SIRAT)
+    REGEX_VENTANA_MENU = re.compile(VENTANA_MENU)
+
+
+_compilar_ventanas()
+
+# Perfil del sitio: JSON versionado con tiempos y localizadores para el build de SIRAT
+# y la máquina de cada sede. Se carga al arrancar, antes de crear la automatización.
+PERFIL_ARCHIVO = SCRIPT_DIR / "perfil_sirat.json"
+PERFIL_VERSION = 1
+PERFIL_TIEMPOS = ("ESPERA_APERTURA", "ESPERA_CARGA", "ESPERA_LOGIN_CAMBIO", "WATCHDOG_INTERVALO",
+                  "PRESUPUESTO_EXPEDIENTE", "SNAPSHOT_VIGENCIA", "RITMO_INTERVALO_INICIAL", "DIAGNOSTICO_INTERVALO")
+PERFIL_CAMPOS_DIALOGO = ("grupos", "solo_texto", "extraer", "respuesta", "intervalo", "presupuesto")
+PERFIL_CAMPOS_NAVEGACION = ("accion", "llegada", "espera")
+PERFIL_ACTIVO = None  # {"nombre", "version", "ruta"} del perfil aplicado (None = valores por defecto)
+
+
+def perfil_actual(nombre="por defecto"):
+    """Perfil con los valores vigentes (plantilla para crear el perfil de un sitio)"""
+    return {
+        "version": PERFIL_VERSION,
+        "nombre": PERFIL_ACTIVO["nombre"] if PERFIL_ACTIVO else nombre,
+        "tiempos": {clave: globals()[clave] for clave in PERFIL_TIEMPOS},
+        "presupuestos_paso": dict(PRESUPUESTOS_PASO),
+        "ventanas": {"sirat": VENTANA_SIRAT, "menu": VENTANA_MENU, "clase_aplicacion": CLASE_APLICACION,
+                     "ejecutables": list(EJECUTABLES_SIRAT)},
+        "auto_ids": dict(AUTO_IDS_LOGIN),
+        "dialogos": {
+            nombre_dialogo: {campo: definicion[campo] for campo in PERFIL_CAMPOS_DIALOGO if campo in definicion}
+            for nombre_dialogo, definicion in DIALOGOS_SIRAT.items()
+        },
+        "navegacion": {destino: dict(definicion) for destino, definicion in NAVEGACION_DESTINOS.items()},
+    }
+
+
+def cargar_perfil(ruta=PERFIL_ARCHIVO):
+    """
+    Aplica un perfil del sitio sobre los valores por defecto. Cada sección es opcional
+    y solo reemplaza las claves que trae:
+    - tiempos: constantes de PERFIL_TIEMPOS (segundos)
+    - presupuestos_paso: presupuestos del watchdog por paso
+    - ventanas: "sirat" / "menu" (title_re), "clase_aplicacion" y "ejecutables" (nombres de .exe)
+    - auto_ids: campos del login ("dependencia", "contrasena")
+    - dialogos: por diálogo de DIALOGOS_SIRAT, los campos de PERFIL_CAMPOS_DIALOGO
+    - navegacion: por destino de NAVEGACION_DESTINOS, accion / llegada / espera
+
+    Todo se valida y compila antes de aplicar: un perfil con errores no se aplica a medias.
+
+    Retorna:
+        - dict PERFIL_ACTIVO si se aplicó
+        - None si el archivo no existe (valores por defecto)
+        - False si el perfil es inválido (no se aplica nada y main cancela la corrida)
+    """
+    global PERFIL_ACTIVO, VENTANA_SIRAT, VENTANA_MENU, CLASE_APLICACION, EJECUTABLES_SIRAT
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return None
+
+    try:
+        perfil = json.loads(ruta.read_text(encoding="utf-8"))
+        if perfil.get("version") != PERFIL_VERSION:
+            raise ValueError(f"versión {perfil.get('version')} no soportada (se espera {PERFIL_VERSION})")
+
+        def _claves(seccion, validas):
+            valores = perfil.get(seccion) or {}
+            desconocidas = set(valores) - set(validas)
+            if desconocidas:
+                raise ValueError(f"claves desconocidas en '{seccion}': {', '.join(sorted(desconocidas))}")
+            return valores
+
+        tiempos = {clave: float(valor) for clave, valor in _claves("tiempos", PERFIL_TIEMPOS).items()}
+        presupuestos = {clave: float(valor) for clave, valor in _claves("presupuestos_paso", PRESUPUESTOS_PASO).items()}
+        ventanas = _claves("ventanas", ("sirat", "menu", "clase_aplicacion", "ejecutables"))
+        for clave in ("sirat", "menu"):
+            if clave in ventanas:
+                re.compile(ventanas[clave])
+        if "ejecutables" in ventanas:
+            if isinstance(ventanas["ejecutables"], str):
+                raise ValueError("'ventanas.ejecutables' debe ser una lista de nombres de .exe")
+            ventanas["ejecutables"] = tuple(str(nombre).lower() for nombre in ventanas["ejecutables"])
+        auto_ids = {clave: str(valor) for clave, valor in _claves("auto_ids", AUTO_IDS_LOGIN).items()}
+
+        dialogos = {}
+        for nombre, cambios in _claves("dialogos", DIALOGOS_SIRAT).items():
+            desconocidos = set(cambios) - set(PERFIL_CAMPOS_DIALOGO)
+            if desconocidos:
+                raise ValueError(f"campos desconocidos en el diálogo '{nombre}': {', '.join(sorted(desconocidos))}")
+            definicion = dict(DIALOGOS_SIRAT[nombre], **cambios)
+            definicion.pop("regex_extraer", None)
+            if "grupos" in cambios:
+                definicion["grupos"] = [tuple(palabra.lower() for palabra in grupo) for grupo in cambios["grupos"]]
+            dialogos[nombre] = _compilar_dialogo(definicion)
+
+        navegacion = {}
+        for destino, cambios in _claves("navegacion", NAVEGACION_DESTINOS).items():
+            desconocidos = set(cambios) - set(PERFIL_CAMPOS_NAVEGACION)
+            if desconocidos:
+                raise ValueError(f"campos desconocidos en el destino '{destino}': {', '.join(sorted(desconocidos))}")
+            definicion = dict(NAVEGACION_DESTINOS[destino], **cambios)
+            if definicion.get("llegada") is not None:
+                definicion["llegada"] = tuple(definicion["llegada"])
+            navegacion[destino] = definicion
+    except Exception as e:
+        logger.error(f"Perfil {ruta} inválido, se cancela la corrida: {e}")
+        return False
+
+    globals().update(tiempos)
+    PRESUPUESTOS_PASO.update(presupuestos)
+    VENTANA_SIRAT = ventanas.get("sirat", VENTANA_SIRAT)
+    VENTANA_MENU = ventanas.get("menu", VENTANA_MENU)
+    CLASE_APLICACION = ventanas.get("clase_aplicacion", CLASE_APLICACION)
+    EJECUTABLES_SIRAT = ventanas.get("ejecutables", EJECUTABLES_SIRAT)
+    _compilar_ventanas()
+    AUTO_IDS_LOGIN.update(auto_ids)
+    DIALOGOS_SIRAT.update(dialogos)
+    NAVEGACION_DESTINOS.update(navegacion)
+
+    PERFIL_ACTIVO = {"nombre": perfil.get("nombre", ruta.stem), "version": PERFIL_VERSION, "ruta": str(ruta)}
+    logger.info(
+        f"Perfil '{PERFIL_ACTIVO['nombre']}' (v{PERFIL_VERSION}) aplicado: {len(tiempos)} tiempo(s), "
+        f"{len(dialogos)} diálogo(s), {len(navegacion)} destino(s) del menú"
+    )
+    return PERFIL_ACTIVO
+
+
+def filtrar_ventanas_sirat(ventanas, ejecutable_de=None):
+    """
+    Elige, entre las ventanas de nivel superior, las que pertenecen a SIRAT.
+
+    Un proceso es SIRAT si su ejecutable está en EJECUTABLES_SIRAT o si tiene una
+    ventana de clase CLASE_APLICACION (la ventana oculta de una aplicación Delphi).
+    El título (VENTANA_SIRAT / VENTANA_MENU) solo filtra entre las ventanas visibles
+    de esos procesos: una ventana del Explorador o del navegador con "SIRAT" en el
+    título no cuenta. El proceso del propio script nunca se considera SIRAT.
+
+    Args:
+        ventanas: dicts con hwnd, pid, titulo, clase, visible y colgada
+        ejecutable_de: función pid -> nombre del .exe en minúsculas ("" si no se pudo leer)
+
+    Retorna:
+        - Lista de tuplas (hwnd, pid, titulo, colgada)
+    """
+    propio = os.getpid()
+    candidatas = [
+        ventana for ventana in ventanas
+        if ventana["visible"] and ventana["pid"] != propio
+        and (REGEX_VENTANA_SIRAT.match(ventana["titulo"]) or REGEX_VENTANA_MENU.match(ventana["titulo"]))
+    ]
+    if not candidatas:
+        return []
+
+    pids_sirat = {ventana["pid"] for ventana in ventanas if ventana["clase"] == CLASE_APLICACION}
+    if ejecutable_de is not None:
+        pids_sirat.update(
+            pid for pid in {ventana["pid"] for ventana in candidatas} - pids_sirat
+            if ejecutable_de(pid) in EJECUTABLES_SIRAT
+        )
+
+    return [
+        (ventana["hwnd"], ventana["pid"], ventana["titulo"], ventana["colgada"])
+        for ventana in candidatas if ventana["pid"] in pids_sirat
+    ]
+
+
+def find_sirat_windows():
+    """
+    Enumera las ventanas de nivel superior de SIRAT usando la API Win32 (ctypes).
+    No usa UIA/COM, por lo que se puede llamar desde cualquier hilo (watchdog).
+    Qué ventanas cuentan como SIRAT lo decide filtrar_ventanas_sirat().
+
+    Retorna:
+        - Lista de tuplas (hwnd, pid, titulo, colgada)
+        - Lista vacía si no hay ventanas o no se está en Windows
+    """
+    if sys.platform != "win32":
+        return []
+
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    kernel32 = ctypes.windll.kernel32
+    ventanas = []
+
+    @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    def _callback(hwnd, _lparam):
+        try:
+            buffer = ctypes.create_unicode_buffer(256)
+            user32.GetWindowTextW(hwnd, buffer, 256)
+            clase = ctypes.create_unicode_buffer(256)
+            user32.GetClassNameW(hwnd, clase, 256)
+            pid = wintypes.DWORD()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            visible = bool(user32.IsWindowVisible(hwnd))
+            ventanas.append({
+                "hwnd": hwnd,
+                "pid": pid.value,
+                "titulo": buffer.value,
+                "clase": clase.value,
+                "visible": visible,
+                "colgada": visible and bool(user32.IsHungAppWindow(hwnd)),
+            })
+        except Exception:
+            pass
+        return True
+
+    def _ejecutable(pid):
+        # PROCESS_QUERY_LIMITED_INFORMATION alcanza para leer la ruta del ejecutable
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return ""
+        try:
+            ruta = ctypes.create_unicode_buffer(520)
+            tamano = wintypes.DWORD(520)
+            if kernel32.QueryFullProcessImageNameW(handle, 0, ruta, ctypes.byref(tamano)):
+                return os.path.basename(ruta.value).lower()
+            return ""
+        finally:
+            kernel32.CloseHandle(handle)
+
+    try:
+        user32.EnumWindows(_callback, 0)
+    except Exception as e:
+        logger.warning(f"No se pudieron enumerar las ventanas de SIRAT: {e}")
+
+    return filtrar_ventanas_sirat(ventanas, _ejecutable)
+
+
+def parse_dependencia(texto):
+    """
+    Extrae la dependencia de un texto de SIRAT (título, barra de estado, etiqueta).
+
+    Retorna:
+        - "21" o "23" si el texto menciona la dependencia
+        - None si no se reconoce
+    """
+    valor = str(texto).upper()
+    if "0021" in valor or "PRICO" in valor:
+        return "21"
+    if "0023" in valor or "MEPECO" in valor:
+        return "23"
+    return None
+
+
+class SIRATWatchdog:
+    """
+    Hilo vigilante que detecta cuando SIRAT queda colgado a mitad de un formulario.
+
+    Cada paso de la automatización registra un latido (heartbeat) con su
+    presupuesto de tiempo. El hilo revisa periódicamente:
+    1. Si el paso en curso excedió su presupuesto
+    2. Si la ventana de SIRAT dejó de responder (IsHungAppWindow)
+
+    Si ocurre alguno, ejecuta `on_hang(motivo)` (que mata el proceso de SIRAT)
+    y marca `disparado` para que el lote reinicie la sesión con
+    open_application + login y reanude en la fila en curso.
+    """
+
+    def __init__(self, on_hang, intervalo=None):
+        self.on_hang = on_hang
+        self.intervalo = WATCHDOG_INTERVALO if intervalo is None else intervalo
+        self.disparado = False
+        self.motivo = ""
+        self.paso = None
+        self.fila = None
+        self.presupuesto = None
+        self.inicio_paso = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Inicia el hilo vigilante (si no está corriendo)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="SIRATWatchdog", daemon=True)
+        self._thread.start()
+        logger.info("Watchdog de SIRAT iniciado")
+
+    def stop(self):
+        """Detiene el hilo vigilante"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.intervalo * 2)
+        self._thread = None
+
+    def heartbeat(self, paso, presupuesto=None, fila=None):
+        """
+        Registra el inicio de un paso con su presupuesto (segundos).
+        Un presupuesto None deja el paso sin límite de tiempo.
+        """
+        with self._lock:
+            self.paso = paso
+            self.presupuesto = presupuesto
+            self.inicio_paso = time.time()
+            if fila is not None:
+                self.fila = fila
+
+    def idle(self):
+        """Indica que no hay ningún paso en curso (sin presupuesto que vigilar)"""
+        with self._lock:
+            self.paso = None
+            self.presupuesto = None
+            self.inicio_paso = None
+
+    def reset(self):
+        """Limpia el estado de disparo después de reiniciar SIRAT"""
+        with self._lock:
+            self.disparado = False
+            self.motivo = ""
+            self.paso = None
+            self.presupuesto = None
+            self.inicio_paso = None
+
+    def check(self):
+        """
+        Evalúa una vez si SIRAT está colgado.
+
+        Retorna:
+            - String con el motivo si se detecta un cuelgue
+            - String vacío "" si todo está en orden
+        """
+        with self._lock:
+            paso = self.paso
+            presupuesto = self.presupuesto
+            inicio = self.inicio_paso
+
+        if paso and presupuesto and inicio and time.time() - inicio > presupuesto:
+            return f"El paso '{paso}' excedió su presupuesto de {presupuesto}s"
+
+        if paso:
+            for hwnd, pid, titulo, colgada in find_sirat_windows():
+                if colgada:
+                    return f"La ventana '{titulo}' (PID {pid}) no responde"
+
+        return ""
+
+    def _run(self):
+        while not self._stop_event.wait(self.intervalo):
+            if self.disparado:
+                continue
+
+            try:
+                motivo = self.check()
+            except Exception as e:
+                logger.warning(f"Error en watchdog: {e}")
+                continue
+
+            if motivo:
+                self.disparado = True
+                self.motivo = motivo
+                logger.error("=" * 70)
+                logger.error(f"WATCHDOG: {motivo}")
+                logger.error(f"Fila en curso: {self.fila + 2 if self.fila is not None else '-'}")
+                logger.error("=" * 70)
+                try:
+                    self.on_hang(motivo)
+                except Exception as e:
+                    logger.error(f"Error ejecutando acción del watchdog: {e}")
+
+    def trigger(self, motivo):
+        """Dispara el watchdog manualmente (p. ej. cuando el circuit breaker no logra recuperar SIRAT)"""
+        if self.disparado:
+            return
+        self.disparado = True
+        self.motivo = motivo
+        logger.error(f"WATCHDOG (manual): {motivo}")
+        try:
+            self.on_hang(motivo)
+        except Exception as e:
+            logger.error(f"Error ejecutando acción del watchdog: {e}")
+
+
+def columnas_metricas(iniciado, terminado, intentos, metricas=None):
+    """
+    Valores de COLUMNAS_METRICAS para una fila (None en lo que no se midió).
+
+    Args:
+        iniciado, terminado: time.time() del inicio y fin del expediente
+        intentos: Veces que se empezó a procesar
+        metricas: dict (o JSON del almacén) de ExpedienteMetrics.as_dict()
+    """
+    if isinstance(metricas, str):
+        metricas = json.loads(metricas)
+    metricas = metricas or {}
+
+    def _hora(momento):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(momento)) if momento else None
+
+    return dict(zip(COLUMNAS_METRICAS, (
+        _hora(iniciado),
+        _hora(terminado),
+        round(terminado - iniciado, 1) if iniciado and terminado and terminado >= iniciado else None,
+        metricas.get("excel_io"),
+        metricas.get("espera_dialogos"),
+        intentos or None,
+        metricas.get("ruta") or None,
+    )))
+
+
+class ExpedienteMetrics:
+    """
+    Tiempos del expediente en curso para las columnas de R_EXPEDIENTES.xlsx:
+    segundos del hilo principal en lectura/escritura de Excel, segundos esperando
+    diálogos de SIRAT y la secuencia de diálogos encontrados. También cuenta
+    cuántas veces se empezó cada fila (reintentos tras reinicios de sesión).
+    """
+
+    def __init__(self):
+        self.intentos = {}
+        self.start(None)
+
+    def start(self, fila):
+        """Reinicia las mediciones para una fila"""
+        self.fila = fila
+        self.inicio = time.time()
+        self.excel_io = 0.0
+        self.espera_dialogos = 0.0
+        self.pausas = 0.0
+        self.ruta = []
+        if fila is not None:
+            self.intentos[fila] = self.intentos.get(fila, 0) + 1
+
+    @contextmanager
+    def medir(self, campo):
+        """Suma al campo ("excel_io" / "espera_dialogos") el tiempo del bloque"""
+        inicio = time.time()
+        try:
+            yield
+        finally:
+            setattr(self, campo, getattr(self, campo) + time.time() - inicio)
+
+    def as_dict(self):
+        return {
+            "excel_io": round(self.excel_io, 2),
+            "espera_dialogos": round(self.espera_dialogos, 2),
+            "ruta": " → ".join(self.ruta),
+        }
+
+
+def categoria_resultado(resultado):
+    """Agrupa un RESULTADO para el informe: RC, MONTO MAYOR, FALTA *, o el texto hasta ':' / ' | '"""
+    texto = str(resultado).strip() if resultado is not None else ""
+    if texto.lstrip("'").isdigit():
+        return "RC"
+    if texto.upper().startswith("FALTA "):
+        return "FALTA *"
+    return texto.split(" | ")[0].split(":")[0][:40] or "(vacío)"
+
+
+def _percentil(valores_ordenados, fraccion):
+    return valores_ordenados[min(int(len(valores_ordenados) * fraccion), len(valores_ordenados) - 1)]
+
+
+class RunReport:
+    """
+    Informe de rendimiento de la corrida, acumulado a medida que avanza:
+    - expedientes/hora en total y por dependencia y tipo de medida
+    - distribución de resultados (categoria_resultado)
+    - pasos más lentos con percentiles: tiempo de cada método de la automatización
+      hasta su pausa (_pausa)
+    - tiempo de los expedientes en pausas fijas, en esperas de diálogos y el resto
+    - tiempo de apertura, login, cambios de dependencia y reinicios de sesión
+
+    Solo suma contadores durante la corrida; cada INFORME_INTERVALO segundos (y al
+    final) escribe <base>.json y <base>.html, así un corte deja el último informe.
+    """
+
+    def __init__(self, base=INFORME_ARCHIVO):
+        self.base = Path(base)
+        self.inicio = time.time()
+        self.expedientes = 0
+        self.por_grupo = {}  # (dependencia, medida) -> [expedientes, segundos]
+        self.resultados = {}  # categoría -> cantidad
+        self.pasos = {}  # método -> lista de segundos
+        self.tiempos = {"expedientes": 0.0, "pausas": 0.0, "dialogos": 0.0}
+        self.sesion = {}  # tipo -> [veces, segundos]
+        self._ultima_escritura = time.time()
+
+    def record_step(self, paso, segundos):
+        self.pasos.setdefault(paso, []).append(segundos)
+
+    def record_session(self, tipo, segundos):
+        acumulado = self.sesion.setdefault(tipo, [0, 0.0])
+        acumulado[0] += 1
+        acumulado[1] += segundos
+
+    def record_row(self, dependencia, medida, resultado, metricas):
+        """
+        Suma un expediente terminado.
+
+        Args:
+            metricas: ExpedienteMetrics del expediente (None si se resolvió sin SIRAT)
+        """
+        self.expedientes += 1
+        categoria = categoria_resultado(resultado)
+        self.resultados[categoria] = self.resultados.get(categoria, 0) + 1
+
+        segundos = time.time() - metricas.inicio if metricas is not None else 0.0
+        grupo = self.por_grupo.setdefault((dependencia or "-", medida or "-"), [0, 0.0])
+        grupo[0] += 1
+        grupo[1] += segundos
+        if metricas is not None:
+            self.tiempos["expedientes"] += segundos
+            self.tiempos["pausas"] += metricas.pausas
+            self.tiempos["dialogos"] += metricas.espera_dialogos
+
+        if time.time() - self._ultima_escritura >= INFORME_INTERVALO:
+            self.save()
+
+    def snapshot(self):
+        """Estado actual del informe como dict (lo que se escribe en el JSON)"""
+        transcurrido = time.time() - self.inicio
+        pasos = []
+        for paso, valores in self.pasos.items():
+            ordenados = sorted(valores)
+            pasos.append({
+                "paso": paso, "veces": len(ordenados), "total": round(sum(ordenados), 1),
+                "p50": round(_percentil(ordenados, 0.5), 2), "p90": round(_percentil(ordenados, 0.9), 2),
+                "max": round(ordenados[-1], 2),
+            })
+        pasos.sort(key=lambda paso: -paso["total"])
+
+        expedientes = self.tiempos["expedientes"]
+        return {
+            "inicio": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.inicio)),
+            "actualizado": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "minutos": round(transcurrido / 60, 1),
+            "expedientes": self.expedientes,
+            "expedientes_hora": round(self.expedientes / transcurrido * 3600, 1) if transcurrido > 0 else None,
+            "por_grupo": [
+                {"dependencia": dependencia, "medida": medida, "expedientes": cantidad, "segundos": round(segundos, 1),
+                 "expedientes_hora": round(cantidad / segundos * 3600, 1) if segundos > 0 else None}
+                for (dependencia, medida), (cantidad, segundos) in sorted(self.por_grupo.items())
+            ],
+            "resultados": dict(sorted(self.resultados.items(), key=lambda item: -item[1])),
+            "pasos_mas_lentos": pasos[:INFORME_PASOS_TOP],
+            "tiempo_expedientes": {
+                "total": round(expedientes, 1),
+                "pausas_fijas": round(self.tiempos["pausas"], 1),
+                "esperas_dialogos": round(self.tiempos["dialogos"], 1),
+                "resto": round(max(expedientes - self.tiempos["pausas"] - self.tiempos["dialogos"], 0.0), 1),
+            },
+            "sesion": {tipo: {"veces": veces, "segundos": round(segundos, 1)} for tipo, (veces, segundos) in self.sesion.items()},
+        }
+
+    def save(self):
+        """Escribe <base>.json y <base>.html (reemplazo atómico de cada archivo)"""
+        import html
+        self._ultima_escritura = time.time()
+        datos = self.snapshot()
+
+        def _tabla(titulo, filas, columnas):
+            cuerpo = "".join(
+                "<tr>" + "".join(f"<td>{html.escape(str(fila.get(columna, '')))}</td>" for columna in columnas) + "</tr>"
+                for fila in filas
+            )
+            cabecera = "".join(f"<th>{html.escape(columna)}</th>" for columna in columnas)
+            return f"<h2>{html.escape(titulo)}</h2><table><tr>{cabecera}</tr>{cuerpo}</table>"
+
+        resumen = [
+            {"métrica": "Expedientes", "valor": datos["expedientes"]},
+            {"métrica": "Expedientes/hora", "valor": datos["expedientes_hora"]},
+            {"métrica": "Minutos", "valor": datos["minutos"]},
+            {"métrica": "Actualizado", "valor": datos["actualizado"]},
+        ]
+        documento = (
+            "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Informe de la corrida</title>"
+            "<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:1em}"
+            "td,th{border:1px solid #999;padding:2px 8px;text-align:right}th{background:#eee}</style></head><body>"
+            f"<h1>Informe de la corrida ({html.escape(datos['inicio'])})</h1>"
+            + _tabla("Resumen", resumen, ("métrica", "valor"))
+            + _tabla("Por dependencia y medida", datos["por_grupo"],
+                     ("dependencia", "medida", "expedientes", "segundos", "expedientes_hora"))
+            + _tabla("Resultados", [{"resultado": clave, "cantidad": valor} for clave, valor in datos["resultados"].items()],
+                     ("resultado", "cantidad"))
+            + _tabla("Pasos más lentos (segundos)", datos["pasos_mas_lentos"], ("paso", "veces", "total", "p50", "p90", "max"))
+            + _tabla("Tiempo en expedientes (segundos)",
+                     [{"concepto": clave, "segundos": valor} for clave, valor in datos["tiempo_expedientes"].items()],
+                     ("concepto", "segundos"))
+            + _tabla("Apertura, login y reinicios", [dict(valores, tipo=tipo) for tipo, valores in datos["sesion"].items()],
+                     ("tipo", "veces", "segundos"))
+            + "</body></html>"
+        )
+
+        try:
+            for sufijo, contenido in ((".json", json.dumps(datos, ensure_ascii=False, indent=1)), (".html", documento)):
+                destino = self.base.with_suffix(sufijo)
+                temporal = destino.with_name(destino.name + ".tmp")
+                temporal.write_text(contenido, encoding="utf-8")
+                os.replace(temporal, destino)
+        except Exception as e:
+            logger.warning(f"No se pudo escribir el informe de la corrida: {e}")
+
+    def report(self):
+        self.save()
+        logger.info(f"Informe de la corrida: {self.base.with_suffix('.html')} ({self.expedientes} expedientes)")
+
+
+def huella_build():
+    """Identifica el build (script o ejecutable) para comparar perfiles entre versiones"""
+    import hashlib
+
+    ruta = Path(sys.executable if getattr(sys, 'frozen', False) else __file__).resolve()
+    huella = {"archivo": ruta.name, "python": sys.version.split()[0]}
+    try:
+        huella["sha1"] = hashlib.sha1(ruta.read_bytes()).hexdigest()[:12]
+        huella["modificado"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ruta.stat().st_mtime))
+    except Exception as e:
+        logger.warning(f"No se pudo calcular la huella del build: {e}")
+    return huella
+
+
+class SamplingProfiler:
+    """
+    Muestreo de pila de bajo costo del hilo principal y de los hilos de PERFILADO_HILOS.
+
+    Cada PERFILADO_INTERVALO segundos un hilo toma la pila del hilo principal con
+    sys._current_frames() y la clasifica por la capa donde está el tiempo real:
+    - "espera (sleep)": la línea en ejecución duerme (time.sleep en _pausa, pyautogui, etc.)
+    - UIA / openpyxl / pandas / pyautogui / ...: según PERFILADO_CATEGORIAS, desde el
+      frame más interno hacia afuera hasta llegar al script
+    - "python (script)": trabajo propio del script
+    A diferencia de cProfile no instrumenta cada llamada, así que no infla el tiempo
+    de las partes con mucho Python y mide también lo que pasa dentro de C (COM, sleep).
+
+    Los hilos de `otros` (por nombre, se buscan en cada muestra porque arrancan durante
+    la corrida) se reparten por categoría aparte, en "hilos", y sus pilas van al
+    .folded con el nombre del hilo como raíz.
+    """
+
+    def __init__(self, hilo=None, intervalo=PERFILADO_INTERVALO, otros=PERFILADO_HILOS):
+        self.hilo_id = (hilo or threading.main_thread()).ident
+        self.otros = tuple(otros)
+        self.hilos = {}  # nombre -> {categoria: muestras}
+        self.intervalo = intervalo
+        self.script = Path(__file__).name
+        self.muestras = 0
+        self.categorias = {}
+        self.funciones = {}
+        self.pilas = {}
+        self.inicio = None
+        self.fin = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.inicio = time.time()
+        self._thread = threading.Thread(target=self._run, name="Muestreo", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self.fin = time.time()
+
+    def _run(self):
+        while not self._stop.wait(self.intervalo):
+            frames = sys._current_frames()
+            frame = frames.get(self.hilo_id)
+            if frame is not None:
+                self._muestra(frame)
+            if self.otros:
+                for hilo in threading.enumerate():
+                    if hilo.name in self.otros and hilo.ident in frames:
+                        self._muestra(frames[hilo.ident], hilo.name)
+
+    def _es_script(self, frame):
+        return os.path.basename(frame.f_code.co_filename) == self.script
+
+    def _categoria(self, frame):
+        linea = linecache.getline(frame.f_code.co_filename, frame.f_lineno)
+        if "sleep(" in linea:
+            return "espera (sleep)"
+        while frame is not None:
+            if self._es_script(frame):
+                return "python (script)"
+            ruta = frame.f_code.co_filename
+            for fragmento, categoria in PERFILADO_CATEGORIAS:
+                if fragmento in ruta:
+                    return categoria
+            frame = frame.f_back
+        return "otros"
+
+    def _muestra(self, frame, hilo=None):
+        categoria = self._categoria(frame)
+        funcion = None
+        pila = []
+        actual = frame
+        while actual is not None and len(pila) < PERFILADO_PROFUNDIDAD:
+            if self._es_script(actual):
+                if funcion is None:
+                    funcion = actual.f_code.co_name
+                pila.append(actual.f_code.co_name)
+            else:
+                pila.append(f"{Path(actual.f_code.co_filename).stem}:{actual.f_code.co_name}")
+            actual = actual.f_back
+        pila.reverse()
+        pila.append(f"[{categoria}]")
+        if hilo is not None:
+            pila.insert(0, hilo)
+        clave = ";".join(pila)
+        self.pilas[clave] = self.pilas.get(clave, 0) + 1
+
+        if hilo is not None:
+            por_categoria = self.hilos.setdefault(hilo, {})
+            por_categoria[categoria] = por_categoria.get(categoria, 0) + 1
+            return
+        self.muestras += 1
+        self.categorias[categoria] = self.categorias.get(categoria, 0) + 1
+        if funcion is not None:
+            por_funcion = self.funciones.setdefault(funcion, {})
+            por_funcion[categoria] = por_funcion.get(categoria, 0) + 1
+
+    def snapshot(self):
+        """Resumen JSON: muestras y segundos estimados por categoría y por función del script"""
+        total = max(self.muestras, 1)
+        duracion = (self.fin or time.time()) - (self.inicio or time.time())
+
+        def _segundos(muestras):
+            return round(duracion * muestras / total, 2)
+
+        def _reparto(conteo):
+            # Cada hilo se muestrea una vez por tick, así que comparte la escala del principal
+            return {
+                categoria: {"muestras": muestras, "segundos": _segundos(muestras),
+                            "porcentaje": round(100 * muestras / total, 1)}
+                for categoria, muestras in sorted(conteo.items(), key=lambda item: -item[1])
+            }
+
+        categorias = _reparto(self.categorias)
+        funciones = [
+            {"funcion": funcion, "muestras": sum(valores.values()), "segundos": _segundos(sum(valores.values())),
+             "categorias": dict(sorted(valores.items(), key=lambda item: -item[1]))}
+            for funcion, valores in self.funciones.items()
+        ]
+        funciones.sort(key=lambda fila: -fila["muestras"])
+        return {
+            "build": huella_build(),
+            "inicio": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.inicio or time.time())),
+            "segundos": round(duracion, 1),
+            "intervalo": self.intervalo,
+            "muestras": self.muestras,
+            "categorias": categorias,
+            "funciones": funciones[:PERFILADO_TOP],
+            "hilos": {hilo: _reparto(conteo) for hilo, conteo in self.hilos.items()},
+        }
+
+    def save(self, carpeta):
+        """Escribe muestreo.json y muestreo.folded (pilas colapsadas, formato flamegraph)"""
+        carpeta = Path(carpeta)
+        (carpeta / "muestreo.json").write_text(
+            json.dumps(self.snapshot(), ensure_ascii=False, indent=1), encoding="utf-8"
+        )
+        (carpeta / "muestreo.folded").write_text(
+            "".join(f"{pila} {cantidad}\n" for pila, cantidad in sorted(self.pilas.items(), key=lambda item: -item[1])),
+            encoding="utf-8",
+        )
+
+
+def run_profiled(carpeta, modo, funcion, *args, **kwargs):
+    """
+    Ejecuta funcion(*args, **kwargs) perfilada y deja en carpeta:
+    - cprofile.pstats / cprofile.txt: cProfile determinista (modo "cprofile" o "ambos")
+    - muestreo.json / muestreo.folded: muestreo de tiempo real (modo "muestreo" o "ambos")
+    Con "ambos" el muestreo incluye el costo de instrumentación de cProfile; para
+    comparar tiempos reales entre builds conviene "muestreo".
+
+    cProfile solo instrumenta el hilo que lo activa (hasta Python 3.11): los hilos que
+    arrancan durante la corrida (escritor de Excel, watchdog, ...) llevan su propio
+    cProfile y se suman al mismo cprofile.pstats.
+    """
+    import cProfile
+    import pstats
+
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    perfil = cProfile.Profile() if modo in ("cprofile", "ambos") else None
+    muestreo = SamplingProfiler() if modo in ("muestreo", "ambos") else None
+
+    perfiles_hilos = []
+
+    def _perfilar_hilo(*_):
+        sys.setprofile(None)
+        perfil_hilo = cProfile.Profile()
+        perfiles_hilos.append(perfil_hilo)
+        perfil_hilo.enable()
+
+    # Desde 3.12 cProfile usa sys.monitoring y ya ve todos los hilos
+    por_hilo = perfil is not None and sys.version_info < (3, 12)
+
+    logger.info(f"Perfilado activo ({modo}): resultados en {carpeta}")
+    if muestreo is not None:
+        muestreo.start()
+    if perfil is not None:
+        if por_hilo:
+            threading.setprofile(_perfilar_hilo)
+        perfil.enable()
+    try:
+        return funcion(*args, **kwargs)
+    finally:
+        if perfil is not None:
+            perfil.disable()
+            if por_hilo:
+                threading.setprofile(None)
+        if muestreo is not None:
+            muestreo.stop()
+        try:
+            if perfil is not None:
+                estadisticas = pstats.Stats(perfil)
+                for perfil_hilo in perfiles_hilos:
+                    try:
+                        estadisticas.add(perfil_hilo)
+                    except TypeError:
+                        pass  # hilo sin llamadas registradas
+                estadisticas.dump_stats(str(carpeta / "cprofile.pstats"))
+                with open(carpeta / "cprofile.txt", "w", encoding="utf-8") as salida:
+                    salida.write(f"Build: {json.dumps(huella_build(), ensure_ascii=False)}\n\n")
+                    estadisticas.stream = salida
+                    estadisticas.sort_stats("cumulative").print_stats(PERFILADO_TOP)
+                    estadisticas.sort_stats("tottime").print_stats(PERFILADO_TOP)
+            if muestreo is not None:
+                muestreo.save(carpeta)
+                reparto = ", ".join(
+                    f"{categoria} {valores['porcentaje']}%"
+                    for categoria, valores in muestreo.snapshot()["categorias"].items()
+                )
+                logger.info(f"Perfilado - tiempo real ({muestreo.muestras} muestras): {reparto or 'sin muestras'}")
+                for hilo, categorias in muestreo.snapshot()["hilos"].items():
+                    reparto = ", ".join(f"{categoria} {valores['porcentaje']}%" for categoria, valores in categorias.items())
+                    logger.info(f"Perfilado - hilo {hilo}: {reparto}")
+            logger.info(f"Perfilado guardado en {carpeta}")
+        except Exception as e:
+            logger.warning(f"No se pudo guardar el perfilado: {e}")
+
+
+class ExpedienteBudget:
+    """
+    Presupuesto total de tiempo para UN expediente.
+
+    Todas las esperas de diálogos (detect_*) recortan su timeout al tiempo
+    restante del expediente, de modo que un SIRAT lento no puede consumir
+    más de PRESUPUESTO_EXPEDIENTE segundos por fila.
+    """
+
+    def __init__(self, presupuesto=None):
+        self.presupuesto = PRESUPUESTO_EXPEDIENTE if presupuesto is None else presupuesto
+        self.fila = None
+        self.deadline = None
+
+    def start(self, fila):
+        """Inicia el presupuesto para una fila"""
+        self.fila = fila
+        self.deadline = time.time() + self.presupuesto
+
+    def expire(self, fila):
+        """Deja el presupuesto de la fila agotado (hasta el próximo start)"""
+        self.fila = fila
+        self.deadline = time.time()
+
+    def remaining(self):
+        """Segundos restantes del expediente en curso (None si no hay expediente en curso)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
+
+    def exceeded(self):
+        """True si el expediente en curso agotó su presupuesto"""
+        restante = self.remaining()
+        return restante is not None and restante <= 0
+
+    def stop(self):
+        """Termina el presupuesto (no hay expediente en curso)"""
+        self.fila = None
+        self.deadline = None
+
+    def clip(self, timeout):
+        """Recorta un timeout al tiempo restante del expediente"""
+        restante = self.remaining()
+        if restante is None:
+            return timeout
+        return min(timeout, restante)
+
+
+class PacingGovernor:
+    """
+    Gobernador de ritmo AIMD para la entrada en SIRAT.
+
+    - intervalo: segundos entre teclas de pyautogui.write()
+    - factor: multiplicador de las pausas fijas después de cada tecla/clic
+
+    Mientras los expedientes terminan bien, ambos bajan de a un paso fijo (aumento
+    aditivo de velocidad). Ante una señal de desincronización (INTERVENTOR o PLAZO que
+    no quedaron como se digitaron, un diálogo esperado que no apareció, presupuesto del
+    expediente agotado, reinicio de sesión por el watchdog) se multiplican por
+    RITMO_RETROCESO (retroceso multiplicativo). Un expediente inválido no es una señal:
+    SIRAT lo rechaza a cualquier ritmo. El estado se guarda en JSON al terminar la
+    sesión (save()), así cada corrida arranca en el ritmo más rápido que resultó
+    seguro en la anterior. El JSON recuerda de qué RITMO_INTERVALO_INICIAL partió:
+    si el perfil del sitio lo cambia, el ritmo guardado se descarta y se arranca
+    desde el valor del perfil.
+    """
+
+    def __init__(self, ruta=RITMO_ARCHIVO):
+        self.ruta = Path(ruta)
+        self.intervalo = RITMO_INTERVALO_INICIAL
+        self.factor = 1.0
+        try:
+            if self.ruta.exists():
+                datos = json.loads(self.ruta.read_text(encoding="utf-8"))
+                base = float(datos.get("intervalo_inicial", RITMO_INTERVALO_INICIAL))
+                if abs(base - RITMO_INTERVALO_INICIAL) > 1e-9:
+                    logger.info(
+                        f"Ritmo: RITMO_INTERVALO_INICIAL cambió ({base * 1000:.0f} -> "
+                        f"{RITMO_INTERVALO_INICIAL * 1000:.0f} ms/tecla), se descarta el ritmo guardado"
+                    )
+                else:
+                    self.intervalo = float(datos.get("intervalo", self.intervalo))
+                    self.factor = float(datos.get("factor", self.factor))
+        except Exception as e:
+            logger.warning(f"No se pudo leer el ritmo guardado {self.ruta}: {e}")
+        self._limitar()
+        self.inicial = (self.intervalo, self.factor)
+        self.avances = 0
+        self.retrocesos = 0
+        self.minimo = (self.intervalo, self.factor)
+
+    def _limitar(self):
+        self.intervalo = min(max(self.intervalo, RITMO_INTERVALO_LIMITES[0]), RITMO_INTERVALO_LIMITES[1])
+        self.factor = min(max(self.factor, RITMO_FACTOR_LIMITES[0]), RITMO_FACTOR_LIMITES[1])
+
+    def save(self):
+        try:
+            self.ruta.write_text(json.dumps({
+                "intervalo": round(self.intervalo, 4),
+                "factor": round(self.factor, 3),
+                "intervalo_inicial": RITMO_INTERVALO_INICIAL,
+                "actualizado": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }), encoding="utf-8")
+        except Exception as e:
+            logger.warning(f"No se pudo guardar el ritmo: {e}")
+
+    def record_success(self):
+        self.intervalo -= RITMO_PASO_INTERVALO
+        self.factor -= RITMO_PASO_FACTOR
+        self._limitar()
+        self.avances += 1
+        self.minimo = min(self.minimo, (self.intervalo, self.factor))
+
+    def record_failure(self, motivo):
+        self.intervalo *= RITMO_RETROCESO
+        self.factor *= RITMO_RETROCESO
+        self._limitar()
+        self.retrocesos += 1
+        logger.warning(
+            f"Ritmo: retroceso por '{motivo}' -> {self.intervalo * 1000:.0f} ms/tecla, pausas x{self.factor:.2f}"
+        )
+
+    def report(self):
+        logger.info(
+            f"Ritmo: {self.intervalo * 1000:.0f} ms/tecla, pausas x{self.factor:.2f} "
+            f"(inicio {self.inicial[0] * 1000:.0f} ms, x{self.inicial[1]:.2f}; "
+            f"más rápido {self.minimo[0] * 1000:.0f} ms, x{self.minimo[1]:.2f}) | "
+            f"{self.avances} avance(s), {self.retrocesos} retroceso(s)"
+        )
+
+
+class _DiagnosticoHandler(logging.Handler):
+    """Handler de logging que vuelca el anillo de diagnóstico con cada logger.error()"""
+
+    def __init__(self, diagnostico):
+        super().__init__(level=logging.ERROR)
+        self.diagnostico = diagnostico
+
+    def emit(self, record):
+        try:
+            self.diagnostico.flush(record.getMessage())
+        except Exception:
+            pass
+
+
+class DiagnosticsRecorder:
+    """
+    Anillo de diagnóstico de tamaño fijo.
+
+    Guarda en memoria las últimas DIAGNOSTICO_CAPTURAS capturas: la pantalla reducida
+    y comprimida en JPEG, y el árbol UIA (tipo, nombre, rectángulo) de la ventana de
+    SIRAT en primer plano, comprimido con zlib. Nada toca el disco mientras todo va bien;
+    ante un fallo (logger.error, resultado fallido, presupuesto agotado, watchdog)
+    flush() escribe el anillo en DIAGNOSTICO_DIR/<fecha>_<hora>/ con un indice.json
+    que indica el paso de cada captura y el motivo del volcado.
+    """
+
+    def __init__(self, directorio=DIAGNOSTICO_DIR, capacidad=DIAGNOSTICO_CAPTURAS):
+        self.directorio = Path(directorio)
+        self.cuadros = deque(maxlen=capacidad)
+        self._lock = threading.Lock()
+        self._ultima_captura = 0.0
+        self._ultimo_volcado = 0.0
+        self.capturas = 0
+        self.tiempo_captura = 0.0
+        self.volcados = []
+        self.handler = _DiagnosticoHandler(self)
+
+    def due(self):
+        """True si ya pasó DIAGNOSTICO_INTERVALO desde la última captura"""
+        return time.time() - self._ultima_captura >= DIAGNOSTICO_INTERVALO
+
+    def cost(self):
+        """Duración esperada de una captura en segundos (promedio medido, o DIAGNOSTICO_COSTO_INICIAL)"""
+        return self.tiempo_captura / self.capturas if self.capturas else DIAGNOSTICO_COSTO_INICIAL
+
+    def _snapshot_uia(self, hwnd):
+        """Árbol UIA compacto de la ventana `hwnd` ([tipo, nombre, [l, t, r, b]] por elemento), comprimido"""
+        try:
+            ventana = Desktop(backend="uia").window(handle=hwnd).wrapper_object()
+            elementos = bulk_uia(ventana)
+            if elementos is None:
+                elementos = iter_uia(ventana)
+            nodos = []
+            for elemento in elementos:
+                rect = elemento.rectangle()
+                nodos.append([
+                    elemento.element_info.control_type,
+                    elemento.window_text(),
+                    [rect.left, rect.top, rect.right, rect.bottom],
+                ])
+                if len(nodos) >= DIAGNOSTICO_MAX_NODOS:
+                    break
+            return zlib.compress(json.dumps(nodos, ensure_ascii=False).encode("utf-8"))
+        except Exception:
+            return None
+
+    def capture(self, paso, hwnd=None):
+        """
+        Agrega una captura al anillo (la más antigua se descarta).
+
+        Args:
+            paso: Descripción del paso en curso (va al indice.json del volcado)
+            hwnd: Ventana de SIRAT cuyo árbol UIA se guarda (None = solo pantalla)
+        """
+        inicio = time.time()
+        self._ultima_captura = inicio
+
+        imagen = None
+        try:
+            pantalla = pyautogui.screenshot()
+            if DIAGNOSTICO_REDUCCION > 1:
+                pantalla = pantalla.reduce(DIAGNOSTICO_REDUCCION)
+            buffer = io.BytesIO()
+            pantalla.convert("RGB").save(buffer, format="JPEG", quality=DIAGNOSTICO_CALIDAD)
+            imagen = buffer.getvalue()
+        except Exception:
+            pass
+
+        arbol = self._snapshot_uia(hwnd) if hwnd is not None else None
+
+        if imagen is None and arbol is None:
+            return
+        with self._lock:
+            self.cuadros.append({"t": inicio, "paso": paso, "imagen": imagen, "uia": arbol})
+        self.capturas += 1
+        self.tiempo_captura += time.time() - inicio
+
+    def flush(self, motivo, forzar=False):
+        """
+        Escribe el anillo a disco y lo vacía.
+
+        Varios errores seguidos de una misma cascada producen un solo volcado: salvo
+        `forzar`, no se vuelca de nuevo antes de DIAGNOSTICO_ESPERA_VOLCADO segundos.
+
+        Retorna:
+            - Path de la carpeta del volcado
+            - None si el anillo estaba vacío o aún no pasó la espera
+        """
+        ahora = time.time()
+        with self._lock:
+            if not self.cuadros:
+                return None
+            if not forzar and ahora - self._ultimo_volcado < DIAGNOSTICO_ESPERA_VOLCADO:
+                return None
+            self._ultimo_volcado = ahora
+            cuadros = list(self.cuadros)
+            self.cuadros.clear()
+
+        carpeta = self.directorio / f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(ahora))}_{len(self.volcados) + 1:03d}"
+        try:
+            carpeta.mkdir(parents=True, exist_ok=True)
+            indice = []
+            for i, cuadro in enumerate(cuadros):
+                entrada = {
+                    "hora": time.strftime("%H:%M:%S", time.localtime(cuadro["t"])),
+                    "segundos_antes": round(ahora - cuadro["t"], 2),
+                    "paso": cuadro["paso"],
+                }
+                if cuadro["imagen"] is not None:
+                    entrada["imagen"] = f"{i:02d}.jpg"
+                    (carpeta / entrada["imagen"]).write_bytes(cuadro["imagen"])
+                if cuadro["uia"] is not None:
+                    entrada["uia"] = f"{i:02d}_uia.json"
+                    (carpeta / entrada["uia"]).write_bytes(zlib.decompress(cuadro["uia"]))
+                indice.append(entrada)
+            (carpeta / "indice.json").write_text(json.dumps({
+                "motivo": str(motivo),
+                "hora": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ahora)),
+                "capturas": indice,
+            }, ensure_ascii=False, indent=1), encoding="utf-8")
+        except Exception as e:
+            logger.warning(f"Diagnóstico: no se pudo volcar el anillo en {carpeta}: {e}")
+            return None
+
+        self.volcados.append(carpeta)
+        self._podar()
+        logger.warning(f"Diagnóstico: {len(cuadros)} captura(s) volcadas en {carpeta} ({motivo})")
+        return carpeta
+
+    def _podar(self):
+        """Borra los volcados más antiguos por encima de DIAGNOSTICO_MAX_VOLCADOS"""
+        import shutil
+        try:
+            carpetas = sorted(p for p in self.directorio.iterdir() if p.is_dir())
+            for carpeta in carpetas[:-DIAGNOSTICO_MAX_VOLCADOS]:
+                shutil.rmtree(carpeta, ignore_errors=True)
+        except Exception:
+            pass
+
+    def report(self):
+        promedio = self.tiempo_captura / self.capturas * 1000 if self.capturas else 0
+        logger.info(
+            f"Diagnóstico: {self.capturas} captura(s) en el anillo ({promedio:.0f} ms promedio), "
+            f"{len(self.volcados)} volcado(s)" + (f" en {self.directorio}" if self.volcados else "")
+        )
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de la campaña.
+
+    Tras BREAKER_FALLOS_CONSECUTIVOS expedientes fallidos seguidos, el circuito
+    se abre: la campaña se pausa con backoff exponencial y se sondea la salud
+    de SIRAT antes de continuar. El primer expediente después de la pausa
+    funciona como prueba (half-open): si falla, el circuito se vuelve a abrir
+    con el doble de espera.
+    """
+
+    def __init__(self, umbral=BREAKER_FALLOS_CONSECUTIVOS,
+                 backoff_inicial=BREAKER_BACKOFF_INICIAL, backoff_maximo=BREAKER_BACKOFF_MAXIMO):
+        self.umbral = umbral
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+        self.fallos_consecutivos = 0
+        self.estado = "cerrado"  # "cerrado", "abierto" o "prueba"
+        self.aperturas = 0
+        self.tiempo_en_pausa = 0.0
+
+    def record_success(self):
+        if self.estado != "cerrado":
+            logger.info("Circuit breaker: SIRAT respondió, circuito cerrado")
+        self.fallos_consecutivos = 0
+        self.aperturas = 0
+        self.estado = "cerrado"
+
+    def record_failure(self):
+        self.fallos_consecutivos += 1
+        if self.estado == "prueba" or self.fallos_consecutivos >= self.umbral:
+            if self.estado != "abierto":
+                self.aperturas += 1
+            self.estado = "abierto"
+            logger.warning(
+                f"Circuit breaker ABIERTO: {self.fallos_consecutivos} fallo(s) consecutivo(s) "
+                f"(apertura {self.aperturas})"
+            )
+
+    def is_open(self):
+        return self.estado == "abierto"
+
+    def backoff(self):
+        """Espera (segundos) de la apertura actual: inicial * 2^(aperturas-1), con tope"""
+        exponente = max(0, self.aperturas - 1)
+        return min(self.backoff_maximo, self.backoff_inicial * (2 ** exponente))
+
+    def half_open(self):
+        """Permite un expediente de prueba después de la pausa"""
+        self.estado = "prueba"
+
+    def record_pause(self, segundos):
+        """Suma una pausa de backoff al tiempo total en pausa"""
+        self.tiempo_en_pausa += segundos
+
+    def record_failed_probe(self):
+        """SIRAT no respondió al sondeo tras la pausa: sigue abierto y la próxima espera se duplica"""
+        self.estado = "abierto"
+        self.aperturas += 1
+
+
+class ExpedienteAbortado(Exception):
+    """
+    El expediente en curso se abandona antes de seguir manejando la GUI: la sesión de
+    SIRAT cayó (watchdog o circuit breaker) o se agotó su presupuesto de tiempo.
+    Los flujos la atrapan como cualquier error y retornan False; cada pausa siguiente
+    la vuelve a lanzar, así no se digita nada más hasta el próximo expediente.
+    """
+
+
+def detect_medida_tipo(tipo_medida):
+    """
+    Normaliza el valor de la columna TIPO DE MEDIDA.
+
+    Retorna:
+        - "IEI" o "DSE" si se reconoce el tipo
+        - None si está vacío o no es válido
+    """
+    valor = str(tipo_medida).strip().upper()
+    if "IEI" in valor:
+        return "IEI"
+    if "DSE" in valor:
+        return "DSE"
+    return None
+
+
+def normalizar_expediente(valor):
+    """
+    Normaliza el número de expediente coactivo: quita espacios, guiones y el ".0" que
+    deja Excel en celdas numéricas, y rellena con ceros a la izquierda hasta 13 dígitos
+    (Excel los pierde cuando la celda es numérica).
+
+    Retorna:
+        - String de 13 dígitos, o None si el valor no puede ser un expediente
+    """
+    texto = re.sub(r"[\s\-]", "", str(valor if valor is not None else ""))
+    if texto.endswith(".0"):
+        texto = texto[:-2]
+    if not texto.isdigit() or len(texto) > EXPEDIENTE_LONGITUD or not texto.strip("0"):
+        return None
+    return texto.zfill(EXPEDIENTE_LONGITUD)
+
+
+def ruc_valido(ruc):
+    """
+    Verifica un RUC: 11 dígitos, prefijo de contribuyente válido y dígito verificador
+    (módulo 11 con pesos 5,4,3,2,7,6,5,4,3,2; resto 10 -> 0 y 11 -> 1).
+    """
+    texto = str(ruc).strip()
+    if texto.endswith(".0"):
+        texto = texto[:-2]
+    if len(texto) != 11 or not texto.isdigit() or not texto.startswith(RUC_PREFIJOS):
+        return False
+    digito = 11 - sum(int(d) * peso for d, peso in zip(texto, RUC_PESOS)) % 11
+    return int(texto[10]) == {10: 0, 11: 1}.get(digito, digito)
+
+
+def parse_importe(texto):
+    """
+    Convierte un importe de SIRAT/Excel ("1,234.50", "1.234,50", "S/. 1 234", 1234.5) a float.
+
+    El último separador es el decimal, salvo que sea el único tipo de separador y se
+    repita ("1.234.567") o deje exactamente 3 dígitos ("1,234", "1.234"): entonces es
+    de miles (los importes llevan a lo sumo 2 decimales). Antes se quitan la moneda
+    ("S/.", "S/") y los separadores sueltos al principio o al final.
+
+    Retorna:
+        - float, o None si está vacío o no es un número
+    """
+    if texto is None:
+        return None
+    if isinstance(texto, (int, float)):
+        return None if texto != texto else float(texto)
+    valor = re.sub(r"[^\d.,-]", "", re.sub(r"S/\.?", "", str(texto), flags=re.IGNORECASE))
+    valor = re.sub(r"^(-?)[.,]+", r"\1", valor).rstrip(".,")
+    separadores = [caracter for caracter in valor if caracter in ",."]
+    if separadores:
+        ultimo = max(valor.rfind(","), valor.rfind("."))
+        decimales = valor[ultimo + 1:]
+        if len(set(separadores)) == 1 and (len(separadores) > 1 or len(decimales) == 3):
+            valor = valor.replace(separadores[0], "")
+        else:
+            valor = re.sub(r"[.,]", "", valor[:ultimo]) + "." + decimales
+    try:
+        return float(valor)
+    except ValueError:
+        return None
+
+
+def evaluar_monto(monto, saldo, tolerancia=MONTO_TOLERANCIA_SALDO):
+    """
+    Regla de SIRAT para DSE: "El monto ingresado excede en más del 20% el Saldo del Expediente".
+
+    Retorna:
+        - "MONTO MAYOR" si el monto excede el saldo en más de la tolerancia
+        - None si el monto es aceptable o no se puede decidir (monto/saldo ilegibles)
+    """
+    monto = parse_importe(monto)
+    saldo = parse_importe(saldo)
+    if monto is None or saldo is None or saldo < 0:
+        return None
+    if monto > saldo * (1 + tolerancia) + 0.005:
+        return "MONTO MAYOR"
+    return None
+
+
+class TransitionScheduler:
+    """
+    Planificador que reordena los expedientes de una sesión (login) para minimizar
+    los cambios de formulario de embargo.
+
+    Orden resultante:
+    1. Filas que no pasan validate_expediente_row (se marcan sin tocar SIRAT)
+    2. Filas agrupadas por tipo de medida (IEI / DSE), empezando por el tipo más frecuente
+    3. Dentro de cada grupo se conserva el orden original del Excel
+
+    Los índices de fila originales se conservan en las tuplas (idx, fila), por lo que
+    los resultados se escriben en la fila correcta. Además mide la duración real de
+    cada expediente según si hubo cambio de tipo o no, para comparar el ahorro
+    estimado contra el ahorro real.
+    """
+
+    def __init__(self, costo_cambio=COSTO_CAMBIO_MEDIDA):
+        self.costo_cambio = costo_cambio
+        self.tipos = {}  # fila -> "IEI" / "DSE"
+        self.transiciones_original = 0
+        self.transiciones_plan = 0
+        self.duraciones = {"mismo_tipo": [], "cambio_tipo": []}
+        self._fila_actual = None
+        self._inicio_actual = None
+        self._tipo_anterior = None
+
+    def count_transitions(self, filas):
+        """Cuenta los cambios de tipo de medida en una secuencia de filas"""
+        tipos = [self.tipos[fila] for fila in filas if fila in self.tipos]
+        return sum(1 for anterior, siguiente in zip(tipos, tipos[1:]) if anterior != siguiente)
+
+    def plan(self, expedientes_grupo, expedientes_df, validar):
+        """
+        Reordena el lote.
+
+        Args:
+            expedientes_grupo: Lista de tuplas (idx, fila) en orden del Excel
+            expedientes_df: DataFrame del Excel
+            validar: Función (expedientes_df, idx) -> (es_valido, mensaje)
+
+        Retorna:
+            - Lista de tuplas (idx, fila) en el nuevo orden
+        """
+        invalidas = []
+        por_tipo = {}
+
+        for row_idx, fila in expedientes_grupo:
+            es_valido, _ = validar(expedientes_df, row_idx)
+            tipo = detect_medida_tipo(fila.get("TIPO DE MEDIDA", "")) if es_valido else None
+
+            if tipo is None:
+                invalidas.append((row_idx, fila))
+                continue
+
+            self.tipos[row_idx] = tipo
+            por_tipo.setdefault(tipo, []).append((row_idx, fila))
+
+        # Empezar por el tipo con más expedientes (en empate, el que aparece primero)
+        orden_tipos = sorted(por_tipo, key=lambda t: (-len(por_tipo[t]), por_tipo[t][0][0]))
+        plan = invalidas + [item for tipo in orden_tipos for item in por_tipo[tipo]]
+
+        self.transiciones_original = self.count_transitions([row_idx for row_idx, _ in expedientes_grupo])
+        self.transiciones_plan = self.count_transitions([row_idx for row_idx, _ in plan])
+
+        ahorro = (self.transiciones_original - self.transiciones_plan) * self.costo_cambio
+        logger.info(" Planificación del lote (agrupado por tipo de medida):")
+        for tipo in orden_tipos:
+            logger.info(f"  • {tipo}: {len(por_tipo[tipo])} expedientes")
+        if invalidas:
+            logger.info(f"  • Sin datos completos (se marcan primero, sin SIRAT): {len(invalidas)}")
+        logger.info(
+            f"  Cambios de formulario: {self.transiciones_original} (orden Excel) → "
+            f"{self.transiciones_plan} (planificado) | Ahorro estimado: {ahorro:.0f}s"
+        )
+
+        return plan
+
+    def on_row_start(self, fila):
+        """Registra el inicio de un expediente (cierra la medición del anterior)"""
+        if fila == self._fila_actual:
+            return
+        self.on_row_end()
+        self._fila_actual = fila
+        self._inicio_actual = time.time()
+
+    def on_row_end(self):
+        """Cierra la medición del expediente en curso y la clasifica por tipo de transición"""
+        if self._fila_actual is None:
+            return
+
+        tipo = self.tipos.get(self._fila_actual)
+        if tipo is not None:
+            duracion = time.time() - self._inicio_actual
+            if self._tipo_anterior is not None:
+                clave = "mismo_tipo" if tipo == self._tipo_anterior else "cambio_tipo"
+                self.duraciones[clave].append(duracion)
+            self._tipo_anterior = tipo
+
+        self._fila_actual = None
+        self._inicio_actual = None
+
+    def report(self):
+        """Loguea el ahorro estimado vs el ahorro real medido en la sesión"""
+        self.on_row_end()
+
+        evitadas = self.transiciones_original - self.transiciones_plan
+        estimado = evitadas * self.costo_cambio
+
+        mismo = self.duraciones["mismo_tipo"]
+        cambio = self.duraciones["cambio_tipo"]
+
+        logger.info("\n" + "=" * 70)
+        logger.info("PLANIFICADOR: AHORRO ESTIMADO VS REAL")
+        logger.info("=" * 70)
+        logger.info(f"Cambios de formulario evitados: {evitadas}")
+        logger.info(f"Ahorro estimado: {estimado:.1f}s ({self.costo_cambio:.1f}s por cambio)")
+
+        if mismo and cambio:
+            costo_real = sum(cambio) / len(cambio) - sum(mismo) / len(mismo)
+            logger.info(
+                f"Duración media: mismo tipo {sum(mismo) / len(mismo):.1f}s "
+                f"({len(mismo)}) | cambio de tipo {sum(cambio) / len(cambio):.1f}s ({len(cambio)})"
+            )
+            logger.info(f"Ahorro real: {evitadas * costo_real:.1f}s ({costo_real:.1f}s por cambio)")
+        else:
+            logger.info("Ahorro real: sin mediciones suficientes (se requieren ambos tipos de transición)")
+
+        return estimado
+
+
+def write_result_cells(archivo, celdas, plantilla=None):
+    """
+    Escribe varias celdas de la columna RESULTADO abriendo y guardando el libro UNA sola vez.
+
+    Args:
+        archivo: Ruta del Excel a actualizar
+        celdas: Lista de tuplas (fila 0-based, valor, apostrofe[, extras]). Con apostrofe=True los
+                números con 0 inicial se escriben con "'" delante. `extras` es un dict
+                {encabezado: valor} con otras columnas de la misma fila (se crean si faltan)
+        plantilla: Excel a copiar si `archivo` aún no existe (None = debe existir)
+    """
+    if not archivo.exists():
+        if plantilla is None:
+            raise FileNotFoundError(f"Archivo Excel no encontrado: {archivo}")
+        logger.info(f"{archivo.name} no existe, creando copia del Excel original...")
+        import shutil
+        shutil.copy(plantilla, archivo)
+
+    wb = load_workbook(archivo)
+    ws = wb.active
+
+    # Encontrar la columna RESULTADO o crearla
+    headers = {}
+    for col_idx, cell in enumerate(ws[1], 1):
+        if cell.value:
+            headers[cell.value] = col_idx
+
+    def _columna(encabezado):
+        if encabezado not in headers:
+            headers[encabezado] = max(headers.values(), default=0) + 1
+            ws.cell(row=1, column=headers[encabezado], value=encabezado)
+        return headers[encabezado]
+
+    resultado_col = _columna("RESULTADO")
+
+    for fila, valor, apostrofe, *extras in celdas:
+        # fila 0-based: row = fila + 2 (fila 1 = header)
+        celda = ws.cell(row=fila + 2, column=resultado_col, value=valor)
+        for encabezado, valor_extra in (extras[0] or {}).items() if extras else ():
+            ws.cell(row=fila + 2, column=_columna(encabezado), value=valor_extra)
+
+        # Forzar formato de texto para preservar el 0 inicial
+        if isinstance(valor, str) and valor.isdigit():
+            celda.number_format = '@'
+            if apostrofe and valor.startswith('0'):
+                celda.value = "'" + valor
+
+    wb.save(archivo)
+
+
+class NavigationCache:
+    """
+    Caché de rutas del menú de SIRAT.
+
+    La primera vez que una opción del menú se encuentra con el recorrido completo de
+    descendientes, se guarda su ruta: la ventana de nivel superior (título y clase) y
+    los índices de hijo desde esa ventana hasta la opción. Las siguientes veces se
+    baja directo por esos índices (una consulta de hijos por nivel) y se confirma el
+    texto de la opción antes de actuar. Si algo no coincide, la ruta se olvida y el
+    flujo vuelve a la búsqueda completa, que la aprende de nuevo.
+
+    Las rutas se guardan en JSON para reutilizarlas entre corridas.
+    """
+
+    def __init__(self, ruta=NAVEGACION_ARCHIVO):
+        self.ruta = Path(ruta)
+        self.rutas = {}
+        self.aciertos = 0
+        self.fallos = 0
+        self.aprendidas = 0
+        self.tiempos = []
+        try:
+            if self.ruta.exists():
+                self.rutas = json.loads(self.ruta.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"No se pudo leer la caché de navegación {self.ruta}: {e}")
+
+    def save(self):
+        try:
+            self.ruta.write_text(json.dumps(self.rutas, ensure_ascii=False, indent=1), encoding="utf-8")
+        except Exception as e:
+            logger.warning(f"No se pudo guardar la caché de navegación: {e}")
+
+    def learn(self, destino, elemento):
+        """Calcula y guarda la ruta de índices de `elemento` desde su ventana de nivel superior"""
+        try:
+            if isinstance(elemento, ElementoCacheado):
+                elemento = elemento.wrapper_object()
+            raiz = elemento.top_level_parent()
+            indices = []
+            actual = elemento
+            while actual.element_info != raiz.element_info and len(indices) < 30:
+                padre = actual.parent()
+                hermanos = padre.children()
+                indices.append(next(
+                    i for i, hermano in enumerate(hermanos) if hermano.element_info == actual.element_info
+                ))
+                actual = padre
+            indices.reverse()
+
+            nueva = {
+                "ventana": raiz.window_text(),
+                "clase": raiz.element_info.class_name,
+                "indices": indices,
+            }
+            if self.rutas.get(destino, {}).get("indices") != indices:
+                self.rutas[destino] = nueva
+                self.aprendidas += 1
+                self.save()
+                logger.info(f"Navegación: ruta aprendida para '{destino}': {indices}")
+        except Exception as e:
+            logger.debug(f"Navegación: no se pudo aprender la ruta de '{destino}': {e}")
+
+    def forget(self, destino):
+        if self.rutas.pop(destino, None) is not None:
+            self.save()
+
+    def resolve(self, destino):
+        """
+        Baja por la ruta guardada y retorna el elemento si su texto es `destino`.
+        Retorna None si no hay ruta o si no coincide.
+        """
+        ruta = self.rutas.get(destino)
+        if not ruta:
+            return None
+        try:
+            ventanas = Desktop(backend="uia").windows(class_name=ruta["clase"])
+            raiz = next((v for v in ventanas if v.window_text() == ruta["ventana"]), None)
+            if raiz is None and len(ventanas) == 1:
+                raiz = ventanas[0]
+            if raiz is None:
+                return None
+            nodo = raiz
+            for indice in ruta["indices"]:
+                nodo = nodo.children()[indice]
+            return nodo if nodo.window_text().strip() == destino else None
+        except Exception:
+            return None
+
+    def report(self):
+        if not (self.aciertos or self.fallos):
+            return
+        promedio = sum(self.tiempos) / len(self.tiempos) * 1000 if self.tiempos else 0
+        logger.info(
+            f"Navegación por caché: {self.aciertos} atajos (promedio {promedio:.0f} ms), "
+            f"{self.fallos} fallback(s) a búsqueda completa, {self.aprendidas} ruta(s) aprendida(s)"
+        )
+
+
+class SessionState:
+    """
+    Estado de la sesión de SIRAT entre expedientes, para llegar al siguiente por el
+    camino más barato:
+    - pantalla: MENU (sesión recién abierta), SELECCION (ventana Selección de Expediente)
+      o EXPEDIENTE (dentro del expediente, después de ALT+A)
+    - anterior: último resultado registrado (solo para el log, no decide el camino)
+    - campo_numero: texto que quedó en el campo Número de la selección ("" = vacío)
+
+    `pantalla` reemplaza al antiguo flag last_exp_completed: lo que decide el camino es
+    dónde quedó SIRAT, no si el anterior llegó a RC o MONTO MAYOR. Un MONTO MAYOR del
+    precheck deja la selección abierta y un flujo cortado después de ALT+A deja el
+    expediente abierto, aunque ninguno de los dos sea una RC.
+
+    Caminos (next_path):
+    - "cobranza coactiva": desde el menú (Cobranza Coactiva → Exp. Cob. Coactiva - Individual)
+    - "cambio de expediente": desde dentro de un expediente (Accesos → Cambio de Expediente)
+    - "directo": la selección sigue abierta con el campo Número vacío
+    - "limpiar + directo": la selección sigue abierta pero el campo Número tiene texto
+    """
+
+    MENU = "menu"
+    SELECCION = "seleccion"
+    EXPEDIENTE = "expediente"
+    CAMINOS = ("cobranza coactiva", "cambio de expediente", "directo", "limpiar + directo")
+
+    def __init__(self):
+        self.caminos = {camino: 0 for camino in self.CAMINOS}
+        self.fallos = {}
+        self.reset()
+
+    def reset(self):
+        """Sesión recién abierta (login, reinicio o cambio de dependencia): SIRAT está en el menú"""
+        self.pantalla = self.MENU
+        self.anterior = None
+        self.campo_numero = ""
+
+    def typed(self, expediente):
+        """Se digitó un expediente en el campo Número de la selección"""
+        self.pantalla = self.SELECCION
+        self.campo_numero = expediente
+
+    def field_cleared(self):
+        """Se borró el campo Número (expediente rechazado en la selección)"""
+        self.campo_numero = ""
+
+    def entered(self):
+        """ALT+A: se entró al expediente, la ventana de selección se cerró"""
+        self.pantalla = self.EXPEDIENTE
+        self.campo_numero = ""
+
+    def record_result(self, resultado):
+        """Registra el resultado escrito (para describe)"""
+        self.anterior = resultado
+
+    def next_path(self):
+        if self.pantalla == self.MENU:
+            return "cobranza coactiva"
+        if self.pantalla == self.EXPEDIENTE:
+            return "cambio de expediente"
+        if self.campo_numero:
+            return "limpiar + directo"
+        return "directo"
+
+    def record_path(self, camino):
+        self.caminos[camino] = self.caminos.get(camino, 0) + 1
+
+    def record_fallback(self, camino):
+        self.fallos[camino] = self.fallos.get(camino, 0) + 1
+
+    def describe(self):
+        anterior = self.anterior or "sin resultado"
+        campo = f", campo Número '{self.campo_numero}'" if self.campo_numero else ""
+        return f"pantalla {self.pantalla}, anterior {anterior}{campo}"
+
+    def report(self):
+        if not any(self.caminos.values()):
+            return
+        caminos = ", ".join(f"{camino} {veces}" for camino, veces in self.caminos.items() if veces)
+        fallos = ", ".join(f"{camino} {veces}" for camino, veces in self.fallos.items())
+        logger.info(f"Caminos al siguiente expediente: {caminos}" + (f" | fallidos: {fallos}" if fallos else ""))
+
+
+class ExpedientePrefetcher:
+    """
+    Pipeline de preparación de expedientes en un hilo aparte.
+
+    Mientras el hilo principal espera a SIRAT (diálogos, cadena de MONTO), este hilo:
+    1. Mantiene EXPEDIENTES.xlsx en memoria (se lee UNA vez por campaña)
+    2. Valida y normaliza los siguientes PREFETCH_PROFUNDIDAD expedientes del lote
+    3. Escribe los resultados en disco (agrupando varias filas por guardado)
+
+    Así, entre un expediente y el siguiente el hilo de la GUI no espera lecturas
+    de Excel ni guardados de openpyxl.
+    """
+
+    def __init__(self, excel_file, profundidad=PREFETCH_PROFUNDIDAD):
+        self.excel_file = excel_file
+        self.profundidad = profundidad
+        self.validar = None
+        self._df = None
+        self._preparados = {}  # fila -> registro normalizado
+        self._en_cola = set()
+        self._lock = threading.Lock()
+        self._cola = queue.Queue()
+        self._thread = None
+        self.aciertos = 0
+        self.fallos = 0
+        self.escrituras = 0
+        self.guardados = 0
+        self.fallidas = []  # (archivo, fila, valor) cuyo guardado falló, hasta que la automatización los reclame
+
+    def load(self, recargar=False):
+        """Retorna el DataFrame de EXPEDIENTES.xlsx (leído una sola vez, luego desde memoria)"""
+        with self._lock:
+            if self._df is None or recargar:
+                self._df = pd.read_excel(self.excel_file, engine="openpyxl", dtype=str)
+                if "EXPEDIENTE" in self._df.columns:
+                    # Expedientes mal formados se dejan tal cual: validate_expediente_row los marca
+                    self._df["EXPEDIENTE"] = [
+                        normalizar_expediente(valor) or valor for valor in self._df["EXPEDIENTE"]
+                    ]
+                self._preparados.clear()
+            return self._df
+
+    def start(self, validar):
+        """
+        Inicia el hilo de prefetch (si no está corriendo).
+
+        Args:
+            validar: Función (expedientes_df, idx) -> (es_valido, mensaje)
+        """
+        self.validar = validar
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="ExpedientePrefetcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Prefetch de expedientes iniciado (profundidad {self.profundidad})")
+
+    def stop(self):
+        """Escribe los resultados pendientes y detiene el hilo"""
+        if not self._thread:
+            return
+        self.flush()
+        self._cola.put(None)
+        self._thread.join(timeout=30)
+        self._thread = None
+
+    def flush(self, timeout=60):
+        """
+        Espera a que se escriban en disco todos los resultados encolados: encola una marca
+        de vaciado que el hilo señala después de procesar todo lo anterior.
+
+        Retorna:
+            - True si la cola se vació (o no hay hilo), False si venció el timeout
+        """
+        if not (self._thread and self._thread.is_alive()):
+            return True
+        vaciado = threading.Event()
+        self._cola.put(("vaciado", vaciado))
+        if not vaciado.wait(timeout):
+            logger.warning(f"Prefetch: los resultados encolados no se terminaron de escribir en {timeout}s")
+            return False
+        return True
+
+    def failed_writes(self):
+        """Retorna (y olvida) los resultados cuyo guardado falló: (archivo, fila, valor)"""
+        with self._lock:
+            fallidas, self.fallidas = self.fallidas, []
+        return fallidas
+
+    def prefetch(self, filas):
+        """Encola la preparación de las siguientes filas del lote (hasta `profundidad`)"""
+        for fila in list(filas)[:self.profundidad]:
+            with self._lock:
+                if fila in self._preparados or fila in self._en_cola:
+                    continue
+                self._en_cola.add(fila)
+            self._cola.put(("preparar", fila))
+
+    def record(self, fila):
+        """
+        Retorna el registro preparado de una fila. Si el hilo aún no la preparó,
+        la prepara en el momento (cuenta como fallo de prefetch).
+        """
+        with self._lock:
+            registro = self._preparados.get(fila)
+        if registro is not None:
+            self.aciertos += 1
+            return registro
+
+        self.fallos += 1
+        return self._preparar(fila)
+
+    def preload(self, filas):
+        """Prepara varias filas en el hilo actual (usado por el preflight de arranque)"""
+        return [self._preparar(fila) for fila in filas]
+
+    def write_result(self, archivo, fila, valor, apostrofe=False, plantilla=None, extras=None):
+        """Encola la escritura del resultado de una fila (se guarda en el hilo de prefetch)"""
+        if not (self._thread and self._thread.is_alive()):
+            write_result_cells(archivo, [(fila, valor, apostrofe, extras)], plantilla)
+            self.escrituras += 1
+            self.guardados += 1
+            return
+        self._cola.put(("escribir", (archivo, fila, valor, apostrofe, plantilla, extras)))
+
+    def report(self):
+        """Loguea la efectividad del prefetch y de la escritura agrupada"""
+        total = self.aciertos + self.fallos
+        logger.info(
+            f"Prefetch: {self.aciertos}/{total} expedientes ya preparados | "
+            f"{self.escrituras} resultados en {self.guardados} guardado(s) de Excel"
+        )
+
+    def _preparar(self, fila):
+        """Valida y normaliza una fila del Excel"""
+        expedientes = self.load()
+        datos = expedientes.iloc[fila]
+
+        def _texto(columna):
+            valor = str(datos.get(columna, "")).strip()
+            return "" if valor.upper() == "NAN" else valor
+
+        if self.validar is not None:
+            es_valido, motivo = self.validar(expedientes, fila)
+        else:
+            es_valido, motivo = True, ""
+
+        registro = {
+            "fila": fila,
+            "expediente": str(datos.get("EXPEDIENTE", "")).strip(),
+            "tipo_medida": _texto("TIPO DE MEDIDA").upper(),
+            "medida_tipo": detect_medida_tipo(datos.get("TIPO DE MEDIDA", "")),
+            "interventor": _texto("INTERVENTOR"),
+            "plazo": _texto("PLAZO"),
+            "monto": _texto("MONTO"),
+            "valido": es_valido,
+            "motivo": motivo,
+        }
+
+        with self._lock:
+            self._preparados[fila] = registro
+            self._en_cola.discard(fila)
+        return registro
+
+    def _escribir(self, escrituras):
+        """Escribe un grupo de resultados: un guardado por archivo"""
+        por_archivo = {}
+        for archivo, fila, valor, apostrofe, plantilla, extras in escrituras:
+            celdas, _ = por_archivo.setdefault(archivo, ([], plantilla))
+            celdas.append((fila, valor, apostrofe, extras))
+
+        for archivo, (celdas, plantilla) in por_archivo.items():
+            try:
+                write_result_cells(archivo, celdas, plantilla)
+                self.escrituras += len(celdas)
+                self.guardados += 1
+                logger.info(f" {archivo.name} actualizado ({len(celdas)} fila(s))")
+            except Exception as e:
+                logger.error(f"Error guardando resultados en {archivo.name}: {e}")
+                with self._lock:
+                    self.fallidas.extend((archivo, fila, valor) for fila, valor, _apostrofe, _extras in celdas)
+
+    def _run(self):
+        while True:
+            tarea = self._cola.get()
+            if tarea is None:
+                self._cola.task_done()
+                return
+
+            # Tomar todo lo que ya esté encolado para agrupar escrituras
+            tareas = [tarea]
+            while True:
+                try:
+                    siguiente = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if siguiente is None:
+                    self._cola.put(None)
+                    self._cola.task_done()
+                    break
+                tareas.append(siguiente)
+
+            escrituras = [datos for tipo, datos in tareas if tipo == "escribir"]
+            if escrituras:
+                self._escribir(escrituras)
+
+            for tipo, datos in tareas:
+                if tipo == "preparar":
+                    try:
+                        self._preparar(datos)
+                    except Exception as e:
+                        logger.warning(f"Prefetch: no se pudo preparar la fila {datos + 2}: {e}")
+                        with self._lock:
+                            self._en_cola.discard(datos)
+
+            # Todo lo encolado antes de cada marca de vaciado ya se procesó
+            for tipo, datos in tareas:
+                if tipo == "vaciado":
+                    datos.set()
+
+            for _ in tareas:
+                self._cola.task_done()
+
+
+def clasificar_resultado(resultado):
+    """
+    Clasifica el RESULTADO escrito para un expediente en un estado del almacén.
+
+    Retorna:
+        - ("done", rc) si se extrajo la RC (rc = número) o se registró MONTO MAYOR (rc = None)
+        - ("invalid", None) si el expediente o sus datos son inválidos (no se reintenta)
+        - ("verify", None) si SIRAT no respondió como se esperaba: puede haber quedado
+          un embargo a medio registrar, requiere revisión manual
+    """
+    texto = str(resultado).strip() if resultado is not None else ""
+    numero = texto.lstrip("'")
+
+    if numero.isdigit():
+        return "done", numero
+    if texto.upper() == "MONTO MAYOR":
+        return "done", None
+    if texto.upper().startswith(RESULTADOS_INVALIDO):
+        return "invalid", None
+    return "verify", None
+
+
+def dependencia_de_fila(expedientes, idx):
+    """ "21" / "23" según la columna DEPENDENCIA (misma regla que get_expedientes_grouped_by_dependencia), o None"""
+    texto = str(expedientes.iloc[idx].get("DEPENDENCIA", "")).strip()
+    return next((clave for clave in DEPENDENCIAS if clave in texto), None)
+
+
+def seleccionar_filas(expedientes, dependencia=None, desde=None, hasta=None):
+    """
+    Filas (0-based) del Excel que entran en la corrida.
+
+    Args:
+        expedientes: DataFrame del Excel
+        dependencia: "21" / "23" para tomar solo esa dependencia (None = todas)
+        desde, hasta: Rango de filas tal como se ven en Excel, inclusive (la fila 2 es el primer expediente)
+
+    Retorna:
+        - Lista de índices en el orden del Excel
+    """
+    primera = max((desde or 2) - 2, 0)
+    ultima = len(expedientes) if hasta is None else min(hasta - 1, len(expedientes))
+    filas = range(primera, ultima)
+    if dependencia:
+        return [idx for idx in filas if dependencia_de_fila(expedientes, idx) == dependencia]
+    return list(filas)
+
+
+def filas_para_almacen(expedientes, filas=None):
+    """Tuplas (fila, expediente, dependencia) del Excel para cargar en el almacén (todas o solo `filas`)"""
+    return [
+        (idx, str(expedientes.iloc[idx].get("EXPEDIENTE", "")).strip(), dependencia_de_fila(expedientes, idx))
+        for idx in (range(len(expedientes)) if filas is None else filas)
+    ]
+
+
+class ColaExpedientes:
+    """
+    Almacén durable de la campaña (SQLite en modo WAL): una fila por expediente.
+
+    Es el registro oficial del estado de la campaña (puede durar días):
+    R_EXPEDIENTES.xlsx es solo una exportación. Estados:
+    - pending: por procesar
+    - in_progress: tomado por un worker (lease con vencimiento, renovado con latidos)
+    - done: RC extraída o MONTO MAYOR
+    - invalid: expediente o datos inválidos
+    - verify: SIRAT no respondió como se esperaba, requiere revisión manual
+
+    Si un worker muere, su lease vence y la fila vuelve a estar disponible
+    (hasta COLA_MAX_INTENTOS intentos). Los índices por estado y dependencia
+    permiten tomar el siguiente expediente sin recorrer la tabla.
+
+    Cada operación abre su propia conexión, por lo que se puede usar desde
+    varios hilos y procesos a la vez.
+    """
+
+    ESTADOS_CERRADOS = ("done", "invalid", "verify")
+
+    def __init__(self, ruta=COLA_ARCHIVO, lease=COLA_LEASE, max_intentos=COLA_MAX_INTENTOS):
+        self.ruta = Path(ruta)
+        self.lease = lease
+        self.max_intentos = max_intentos
+        with self._conectar() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS expedientes ("
+                " fila INTEGER PRIMARY KEY,"
+                " expediente TEXT,"
+                " dependencia TEXT,"
+                " estado TEXT NOT NULL DEFAULT 'pending',"
+                " intentos INTEGER NOT NULL DEFAULT 0,"
+                " worker TEXT,"
+                " lease_hasta REAL,"
+                " creado REAL,"
+                " actualizado REAL,"
+                " iniciado REAL,"
+                " terminado REAL,"
+                " resultado TEXT,"
+                " rc TEXT,"
+                " exportado INTEGER NOT NULL DEFAULT 0,"
+                " metricas TEXT)"
+            )
+            # Almacenes creados antes de las columnas de tiempos
+            if "metricas" not in {columna[1] for columna in conn.execute("PRAGMA table_info(expedientes)")}:
+                try:
+                    conn.execute("ALTER TABLE expedientes ADD COLUMN metricas TEXT")
+                except sqlite3.OperationalError:
+                    pass  # Otro proceso la agregó al mismo tiempo
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_expedientes_estado_dependencia"
+                " ON expedientes (estado, dependencia, fila)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_expedientes_dependencia_estado"
+                " ON expedientes (dependencia, estado)"
+            )
+
+    @contextmanager
+    def _conectar(self):
+        conn = sqlite3.connect(str(self.ruta), timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def cargar(self, filas):
+        """
+        Agrega filas a la campaña. Las ya cargadas conservan su estado (permite reanudar
+        otro día); si en esa fila del Excel ahora hay OTRO expediente, se reinicia.
+
+        Args:
+            filas: Lista de tuplas (fila, expediente, dependencia)
+        """
+        ahora = time.time()
+        with self._conectar() as conn:
+            conn.executemany(
+                "INSERT INTO expedientes (fila, expediente, dependencia, creado, actualizado)"
+                " VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(fila) DO UPDATE SET"
+                "  expediente = excluded.expediente, dependencia = excluded.dependencia,"
+                "  estado = 'pending', intentos = 0, worker = NULL, lease_hasta = NULL,"
+                "  iniciado = NULL, terminado = NULL, resultado = NULL, rc = NULL, exportado = 0, metricas = NULL,"
+                "  actualizado = excluded.actualizado"
+                " WHERE expedientes.expediente IS NOT excluded.expediente",
+                [(fila, expediente, dependencia, ahora, ahora) for fila, expediente, dependencia in filas],
+            )
+
+    def tomar(self, worker, dependencia):
+        """
+        Toma la siguiente fila pendiente (o con lease vencido) de una dependencia.
+
+        Retorna:
+            - Índice de fila (0-based) tomado por el worker
+            - None si no hay filas disponibles para esa dependencia
+        """
+        ahora = time.time()
+        with self._conectar() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                registro = conn.execute(
+                    "SELECT fila FROM expedientes WHERE estado = 'pending' AND dependencia = ? AND intentos < ?"
+                    " ORDER BY fila LIMIT 1",
+                    (dependencia, self.max_intentos),
+                ).fetchone()
+                if registro is None:
+                    registro = conn.execute(
+                        "SELECT fila FROM expedientes WHERE estado = 'in_progress' AND dependencia = ?"
+                        " AND intentos < ? AND lease_hasta < ? ORDER BY fila LIMIT 1",
+                        (dependencia, self.max_intentos, ahora),
+                    ).fetchone()
+                if registro is None:
+                    conn.execute("COMMIT")
+                    return None
+                self._iniciar(conn, registro[0], worker, ahora)
+                conn.execute("COMMIT")
+                return registro[0]
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def iniciar(self, fila, worker):
+        """Marca una fila como in_progress para un procesamiento que no pasó por tomar() (modo normal)"""
+        with self._conectar() as conn:
+            self._iniciar(conn, fila, worker, time.time())
+
+    def _iniciar(self, conn, fila, worker, ahora):
+        conn.execute(
+            "UPDATE expedientes SET estado = 'in_progress', worker = ?, lease_hasta = ?,"
+            " intentos = intentos + 1, iniciado = ?, actualizado = ? WHERE fila = ?",
+            (worker, ahora + self.lease, ahora, ahora, fila),
+        )
+
+    def renovar(self, worker):
+        """Latido: extiende el lease de todas las filas en curso del worker"""
+        ahora = time.time()
+        with self._conectar() as conn:
+            conn.execute(
+                "UPDATE expedientes SET lease_hasta = ?, actualizado = ?"
+                " WHERE worker = ? AND estado = 'in_progress'",
+                (ahora + self.lease, ahora, worker),
+            )
+
+    def completar(self, fila, worker, resultado, metricas=None):
+        """
+        Registra el resultado de una fila (solo si el worker aún tiene su lease;
+        worker None = resultado resuelto sin SIRAT, p. ej. datos incompletos).
+        `metricas` es el dict de ExpedienteMetrics (se exporta como columnas de tiempos).
+        """
+        estado, rc = clasificar_resultado(resultado)
+        ahora = time.time()
+        with self._conectar() as conn:
+            cursor = conn.execute(
+                "UPDATE expedientes SET estado = ?, resultado = ?, rc = ?, terminado = ?, actualizado = ?,"
+                " exportado = 0, lease_hasta = NULL, metricas = ?"
+                " WHERE fila = ? AND (? IS NULL OR worker IS NULL OR worker = ?)",
+                (estado, None if resultado is None else str(resultado), rc, ahora, ahora,
+                 json.dumps(metricas, ensure_ascii=False) if metricas else None, fila, worker, worker),
+            )
+            return cursor.rowcount > 0
+
+    def liberar(self, fila, worker):
+        """Devuelve una fila a pending (el worker no pudo escribir un resultado)"""
+        with self._conectar() as conn:
+            conn.execute(
+                "UPDATE expedientes SET estado = 'pending', worker = NULL, lease_hasta = NULL, actualizado = ?"
+                " WHERE fila = ? AND worker = ? AND estado = 'in_progress'",
+                (time.time(), fila, worker),
+            )
+
+    def cerrar_agotados(self, resultado="ERROR: SIN RESPUESTA DEL WORKER"):
+        """Pasa a verify las filas que agotaron sus intentos sin resultado"""
+        ahora = time.time()
+        with self._conectar() as conn:
+            cursor = conn.execute(
+                "UPDATE expedientes SET estado = 'verify', resultado = ?, terminado = ?, actualizado = ?,"
+                " exportado = 0 WHERE estado IN ('pending', 'in_progress') AND intentos >= ?"
+                " AND (lease_hasta IS NULL OR lease_hasta < ?)",
+                (resultado, ahora, ahora, self.max_intentos, ahora),
+            )
+            return cursor.rowcount
+
+    def pendientes(self, dependencia=None):
+        """Cantidad de filas sin cerrar (de una dependencia o de todas)"""
+        consulta = "SELECT COUNT(*) FROM expedientes WHERE estado IN ('pending', 'in_progress')"
+        parametros = ()
+        if dependencia is not None:
+            consulta += " AND dependencia = ?"
+            parametros = (dependencia,)
+        with self._conectar() as conn:
+            return conn.execute(consulta, parametros).fetchone()[0]
+
+    def tomables(self):
+        """
+        Cantidad de filas sin cerrar que algún worker todavía puede tomar (con intentos
+        disponibles; las in_progress, cuando venza su lease). Las que agotaron sus intentos
+        solo esperan a cerrar_agotados().
+        """
+        with self._conectar() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM expedientes WHERE estado IN ('pending', 'in_progress') AND intentos < ?",
+                (self.max_intentos,),
+            ).fetchone()[0]
+
+    def filas_cerradas(self):
+        """Filas que ya tienen resultado definitivo (no se reprocesan al reanudar)"""
+        with self._conectar() as conn:
+            return {
+                fila for fila, in conn.execute(
+                    "SELECT fila FROM expedientes WHERE estado IN ('done', 'invalid', 'verify')"
+                )
+            }
+
+    def dependencias_pendientes(self):
+        """Dependencias con filas disponibles, la de más filas primero"""
+        with self._conectar() as conn:
+            return [
+                dependencia for dependencia, _ in conn.execute(
+                    "SELECT dependencia, COUNT(*) AS n FROM expedientes WHERE intentos < ? AND"
+                    " (estado = 'pending' OR (estado = 'in_progress' AND lease_hasta < ?))"
+                    " GROUP BY dependencia ORDER BY n DESC, MIN(fila)",
+                    (self.max_intentos, time.time()),
+                )
+            ]
+
+    def resultados(self, solo_sin_exportar=False):
+        """Lista de (fila, resultado) de las filas cerradas"""
+        consulta = "SELECT fila, resultado FROM expedientes WHERE estado IN ('done', 'invalid', 'verify')"
+        if solo_sin_exportar:
+            consulta += " AND exportado = 0"
+        with self._conectar() as conn:
+            return conn.execute(consulta + " ORDER BY fila").fetchall()
+
+    def resultados_sin_exportar(self):
+        """Lista de (fila, resultado) cerradas que aún no se volcaron al Excel"""
+        return self.resultados(solo_sin_exportar=True)
+
+    def marcar_exportados(self, filas):
+        with self._conectar() as conn:
+            conn.executemany("UPDATE expedientes SET exportado = 1 WHERE fila = ?", [(fila,) for fila in filas])
+
+    def marcar_sin_exportar(self, filas):
+        """Vuelve a poner filas cerradas en la próxima exportación (su guardado en el Excel falló)"""
+        with self._conectar() as conn:
+            conn.executemany("UPDATE expedientes SET exportado = 0 WHERE fila = ?", [(fila,) for fila in filas])
+
+    def exportar(self, resultado_file, plantilla, completo=False):
+        """
+        Exporta los resultados del almacén a la columna RESULTADO de R_EXPEDIENTES.xlsx,
+        junto con las columnas de tiempos (COLUMNAS_METRICAS), en un solo guardado.
+
+        Args:
+            completo: True = reescribe todas las filas cerradas; False = solo las no exportadas
+
+        Retorna:
+            - Cantidad de filas exportadas
+        """
+        consulta = (
+            "SELECT fila, resultado, iniciado, terminado, intentos, metricas FROM expedientes"
+            " WHERE estado IN ('done', 'invalid', 'verify')"
+        )
+        if not completo:
+            consulta += " AND exportado = 0"
+        with self._conectar() as conn:
+            resultados = conn.execute(consulta + " ORDER BY fila").fetchall()
+        if not resultados:
+            return 0
+        write_result_cells(
+            resultado_file,
+            [
+                (fila, resultado, False, columnas_metricas(iniciado, terminado, intentos, metricas))
+                for fila, resultado, iniciado, terminado, intentos, metricas in resultados
+            ],
+            plantilla=plantilla,
+        )
+        self.marcar_exportados([fila for fila, *_ in resultados])
+        return len(resultados)
+
+    def resumen(self):
+        """Cantidad de filas por estado"""
+        with self._conectar() as conn:
+            return dict(conn.execute("SELECT estado, COUNT(*) FROM expedientes GROUP BY estado").fetchall())
+
+    def detalle(self):
+        """Lista de (fila, dependencia, estado, intentos, iniciado, terminado, resultado) de toda la campaña"""
+        with self._conectar() as conn:
+            return conn.execute(
+                "SELECT fila, dependencia, estado, intentos, iniciado, terminado, resultado"
+                " FROM expedientes ORDER BY fila"
+            ).fetchall()
+
+    def duracion_media(self):
+        """Segundos promedio por expediente terminado (None si aún no hay historial)"""
+        with self._conectar() as conn:
+            media, = conn.execute(
+                "SELECT AVG(terminado - iniciado) FROM expedientes"
+                " WHERE estado = 'done' AND iniciado IS NOT NULL AND terminado >= iniciado"
+            ).fetchone()
+            return media
+
+
+class SimuladorSIRAT:
+    """
+    Sustituto guionado de SIRAT para probar el modo coordinador/worker sin GUI.
+
+    El guion (JSON) asocia EXPEDIENTE -> resultado. Resultados especiales:
+    - "__CAIDA__": el worker termina abruptamente (prueba de leases vencidos)
+    - "__SIN_RESULTADO__": no se escribe resultado (la fila se libera y se reintenta)
+    Los expedientes sin guion devuelven un RC sintético de 8 dígitos.
+    """
+
+    def __init__(self, guion=None, demora=0.2):
+        self.guion = {}
+        if guion:
+            with open(guion, "r", encoding="utf-8") as f:
+                self.guion = {str(clave).strip(): valor for clave, valor in json.load(f).items()}
+        self.demora = demora
+
+    def procesar(self, registro):
+        expediente = registro["expediente"]
+        time.sleep(self.demora)
+        resultado = self.guion.get(expediente)
+
+        if resultado == "__CAIDA__":
+            logger.error(f"Simulador: caída del worker en el expediente {expediente}")
+            os._exit(1)
+        if resultado == "__SIN_RESULTADO__":
+            return None
+        if resultado is None:
+            resultado = str(zlib.crc32(expediente.encode("utf-8")) % 10 ** 8).zfill(8)
+        return resultado
+
+
+def run_coordinator(cola, workers=0, simulado=None, intervalo=COLA_INTERVALO_EXPORTACION, automatizacion=None,
+                    perfilado=None, perfilado_modo="ambos"):
+    """
+    Coordinador: carga EXPEDIENTES.xlsx en la cola, lanza `workers` procesos locales
+    (opcional; los workers de otras sesiones VDI apuntan a la misma cola con el subcomando worker)
+    y vuelca los resultados a UN solo R_EXPEDIENTES.xlsx hasta terminar.
+
+    Args:
+        cola: ColaExpedientes compartida
+        workers: Cantidad de workers locales a lanzar
+        simulado: Ruta de un guion para SimuladorSIRAT ("" = sin guion), o None para SIRAT real
+        automatizacion: RSIRATAutomation32 con las rutas y la selección de filas (None = valores por defecto)
+        perfilado: Carpeta de --perfilado para los workers locales (cada uno en CARPETA/worker_ID);
+            el coordinador no se perfila, casi todo su tiempo es espera
+        perfilado_modo: --perfilado-modo de los workers
+    """
+    logger.info("\n" + "=" * 70)
+    logger.info(f"COORDINADOR: cola {cola.ruta}")
+    logger.info("=" * 70)
+
+    automatizacion = automatizacion or RSIRATAutomation32()
+    excel_file = automatizacion.excel_entrada
+    resultado_file = automatizacion.excel_resultados
+    expedientes = automatizacion.load_expedientes()
+
+    filas = []
+    invalidas = []
+    cerradas = cola.filas_cerradas()
+    maximo = automatizacion.seleccion.get("maximo")
+    for idx, expediente, dependencia in filas_para_almacen(expedientes, automatizacion.selected_rows(expedientes)):
+        # Las filas incompletas se resuelven sin SIRAT; las de otra dependencia se ignoran
+        es_valido, motivo = automatizacion.validate_expediente_row(expedientes, idx)
+        if not es_valido:
+            invalidas.append((idx, motivo))
+        elif dependencia is None:
+            continue
+        elif maximo is not None and idx not in cerradas:
+            # --max cuenta solo las filas que van a SIRAT (igual que run y validate)
+            if maximo <= 0:
+                break
+            maximo -= 1
+
+        filas.append((idx, expediente, dependencia))
+
+    cola.cargar(filas)
+    for idx, motivo in invalidas:
+        if idx not in cerradas:
+            cola.completar(idx, None, motivo)
+    logger.info(
+        f"Cola cargada: {len(filas)} expedientes ({len(invalidas)} incompletos, resueltos sin SIRAT) | "
+        f"Estado de la campaña: {cola.resumen()}"
+    )
+
+    # Workers locales (pruebas o varias sesiones en la misma máquina)
+    procesos = []
+    comando = [sys.executable] + ([] if getattr(sys, 'frozen', False) else [str(Path(__file__).resolve())])
+    for numero in range(1, workers + 1):
+        argumentos = comando + [
+            "worker", f"{socket.gethostname()}-{numero}", "--cola", str(cola.ruta), "--lease", str(cola.lease),
+            "--entrada", str(excel_file),
+        ]
+        if PERFIL_ACTIVO:
+            argumentos += ["--perfil", PERFIL_ACTIVO["ruta"]]
+        if simulado is not None:
+            argumentos += ["--simulado", simulado]
+        if perfilado:
+            argumentos += ["--perfilado", str(perfilado), "--perfilado-modo", perfilado_modo]
+        procesos.append(subprocess.Popen(argumentos))
+        logger.info(f"Worker local {numero} lanzado (PID {procesos[-1].pid})")
+
+    def _exportar():
+        return cola.exportar(resultado_file, excel_file)
+
+    try:
+        while True:
+            cerradas = cola.cerrar_agotados()
+            if cerradas:
+                logger.warning(f"{cerradas} expediente(s) agotaron sus intentos sin resultado")
+
+            exportados = _exportar()
+            resumen = cola.resumen()
+            if exportados:
+                logger.info(f"Coordinador: {exportados} resultado(s) volcados a R_EXPEDIENTES.xlsx | {resumen}")
+
+            if cola.pendientes() == 0:
+                break
+
+            if procesos and all(proceso.poll() is not None for proceso in procesos):
+                logger.warning(f"Todos los workers locales terminaron con {cola.pendientes()} expediente(s) sin terminar")
+                break
+
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        logger.warning("Coordinador interrumpido")
+    finally:
+        cola.exportar(resultado_file, excel_file, completo=True)
+
+    for proceso in procesos:
+        try:
+            proceso.wait(timeout=60)
+        except Exception:
+            proceso.kill()
+
+    logger.info("\n" + "=" * 70)
+    logger.info(f"COORDINADOR COMPLETADO: {cola.resumen()}")
+    logger.info("=" * 70)
+    return cola.pendientes() == 0
+
+
+def report_campaign(ruta=COLA_ARCHIVO):
+    """
+    Resume el estado de una campaña desde el almacén, sin abrir SIRAT ni el Excel:
+    estados por dependencia, resultados más frecuentes, duración por expediente y ritmo.
+
+    Retorna:
+        - True si el almacén existe y tiene filas
+        - False en caso contrario
+    """
+    ruta = Path(ruta)
+    if not ruta.exists():
+        logger.error(f"No existe el almacén de la campaña: {ruta}")
+        return False
+
+    cola = ColaExpedientes(ruta)
+    filas = cola.detalle()
+    logger.info("\n" + "=" * 70)
+    logger.info(f"REPORTE DE LA CAMPAÑA: {cola.ruta}")
+    logger.info("=" * 70)
+    if not filas:
+        logger.warning("El almacén no tiene expedientes cargados")
+        return False
+
+    logger.info(f"Expedientes: {len(filas)} | Estado: {cola.resumen()}")
+
+    por_dependencia = {}
+    resultados = {}
+    duraciones = []
+    reintentados = 0
+    for fila, dependencia, estado, intentos, iniciado, terminado, resultado in filas:
+        conteo = por_dependencia.setdefault(dependencia or "-", {})
+        conteo[estado] = conteo.get(estado, 0) + 1
+        if intentos and intentos > 1:
+            reintentados += 1
+        if estado in ColaExpedientes.ESTADOS_CERRADOS:
+            clave = "RC" if estado == "done" and str(resultado).lstrip("'").isdigit() else str(resultado).split(" | ")[0]
+            resultados[clave] = resultados.get(clave, 0) + 1
+        if estado == "done" and iniciado and terminado and terminado >= iniciado:
+            duraciones.append((iniciado, terminado))
+
+    for dependencia, conteo in sorted(por_dependencia.items()):
+        logger.info(f"  • Dependencia {dependencia}: {conteo}")
+
+    logger.info("Resultados más frecuentes:")
+    for clave, cantidad in sorted(resultados.items(), key=lambda item: -item[1])[:10]:
+        logger.info(f"   {cantidad:5d}  {clave}")
+
+    if reintentados:
+        logger.info(f"Expedientes con más de un intento: {reintentados}")
+
+    if duraciones:
+        segundos = sorted(terminado - iniciado for iniciado, terminado in duraciones)
+        ventana = max(terminado for _, terminado in duraciones) - min(iniciado for iniciado, _ in duraciones)
+        logger.info(
+            f"Duración por expediente: media {sum(segundos) / len(segundos):.1f}s, "
+            f"p50 {segundos[len(segundos) // 2]:.1f}s, p90 {segundos[int(len(segundos) * 0.9)]:.1f}s, "
+            f"máx {segundos[-1]:.1f}s"
+        )
+        if ventana > 0:
+            logger.info(f"Rendimiento: {len(duraciones) / ventana * 3600:.0f} expedientes/hora ({ventana / 60:.1f} min)")
+
+    logger.info("=" * 70)
+    return True
+
+
+def run_bench(automatizacion, workers=2, simulado="", conservar=False):
+    """
+    Corrida de rendimiento con SimuladorSIRAT: coordinador + `workers` workers simulados
+    sobre una copia temporal del almacén y de R_EXPEDIENTES.xlsx (no toca la campaña real).
+    Mide cuántos expedientes por hora procesa la cola sin la GUI de por medio.
+
+    Args:
+        automatizacion: RSIRATAutomation32 con el Excel de entrada y la selección de filas
+        workers: Workers simulados a lanzar (al menos 1)
+        simulado: Ruta del guion de SimuladorSIRAT ("" = RC sintéticas)
+        conservar: True = no borra la carpeta temporal al terminar
+
+    Retorna:
+        - True si la cola terminó
+    """
+    import shutil
+    carpeta = Path(tempfile.mkdtemp(prefix="bench_sirat_"))
+    automatizacion.excel_resultados = carpeta / "R_EXPEDIENTES.xlsx"
+    cola = ColaExpedientes(carpeta / "cola_expedientes.db", lease=30)
+
+    inicio = time.time()
+    try:
+        completada = run_coordinator(
+            cola, workers=max(workers, 1), simulado=simulado, intervalo=1, automatizacion=automatizacion
+        )
+        duracion = time.time() - inicio
+        terminados = sum(cantidad for estado, cantidad in cola.resumen().items() if estado in ColaExpedientes.ESTADOS_CERRADOS)
+
+        logger.info("\n" + "=" * 70)
+        logger.info(f"BENCH: {terminados} expedientes en {duracion:.1f}s con {max(workers, 1)} worker(s) simulados")
+        logger.info(f"Perfil: {PERFIL_ACTIVO['nombre'] + ' (' + PERFIL_ACTIVO['ruta'] + ')' if PERFIL_ACTIVO else 'valores por defecto'}")
+        if duracion > 0:
+            logger.info(f"Rendimiento: {terminados / duracion * 3600:.0f} expedientes/hora")
+        logger.info("=" * 70)
+        return completada
+    finally:
+        if conservar:
+            logger.info(f"Archivos del bench en {carpeta}")
+        else:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+
+class UIARecorder:
+    """
+    Grabador de subárboles UIA de SIRAT para reproducirlos offline.
+
+    Se activa con --grabar: cada vez que la automatización consulta el escritorio
+    (Desktop().windows() / .window()) se serializan las ventanas de los procesos de
+    SIRAT con todos sus descendientes (nombre, tipo, clase, auto_id, rectángulo),
+    incluidos los textos de los diálogos. Cada evento guarda el tiempo relativo, el
+    método de la automatización que consultaba (detect_*, click_*, ...) y su timeout.
+
+    Los árboles idénticos se guardan una sola vez y el archivo se escribe como JSON
+    comprimido (gzip), por lo que una corrida completa ocupa poco.
+    """
+
+    def __init__(self, ruta, intervalo=GRABACION_INTERVALO, max_nodos=GRABACION_MAX_NODOS):
+        self.ruta = Path(ruta)
+        self.intervalo = intervalo
+        self.max_nodos = max_nodos
+        self.inicio = time.time()
+        self.arboles = []  # id -> nodo serializado
+        self._ids = {}  # hash del árbol -> id
+        self.eventos = []
+        self._ultima_captura = 0.0
+        self._lock = threading.Lock()
+
+    def wrap(self, desktop):
+        return _DesktopGrabado(desktop, self)
+
+    def _llamador(self):
+        """Método de RSIRATAutomation32 que está consultando la UI (y su timeout)"""
+        marco = sys._getframe(3)
+        while marco is not None:
+            if _METODOS_UIA.match(marco.f_code.co_name) and "self" in marco.f_locals:
+                return marco.f_code.co_name, marco.f_locals.get("timeout")
+            marco = marco.f_back
+        return None, None
+
+    def _serializar(self, elemento, contador):
+        if contador[0] >= self.max_nodos:
+            return None
+        contador[0] += 1
+
+        info = elemento.element_info
+        try:
+            rect = elemento.rectangle()
+            rectangulo = [rect.left, rect.top, rect.right, rect.bottom]
+        except Exception:
+            rectangulo = None
+
+        nodo = {
+            "n": info.name or "",
+            "t": info.control_type,
+            "c": info.class_name,
+            "a": info.automation_id,
+            "h": info.handle,
+            "p": info.process_id,
+            "r": rectangulo,
+        }
+
+        hijos = []
+        try:
+            for hijo in elemento.children():
+                serializado = self._serializar(hijo, contador)
+                if serializado is not None:
+                    hijos.append(serializado)
+        except Exception:
+            pass
+        if hijos:
+            nodo["k"] = hijos
+        return nodo
+
+    def _registrar(self, nodo):
+        clave = json.dumps(nodo, sort_keys=True, ensure_ascii=False)
+        if clave not in self._ids:
+            self._ids[clave] = len(self.arboles)
+            self.arboles.append(nodo)
+        return self._ids[clave]
+
+    def capture(self, desktop, motivo):
+        """Serializa las ventanas de SIRAT visibles en este momento (como máximo una vez por intervalo)"""
+        ahora = time.time()
+        if ahora - self._ultima_captura < self.intervalo:
+            return
+        self._ultima_captura = ahora
+
+        llamador, timeout = self._llamador()
+        pids = {pid for hwnd, pid, titulo, colgada in find_sirat_windows()}
+
+        ventanas = []
+        try:
+            for ventana in desktop.windows():
+                try:
+                    if pids and ventana.element_info.process_id not in pids:
+                        continue
+                    nodo = self._serializar(ventana, [0])
+                    if nodo is not None:
+                        ventanas.append(self._registrar(nodo))
+                except Exception:
+                    continue
+        except Exception as e:
+            logger.warning(f"Grabación UIA: no se pudo capturar el escritorio: {e}")
+            return
+
+        with self._lock:
+            # Si nada cambió desde el evento anterior del mismo llamador, no se repite
+            if self.eventos and self.eventos[-1]["v"] == ventanas and self.eventos[-1]["m"] == llamador:
+                return
+            self.eventos.append({
+                "t": round(ahora - self.inicio, 3),
+                "m": llamador,
+                "to": timeout,
+                "q": motivo,
+                "v": ventanas,
+            })
+
+    def save(self):
+        """Escribe la grabación (JSON + gzip)"""
+        import gzip
+        with self._lock:
+            datos = {"version": 1, "arboles": self.arboles, "eventos": self.eventos}
+        with gzip.open(self.ruta, "wt", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, separators=(",", ":"))
+        logger.info(
+            f"Grabación UIA guardada en {self.ruta}: {len(self.eventos)} eventos, "
+            f"{len(self.arboles)} árboles distintos"
+        )
+
+
+class _DesktopGrabado:
+    """Desktop de pywinauto que graba un snapshot antes de cada consulta"""
+
+    def __init__(self, desktop, grabador):
+        self._desktop = desktop
+        self._grabador = grabador
+
+    def windows(self, **criterios):
+        self._grabador.capture(self._desktop, "windows")
+        return self._desktop.windows(**criterios)
+
+    def window(self, **criterios):
+        self._grabador.capture(self._desktop, "window")
+        return self._desktop.window(**criterios)
+
+    def __getattr__(self, atributo):
+        return getattr(self._desktop, atributo)
+
+
+def _coincide(nodo, criterios):
+    """Aplica los criterios de búsqueda de pywinauto (los que usa este módulo) a un nodo grabado"""
+    for clave, valor in criterios.items():
+        if valor is None:
+            continue
+        if clave in ("title", "best_match") and nodo.get("n") != valor:
+            return False
+        if clave == "title_re" and not re.match(valor, nodo.get("n") or ""):
+            return False
+        if clave == "class_name" and nodo.get("c") != valor:
+            return False
+        if clave == "class_name_re" and not re.match(valor, nodo.get("c") or ""):
+            return False
+        if clave == "control_type" and nodo.get("t") != valor:
+            return False
+        if clave == "auto_id" and nodo.get("a") != valor:
+            return False
+        if clave == "handle" and nodo.get("h") != valor:
+            return False
+    return True
+
+
+def _filtrar(nodos, criterios):
+    criterios = dict(criterios)
+    indice = criterios.pop("found_index", None)
+    for ignorado in ("visible_only", "enabled_only", "top_level_only", "depth", "backend", "process"):
+        criterios.pop(ignorado, None)
+    encontrados = [nodo for nodo in nodos if _coincide(nodo, criterios)]
+    if indice is not None:
+        return encontrados[indice:indice + 1]
+    return encontrados
+
+
+class _ElementoReplay:
+    """Elemento UIA reproducido desde una grabación (misma interfaz que usa este módulo)"""
+
+    def __init__(self, nodo, reproduccion):
+        self._nodo = nodo
+        self._reproduccion = reproduccion
+        self.element_info = self
+        self.name = nodo.get("n") or ""
+        self.control_type = nodo.get("t")
+        self.class_name = nodo.get("c")
+        self.automation_id = nodo.get("a")
+        self.handle = nodo.get("h")
+        self.process_id = nodo.get("p")
+
+    def _descendientes(self):
+        pendientes = list(self._nodo.get("k", []))
+        while pendientes:
+            nodo = pendientes.pop(0)
+            yield nodo
+            pendientes.extend(nodo.get("k", []))
+
+    def window_text(self):
+        return self.name
+
+    def texts(self):
+        return [self.name]
+
+    def children(self, **criterios):
+        return [_ElementoReplay(nodo, self._reproduccion) for nodo in _filtrar(self._nodo.get("k", []), criterios)]
+
+    def descendants(self, **criterios):
+        return [_ElementoReplay(nodo, self._reproduccion) for nodo in _filtrar(list(self._descendientes()), criterios)]
+
+    def child_window(self, **criterios):
+        return _SpecReplay(lambda: list(self._descendientes()), criterios, self._reproduccion)
+
+    def window(self, **criterios):
+        return self.child_window(**criterios)
+
+    def rectangle(self):
+        return _Rectangulo(self._nodo.get("r"))
+
+    def exists(self, timeout=None):
+        return True
+
+    def is_visible(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def wrapper_object(self):
+        return self
+
+    def _accion(self, nombre, *args, **kwargs):
+        self._reproduccion.acciones.append((self._reproduccion.now(), nombre, self.name))
+        return self
+
+    def set_focus(self):
+        return self._accion("set_focus")
+
+    def invoke(self):
+        return self._accion("invoke")
+
+    def click(self, *args, **kwargs):
+        return self._accion("click")
+
+    def click_input(self, *args, **kwargs):
+        return self._accion("click_input")
+
+    def type_keys(self, *args, **kwargs):
+        return self._accion("type_keys")
+
+
+class _SpecReplay:
+    """Especificación de ventana (desktop.window(...) / child_window(...)) resuelta contra la grabación"""
+
+    def __init__(self, candidatos, criterios, reproduccion):
+        self._candidatos = candidatos
+        self._criterios = criterios
+        self._reproduccion = reproduccion
+
+    def _resolver(self):
+        encontrados = _filtrar(self._candidatos(), self._criterios)
+        return _ElementoReplay(encontrados[0], self._reproduccion) if encontrados else None
+
+    def exists(self, timeout=None):
+        end_time = time.time() + (timeout or 0)
+        while True:
+            if self._resolver() is not None:
+                return True
+            if time.time() >= end_time:
+                return False
+            time.sleep(0.1)
+
+    def wrapper_object(self):
+        elemento = self._resolver()
+        if elemento is None:
+            raise LookupError(f"Elemento no encontrado en la grabación: {self._criterios}")
+        return elemento
+
+    def child_window(self, **criterios):
+        return _SpecReplay(lambda: list(self.wrapper_object()._descendientes()), criterios, self._reproduccion)
+
+    def window(self, **criterios):
+        return self.child_window(**criterios)
+
+    def __getattr__(self, atributo):
+        return getattr(self.wrapper_object(), atributo)
+
+
+class UIAReplay:
+    """
+    Backend de reproducción: sirve los snapshots grabados por UIARecorder como si
+    fueran el escritorio real, respetando los tiempos de la grabación.
+
+    El reloj de reproducción avanza en tiempo real desde `start(t)`; cada consulta
+    ve el último snapshot grabado hasta ese instante. Las acciones (invoke, click,
+    set_focus) no tocan nada: quedan en `acciones`.
+    """
+
+    def __init__(self, ruta):
+        import gzip
+        with gzip.open(ruta, "rt", encoding="utf-8") as f:
+            datos = json.load(f)
+        self.ruta = Path(ruta)
+        self.arboles = datos["arboles"]
+        self.eventos = datos["eventos"]
+        self._tiempos = [evento["t"] for evento in self.eventos]
+        self.acciones = []
+        self._origen = 0.0
+        self._inicio = time.time()
+
+    def start(self, t=0.0):
+        """Reinicia el reloj de reproducción en el instante `t` de la grabación"""
+        self._origen = t
+        self._inicio = time.time()
+
+    def now(self):
+        return self._origen + (time.time() - self._inicio)
+
+    def frame(self):
+        """Ventanas (nodos) del último snapshot grabado hasta el instante actual"""
+        import bisect
+        posicion = bisect.bisect_right(self._tiempos, self.now()) - 1
+        if posicion < 0:
+            return []
+        return [self.arboles[indice] for indice in self.eventos[posicion]["v"]]
+
+    def desktop(self):
+        return _DesktopReplay(self)
+
+
+class _DesktopReplay:
+    def __init__(self, reproduccion):
+        self._reproduccion = reproduccion
+
+    def windows(self, **criterios):
+        return [_ElementoReplay(nodo, self._reproduccion) for nodo in _filtrar(self._reproduccion.frame(), criterios)]
+
+    def window(self, **criterios):
+        return _SpecReplay(self._reproduccion.frame, criterios, self._reproduccion)
+
+
+class _ApplicationReplay:
+    """Application(backend="uia") sobre la reproducción (connect + window)"""
+
+    def __init__(self, reproduccion):
+        self._reproduccion = reproduccion
+
+    def connect(self, **criterios):
+        return self
+
+    def window(self, **criterios):
+        return _SpecReplay(self._reproduccion.frame, criterios, self._reproduccion)
+
+
+class _PyautoguiInerte:
+    """Sustituto de pyautogui durante la reproducción: no mueve el mouse ni escribe"""
+
+    FAILSAFE = False
+
+    def __getattr__(self, atributo):
+        return lambda *args, **kwargs: None
+
+
+def replay_benchmark(ruta):
+    """
+    Benchmark offline de la detección de diálogos sobre una grabación.
+
+    Agrupa los eventos consecutivos de cada detector (detect_*, wait_for_login_window)
+    en llamadas y reproduce cada una con los tiempos grabados: el detector corre
+    contra los snapshots y se mide cuánto tarda en responder frente a lo que tardó
+    en la corrida real.
+
+    Retorna:
+        - dict detector -> {"llamadas", "detectados", "grabado", "reproducido", "maximo"}
+    """
+    global UIA_REPRODUCCION, pyautogui
+
+    # El escritorio y el teclado se sustituyen solo mientras dura el benchmark
+    anteriores = (UIA_REPRODUCCION, pyautogui)
+    reproduccion = UIAReplay(ruta)
+    UIA_REPRODUCCION = reproduccion
+    pyautogui = _PyautoguiInerte()
+    try:
+        automatizacion = RSIRATAutomation32()
+
+        # Llamadas grabadas: (detector, timeout, inicio, fin)
+        llamadas = []
+        for evento in reproduccion.eventos:
+            metodo = evento.get("m")
+            if not metodo or not (metodo.startswith("detect_") or metodo == "wait_for_login_window"):
+                continue
+            if llamadas and llamadas[-1][0] == metodo and evento["t"] - llamadas[-1][3] < 1.0:
+                llamadas[-1][3] = evento["t"]
+            else:
+                llamadas.append([metodo, evento.get("to"), evento["t"], evento["t"]])
+
+        logger.info("\n" + "=" * 70)
+        logger.info(f"BENCHMARK DE REPRODUCCIÓN: {ruta} ({len(llamadas)} llamadas a detectores)")
+        logger.info("=" * 70)
+
+        estadisticas = {}
+        for metodo, timeout, inicio, fin in llamadas:
+            detector = getattr(automatizacion, metodo, None)
+            if detector is None:
+                continue
+
+            reproduccion.start(inicio)
+            t0 = time.time()
+            try:
+                resultado = detector(timeout=timeout if timeout is not None else 2)
+            except Exception as e:
+                logger.warning(f"{metodo} falló en la reproducción: {e}")
+                resultado = None
+            duracion = time.time() - t0
+
+            detectado = bool(resultado[0] if isinstance(resultado, tuple) else resultado)
+            datos = estadisticas.setdefault(
+                metodo, {"llamadas": 0, "detectados": 0, "grabado": 0.0, "reproducido": 0.0, "maximo": 0.0}
+            )
+            datos["llamadas"] += 1
+            datos["detectados"] += int(detectado)
+            datos["grabado"] += fin - inicio
+            datos["reproducido"] += duracion
+            datos["maximo"] = max(datos["maximo"], duracion)
+
+        for metodo, datos in sorted(estadisticas.items()):
+            logger.info(
+                f"  • {metodo}: {datos['llamadas']} llamadas, {datos['detectados']} detecciones | "
+                f"grabado {datos['grabado']:.2f}s, reproducido {datos['reproducido']:.2f}s "
+                f"(máx {datos['maximo']:.2f}s)"
+            )
+
+        return estadisticas
+    finally:
+        UIA_REPRODUCCION, pyautogui = anteriores
+
+
+class RSIRATAutomation32:
+    """Automatización de RSIRAT optimizada para 32-bit desde Python 64-bit"""
+    
+    def __init__(self, confidence_threshold=0.40, adjuntar=MODO_ADJUNTAR, entrada=None, salida=None,
+                 contrasena=None, cola=None, seleccion=None):
+        self.adjuntar = adjuntar
+
+        # Archivos de la corrida (por defecto, junto al ejecutable)
+        self.excel_entrada = Path(entrada) if entrada else SCRIPT_DIR / "EXPEDIENTES.xlsx"
+        self.excel_resultados = Path(salida) if salida else SCRIPT_DIR / "R_EXPEDIENTES.xlsx"
+        self.archivo_contrasena = Path(contrasena) if contrasena else SCRIPT_DIR / "contrasena.txt"
+        self.archivo_cola = Path(cola) if cola else COLA_ARCHIVO
+        # Filas que entran en la corrida: {"dependencia", "desde", "hasta", "maximo"} (vacío = todas)
+        self.seleccion = seleccion or {}
+
+        self.password = None
+        self.dependencia = None
+        self.expediente = None
+        self.dep_type = None  # "21" o "23" - Indica el BUCLE INICIAL a usar (no el tipo)
+        self.primer_expediente_idx = 0  # Índice del primer expediente válido encontrado
+        # Pantalla de SIRAT y cómo terminó el expediente anterior: decide si el siguiente
+        # entra desde Cobranza Coactiva, con Cambio de Expediente o directo en la selección
+        self.estado_sesion = SessionState()
+
+        # Coordenadas para desplazamiento del menú
+        self.trabar_embargo_coords = None  # Coordenadas de "Trabar Embargo"
+        self.proceso_embargo_coords = None  # Coordenadas de "Proceso de Embargo"
+
+        # Rutas aprendidas del menú (atajo a cada opción sin recorrer todos los descendientes)
+        self.navegacion = NavigationCache()
+
+        # Elementos traídos de UIA por cada búsqueda (walk_uia), para el resumen
+        self.busquedas_uia = {}
+
+        # Estado de reanudación (watchdog)
+        self.filas_terminadas = set()  # Filas (0-based) con resultado ya escrito
+        self.fila_en_curso = None  # Fila (0-based) que se está procesando en SIRAT
+        self.orden_filas = None  # Filas del lote actual en orden de procesamiento (None = orden del Excel)
+        self.reinicios_sesion = 0
+        self.watchdog = SIRATWatchdog(self.kill_sirat)
+
+        # Presupuesto por expediente y circuit breaker de la campaña
+        self.budget = ExpedienteBudget()
+        self.metricas = ExpedienteMetrics()
+        self.informe = RunReport()
+        self._marca_paso = time.time()  # Fin de la última pausa (inicio del paso siguiente)
+        self.breaker = CircuitBreaker()
+        self.ritmo = PacingGovernor()
+        self.diagnostico = DiagnosticsRecorder()
+
+        # Planificador del lote en curso (agrupa por tipo de medida)
+        self.scheduler = None
+
+        # Excel en memoria + preparación de los siguientes expedientes y escritura de resultados en segundo plano
+        self.prefetcher = ExpedientePrefetcher(self.excel_entrada)
+
+        # Arranque concurrente: SIRAT se lanza mientras un hilo carga el Excel y valida
+        self.sirat_lanzado = None  # time.time() del último lanzamiento del acceso directo
+        self.lanzamiento_pendiente = False  # True si SIRAT se lanzó y open_application aún no lo recibió
+        self.pids_previos = set()  # Procesos de SIRAT que ya existían antes de lanzarlo (cancel_launch no los toca)
+        self.preflight = None  # (True, bucle_inicial) o (False, mensaje) de validate_excel_columns
+        self.arranque = {}  # Resultado del hilo de arranque (grupos, orden de dependencias)
+        self.primer_expediente_en = None
+        # Sesión de SIRAT ya abierta encontrada en modo adjuntar:
+        # "21" / "23" (menú con esa dependencia), "login" (ventana de login) o None
+        self.sesion_adjunta = None
+
+        # Cambio de dependencia entre lotes
+        self.dependencia_lote = None  # "21" / "23" del lote en curso (define la dependencia del login)
+        self.sesion_activa = None  # Dependencia de la sesión que quedó abierta al terminar el lote anterior
+        self.cambios_dependencia = []  # (modo, segundos) con modo "en_sesion" o "relanzamiento"
+        self.duracion_apertura = None  # Segundos de la primera apertura + login (referencia de relanzamiento)
+
+        # Expedientes DSE resueltos como MONTO MAYOR en la grilla de selección (sin abrir el formulario)
+        self.montos_mayores_precheck = 0
+
+        # Último snapshot de textos de SIRAT (tiempo, solo Text, textos), compartido por los detectores de diálogos
+        self._snapshot_dialogos = None
+
+        # Almacén durable de la campaña (se abre en run() / run_worker()) y dueño de los leases.
+        # En modo worker los resultados solo van al almacén: el coordinador exporta el Excel.
+        self.cola = None
+        self.worker_id = f"run-{socket.gethostname()}-{os.getpid()}"
+        self.modo_worker = False
+
+    def load_expedientes(self):
+        """Retorna el DataFrame de EXPEDIENTES.xlsx desde memoria (se lee del disco una sola vez)"""
+        with self.metricas.medir("excel_io"):
+            return self.prefetcher.load()
+
+    def row_record(self, fila):
+        """Registro validado de una fila (preparado por el prefetch; si no, se prepara ahora)"""
+        with self.metricas.medir("excel_io"):
+            return self.prefetcher.record(fila)
+
+    def selected_rows(self, expedientes):
+        """Filas (0-based) de la corrida según self.seleccion (dependencia y rango de filas)"""
+        return seleccionar_filas(
+            expedientes,
+            dependencia=self.seleccion.get("dependencia"),
+            desde=self.seleccion.get("desde"),
+            hasta=self.seleccion.get("hasta"),
+        )
+
+    def write_result(self, archivo, fila, valor, apostrofe=False, plantilla=None):
+        """
+        Encola la escritura de un resultado en el Excel.
+        En modo worker no escribe: el resultado va a la cola y el coordinador lo vuelca.
+        """
+        if self.modo_worker:
+            return
+        # R_EXPEDIENTES.xlsx lleva también los tiempos del expediente (mismo guardado)
+        extras = None
+        if archivo == self.excel_resultados and self.metricas.fila == fila:
+            extras = columnas_metricas(
+                self.metricas.inicio, time.time(), self.metricas.intentos.get(fila), self.metricas.as_dict()
+            )
+        with self.metricas.medir("excel_io"):
+            self.prefetcher.write_result(archivo, fila, valor, apostrofe=apostrofe, plantilla=plantilla, extras=extras)
+
+    def check_row(self):
+        """
+        Corta el expediente en curso antes de seguir manejando la GUI (ExpedienteAbortado):
+        - sesión de SIRAT caída: la fila queda pendiente para el reinicio de la sesión
+        - presupuesto agotado: registra RESULTADO_PRESUPUESTO (una vez) y la fila se da por
+          terminada; el presupuesto sigue agotado hasta el próximo start_row
+        """
+        if self.sesion_caida():
+            raise ExpedienteAbortado(f"sesión de SIRAT caída: {self.watchdog.motivo}")
+        if not self.budget.exceeded():
+            return
+        fila = self.budget.fila
+        if fila not in self.filas_terminadas:
+            logger.warning(f"Fila {fila + 2}: presupuesto de {self.budget.presupuesto}s agotado, se abandona el expediente")
+            self.primer_expediente_idx = fila
+            self.update_excel_result(RESULTADO_PRESUPUESTO)
+            # record_row_result detiene el presupuesto: vuelve a quedar agotado hasta el próximo expediente
+            self.budget.expire(fila)
+        raise ExpedienteAbortado(f"fila {fila + 2}: presupuesto agotado")
+
+    def _escribir(self, texto):
+        """Digita `texto` con el intervalo entre teclas del gobernador de ritmo"""
+        self.check_row()
+        pyautogui.write(texto, interval=self.ritmo.intervalo)
+    
+    def _pausa(self, segundos):
+        """
+        Pausa entre pasos escalada por el gobernador de ritmo. Si toca, la captura
+        de diagnóstico se toma dentro de la pausa (descuenta su duración), solo
+        cuando la pausa alcanza para cubrir el costo medio de una captura; las
+        pausas cortas no se alargan.
+        Antes de pausar corta el expediente si la sesión cayó o se agotó su presupuesto.
+        """
+        self.check_row()
+        inicio = time.time()
+        metodo = sys._getframe(1).f_code.co_name
+        self.informe.record_step(metodo, inicio - self._marca_paso)
+        fin = inicio + segundos * self.ritmo.factor
+        if self.diagnostico.due() and fin - time.time() >= self.diagnostico.cost():
+            paso = f"{self.watchdog.paso} / {metodo}" if self.watchdog.paso else metodo
+            self.diagnostico.capture(paso, self.foreground_sirat_window())
+        restante = fin - time.time()
+        if restante > 0:
+            time.sleep(restante)
+        self._marca_paso = time.time()
+        self.metricas.pausas += self._marca_paso - inicio
+    
+    def foreground_sirat_window(self):
+        """hwnd de la ventana en primer plano si pertenece a SIRAT (incluye sus diálogos); si no, None"""
+        if sys.platform != "win32":
+            return None
+        try:
+            import ctypes
+            from ctypes import wintypes
+            user32 = ctypes.windll.user32
+            hwnd = user32.GetForegroundWindow()
+            pid = wintypes.DWORD()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            if pid.value in {pid_sirat for _h, pid_sirat, _t, _c in find_sirat_windows()}:
+                return hwnd
+        except Exception:
+            pass
+        return None
+    
+    def heartbeat(self, paso, tipo_presupuesto=None, fila=None):
+        """
+        Registra un latido del paso actual en el watchdog.
+
+        Args:
+            paso: Nombre descriptivo del paso (para el log)
+            tipo_presupuesto: Clave de PRESUPUESTOS_PASO ("apertura", "login", "navegacion", "expediente")
+            fila: Fila (0-based) en curso, si aplica
+        """
+        if fila is not None:
+            self.fila_en_curso = fila
+        self.watchdog.heartbeat(paso, PRESUPUESTOS_PASO.get(tipo_presupuesto), fila)
+
+    def sesion_caida(self):
+        """True si el watchdog detectó SIRAT colgado y la sesión debe reiniciarse"""
+        return self.watchdog.disparado
+
+    def resultado_descartado(self, row_idx, resultado):
+        """
+        True si el watchdog mató SIRAT mientras la fila estaba en curso: lo que el hilo
+        de la GUI alcanzó a leer (p. ej. "RC NO DETECTADO") no es el resultado del
+        expediente. No se escribe ni se marca la fila como terminada, así el reinicio
+        de la sesión la procesa de nuevo.
+        """
+        if not self.sesion_caida():
+            return False
+        logger.warning(
+            f"Fila {row_idx + 2}: sesión de SIRAT caída ({self.watchdog.motivo}), "
+            f"se descarta '{resultado}' y la fila queda pendiente"
+        )
+        return True
+
+    def kill_sirat(self, motivo=""):
+        """
+        Mata los procesos de SIRAT (llamado desde el hilo del watchdog).
+        Usa taskkill sobre los PID de las ventanas de SIRAT encontradas.
+        """
+        self.diagnostico.flush(f"watchdog: {motivo}", forzar=True)
+        if not self.close_sirat_processes(f"Watchdog: {motivo}"):
+            logger.warning("Watchdog: no se encontraron procesos de SIRAT para cerrar")
+            return False
+        return True
+
+    def close_sirat_processes(self, motivo):
+        """
+        Cierra los procesos de SIRAT con ventana abierta (find_sirat_windows + taskkill).
+        A diferencia de ALT+F4, no depende de qué ventana tiene el foco.
+
+        Retorna:
+            - True si había procesos de SIRAT para cerrar
+            - False si no se encontró ninguno
+        """
+        pids = {pid for hwnd, pid, titulo, colgada in find_sirat_windows()}
+        if not pids:
+            return False
+        self.terminate_processes(pids, motivo)
+        return True
+
+    def terminate_processes(self, pids, motivo):
+        """taskkill /F sobre los PID de SIRAT indicados"""
+        for pid in sorted(pids):
+            try:
+                logger.warning(f"Cerrando SIRAT (PID {pid}) - {motivo}")
+                subprocess.run(["taskkill", "/PID", str(pid), "/F"], capture_output=True, timeout=15)
+            except Exception as e:
+                logger.error(f"No se pudo cerrar el proceso {pid}: {e}")
+
+    def cancel_launch(self):
+        """
+        Cierra el SIRAT lanzado al arrancar que ningún lote llegó a usar (preflight fallido
+        o sin expedientes que procesar). El acceso directo no devuelve el proceso: se espera
+        a que aparezca su ventana (hasta ESPERA_APERTURA + ESPERA_CARGA) y se cierran solo
+        los procesos de SIRAT que no existían antes del lanzamiento.
+        """
+        if not self.lanzamiento_pendiente:
+            return
+        self.lanzamiento_pendiente = False
+        limite = (self.sirat_lanzado or time.time()) + ESPERA_APERTURA + ESPERA_CARGA
+        while True:
+            nuevos = {pid for hwnd, pid, titulo, colgada in find_sirat_windows()} - self.pids_previos
+            if nuevos or time.time() >= limite:
+                break
+            time.sleep(1)
+        if not nuevos:
+            logger.warning("El SIRAT lanzado al arrancar no apareció, no hay nada que cerrar")
+            return
+        self.terminate_processes(nuevos, "lanzado al arrancar y no utilizado")
+
+    def restart_sirat_session(self):
+        """
+        Relanza SIRAT (open_application + login) después de un cuelgue detectado por el watchdog.
+        La siguiente fila pendiente (la que estaba en curso) se procesa desde Cobranza Coactiva.
+
+        Retorna:
+            - True si la sesión se reinició correctamente
+            - False si se alcanzó MAX_REINICIOS_SESION o falló la apertura/login
+        """
+        self.ritmo.record_failure(f"watchdog: {self.watchdog.motivo}")
+        if self.reinicios_sesion >= MAX_REINICIOS_SESION:
+            logger.error(f"Se alcanzó el máximo de reinicios de sesión ({MAX_REINICIOS_SESION})")
+            return False
+
+        self.reinicios_sesion += 1
+        logger.warning("\n" + "=" * 70)
+        logger.warning(f"REINICIANDO SESIÓN DE SIRAT ({self.reinicios_sesion}/{MAX_REINICIOS_SESION})")
+        logger.warning(f"Motivo: {self.watchdog.motivo}")
+        if self.fila_en_curso is not None:
+            logger.warning(f"Se reanudará en la fila {self.fila_en_curso + 2}")
+        logger.warning("=" * 70)
+
+        self.watchdog.reset()
+        inicio = time.time()
+        time.sleep(2)
+
+        if not self.open_session():
+            return False
+
+        self.informe.record_session("reinicio por cuelgue", time.time() - inicio)
+        return True
+
+    def open_session(self):
+        """Abre SIRAT y hace login. Deja la sesión lista para entrar desde Cobranza Coactiva."""
+        if not self.open_application():
+            logger.error("No se pudo abrir la aplicación")
+            return False
+
+        logger.info("Esperando carga de la aplicación...")
+        transcurrido = time.time() - self.sirat_lanzado
+        time.sleep(max(0.0, ESPERA_APERTURA + ESPERA_CARGA - transcurrido))
+
+        logger.info("Procediendo con el login...")
+        if not self.login():
+            logger.warning("No se pudo completar el login")
+            return False
+
+        self.estado_sesion.reset()
+        self.watchdog.idle()
+        self.budget.stop()
+        return True
+
+    def find_existing_session(self):
+        """
+        Busca una sesión de SIRAT ya abierta y determina su dependencia desde la ventana principal
+        (título y textos de la ventana del menú).
+
+        Retorna:
+            - "21" o "23" si hay una sesión iniciada con esa dependencia
+            - "login" si SIRAT está abierto en la ventana de login
+            - "?" si hay un menú abierto pero no se reconoce la dependencia
+            - None si no hay SIRAT abierto
+        """
+        ventanas = find_sirat_windows()
+        if not ventanas:
+            return None
+
+        if any(colgada for hwnd, pid, titulo, colgada in ventanas):
+            logger.warning("Hay una ventana de SIRAT que no responde, se cerrará y se relanzará")
+            self.kill_sirat("Ventana de SIRAT colgada al adjuntar")
+            return None
+
+        menus = [(hwnd, titulo) for hwnd, pid, titulo, colgada in ventanas if REGEX_VENTANA_MENU.match(titulo)]
+        if not menus:
+            logger.info("SIRAT ya está abierto en la ventana de login")
+            return "login"
+
+        for hwnd, titulo in menus:
+            dependencia = parse_dependencia(titulo)
+            if dependencia:
+                return dependencia
+
+            try:
+                ventana = Desktop(backend="uia").window(handle=hwnd)
+                for elemento in self.walk_uia(ventana, "Dependencia de la sesión"):
+                    dependencia = parse_dependencia(elemento.window_text())
+                    if dependencia:
+                        return dependencia
+            except Exception as e:
+                logger.warning(f"No se pudo leer la ventana '{titulo}': {e}")
+
+        logger.warning("Hay un menú de SIRAT abierto pero no se reconoce su dependencia")
+        return "?"
+
+    def close_attached_session(self):
+        """Cierra la sesión de SIRAT encontrada en modo adjuntar (ALT+F4 sobre el menú)"""
+        self.sesion_adjunta = None
+        try:
+            for hwnd, pid, titulo, colgada in find_sirat_windows():
+                if REGEX_VENTANA_MENU.match(titulo):
+                    Desktop(backend="uia").window(handle=hwnd).set_focus()
+                    time.sleep(0.5)
+                    pyautogui.hotkey('alt', 'f4')
+                    time.sleep(2)
+                    logger.info(f" ✓ Sesión de SIRAT cerrada: {titulo}")
+        except Exception as e:
+            logger.warning(f" Error cerrando la sesión existente: {e}")
+
+    def ensure_session(self, dependencia):
+        """
+        Deja lista una sesión de SIRAT para la dependencia del lote:
+        - Sesión adjunta con la MISMA dependencia: se reutiliza (sin apertura ni login)
+        - SIRAT adjunto en la ventana de login: solo login
+        - Sesión del lote anterior abierta: switch_dependencia(); si no vuelve al login,
+          se cierran los procesos de SIRAT (no ALT+F4) y open_session()
+        - En otro caso: open_session() (acceso directo + login)
+        """
+        adjunta, self.sesion_adjunta = self.sesion_adjunta, None
+        anterior, self.sesion_activa = self.sesion_activa, None
+        self.dependencia_lote = dependencia
+
+        if adjunta == dependencia:
+            logger.info(f"Reutilizando sesión de SIRAT ya abierta (dependencia {dependencia}): sin apertura ni login")
+        elif adjunta == "login":
+            logger.info("Reutilizando SIRAT abierto: solo login")
+            inicio = time.time()
+            if not self.login():
+                logger.warning("No se pudo completar el login")
+                return False
+            self.informe.record_session("login", time.time() - inicio)
+        elif anterior is not None:
+            # Sesión del lote anterior abierta: cambiar de dependencia sin relanzar si SIRAT lo permite
+            inicio = time.time()
+            if self.switch_dependencia(dependencia):
+                self.cambios_dependencia.append(("en_sesion", time.time() - inicio))
+            else:
+                # La opción del menú pudo haberse invocado sin llegar al login: ALT+F4 a ciegas
+                # podría cerrar otra ventana o dejar un segundo SIRAT abierto
+                logger.info("Cambio de dependencia en sesión no disponible, cerrando SIRAT y relanzando...")
+                if self.close_sirat_processes("cambio de dependencia en sesión no disponible"):
+                    limite = time.time() + ESPERA_CIERRE_SIRAT
+                    while find_sirat_windows() and time.time() < limite:
+                        time.sleep(0.5)
+                if not self.open_session():
+                    return False
+                self.cambios_dependencia.append(("relanzamiento", time.time() - inicio))
+            self.informe.record_session(f"cambio de dependencia ({self.cambios_dependencia[-1][0]})", time.time() - inicio)
+        else:
+            inicio = time.time()
+            if not self.open_session():
+                return False
+            if self.duracion_apertura is None:
+                self.duracion_apertura = time.time() - inicio
+            self.informe.record_session("apertura + login", time.time() - inicio)
+
+        self.sesion_activa = dependencia
+        self.estado_sesion.reset()
+        self.watchdog.idle()
+        self.budget.stop()
+        return True
+
+    def switch_dependencia(self, dependencia):
+        """
+        Cambia de dependencia dentro del proceso de SIRAT en curso:
+        invoca la opción del menú que vuelve a la ventana de login
+        (PATRON_CAMBIO_DEPENDENCIA) y hace login con la nueva dependencia.
+
+        Retorna:
+            - True si se hizo login con la nueva dependencia sin relanzar
+            - False si SIRAT no ofrece la opción o no volvió al login (usar ALT+F4 + relanzar)
+        """
+        logger.info("\n" + "=" * 70)
+        logger.info(f"CAMBIO DE DEPENDENCIA EN SESIÓN → {DEPENDENCIAS.get(dependencia, dependencia)}")
+        logger.info("=" * 70)
+        self.heartbeat("Cambio de dependencia", "login")
+
+        try:
+            desktop = Desktop(backend="uia")
+            menu = desktop.window(title_re=VENTANA_MENU, class_name=CLASE_APLICACION)
+            if not menu.exists(timeout=2):
+                logger.info("No se encontró el menú de SIRAT")
+                return False
+
+            opcion = None
+            for elemento in self.walk_uia(menu, "Cambio de dependencia"):
+                try:
+                    if re.search(PATRON_CAMBIO_DEPENDENCIA, elemento.window_text() or ""):
+                        opcion = elemento
+                        break
+                except Exception:
+                    continue
+
+            if opcion is None:
+                logger.info("SIRAT no ofrece una opción para cambiar de dependencia en el menú")
+                return False
+
+            logger.info(f"Usando opción del menú: '{opcion.window_text()}'")
+            try:
+                opcion.invoke()
+            except Exception:
+                opcion.click_input()
+
+            # Esperar a que el menú se cierre y aparezca la ventana de login del mismo proceso
+            end_time = time.time() + ESPERA_LOGIN_CAMBIO
+            while time.time() < end_time:
+                titulos = [titulo for hwnd, pid, titulo, colgada in find_sirat_windows()]
+                if titulos and not any(REGEX_VENTANA_MENU.match(titulo) for titulo in titulos) and "SIRAT" in titulos:
+                    break
+                time.sleep(0.5)
+            else:
+                logger.warning("SIRAT no volvió a la ventana de login")
+                return False
+
+            if not self.login():
+                logger.warning("No se pudo completar el login con la nueva dependencia")
+                return False
+
+            logger.info(" ✓ Dependencia cambiada sin relanzar SIRAT")
+            return True
+
+        except Exception as e:
+            logger.warning(f"Error cambiando de dependencia en sesión: {e}")
+            return False
+
+    def close_session(self):
+        """Cierra SIRAT con ALT+F4 (siguiente apertura: acceso directo + login)"""
+        logger.info("\nCerrando aplicación con ALT+F4...")
+        self.sesion_activa = None
+        try:
+            pyautogui.hotkey('alt', 'f4')
+            time.sleep(2)
+            logger.info(" ✓ Aplicación cerrada")
+        except Exception as e:
+            logger.warning(f" Error en ALT+F4: {e}")
+
+    def report_dependencia_switches(self):
+        """Loguea el tiempo de cada cambio de dependencia y el ahorro frente a relanzar SIRAT"""
+        if not self.cambios_dependencia:
+            return
+
+        en_sesion = [segundos for modo, segundos in self.cambios_dependencia if modo == "en_sesion"]
+        relanzamientos = [segundos for modo, segundos in self.cambios_dependencia if modo == "relanzamiento"]
+
+        logger.info("Cambios de dependencia:")
+        for modo, segundos in self.cambios_dependencia:
+            logger.info(f"  • {modo}: {segundos:.1f}s")
+
+        # Costo de relanzar: medido en esta corrida, o la primera apertura + login como referencia
+        if relanzamientos:
+            costo_relanzar = sum(relanzamientos) / len(relanzamientos)
+        else:
+            costo_relanzar = self.duracion_apertura
+
+        if en_sesion and costo_relanzar:
+            ahorro = costo_relanzar - sum(en_sesion) / len(en_sesion)
+            logger.info(
+                f"Ahorro por cambio en sesión: {ahorro:.1f}s "
+                f"(relanzar ≈ {costo_relanzar:.1f}s) | Total: {ahorro * len(en_sesion):.1f}s"
+            )
+
+    def start_row(self, row_idx):
+        """
+        Marca el inicio de UN expediente: respeta el circuit breaker (pausa si está abierto),
+        inicia su presupuesto de tiempo y registra el latido en el watchdog.
+
+        Lanza ExpedienteAbortado si el circuit breaker terminó disparando el watchdog:
+        el SIRAT de esta sesión ya se cerró y no hay que digitar nada en él.
+        """
+        if not self.wait_for_circuit() or self.sesion_caida():
+            raise ExpedienteAbortado(f"sesión de SIRAT caída antes de la fila {row_idx + 2}")
+        self.budget.start(row_idx)
+        self.metricas.start(row_idx)
+        self._marca_paso = time.time()
+        if self.scheduler:
+            self.scheduler.on_row_start(row_idx)
+        self.heartbeat(f"Expediente fila {row_idx + 2}", "expediente", row_idx)
+
+        # Modo normal: registrar el inicio en el almacén (en modo worker lo hace tomar())
+        if self.cola is not None and not self.modo_worker:
+            try:
+                self.cola.iniciar(row_idx, self.worker_id)
+            except Exception as e:
+                logger.warning(f"No se pudo registrar el inicio de la fila {row_idx + 2} en el almacén: {e}")
+
+        if self.primer_expediente_en is None:
+            self.primer_expediente_en = time.time()
+            logger.info(f"Arranque en frío hasta el primer expediente: {self.primer_expediente_en - INICIO_PROCESO:.1f}s")
+
+        # Mientras SIRAT procesa esta fila, preparar las siguientes en segundo plano
+        total = len(self.load_expedientes())
+        self.prefetcher.prefetch(self.filas_pendientes(total, excluir=row_idx))
+
+    def record_row_result(self, row_idx, resultado):
+        """
+        Registra el resultado escrito para una fila: la marca como terminada y
+        alimenta el circuit breaker (fallo si SIRAT no respondió o se agotó el presupuesto).
+        Con la sesión caída no registra nada: la fila queda pendiente para el reinicio.
+        """
+        if self.resultado_descartado(row_idx, resultado):
+            return
+        self.filas_terminadas.add(row_idx)
+        self.estado_sesion.record_result(resultado)
+
+        if self.cola is not None:
+            metricas = self.metricas.as_dict() if self.metricas.fila == row_idx else None
+            try:
+                if not self.cola.completar(row_idx, self.worker_id, resultado, metricas):
+                    logger.warning(f"Fila {row_idx + 2}: el lease ya no pertenece a este worker, resultado descartado")
+            except Exception as e:
+                logger.error(f"No se pudo registrar el resultado de la fila {row_idx + 2} en el almacén: {e}")
+
+        try:
+            expedientes = self.load_expedientes()
+            self.informe.record_row(
+                dependencia_de_fila(expedientes, row_idx),
+                detect_medida_tipo(expedientes.iloc[row_idx].get("TIPO DE MEDIDA", "")),
+                resultado,
+                self.metricas if self.metricas.fila == row_idx else None,
+            )
+        except Exception as e:
+            logger.warning(f"No se pudo registrar la fila {row_idx + 2} en el informe: {e}")
+
+        texto = str(resultado).strip().upper() if resultado is not None else ""
+        agotado = self.budget.exceeded()
+
+        if agotado or texto.startswith(RESULTADOS_FALLO):
+            if agotado:
+                logger.warning(f"Fila {row_idx + 2}: presupuesto de {self.budget.presupuesto}s agotado")
+            self.diagnostico.flush(f"fila {row_idx + 2}: {'presupuesto agotado' if agotado else texto}")
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+        # Ritmo: presupuesto agotado o un diálogo esperado que no apareció (RC no detectada)
+        # indican que SIRAT no siguió el ritmo. Los campos mal digitados se señalan donde
+        # se verifican (INTERVENTOR / PLAZO) y los cuelgues en restart_sirat_session()
+        if agotado or texto.startswith(RESULTADOS_FALLO):
+            self.ritmo.record_failure("presupuesto agotado" if agotado else texto)
+        elif clasificar_resultado(resultado)[0] == "done":
+            self.ritmo.record_success()
+
+        # Con el resultado escrito, lo que sigue (p. ej. Cambio de Expediente) ya no es de esta fila
+        if self.budget.fila == row_idx:
+            self.budget.stop()
+
+    def probe_sirat_health(self):
+        """
+        Sondea si SIRAT está sano: su ventana existe y responde.
+
+        Retorna:
+            - True si SIRAT responde
+            - False si no hay ventana o está colgada
+        """
+        try:
+            for hwnd, pid, titulo, colgada in find_sirat_windows():
+                if colgada:
+                    logger.warning(f"Sondeo: la ventana '{titulo}' no responde")
+                    return False
+
+            desktop = Desktop(backend="uia")
+            if desktop.window(title_re=VENTANA_SIRAT).exists(timeout=2):
+                return True
+
+            return desktop.window(title_re=VENTANA_MENU).exists(timeout=2)
+        except Exception as e:
+            logger.warning(f"Sondeo de SIRAT falló: {e}")
+            return False
+
+    def wait_for_circuit(self):
+        """
+        Si el circuit breaker está abierto, pausa la campaña con backoff exponencial
+        y sondea SIRAT hasta que responda. Si tras BREAKER_MAX_SONDEOS no responde,
+        dispara el watchdog para reiniciar la sesión.
+
+        Retorna:
+            - True si se puede seguir (circuito cerrado o SIRAT respondió)
+            - False si se disparó el watchdog (la sesión se reinicia)
+        """
+        if not self.breaker.is_open():
+            return True
+
+        for sondeo in range(1, BREAKER_MAX_SONDEOS + 1):
+            espera = self.breaker.backoff()
+            logger.warning("=" * 70)
+            logger.warning(f"CIRCUIT BREAKER ABIERTO: pausando campaña {espera}s (sondeo {sondeo}/{BREAKER_MAX_SONDEOS})")
+            logger.warning("=" * 70)
 
-logger.info(f"Directorio de trabajo: {SCRIPT_DIR}")
-logger.info(f"Arquitectura Python: {'64-bit' if sys.maxsize > 2**32 else '32-bit'}")
+            # Sin paso en curso mientras se espera (el watchdog no debe dispararse)
+            self.watchdog.idle()
+            time.sleep(espera)
+            self.breaker.record_pause(espera)
 
+            if self.probe_sirat_health():
+                logger.info("SIRAT responde, reanudando con un expediente de prueba")
+                self.breaker.half_open()
+                return True
 
+            self.breaker.record_failed_probe()
 
+        logger.error("SIRAT no se recuperó tras el backoff, solicitando reinicio de sesión")
+        self.breaker.half_open()
+        self.watchdog.trigger("SIRAT no respondió a los sondeos del circuit breaker")
+        return False
+
+    def filas_pendientes(self, total, excluir=None):
+        """
+        Retorna las filas (0-based) que faltan procesar, en el orden del lote actual.
+        Omite las filas que ya tienen resultado escrito (no se reprocesan tras un reinicio).
+
+        Args:
+            total: Cantidad de filas del Excel
+            excluir: Fila adicional a omitir (ej: la que se acaba de procesar)
+        """
+        self.reclaim_failed_writes()
+        orden = self.orden_filas if self.orden_filas is not None else range(total)
+        return [
+            fila for fila in orden
+            if fila < total and fila not in self.filas_terminadas and fila != excluir
+        ]
+
+    def reclaim_failed_writes(self):
+        """
+        Reclama los resultados cuyo guardado en Excel falló en el hilo de escritura
+        (la fila ya estaba en filas_terminadas):
+        - si el resultado quedó en el almacén, la fila sigue cerrada y se marca sin
+          exportar: la exportación del almacén la vuelve a escribir
+        - si no, la fila sale de filas_terminadas y queda pendiente
+
+        Retorna:
+            - Lista de (archivo, fila, valor) reclamados
+        """
+        fallidas = self.prefetcher.failed_writes()
+        if not fallidas:
+            return fallidas
+
+        cerradas = set()
+        if self.cola is not None:
+            try:
+                cerradas = self.cola.filas_cerradas()
+            except Exception as e:
+                logger.error(f"No se pudo consultar el almacén: {e}")
+
+        for archivo, fila, valor in fallidas:
+            if fila in cerradas:
+                logger.error(
+                    f"Fila {fila + 2}: no se pudo guardar '{valor}' en {Path(archivo).name}; "
+                    f"el resultado queda en el almacén y se exportará de nuevo"
+                )
+            else:
+                self.filas_terminadas.discard(fila)
+                logger.error(
+                    f"Fila {fila + 2}: no se pudo guardar '{valor}' en {Path(archivo).name}; la fila queda pendiente"
+                )
+
+        exportar = sorted({fila for _archivo, fila, _valor in fallidas} & cerradas)
+        if exportar:
+            try:
+                self.cola.marcar_sin_exportar(exportar)
+            except Exception as e:
+                logger.error(f"No se pudieron marcar las filas {exportar} para exportar: {e}")
+        return fallidas
 
-class RSIRATAutomation32:
-    """Automatización de RSIRAT optimizada para 32-bit desde Python 64-bit"""
-    
-    def __init__(self, confidence_threshold=0.40):
-        self.password = None
-        self.dependencia = None
-        self.expediente = None
-        self.dep_type = None  # "21" o "23" - Indica el BUCLE INICIAL a usar (no el tipo)
-        self.primer_expediente_idx = 0  # Índice del primer expediente válido encontrado
-        # Indica si el expediente anterior quedó completamente procesado
-        # (RC extraída o MONTO MAYOR registrado). Usada para decidir
-        # si se puede ejecutar `click_cambio_expediente()` antes del
-        # siguiente expediente.
-        self.last_exp_completed = False
-        
-        # Coordenadas para desplazamiento del menú
-        self.trabar_embargo_coords = None  # Coordenadas de "Trabar Embargo"
-        self.proceso_embargo_coords = None  # Coordenadas de "Proceso de Embargo"
-    
     def validate_expediente_row(self, expedientes, row_idx):
         """
         Valida que un expediente específico tenga todos los datos necesarios.
         
         Verificaciones:
+        0. EXPEDIENTE de 13 dígitos y RUC (si viene) con dígito verificador correcto:
+           se rechazan sin digitarlos en SIRAT
         1. DEPENDENCIA: No vacío
         2. TIPO DE MEDIDA: IEI o DSE
         3. Si IEI: INTERVENTOR y PLAZO no vacíos
@@ -80,6 +4237,16 @@ class RSIRATAutomation32:
             fila = expedientes.iloc[row_idx]
             errores = []
             
+            # ============================================================
+            # 0. VALIDAR FORMATO DE EXPEDIENTE Y RUC (sin pasar por SIRAT)
+            # ============================================================
+            if normalizar_expediente(fila.get("EXPEDIENTE", "")) is None:
+                return (False, "NRO EXPEDIENTE INVALIDO")
+            
+            ruc = str(fila.get("RUC", "")).strip()
+            if ruc and ruc.upper() != "NAN" and not ruc_valido(ruc):
+                return (False, "RUC INVALIDO")
+            
             # ============================================================
             # 1. VALIDAR DEPENDENCIA
             # ============================================================
@@ -305,7 +4472,7 @@ class RSIRATAutomation32:
         """Carga contraseña desde archivo y lee Excel para determinar dependencia"""
         try:
             # Cargar contraseña
-            password_file = SCRIPT_DIR / "contrasena.txt"
+            password_file = self.archivo_contrasena
             if not password_file.exists():
                 logger.error(f"Archivo de contraseña no encontrado: {password_file}")
                 return False
@@ -316,13 +4483,13 @@ class RSIRATAutomation32:
             logger.info("Contraseña cargada correctamente")
             
             # Cargar Excel - especificar dtype para columns numéricas como string
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
+            excel_file = self.excel_entrada
             if not excel_file.exists():
                 logger.error(f"Archivo Excel no encontrado: {excel_file}")
                 return False
             
-            # Leer con dtype object para preservar formato original
-            expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+            # Leer con dtype object para preservar formato original (ya en memoria si corrió el preflight)
+            expedientes = self.load_expedientes()
             
             if "DEPENDENCIA" not in expedientes.columns:
                 logger.error("El Excel no contiene la columna 'DEPENDENCIA'")
@@ -331,7 +4498,7 @@ class RSIRATAutomation32:
             # ============================================================
             # VALIDAR COLUMNAS OBLIGATORIAS SEGÚN TIPO DE MEDIDA
             # ============================================================
-            columnas_validas, tipo_o_error = self.validate_excel_columns(expedientes)
+            columnas_validas, tipo_o_error = self.preflight or self.validate_excel_columns(expedientes)
             
             if not columnas_validas:
                 logger.error(f" VALIDACIÓN FALLIDA: {tipo_o_error}")
@@ -341,10 +4508,12 @@ class RSIRATAutomation32:
             # Asignar tipo detectado por TIPO DE MEDIDA
             self.dep_type = tipo_o_error
             
-            # Mapear dependencia por tipo detectado
+            # Mapear dependencia: la del lote en curso o, si no hay lote, la más usada
             # IMPORTANTE: Ahora IEI y DSE pueden aparecer en AMBAS dependencias (21 y 23)
-            # Por lo tanto, solo asignamos la dependencia según el tipo inicial
-            if self.dep_type == "21":
+            if self.dependencia_lote in DEPENDENCIAS:
+                self.dependencia = DEPENDENCIAS[self.dependencia_lote]
+                logger.info(f" Dependencia del lote: {self.dependencia_lote}")
+            elif self.dep_type == "21":
                 self.dependencia = "0021 I.R. Lima - PRICO"
                 logger.info(" Dependencia inicial: 21 (PRICO)")
                 logger.info("IMPORTANTE: Esta dependencia puede contener IEI, DSE o ambos")
@@ -386,7 +4555,7 @@ class RSIRATAutomation32:
                     pass
                 
                 try:
-                    win = desktop.window(title_re=".*SIRAT.*")
+                    win = desktop.window(title_re=VENTANA_SIRAT)
                     if win.exists(timeout=1):
                         handle = win.handle
                         app = Application(backend="uia").connect(handle=handle)
@@ -404,481 +4573,186 @@ class RSIRATAutomation32:
             logger.error(f"Error esperando login: {str(e)}")
             return None, None
     
-    def detect_password_error(self, timeout=2):
-        """
-        Detecta si hay un mensaje de error de contraseña incorrecta usando MSAA.
-        Busca controles de tipo Text que contengan palabras clave de error.
-        Sin OCR ni coordenadas - solo inspección de elementos de la UI.
-        
-        Retorna:
-            - Tupla (True, mensaje) si se detecta error
-            - Tupla (False, "") si no hay error
-        """
-        try:
-            logger.info("Verificando si hay mensaje de error...")
-            desktop = Desktop(backend="uia")
-            end_time = time.time() + timeout
-            
-            while time.time() < end_time:
-                try:
-                    # Obtener todas las ventanas visibles
-                    all_windows = desktop.windows()
-                    
-                    for win in all_windows:
-                        try:
-                            # Obtener todos los descendientes
-                            all_descendants = list(win.descendants())
-                            
-                            # Buscar controles de tipo Text con palabras clave
-                            for desc in all_descendants:
-                                try:
-                                    # Obtener control_type y texto
-                                    control_type = None
-                                    texto = ""
-                                    
-                                    try:
-                                        if hasattr(desc, 'element_info'):
-                                            control_type = desc.element_info.control_type
-                                    except:
-                                        pass
-                                    
-                                    try:
-                                        texto = desc.window_text()
-                                    except:
-                                        pass
-                                    
-                                    # Verificar si es un control Text con contenido
-                                    if control_type == "Text" and texto and len(texto.strip()) > 0:
-                                        # Buscar palabras clave de error
-                                        texto_lower = texto.lower()
-                                        palabras_clave = [
-                                            "no puede ser accedido",
-                                            "estimado usuario",
-                                            "aplicativo"
-                                        ]
-                                        
-                                        if any(palabra in texto_lower for palabra in palabras_clave):
-                                            logger.error(f"Mensaje de error detectado: {texto}")
-                                            return (True, texto)
-                                
-                                except:
-                                    pass
-                        
-                        except:
-                            pass
-                
-                except:
-                    pass
-                
-                time.sleep(0.3)
-            
-            return (False, "")
-        
-        except Exception as e:
-            logger.error(f"Error en detect_password_error: {e}")
-            return (False, "")
-    
-    def detect_monto_aviso(self, timeout=2):
-        """
-        Detecta y extrae el mensaje de aviso que aparece después de presionar ALT+A en DSE.
-        Puede variar dependiendo del monto ingresado (ej: "El monto ingresado excede en más del 20% el Saldo del Expediente").
-        
-        Usa MSAA para inspeccionar controles de tipo Text sin OCR ni coordenadas.
-        
-        Retorna:
-            - Tupla (True, mensaje) si se detecta un mensaje de aviso
-            - Tupla (False, "") si no hay mensaje
-        """
-        try:
-            logger.info("Verificando si hay mensaje de aviso del MONTO...")
-            desktop = Desktop(backend="uia")
-            end_time = time.time() + timeout
-            
-            while time.time() < end_time:
-                try:
-                    # Obtener todas las ventanas visibles
-                    all_windows = desktop.windows()
-                    
-                    for win in all_windows:
-                        try:
-                            # Obtener todos los descendientes
-                            all_descendants = list(win.descendants())
-                            
-                            # Buscar controles de tipo Text que contengan mensajes
-                            for desc in all_descendants:
-                                try:
-                                    # Obtener control_type y texto
-                                    control_type = None
-                                    texto = ""
-                                    
-                                    try:
-                                        if hasattr(desc, 'element_info'):
-                                            control_type = desc.element_info.control_type
-                                    except:
-                                        pass
-                                    
-                                    try:
-                                        texto = desc.window_text()
-                                    except:
-                                        pass
-                                    
-                                    # Verificar si es un control Text con contenido y es un mensaje de aviso
-                                    if control_type == "Text" and texto and len(texto.strip()) > 0:
-                                        # Buscar palabras clave típicas de mensajes de aviso/error
-                                        texto_lower = texto.lower()
-                                        palabras_clave = [
-                                            "monto",
-                                            "excede",
-                                            "saldo",
-                                            "expediente",
-                                            "aviso",
-                                            "error"
-                                        ]
-                                        
-                                        if any(palabra in texto_lower for palabra in palabras_clave):
-                                            logger.info(f"Mensaje de aviso detectado: {texto}")
-                                            return (True, texto)
-                                
-                                except:
-                                    pass
-                        
-                        except:
-                            pass
-                
-                except:
-                    pass
-                
-                time.sleep(0.3)
-            
-            return (False, "")
-        
-        except Exception as e:
-            logger.error(f"Error en detect_monto_aviso: {e}")
-            return (False, "")
-    
-    def detect_expediente_error(self, timeout=2):
-        """
-        Detecta si hay un mensaje de error de expediente inválido usando MSAA.
-        Busca controles de tipo Text que contengan palabras clave de error.
-        
-        Mensaje esperado: "El número de Expediente Coactivo ingresado no es válido"
-        
-        Sin OCR ni coordenadas - solo inspección de elementos de la UI.
-        
-        Retorna:
-            - Tupla (True, mensaje) si se detecta error
-            - Tupla (False, "") si no hay error
-        """
-        try:
-            logger.info("Verificando si hay mensaje de error de expediente...")
-            desktop = Desktop(backend="uia")
-            end_time = time.time() + timeout
-            
-            while time.time() < end_time:
-                try:
-                    # Obtener todas las ventanas visibles
-                    all_windows = desktop.windows()
-                    
-                    for win in all_windows:
-                        try:
-                            # Obtener todos los descendientes
-                            all_descendants = list(win.descendants())
-                            
-                            # Buscar controles de tipo Text que contengan mensajes
-                            for desc in all_descendants:
-                                try:
-                                    # Obtener control_type y texto
-                                    control_type = None
-                                    texto = ""
-                                    
-                                    try:
-                                        if hasattr(desc, 'element_info'):
-                                            control_type = desc.element_info.control_type
-                                    except:
-                                        pass
-                                    
-                                    try:
-                                        texto = desc.window_text()
-                                    except:
-                                        pass
-                                    
-                                    # Verificar si es un control Text con contenido relacionado a expediente
-                                    if control_type == "Text" and texto and len(texto.strip()) > 0:
-                                        # Buscar palabras clave típicas de error de expediente
-                                        texto_lower = texto.lower()
-                                        palabras_clave = [
-                                            "expediente",
-                                            "ingresado",
-                                            "válido",
-                                            "no es válido",
-                                            "coactivo"
-                                        ]
-                                        
-                                        # Búsqueda específica del patrón
-                                        if ("expediente" in texto_lower and "válido" in texto_lower) or \
-                                           ("expediente" in texto_lower and "ingresado" in texto_lower):
-                                            logger.warning(f"Error de expediente detectado: {texto}")
-                                            return (True, texto)
-                                
-                                except:
-                                    pass
-                        
-                        except:
-                            pass
-                
-                except:
-                    pass
-                
-                time.sleep(0.3)
-            
-            return (False, "")
-        
-        except Exception as e:
-            logger.error(f"Error en detect_expediente_error: {e}")
-            return (False, "")
-    
-    def detect_expediente_aviso(self, timeout=2):
-        """
-        Detecta si hay un mensaje de aviso de expediente después de presionar ALT+A en IEI.
-        Este aviso es específico de Dependencia 21 (PRICO - Trabar Intervención en Información).
-        
-        Busca DOS tipos de mensajes posibles:
-        1. Si hay embargos activos: "El Expediente..."
-        2. Si NO hay embargos: "¿Desea Ud. grabar la Resolución?"
-        
-        Usa MSAA para inspeccionar controles de tipo Text sin OCR ni coordenadas.
-        
-        Retorna:
-            - Tupla (True, mensaje) si se detecta un mensaje de aviso
-            - Tupla (False, "") si no hay mensaje
-        """
-        try:
-            logger.info("Verificando si hay mensaje de aviso de expediente (IEI)...")
-            desktop = Desktop(backend="uia")
-            end_time = time.time() + timeout
-            
-            while time.time() < end_time:
-                try:
-                    # Obtener todas las ventanas visibles
-                    all_windows = desktop.windows()
-                    
-                    for win in all_windows:
-                        try:
-                            # Obtener todos los descendientes
-                            all_descendants = list(win.descendants())
-                            
-                            # Buscar controles de tipo Text que contengan mensajes
-                            for desc in all_descendants:
-                                try:
-                                    # Obtener control_type y texto
-                                    control_type = None
-                                    texto = ""
-                                    
-                                    try:
-                                        if hasattr(desc, 'element_info'):
-                                            control_type = desc.element_info.control_type
-                                    except:
-                                        pass
-                                    
-                                    try:
-                                        texto = desc.window_text()
-                                    except:
-                                        pass
-                                    
-                                    # Verificar si es un control Text con contenido
-                                    if control_type == "Text" and texto and len(texto.strip()) > 0:
-                                        # Búsqueda ROBUSTA: múltiples palabras clave
-                                        texto_lower = texto.lower()
-                                        
-                                        # Patrón: "El Expediente XXX correspondiente al RUC XXX tiene X Embargos activos..."
-                                        # Búsqueda robusta: "expediente" + "ruc" + "embargo" + "activo"
-                                        if ("expediente" in texto_lower and 
-                                            "ruc" in texto_lower and 
-                                            "embargo" in texto_lower and 
-                                            "activo" in texto_lower):
-                                            logger.warning(f"Aviso de embargos activos detectado")
-                                            return (True, texto)
-                                
-                                except:
-                                    pass
-                        
-                        except:
-                            pass
-                
-                except:
-                    pass
-                
-                time.sleep(0.3)
-            
-            return (False, "")
-        
-        except Exception as e:
-            logger.error(f"Error en detect_expediente_aviso: {e}")
-            return (False, "")
-    
-    def extract_ruc_from_message(self, mensaje):
-        """
-        Extrae el número RUC del mensaje de aviso de expediente.
-        
-        Ejemplo: "El Expediente XXX correspondiente al RUC 12345678910..."
-        Retorna: "12345678910"
-        
-        Args:
-            mensaje: Texto del mensaje que contiene el RUC
-            
-        Retorna:
-            - String con el número RUC si se encuentra
-            - String vacío "" si no se encuentra
-        """
-        try:
-            logger.info("Extrayendo RUC del mensaje...")
-            
-            # Buscar "RUC" en el mensaje (case-insensitive)
-            ruc_index = mensaje.upper().find("RUC")
-            
-            if ruc_index == -1:
-                logger.warning("No se encontró 'RUC' en el mensaje")
-                return ""
-            
-            # Obtener el texto después de "RUC"
-            texto_despues_ruc = mensaje[ruc_index + 3:].strip()
-            
-            logger.info(f"Texto después de 'RUC': '{texto_despues_ruc[:50]}'")
-            
-            # Extraer los primeros dígitos consecutivos (el RUC)
-            ruc = ""
-            for caracter in texto_despues_ruc:
-                if caracter.isdigit():
-                    ruc += caracter
-                elif ruc:  # Si ya tenemos dígitos y encontramos un no-dígito, parar
-                    break
-            
-            if ruc:
-                logger.info(f" RUC extraído: {ruc}")
-                return ruc
-            else:
-                logger.warning("No se encontraron dígitos después de 'RUC'")
-                return ""
-        
-        except Exception as e:
-            logger.error(f"Error extrayendo RUC: {e}")
-            return ""
-    
-    def detect_resolucion_coactiva_aviso(self, timeout=2):
+    def snapshot_dialog_texts(self, solo_texto=False):
         """
-        Detecta el mensaje de confirmación de Resolución Coactiva después de ALT+S en IEI.
-        Busca el patrón: "Se grabó la Resolución Coactiva con el número XXXX..."
-        
-        Usa MSAA para inspeccionar controles de tipo Text sin OCR ni coordenadas.
-        
-        Retorna:
-            - Tupla (True, mensaje) si se detecta el mensaje
-            - Tupla (False, "") si no hay mensaje
+        Snapshot de los textos visibles de SIRAT: (control_type, texto, texto en minúsculas)
+        de los descendientes de las ventanas de los procesos de SIRAT (si no se
+        identifican, de todas las ventanas). Un snapshot reciente (SNAPSHOT_VIGENCIA) se
+        reutiliza, de modo que varios detectores seguidos no recorren el escritorio otra vez.
+
+        Con CacheRequest (bulk_uia) cada ventana se lee en una sola llamada. Sin él,
+        con solo_texto=True la búsqueda se filtra en UIA (control_type="Text"), así que
+        solo se traen los textos de esos controles; un snapshot completo también sirve.
         """
-        try:
-            logger.info("Verificando si hay mensaje de Resolución Coactiva...")
-            desktop = Desktop(backend="uia")
-            end_time = time.time() + timeout
-            
-            while time.time() < end_time:
-                try:
-                    all_windows = desktop.windows()
-                    
-                    for win in all_windows:
-                        try:
-                            all_descendants = list(win.descendants())
-                            
-                            for desc in all_descendants:
-                                try:
-                                    control_type = None
-                                    texto = ""
-                                    
-                                    try:
-                                        if hasattr(desc, 'element_info'):
-                                            control_type = desc.element_info.control_type
-                                    except:
-                                        pass
-                                    
-                                    try:
-                                        texto = desc.window_text()
-                                    except:
-                                        pass
-                                    
-                                    # Verificar si es un control Text que contiene "Se grabó la Resolución Coactiva"
-                                    if control_type == "Text" and texto and len(texto.strip()) > 0:
-                                        # Buscar patrón "Se grabó la Resolución Coactiva" (case-insensitive)
-                                        if "se grabó" in texto.lower() and "resolución coactiva" in texto.lower():
-                                            logger.warning(f" MENSAJE DE RESOLUCIÓN COACTIVA DETECTADO: {texto[:100]}...")
-                                            return (True, texto)
-                                
-                                except:
-                                    pass
-                        
-                        except:
-                            pass
-                
-                except:
-                    pass
-                
-                time.sleep(0.3)
-            
-            return (False, "")
+        ahora = time.time()
+        if self._snapshot_dialogos:
+            tomado, parcial, textos = self._snapshot_dialogos
+            if ahora - tomado < SNAPSHOT_VIGENCIA and (solo_texto or not parcial):
+                return textos
+        
+        pids = {pid for hwnd, pid, titulo, colgada in find_sirat_windows()}
+        criterios = {"control_type": "Text"} if solo_texto else {}
+        textos = []
+        for win in Desktop(backend="uia").windows():
+            try:
+                if pids and win.element_info.process_id not in pids:
+                    continue
+                cacheados = bulk_uia(win)
+                if cacheados is not None:
+                    for desc in cacheados:
+                        if desc.name.strip() and (not solo_texto or desc.control_type == "Text"):
+                            textos.append((desc.control_type, desc.name, desc.name.lower()))
+                    continue
+                for desc in win.descendants(**criterios):
+                    try:
+                        texto = desc.window_text()
+                        if texto and texto.strip():
+                            control_type = "Text" if solo_texto else desc.element_info.control_type
+                            textos.append((control_type, texto, texto.lower()))
+                    except Exception:
+                        pass
+            except Exception:
+                pass
         
-        except Exception as e:
-            logger.error(f"Error en detect_resolucion_coactiva_aviso: {e}")
-            return (False, "")
+        self._snapshot_dialogos = (time.time(), solo_texto, textos)
+        return textos
     
-    def extract_resolucion_coactiva_number(self, mensaje):
+    def match_dialogs(self, nombres, timeout=2):
         """
-        Extrae el número de Resolución Coactiva del mensaje.
-        
-        Ejemplo: "Se grabó la Resolución Coactiva con el número 0290079364147"
-        Retorna: "0290079364147"
-        
+        Espera a que aparezca alguno de los diálogos registrados en DIALOGOS_SIRAT.
+        Cada snapshot se evalúa contra todos los diálogos pedidos en una sola pasada.
+
         Args:
-            mensaje: Texto del mensaje que contiene el número de RC
-            
+            nombres: Nombre o lista de nombres de DIALOGOS_SIRAT
+            timeout: Segundos máximos de espera
+
         Retorna:
-            - String con el número de RC si se encuentra (preservando 0 inicial)
-            - String vacío "" si no se encuentra
+            - Tupla (nombre, texto, dato extraído o None) del primer diálogo encontrado
+            - Tupla (None, "", None) si no aparece ninguno
         """
+        if isinstance(nombres, str):
+            nombres = [nombres]
+        definiciones = [(nombre, DIALOGOS_SIRAT[nombre]) for nombre in nombres]
+        intervalo = min(definicion["intervalo"] for _, definicion in definiciones)
+        solo_texto = all(definicion["solo_texto"] for _, definicion in definiciones)
+        if any(definicion["presupuesto"] for _, definicion in definiciones):
+            timeout = self.budget.clip(timeout)
+        
+        inicio_espera = time.time()
         try:
-            logger.info("Extrayendo número de Resolución Coactiva del mensaje...")
-            
-            # Buscar "número" en el mensaje (case-insensitive)
-            numero_index = mensaje.lower().find("número")
-            
-            if numero_index == -1:
-                logger.warning("No se encontró 'palabra 'número' en el mensaje")
-                return ""
-            
-            # Obtener el texto después de "número"
-            texto_despues_numero = mensaje[numero_index + 6:].strip()
-            
-            logger.info(f"Texto después de 'número': '{texto_despues_numero[:50]}'")
+            for _, definicion in definiciones:
+                logger.info(definicion["verificando"])
+            end_time = time.time() + timeout
             
-            # Extraer los primeros dígitos consecutivos (el número de RC)
-            rc_number = ""
-            for caracter in texto_despues_numero:
-                if caracter.isdigit():
-                    rc_number += caracter
-                elif rc_number:  # Si ya se encontraron dígitos y ahora hay no-dígito, parar
-                    break
+            while time.time() < end_time:
+                try:
+                    for control_type, texto, texto_lower in self.snapshot_dialog_texts(solo_texto):
+                        for nombre, definicion in definiciones:
+                            if definicion["solo_texto"] and control_type != "Text":
+                                continue
+                            if definicion["regex"].match(texto_lower):
+                                logger.log(definicion["nivel"], definicion["detectado"].format(texto=texto))
+                                dato = None
+                                if definicion.get("regex_extraer"):
+                                    encontrado = definicion["regex_extraer"].search(texto)
+                                    dato = encontrado.group(1) if encontrado else None
+                                self.metricas.ruta.append(nombre)
+                                return (nombre, texto, dato)
+                except Exception:
+                    pass
+                
+                time.sleep(intervalo)
             
-            if rc_number:
-                logger.info(f" Número de RC extraído: {rc_number}")
-                return rc_number
-            else:
-                logger.warning("No se encontraron dígitos después de 'número'")
-                return ""
+            return (None, "", None)
         
         except Exception as e:
-            logger.error(f"Error extrayendo número de RC: {e}")
-            return ""
+            logger.error(f"Error en match_dialogs({', '.join(nombres)}): {e}")
+            return (None, "", None)
+        
+        finally:
+            self.metricas.espera_dialogos += time.time() - inicio_espera
+    
+    def respond_dialog(self, nombre):
+        """Responde un diálogo con su tecla por defecto (DIALOGOS_SIRAT[nombre]["respuesta"])"""
+        respuesta = DIALOGOS_SIRAT[nombre]["respuesta"]
+        logger.info(f"Presionando {respuesta.upper()}...")
+        if "+" in respuesta:
+            pyautogui.hotkey(*respuesta.split("+"))
+        else:
+            pyautogui.press("return" if respuesta == "enter" else respuesta)
+        self._pausa(1)
+        logger.info(f" {respuesta.upper()} presionado")
+    
+    def detect_password_error(self, timeout=2):
+        """
+        Detecta si hay un mensaje de error de contraseña incorrecta ("El aplicativo no puede
+        ser accedido...", ver DIALOGOS_SIRAT["password_error"]).
+
+        Retorna:
+            - Tupla (True, mensaje) si se detecta error
+            - Tupla (False, "") si no hay error
+        """
+        encontrado, texto, _ = self.match_dialogs("password_error", timeout)
+        return (True, texto) if encontrado else (False, "")
+    
+    def detect_monto_aviso(self, timeout=2):
+        """
+        Detecta el aviso que aparece después de presionar ALT+A en DSE
+        (ej: "El monto ingresado excede en más del 20% el Saldo del Expediente").
+
+        Retorna:
+            - Tupla (True, mensaje) si se detecta un mensaje de aviso
+            - Tupla (False, "") si no hay mensaje
+        """
+        encontrado, texto, _ = self.match_dialogs("monto_aviso", timeout)
+        return (True, texto) if encontrado else (False, "")
+    
+    def detect_expediente_error(self, timeout=2):
+        """
+        Detecta el mensaje de expediente inválido
+        ("El número de Expediente Coactivo ingresado no es válido").
+
+        Retorna:
+            - Tupla (True, mensaje) si se detecta error
+            - Tupla (False, "") si no hay error
+        """
+        encontrado, texto, _ = self.match_dialogs("expediente_error", timeout)
+        return (True, texto) if encontrado else (False, "")
+    
+    def detect_expediente_aviso(self, timeout=2):
+        """
+        Detecta el aviso de embargos activos después de ALT+A en IEI
+        ("El Expediente XXX correspondiente al RUC XXX tiene X Embargos activos...").
+
+        Retorna:
+            - Tupla (True, mensaje) si se detecta un mensaje de aviso
+            - Tupla (False, "") si no hay mensaje
+        """
+        encontrado, texto, _ = self.match_dialogs("expediente_aviso", timeout)
+        return (True, texto) if encontrado else (False, "")
+    
+    def detect_resolucion_coactiva_aviso(self, timeout=2):
+        """
+        Detecta el mensaje de confirmación "Se grabó la Resolución Coactiva con el número XXXX..."
+        y extrae el número de RC (DIALOGOS_SIRAT["resolucion_coactiva"]["extraer"], conserva el 0 inicial).
+
+        Retorna:
+            - Tupla (True, mensaje, número de RC o "" si no se pudo extraer) si se detecta el mensaje
+            - Tupla (False, "", "") si no hay mensaje
+        """
+        encontrado, texto, rc_number = self.match_dialogs("resolucion_coactiva", timeout)
+        if not encontrado:
+            return (False, "", "")
+        if rc_number:
+            logger.info(f" Número de RC extraído: {rc_number}")
+        else:
+            logger.warning("No se encontró el número de RC en el mensaje")
+        return (True, texto, rc_number or "")
     
     def login(self):
         try:
             logger.info("\nIniciando proceso de login...")
+            self.heartbeat("Login", "login")
             
             # Cargar credenciales
             if not self.load_credentials():
@@ -895,8 +4769,8 @@ class RSIRATAutomation32:
             # Buscar campos de entrada
             logger.info("Buscando campos de dependencia y contraseña...")
             try:
-                dependencia_edit = dlg.child_window(auto_id="1001", control_type="Edit")
-                password_edit = dlg.child_window(auto_id="1005", control_type="Edit")
+                dependencia_edit = dlg.child_window(auto_id=AUTO_IDS_LOGIN["dependencia"], control_type="Edit")
+                password_edit = dlg.child_window(auto_id=AUTO_IDS_LOGIN["contrasena"], control_type="Edit")
                 logger.info("Campos encontrados por auto_id")
             except Exception as e:
                 logger.warning(f"No se encontraron campos por auto_id: {e}")
@@ -995,7 +4869,7 @@ class RSIRATAutomation32:
             
             while time.time() - start_wait < max_wait:
                 try:
-                    menu_window = app.window(title_re=".*Menú.*")
+                    menu_window = app.window(title_re=VENTANA_MENU)
                     if menu_window and menu_window.is_visible():
                         menu_detected = True
                         logger.info("Menú de opciones detectado")
@@ -1021,7 +4895,26 @@ class RSIRATAutomation32:
         logger.info("INICIANDO AUTOMATIZACIÓN DE RSIRAT (32-BIT)")
         logger.info("=" * 70)
         logger.info(f"Buscando acceso directo en: {SHORTCUT_PATH}")
+        self.heartbeat("Apertura de SIRAT", "apertura")
+        
+        # Arranque concurrente: el acceso directo ya se lanzó en run()
+        if self.lanzamiento_pendiente:
+            self.lanzamiento_pendiente = False
+            transcurrido = time.time() - self.sirat_lanzado
+            logger.info(f"SIRAT se lanzó hace {transcurrido:.1f}s (arranque concurrente)")
+            time.sleep(max(0.0, ESPERA_APERTURA - transcurrido))
+            logger.info("Aplicación abierta correctamente")
+            return True
+        
+        if not self.launch_sirat():
+            return False
         
+        time.sleep(ESPERA_APERTURA)
+        logger.info("Aplicación abierta correctamente")
+        return True
+    
+    def launch_sirat(self):
+        """Lanza el acceso directo de RSIRAT sin esperar a que abra"""
         if not SHORTCUT_PATH.exists():
             logger.error(f"Acceso directo no encontrado: {SHORTCUT_PATH}")
             return False
@@ -1029,8 +4922,7 @@ class RSIRATAutomation32:
         try:
             logger.info(f"Abriendo: {SHORTCUT_PATH.name}")
             os.startfile(str(SHORTCUT_PATH))
-            time.sleep(4)
-            logger.info("Aplicación abierta correctamente")
+            self.sirat_lanzado = time.time()
             return True
         except Exception as e:
             logger.error(f"Error al abrir aplicación: {str(e)}")
@@ -1047,66 +4939,26 @@ class RSIRATAutomation32:
             resultado: El texto a escribir en la columna RESULTADO
         """
         try:
+            if self.resultado_descartado(self.primer_expediente_idx, resultado):
+                return False
             logger.info(f"Actualizando R_EXPEDIENTES.xlsx con resultado: {resultado}")
             
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            resultado_file = SCRIPT_DIR / "R_EXPEDIENTES.xlsx"
+            excel_file = self.excel_entrada
+            resultado_file = self.excel_resultados
             
             if not excel_file.exists():
                 logger.error(f"Archivo Excel no encontrado: {excel_file}")
                 return False
             
-            # Si R_EXPEDIENTES.xlsx no existe, crear una copia del original
-            from openpyxl import load_workbook
-            from openpyxl.styles import numbers
-            
-            if not resultado_file.exists():
-                logger.info("R_EXPEDIENTES.xlsx no existe, creando copia del Excel original...")
-                import shutil
-                shutil.copy(excel_file, resultado_file)
-            
-            # Abrir R_EXPEDIENTES.xlsx
-            wb = load_workbook(resultado_file)
-            ws = wb.active
-            
-            # Encontrar la columna RESULTADO o crearla
-            headers = {}
-            for col_idx, cell in enumerate(ws[1], 1):
-                if cell.value:
-                    headers[cell.value] = col_idx
-            
-            # Si no existe la columna RESULTADO, crearla
-            if "RESULTADO" not in headers:
-                resultado_col = len(headers) + 1
-                ws.cell(row=1, column=resultado_col, value="RESULTADO")
-            else:
-                resultado_col = headers["RESULTADO"]
-            
             # Escribir el resultado en la fila correcta (basada en primer_expediente_idx)
             # primer_expediente_idx es 0-based, así que row = idx + 2 (fila 1 = header, fila 2 = idx 0)
             target_row = self.primer_expediente_idx + 2
             logger.info(f"Escribiendo resultado en fila {target_row} (idx={self.primer_expediente_idx})")
-            celda_resultado = ws.cell(row=target_row, column=resultado_col, value=resultado)
             
-            # Forzar formato de texto para preservar el 0 inicial
-            if isinstance(resultado, str) and resultado.isdigit():
-                celda_resultado.number_format = '@'
-            
-            # Guardar el archivo
-            wb.save(resultado_file)
-            logger.info(f"R_EXPEDIENTES.xlsx actualizado correctamente (fila {target_row})")
-            # Actualizar estado de completado según resultado escrito
-            try:
-                if isinstance(resultado, str):
-                    res_up = resultado.strip().upper()
-                    if resultado.isdigit() or res_up == 'MONTO MAYOR':
-                        self.last_exp_completed = True
-                    else:
-                        self.last_exp_completed = False
-                else:
-                    self.last_exp_completed = False
-            except Exception:
-                pass
+            # El guardado se hace en el hilo de prefetch (si R_EXPEDIENTES.xlsx no existe, se copia del original)
+            self.write_result(resultado_file, self.primer_expediente_idx, resultado, plantilla=excel_file)
+            logger.info(f"Resultado encolado para R_EXPEDIENTES.xlsx (fila {target_row})")
+            self.record_row_result(self.primer_expediente_idx, resultado)
             return True
         
         except Exception as e:
@@ -1122,49 +4974,20 @@ class RSIRATAutomation32:
             motivo: Razón por la que es inválido (ej: "FALTA MONTO", "FALTA INTERVENTOR", etc.)
         """
         try:
+            if self.resultado_descartado(row_idx, motivo):
+                return False
             logger.info(f"Marcando expediente inválido en fila {row_idx + 2}...")
             logger.info(f"Motivo: {motivo}")
             
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            resultado_file = SCRIPT_DIR / "R_EXPEDIENTES.xlsx"
-            
-            from openpyxl import load_workbook
-            
-            # Si R_EXPEDIENTES.xlsx no existe, crear una copia del original
-            if not resultado_file.exists():
-                logger.info("R_EXPEDIENTES.xlsx no existe, creando copia del Excel original...")
-                import shutil
-                shutil.copy(excel_file, resultado_file)
-            
-            # Abrir R_EXPEDIENTES.xlsx
-            wb = load_workbook(resultado_file)
-            ws = wb.active
+            excel_file = self.excel_entrada
+            resultado_file = self.excel_resultados
             
-            # Encontrar la columna RESULTADO o crearla
-            headers = {}
-            for col_idx, cell in enumerate(ws[1], 1):
-                if cell.value:
-                    headers[cell.value] = col_idx
-            
-            # Si no existe la columna RESULTADO, crearla
-            if "RESULTADO" not in headers:
-                resultado_col = len(headers) + 1
-                ws.cell(row=1, column=resultado_col, value="RESULTADO")
-            else:
-                resultado_col = headers["RESULTADO"]
-            
-            # Escribir el motivo en la fila especificada
+            # Escribir el motivo en la fila especificada (guardado en el hilo de prefetch;
+            # si R_EXPEDIENTES.xlsx no existe, se crea una copia del original)
             target_row = row_idx + 2
-            ws.cell(row=target_row, column=resultado_col, value=motivo)
-            
-            # Guardar el archivo
-            wb.save(resultado_file)
+            self.write_result(resultado_file, row_idx, motivo, plantilla=excel_file)
             logger.info(f" Expediente marcado como inválido en R_EXPEDIENTES.xlsx (fila {target_row}): {motivo}")
-            # Marcar que el expediente NO quedó completado
-            try:
-                self.last_exp_completed = False
-            except Exception:
-                pass
+            self.record_row_result(row_idx, motivo)
             return True
         
         except Exception as e:
@@ -1189,6 +5012,8 @@ class RSIRATAutomation32:
         logger.info("=" * 70)
         
         try:
+            self.heartbeat("Navegación a Cobranza Coactiva", "navegacion")
+            
             # PASO 1: Buscar y clicar "Cobranza Coactiva"
             logger.info("\nPASO 1: Buscando 'Cobranza Coactiva'...")
             if not self._click_cobranza_coactiva_element():
@@ -1234,6 +5059,109 @@ class RSIRATAutomation32:
             logger.error(f"Error en click_cobranza_coactiva: {str(e)}")
             return False
     
+    def walk_uia(self, raiz, busqueda, control_types=None):
+        """
+        Descendientes de `raiz` para una búsqueda, en orden de documento en ambos casos:
+        - Con CacheRequest (bulk_uia): todo el subárbol y sus propiedades en una llamada;
+          nombre, tipo y rectángulo se leen localmente
+        - Si no está disponible: recorrido perezoso iter_uia()
+
+        Al terminar (o al cortarse en el primer resultado) registra y loguea cuántos
+        elementos se trajeron de UIA para `busqueda`: con CacheRequest, el subárbol
+        entero (aunque se corte antes); con iter_uia, los hijos de cada nodo expandido.
+        """
+        contador = [0]
+        cacheada = False
+        try:
+            cacheados = bulk_uia(raiz)
+            if cacheados is None:
+                yield from iter_uia(raiz, control_types=control_types, contador=contador)
+                return
+            cacheada = True
+            contador[0] = len(cacheados)
+            for elemento in cacheados:
+                if control_types is None or elemento.control_type in control_types:
+                    yield elemento
+        finally:
+            self.busquedas_uia.setdefault(busqueda, []).append(contador[0])
+            logger.info(
+                f"Búsqueda UIA '{busqueda}': {contador[0]} elementos traídos "
+                f"({'CacheRequest' if cacheada else 'recorrido perezoso'})"
+            )
+    
+    def report_uia_lookups(self):
+        """Loguea el promedio de elementos traídos de UIA por búsqueda"""
+        if not self.busquedas_uia:
+            return
+        logger.info("Búsquedas UIA (elementos traídos, promedio / máximo):")
+        for busqueda, traidos in sorted(self.busquedas_uia.items()):
+            logger.info(
+                f"  • {busqueda}: {sum(traidos) / len(traidos):.0f} / {max(traidos)} "
+                f"en {len(traidos)} búsqueda(s)"
+            )
+    
+    def navigate(self, destino):
+        """
+        Atajo a una opción del menú con la ruta aprendida (NavigationCache): la
+        resuelve, ejecuta la acción de NAVEGACION_DESTINOS y espera la llegada con
+        una sola comprobación barata en vez de la espera fija.
+
+        Como en la búsqueda completa, solo se hace clic si la opción tiene rectángulo y
+        está en pantalla; si no, se invoca. Si la acción falla, la ruta se olvida.
+
+        Retorna:
+            - Tupla (x, y) del centro de la opción si se usó el atajo con clic
+            - True si se usó el atajo con invoke() (sin coordenadas reutilizables)
+            - None si no hay ruta, no coincide o falló (el llamador hace la búsqueda completa)
+        """
+        inicio = time.time()
+        elemento = self.navegacion.resolve(destino)
+        if elemento is None:
+            if destino in self.navegacion.rutas:
+                logger.info(f"Navegación: la ruta de '{destino}' ya no coincide, búsqueda completa")
+                self.navegacion.forget(destino)
+                self.navegacion.fallos += 1
+            return None
+        
+        config = NAVEGACION_DESTINOS[destino]
+        try:
+            rect = elemento.rectangle()
+            x, y = (rect.left + rect.right) // 2, (rect.top + rect.bottom) // 2
+            if rect.width() <= 0 or rect.height() <= 0 or not pyautogui.onScreen(x, y):
+                logger.info(f"Navegación: '{destino}' sin coordenadas válidas, intentando invoke...")
+                elemento.invoke()
+                x = y = None
+            elif config["accion"] == "doble":
+                pyautogui.doubleClick(x, y)
+            elif config["accion"] == "clics4":
+                for i in range(4):
+                    pyautogui.click(x, y)
+                    self._pausa(0.3)
+            else:
+                pyautogui.click(x, y)
+        except Exception as e:
+            logger.warning(f"Navegación: no se pudo actuar sobre '{destino}': {e}, búsqueda completa")
+            self.navegacion.forget(destino)
+            self.navegacion.fallos += 1
+            return None
+        
+        # Llegada: siguiente opción del menú resoluble / ventana abierta (o la espera original)
+        llegada = config["llegada"]
+        limite = time.time() + config["espera"]
+        if llegada is None or (llegada[0] == "elemento" and llegada[1] not in self.navegacion.rutas):
+            time.sleep(config["espera"])
+        elif llegada[0] == "ventana":
+            if not Desktop(backend="uia").window(title_re=llegada[1]).exists(timeout=config["espera"]):
+                logger.warning(f"Navegación: no se confirmó la llegada tras '{destino}'")
+        else:
+            while self.navegacion.resolve(llegada[1]) is None and time.time() < limite:
+                time.sleep(0.1)
+        
+        self.navegacion.aciertos += 1
+        self.navegacion.tiempos.append(time.time() - inicio)
+        logger.info(f" '{destino}' por ruta aprendida ({(time.time() - inicio) * 1000:.0f} ms)")
+        return True if x is None else (x, y)
+    
     def _click_cobranza_coactiva_element(self):
         """
         Búsqueda INTERNA de "Cobranza Coactiva" - Solo busca y clica el elemento.
@@ -1241,12 +5169,15 @@ class RSIRATAutomation32:
         """
         logger.info("Buscando elemento 'Cobranza Coactiva' en menú...")
         
+        if self.navigate("Cobranza Coactiva"):
+            return True
+        
         try:
             desktop = Desktop(backend="uia")
             
             # Buscar ventana del menú
             try:
-                win = desktop.window(title_re=".*Menú.*")
+                win = desktop.window(title_re=VENTANA_MENU)
                 if win.exists(timeout=1):
                     logger.info("Ventana de menú encontrada")
                     app_window = win
@@ -1254,7 +5185,7 @@ class RSIRATAutomation32:
                     raise Exception("Ventana de menú no encontrada")
             except:
                 try:
-                    win = desktop.window(title_re=".*SIRAT.*")
+                    win = desktop.window(title_re=VENTANA_SIRAT)
                     if win.exists(timeout=1):
                         logger.info("Ventana SIRAT encontrada")
                         app_window = win
@@ -1266,7 +5197,7 @@ class RSIRATAutomation32:
             
             # Buscar "Cobranza Coactiva" en descendientes
             try:
-                descendants = list(app_window.descendants())
+                descendants = self.walk_uia(app_window, "Cobranza Coactiva")
                 
                 for descendant in descendants:
                     try:
@@ -1274,6 +5205,7 @@ class RSIRATAutomation32:
                         
                         if window_text == "Cobranza Coactiva":
                             logger.info(f"✓ 'Cobranza Coactiva' encontrado")
+                            self.navegacion.learn("Cobranza Coactiva", descendant)
                             rect = descendant.rectangle()
                             
                             if rect.left > 0 or rect.top > 0:
@@ -1281,7 +5213,7 @@ class RSIRATAutomation32:
                                 center_y = (rect.top + rect.bottom) // 2
                                 logger.info(f"Haciendo clic en ({center_x}, {center_y})")
                                 pyautogui.click(center_x, center_y)
-                                time.sleep(1)
+                                self._pausa(1)
                                 logger.info(" Clic completado")
                                 return True
                     except:
@@ -1303,13 +5235,17 @@ class RSIRATAutomation32:
         """
         logger.info("Buscando 'Exp. Cob. Coactiva - Individual' para hacer 4 clics...")
         
+        if self.navigate("Exp. Cob. Coactiva - Individual"):
+            logger.info("Procediendo a ingresar expediente...")
+            return self.enter_expediente_field()
+        
         try:
             desktop = Desktop(backend="uia")
             
             # Buscar ventana de menú o principal
             menu_windows = []
             try:
-                win = desktop.window(title_re=".*Menú.*")
+                win = desktop.window(title_re=VENTANA_MENU)
                 if win.exists(timeout=1):
                     menu_windows.append(win)
                     logger.info(f"Ventana de menú encontrada: {win.window_text()}")
@@ -1319,7 +5255,7 @@ class RSIRATAutomation32:
             # Si no se encontró ventana de menú, buscar ventana SIRAT general
             if not menu_windows:
                 try:
-                    win = desktop.window(title_re=".*SIRAT.*")
+                    win = desktop.window(title_re=VENTANA_SIRAT)
                     if win.exists(timeout=1):
                         menu_windows.append(win)
                         logger.info(f"Ventana SIRAT encontrada: {win.window_text()}")
@@ -1340,6 +5276,7 @@ class RSIRATAutomation32:
                 exp_control = app_window.child_window(title="Exp. Cob. Coactiva - Individual")
                 if exp_control.exists(timeout=2):
                     logger.info("Control 'Exp. Cob. Coactiva - Individual' encontrado por titulo exacto")
+                    self.navegacion.learn("Exp. Cob. Coactiva - Individual", exp_control.wrapper_object())
                     for i in range(4):
                         try:
                             # Obtener coordenadas del control
@@ -1348,7 +5285,7 @@ class RSIRATAutomation32:
                             center_y = (rect.top + rect.bottom) // 2
                             logger.info(f"Clic {i+1}/4 en coordenadas: ({center_x}, {center_y})")
                             pyautogui.click(center_x, center_y)
-                            time.sleep(0.3)
+                            self._pausa(0.3)
                         except Exception as e:
                             logger.warning(f"Error en clic {i+1}/4: {e}")
                             time.sleep(0.3)
@@ -1364,7 +5301,7 @@ class RSIRATAutomation32:
             # Buscar en descendientes
             try:
                 logger.info("Buscando en descendientes del control...")
-                descendants = app_window.descendants()
+                descendants = self.walk_uia(app_window, "Exp. Cob. Coactiva - Individual")
                 
                 for descendant in descendants:
                     try:
@@ -1373,6 +5310,8 @@ class RSIRATAutomation32:
                         if "Exp. Cob. Coactiva" in desc_text and "Individual" in desc_text:
                             logger.info(f"Encontrado control: {desc_text}")
                             logger.info(f"Control type: {descendant.element_info.control_type}")
+                            if desc_text == "Exp. Cob. Coactiva - Individual":
+                                self.navegacion.learn(desc_text, descendant)
                             
                             # Hacer 4 clics usando coordenadas directas
                             for i in range(4):
@@ -1382,7 +5321,7 @@ class RSIRATAutomation32:
                                     center_y = (rect.top + rect.bottom) // 2
                                     logger.info(f"Clic {i+1}/4 en coordenadas: ({center_x}, {center_y})")
                                     pyautogui.click(center_x, center_y)
-                                    time.sleep(0.3)
+                                    self._pausa(0.3)
                                 except Exception as err:
                                     logger.warning(f"Error en clic {i+1}/4: {err}")
                                     time.sleep(0.3)
@@ -1424,29 +5363,34 @@ class RSIRATAutomation32:
         5. Si no hay error: Continúa con validación de ejecutor (ALT+A)
         """
         # Cargar datos del Excel
-        excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-        expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+        expedientes = self.load_expedientes()
         
-        # Procesar expedientes hasta encontrar uno válido
-        for idx in range(len(expedientes)):
+        # Procesar expedientes pendientes (en el orden del lote) hasta encontrar uno válido
+        for idx in self.filas_pendientes(len(expedientes)):
+            if self.sesion_caida():
+                logger.error("Sesión de SIRAT caída, interrumpiendo ingreso de expediente")
+                return False
+            
             exp_actual = str(expedientes.iloc[idx]["EXPEDIENTE"]).strip()
+            self.start_row(idx)
             
             logger.info(f"\nIntentando expediente {idx + 1} de {len(expedientes)}: {exp_actual}")
             
             try:
                 # Digitar el expediente
                 logger.info(f"Digitando expediente: '{exp_actual}'")
-                pyautogui.write(exp_actual, interval=0.05)
+                self._escribir(exp_actual)
+                self.estado_sesion.typed(exp_actual)
                 logger.info(f" Expediente '{exp_actual}' ingresado")
-                time.sleep(0.5)
+                self._pausa(0.5)
                 
                 # Presionar Enter para verificar expediente
                 logger.info("Presionando Enter para verificar expediente...")
                 pyautogui.press('return')
-                time.sleep(1)
+                self._pausa(1)
                 
                 # Pequeña pausa para que aparezca el posible error
-                time.sleep(0.5)
+                self._pausa(0.5)
                 
                 # Verificar si hay mensaje de error de expediente
                 error_detected, error_message = self.detect_expediente_error(timeout=2)
@@ -1459,14 +5403,15 @@ class RSIRATAutomation32:
                     # Presionar ENTER para cerrar el diálogo de error
                     logger.info("Presionando ENTER para cerrar el diálogo de error...")
                     pyautogui.press('return')
-                    time.sleep(0.5)
+                    self._pausa(0.5)
                     
                     # Borrar el expediente que quedó en el campo con Ctrl+Backspace x20
                     logger.info("Borrando el expediente del campo con Ctrl+Backspace x20...")
                     for i in range(20):
                         pyautogui.hotkey('ctrl', 'backspace')
-                        time.sleep(0.1)
-                    time.sleep(0.5)
+                        self._pausa(0.1)
+                    self._pausa(0.5)
+                    self.estado_sesion.field_cleared()
                     
                     logger.info("Continuando con el siguiente expediente...")
                     continue  # Pasar al siguiente expediente
@@ -1478,6 +5423,11 @@ class RSIRATAutomation32:
                 # Guardar el índice del expediente válido encontrado para usar en el bucle
                 self.primer_expediente_idx = idx
                 
+                # Precheck en la grilla (Grupo vacío / MONTO MAYOR): se registra y se pasa al siguiente
+                if not self.precheck_seleccion(idx):
+                    logger.info("Continuando con el siguiente expediente...")
+                    continue
+                
                 # Si el expediente es válido, proceder a validar ejecutor (ALT+A)
                 return self.validate_executor()
             
@@ -1497,17 +5447,18 @@ class RSIRATAutomation32:
         Esta rutina NO itera sobre todo el Excel; solo intenta el row_idx.
         """
         try:
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+            expedientes = self.load_expedientes()
 
             exp_actual = str(expedientes.iloc[row_idx]["EXPEDIENTE"]).strip()
+            self.start_row(row_idx)
             logger.info(f"Intentando en campo específico: fila {row_idx + 1}: {exp_actual}")
 
             # Digitar expediente
-            pyautogui.write(exp_actual, interval=0.05)
-            time.sleep(0.5)
+            self._escribir(exp_actual)
+            self.estado_sesion.typed(exp_actual)
+            self._pausa(0.5)
             pyautogui.press('return')
-            time.sleep(1)
+            self._pausa(1)
 
             # Verificar si hay mensaje de error
             error_detected, error_message = self.detect_expediente_error(timeout=2)
@@ -1515,18 +5466,19 @@ class RSIRATAutomation32:
                 logger.warning(f"✗ Expediente inválido: {error_message}")
                 self.mark_invalid_expediente_in_results(row_idx)
                 pyautogui.press('return')
-                time.sleep(0.5)
+                self._pausa(0.5)
                 # limpiar campo
                 pyautogui.hotkey('ctrl', 'backspace')
-                time.sleep(0.2)
-                # No quedó completado
-                self.last_exp_completed = False
+                self._pausa(0.2)
+                self.estado_sesion.field_cleared()
                 return False
 
             # Expediente válido
             logger.info(f" Expediente válido: {exp_actual}")
             self.primer_expediente_idx = row_idx
-            return True
+            
+            # Precheck en la grilla (Grupo vacío / MONTO MAYOR): no se presiona ALT+A
+            return self.precheck_seleccion(row_idx)
 
         except Exception as e:
             logger.error(f"Error en enter_specific_expediente fila {row_idx + 1}: {e}")
@@ -1562,13 +5514,13 @@ class RSIRATAutomation32:
                         if aceptar_btn.exists(timeout=1):
                             logger.info("Botón 'Aceptar' encontrado, haciendo clic...")
                             aceptar_btn.invoke()
-                            time.sleep(1)
+                            self._pausa(1)
                     except Exception as e:
                         logger.warning(f"No se encontró botón 'Aceptar': {e}")
                         # Fallback: presionar Enter
                         logger.info("Fallback: presionando Enter...")
                         pyautogui.press('return')
-                        time.sleep(1)
+                        self._pausa(1)
                     
                     # Cerrar la ventana de búsqueda
                     logger.info("Cerrando ventana de búsqueda...")
@@ -1582,7 +5534,7 @@ class RSIRATAutomation32:
             
             # Patrón 2: Buscar en descendientes del app_window
             try:
-                descendants = app_window.descendants()
+                descendants = self.walk_uia(app_window, "Mensaje de expediente no válido")
                 for descendant in descendants:
                     try:
                         desc_text = descendant.window_text()
@@ -1600,11 +5552,11 @@ class RSIRATAutomation32:
                                 if aceptar_btn.exists(timeout=2):
                                     logger.info("Botón 'Aceptar' encontrado, haciendo clic...")
                                     aceptar_btn.invoke()
-                                    time.sleep(1)
+                                    self._pausa(1)
                             except Exception as e:
                                 logger.warning(f"No se encontró botón: {e}")
                                 pyautogui.press('return')
-                                time.sleep(1)
+                                self._pausa(1)
                             
                             # Cerrar ventana
                             logger.info("Cerrando ventana de búsqueda...")
@@ -1669,7 +5621,7 @@ class RSIRATAutomation32:
                     # Presionar Enter para cerrar el diálogo
                     logger.info("Presionando Enter para cerrar el diálogo de error...")
                     pyautogui.press('return')
-                    time.sleep(1)
+                    self._pausa(1)
                     
                     # Cerrar la ventana de búsqueda
                     logger.info("Cerrando ventana de búsqueda...")
@@ -1708,7 +5660,7 @@ class RSIRATAutomation32:
                         if cerrar_btn.exists(timeout=1):
                             logger.info("Botón 'Cerrar' encontrado con MSAA, haciendo clic...")
                             cerrar_btn.invoke()
-                            time.sleep(1)
+                            self._pausa(1)
                             logger.info("Ventana cerrada exitosamente con MSAA")
                             return True
                     except Exception as btn_e:
@@ -1721,10 +5673,151 @@ class RSIRATAutomation32:
         # Último fallback: presionar Escape para cerrar
         logger.info("Fallback final: presionando Escape para cerrar ventana...")
         pyautogui.press('escape')
-        time.sleep(1)
+        self._pausa(1)
         logger.info("Ventana cerrada con Escape")
         return True
     
+    def read_seleccion_grid(self, timeout=2):
+        """
+        Lee la grilla de "Selección de Expediente Coactivo" (Número, Tipo, Saldos
+        Total/Exigible/Costas, Fecha de Transferencia, Medidas de Embargo, Grupo).
+
+        Las filas son los hijos de la grilla: cada una se trae con sus celdas en UNA
+        llamada (bulk_uia; sin CacheRequest, con children()) y cada celda se ubica en
+        su columna por geometría (registros_seleccion). Si la grilla expone las celdas
+        como hijos directos, se agrupan en filas por su altura.
+
+        Retorna:
+            - Lista de dicts {columna: texto} (una por fila de la grilla)
+            - None si no se encontró la ventana o la grilla
+        """
+        try:
+            desktop = Desktop(backend="uia")
+            ventana = desktop.window(title_re=".*Selecci.n de Expediente.*")
+            if not ventana.exists(timeout=self.budget.clip(timeout)):
+                return None
+            
+            grilla = None
+            for control in self.walk_uia(ventana, "Grilla de selección", control_types=("DataGrid", "Table")):
+                grilla = control
+                break
+            if grilla is None:
+                return None
+            
+            # Encabezados: patrón Table si existe, si no los HeaderItem de la grilla
+            encabezados = []
+            try:
+                cabeceras = grilla.iface_table.GetCurrentColumnHeaders()
+                for indice in range(cabeceras.Length):
+                    encabezado = cabeceras.GetElement(indice)
+                    encabezados.append((encabezado.CurrentName.strip(), encabezado.CurrentBoundingRectangle))
+            except Exception:
+                encabezados = []
+            leer_encabezados = not encabezados
+            
+            filas = []
+            celdas_sueltas = []
+            for hijo in grilla.children():
+                tipo = hijo.element_info.control_type
+                if tipo in ("ScrollBar", "Thumb", "Button"):
+                    continue
+                if tipo == "HeaderItem":
+                    if leer_encabezados:
+                        encabezados.append((hijo.window_text().strip(), hijo.rectangle()))
+                    continue
+                
+                celdas = bulk_uia(hijo)
+                if celdas is None:
+                    celdas = hijo.children()
+                if tipo == "Header":
+                    if leer_encabezados:
+                        encabezados += [
+                            (celda.window_text().strip(), celda.rectangle()) for celda in celdas
+                            if celda.element_info.control_type == "HeaderItem"
+                        ]
+                elif celdas:
+                    filas.append([(celda.rectangle(), celda.window_text().strip()) for celda in celdas])
+                else:
+                    celdas_sueltas.append((hijo.rectangle(), hijo.window_text().strip()))
+            
+            filas += agrupar_por_renglon(celdas_sueltas)
+            registros = registros_seleccion([(nombre, rect) for nombre, rect in encabezados if nombre], filas)
+            logger.info(f"Grilla de selección: {len(registros)} fila(s) {registros}")
+            return registros
+        
+        except Exception as e:
+            logger.warning(f"No se pudo leer la grilla de selección: {e}")
+            return None
+    
+    def precheck_seleccion(self, row_idx):
+        """
+        Prechequeo del expediente en la grilla de selección ANTES de presionar ALT+A
+        (una sola lectura de la grilla):
+
+        1. Sin "Grupo" (ejecutor no asignado): registra "Sin ejecutor asignado"
+        2. DSE con MONTO que excede en más del 20% el saldo (Total): registra
+           "MONTO MAYOR" tal como lo haría fill_monto, sin abrir el formulario DSE
+           ni pasar por los dos avisos de SIRAT
+
+        En ambos casos limpia el campo Número y retorna False para pasar al siguiente
+        expediente. No se rechaza nada (flujo normal) si la grilla no se pudo leer, si
+        el expediente no figura en ella o si no se reconoció la columna Grupo.
+        """
+        registros = self.read_seleccion_grid()
+        if not registros:
+            return True
+        
+        fila = self.load_expedientes().iloc[row_idx]
+        expediente = str(fila["EXPEDIENTE"]).strip()
+        registro = next(
+            (r for r in registros if r.get("Número", "").lstrip("0") == expediente.lstrip("0")),
+            None,
+        )
+        if registro is None:
+            logger.info(f"Expediente {expediente} no figura en la grilla de selección, se omite el precheck")
+            return True
+        
+        # Solo una celda Grupo leída y vacía cuenta como "sin ejecutor"
+        if registro.get("Grupo") == "":
+            logger.warning(f"✗ Expediente {expediente} sin Grupo en la grilla: {RESULTADO_SIN_EJECUTOR}")
+            self.mark_invalid_expediente_in_results(row_idx, RESULTADO_SIN_EJECUTOR)
+            self.clear_expediente_field()
+            return False
+        if "Grupo" in registro:
+            logger.info(f"Grupo asignado: {registro['Grupo']}")
+        
+        if detect_medida_tipo(fila.get("TIPO DE MEDIDA", "")) == "DSE":
+            veredicto = evaluar_monto(fila.get("MONTO"), registro.get("Total"))
+            if veredicto:
+                logger.warning(
+                    f"✗ {veredicto} (precheck): MONTO {fila.get('MONTO')} excede en más del "
+                    f"{MONTO_TOLERANCIA_SALDO:.0%} el saldo {registro.get('Total')}"
+                )
+                self.primer_expediente_idx = row_idx
+                self.update_excel_result(veredicto)
+                self.montos_mayores_precheck += 1
+                self.clear_expediente_field()
+                return False
+        
+        return True
+    
+    def clear_expediente_field(self):
+        """
+        Deja la ventana de selección lista para el siguiente expediente: vuelve al
+        campo Número y lo borra. El expediente no pasó por ALT+A, así que el
+        siguiente se ingresa directo (sin Cambio de Expediente).
+        """
+        try:
+            ventana = Desktop(backend="uia").window(title_re=".*Selecci.n de Expediente.*")
+            ventana.child_window(control_type="Edit", found_index=0).set_focus()
+        except Exception:
+            pass
+        for i in range(20):
+            pyautogui.hotkey('ctrl', 'backspace')
+            self._pausa(0.1)
+        self._pausa(0.3)
+        self.estado_sesion.field_cleared()
+    
     def validate_executor(self):
         """
         Presiona ALT+A para continuar con el proceso de embargo.
@@ -1738,7 +5831,8 @@ class RSIRATAutomation32:
             time.sleep(0.5)
             pyautogui.hotkey('alt', 'a')
             logger.info(" ALT+A presionado correctamente")
-            time.sleep(1)
+            self.estado_sesion.entered()
+            self._pausa(1)
             
             return True
         
@@ -1754,13 +5848,18 @@ class RSIRATAutomation32:
         """
         logger.info("Buscando 'Proceso de Embargo' en el menú...")
         
+        coords = self.navigate("Proceso de Embargo")
+        if coords:
+            self.proceso_embargo_coords = None if coords is True else coords
+            return True
+        
         try:
             desktop = Desktop(backend="uia")
             
             # Buscar ventana principal de SIRAT (Menú de Opciones)
             app = None
             try:
-                app = desktop.window(title_re=".*Menú.*")
+                app = desktop.window(title_re=VENTANA_MENU)
                 if not app.exists(timeout=2):
                     app = None
             except:
@@ -1768,7 +5867,7 @@ class RSIRATAutomation32:
             
             if not app:
                 try:
-                    app = desktop.window(title_re=".*SIRAT.*")
+                    app = desktop.window(title_re=VENTANA_SIRAT)
                     if not app.exists(timeout=2):
                         app = None
                 except:
@@ -1784,8 +5883,7 @@ class RSIRATAutomation32:
                 logger.info("Ventana encontrada, iterando descendientes...")
                 
                 try:
-                    descendants = app.descendants()
-                    logger.info(f"Total de descendientes: {len(descendants)}")
+                    descendants = self.walk_uia(app, "Proceso de Embargo")
                     
                     # Listado de debug: mostrar elementos con "Proceso" o "Embargo"
                     elementos_embargo = []
@@ -1803,6 +5901,7 @@ class RSIRATAutomation32:
                                 # BÚSQUEDA EXACTA: "Proceso de Embargo"
                                 if desc_text == "Proceso de Embargo":
                                     logger.info(f" 'Proceso de Embargo' encontrado (búsqueda exacta)")
+                                    self.navegacion.learn("Proceso de Embargo", descendant)
                                     rect = descendant.rectangle()
                                     click_x = (rect.left + rect.right) // 2
                                     click_y = (rect.top + rect.bottom) // 2
@@ -1816,7 +5915,7 @@ class RSIRATAutomation32:
                                         
                                         pyautogui.click(click_x, click_y)
                                         logger.info("Esperando 2 segundos para que se expanda el menú...")
-                                        time.sleep(2)
+                                        self._pausa(2)
                                         logger.info(" Clic en Proceso de Embargo completado")
                                         return True
                         
@@ -1846,13 +5945,18 @@ class RSIRATAutomation32:
         """
         logger.info("Buscando 'Trabar Embargo' (usando patrón de descendientes)...")
         
+        coords = self.navigate("Trabar Embargo")
+        if coords:
+            self.trabar_embargo_coords = None if coords is True else coords
+            return True
+        
         try:
             desktop = Desktop(backend="uia")
             
             # Buscar ventana SIRAT
             app = None
             try:
-                app = desktop.window(title_re=".*SIRAT.*")
+                app = desktop.window(title_re=VENTANA_SIRAT)
                 if not app.exists(timeout=2):
                     app = None
             except:
@@ -1868,8 +5972,7 @@ class RSIRATAutomation32:
                 logger.info("Ventana encontrada, iterando descendientes...")
                 
                 try:
-                    descendants = app.descendants()
-                    logger.info(f"Total de descendientes: {len(descendants)}")
+                    descendants = self.walk_uia(app, "Trabar Embargo")
                     
                     # Listas para debugging
                     elementos_embargo = []
@@ -1890,6 +5993,7 @@ class RSIRATAutomation32:
                             # Búsqueda exacta con strip()
                             if desc_text == "Trabar Embargo":
                                 logger.info(f" 'Trabar Embargo' encontrado (exacto) en índice {i}")
+                                self.navegacion.learn("Trabar Embargo", descendant)
                                 rect = descendant.rectangle()
                                 
                                 if rect.width() > 0 and rect.height() > 0:
@@ -1903,7 +6007,7 @@ class RSIRATAutomation32:
                                     
                                     logger.info(f"Haciendo clic en: ({click_x}, {click_y})")
                                     pyautogui.click(click_x, click_y)
-                                    time.sleep(1)
+                                    self._pausa(1)
                                     logger.info(" Clic completado exitosamente")
                                     return True
                                 else:
@@ -1911,12 +6015,12 @@ class RSIRATAutomation32:
                                     logger.info("Coordenadas inválidas, intentando invoke...")
                                     try:
                                         descendant.invoke()
-                                        time.sleep(1)
+                                        self._pausa(1)
                                         logger.info(" Invocado correctamente")
                                         return True
                                     except:
                                         pyautogui.press('return')
-                                        time.sleep(1)
+                                        self._pausa(1)
                                         logger.info(" Enter presionado")
                                         return True
                         
@@ -1971,7 +6075,7 @@ class RSIRATAutomation32:
             # Buscar ventana SIRAT
             app = None
             try:
-                app = desktop.window(title_re=".*SIRAT.*")
+                app = desktop.window(title_re=VENTANA_SIRAT)
                 if not app.exists(timeout=2):
                     app = None
             except:
@@ -1987,8 +6091,7 @@ class RSIRATAutomation32:
                 logger.info("Ventana encontrada, iterando descendientes...")
                 
                 try:
-                    descendants = app.descendants()
-                    logger.info(f"Total de descendientes: {len(descendants)}")
+                    descendants = self.walk_uia(app, "Trabar Intervención en Información")
                     
                     # Iterar todos los descendientes y buscar "Trabar Intervención en Información"
                     for i, descendant in enumerate(descendants):
@@ -2010,7 +6113,7 @@ class RSIRATAutomation32:
                                     logger.info(f"Coordenadas válidas: ({click_x}, {click_y})")
                                     logger.info(f"Haciendo DOBLE CLIC en: ({click_x}, {click_y})")
                                     pyautogui.doubleClick(click_x, click_y)
-                                    time.sleep(1.5)
+                                    self._pausa(1.5)
                                     logger.info(" Doble clic completado exitosamente")
                                     return True
                                 else:
@@ -2018,12 +6121,12 @@ class RSIRATAutomation32:
                                     logger.info("Coordenadas inválidas, intentando invoke...")
                                     try:
                                         descendant.invoke()
-                                        time.sleep(1)
+                                        self._pausa(1)
                                         logger.info(" Invocado correctamente")
                                         return True
                                     except:
                                         pyautogui.press('return')
-                                        time.sleep(1)
+                                        self._pausa(1)
                                         logger.info(" Enter presionado")
                                         return True
                         
@@ -2073,7 +6176,7 @@ class RSIRATAutomation32:
             
             # Esperar 1 segundo después de ENTER
             logger.info("Esperando 1 segundo después de ENTER...")
-            time.sleep(1)
+            self._pausa(1)
             
             logger.info(" ENTER presionado correctamente")
             logger.info("Continuando con el flujo de INTERVENTOR y PLAZO...")
@@ -2108,7 +6211,7 @@ class RSIRATAutomation32:
             
             # Esperar 1 segundo después de ENTER
             logger.info("Esperando 1 segundo después de ENTER...")
-            time.sleep(1)
+            self._pausa(1)
             
             logger.info(" ENTER presionado correctamente")
             logger.info("Continuando con el flujo de MONTO...")
@@ -2135,7 +6238,7 @@ class RSIRATAutomation32:
             # Buscar ventana SIRAT
             app = None
             try:
-                app = desktop.window(title_re=".*SIRAT.*")
+                app = desktop.window(title_re=VENTANA_SIRAT)
                 if not app.exists(timeout=2):
                     app = None
             except:
@@ -2151,8 +6254,7 @@ class RSIRATAutomation32:
                 logger.info("Ventana encontrada, iterando descendientes...")
                 
                 try:
-                    descendants = app.descendants()
-                    logger.info(f"Total de descendientes: {len(descendants)}")
+                    descendants = self.walk_uia(app, "Trabar Depósito sin Extracción")
                     
                     # Iterar todos los descendientes y buscar "Trabar Depósito sin Extracción"
                     for i, descendant in enumerate(descendants):
@@ -2174,7 +6276,7 @@ class RSIRATAutomation32:
                                     logger.info(f"Coordenadas válidas: ({click_x}, {click_y})")
                                     logger.info(f"Haciendo DOBLE CLIC en: ({click_x}, {click_y})")
                                     pyautogui.doubleClick(click_x, click_y)
-                                    time.sleep(1.5)
+                                    self._pausa(1.5)
                                     logger.info(" Doble clic completado exitosamente")
                                     return True
                                 else:
@@ -2182,12 +6284,12 @@ class RSIRATAutomation32:
                                     logger.info("Coordenadas inválidas, intentando invoke...")
                                     try:
                                         descendant.invoke()
-                                        time.sleep(1)
+                                        self._pausa(1)
                                         logger.info(" Invocado correctamente")
                                         return True
                                     except:
                                         pyautogui.press('return')
-                                        time.sleep(1)
+                                        self._pausa(1)
                                         logger.info(" Enter presionado")
                                         return True
                         
@@ -2234,15 +6336,16 @@ class RSIRATAutomation32:
             # ================================================================
             logger.info("Detectando tipo del primer expediente...")
             
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+            expedientes = self.load_expedientes()
             
             if "TIPO DE MEDIDA" not in expedientes.columns:
                 logger.error("La columna 'TIPO DE MEDIDA' no existe en el Excel")
                 return False
             
-            tipo_medida = str(expedientes.iloc[0]["TIPO DE MEDIDA"]).strip().upper()
-            logger.info(f"Tipo de Medida del primer expediente: {tipo_medida}")
+            # Usar la fila del expediente en curso (no la fila 0): tras un reinicio
+            # del watchdog el primer expediente de la sesión puede ser cualquier fila
+            tipo_medida = str(expedientes.iloc[self.primer_expediente_idx]["TIPO DE MEDIDA"]).strip().upper()
+            logger.info(f"Tipo de Medida del primer expediente (fila {self.primer_expediente_idx + 2}): {tipo_medida}")
             
             # Determinar si es IEI o DSE
             if "IEI" in tipo_medida:
@@ -2319,8 +6422,7 @@ class RSIRATAutomation32:
         
         try:
             # Cargar datos del Excel
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+            expedientes = self.load_expedientes()
             
             # Obtener valores de INTERVENTOR y PLAZO del primer expediente válido
             interventor = None
@@ -2353,8 +6455,8 @@ class RSIRATAutomation32:
             
             # Digitar INTERVENTOR directamente (sin hacer clic en el campo)
             logger.info(f"Digitando INTERVENTOR: '{interventor}'")
-            pyautogui.write(interventor, interval=0.05)
-            time.sleep(0.2)
+            self._escribir(interventor)
+            self._pausa(0.2)
             
             # ============================================================
             # PASO 2: Presionar TAB para pasar a PLAZO
@@ -2365,7 +6467,7 @@ class RSIRATAutomation32:
             
             logger.info("Presionando TAB para pasar al campo PLAZO...")
             pyautogui.press('tab')
-            time.sleep(0.2)
+            self._pausa(0.2)
             
             # ============================================================
             # PASO 3: Digitar PLAZO
@@ -2375,8 +6477,8 @@ class RSIRATAutomation32:
             logger.info("=" * 70)
             
             logger.info(f"Digitando PLAZO: '{plazo}'")
-            pyautogui.write(plazo, interval=0.05)
-            time.sleep(0.3)
+            self._escribir(plazo)
+            self._pausa(0.3)
             
             # ============================================================
             # PASO 4: Verificar valores via MSAA
@@ -2391,7 +6493,7 @@ class RSIRATAutomation32:
                 # Buscar ventana principal de SIRAT
                 sirat_window = None
                 try:
-                    sirat_windows = desktop.windows(title_re=".*SIRAT.*")
+                    sirat_windows = desktop.windows(title_re=VENTANA_SIRAT)
                     if sirat_windows:
                         sirat_window = sirat_windows[0]
                 except:
@@ -2413,6 +6515,7 @@ class RSIRATAutomation32:
                                 logger.info(" INTERVENTOR se ingresó correctamente")
                             else:
                                 logger.warning(f"INTERVENTOR ingresado no coincide: esperado '{interventor}', obtenido '{valor_interventor}'")
+                                self.ritmo.record_failure("INTERVENTOR no coincide")
                     except Exception as e:
                         logger.info(f"No se pudo verificar INTERVENTOR via MSAA: {e}")
                     
@@ -2430,6 +6533,7 @@ class RSIRATAutomation32:
                                 logger.info(" PLAZO se ingresó correctamente")
                             else:
                                 logger.warning(f"PLAZO ingresado no coincide: esperado '{plazo}', obtenido '{valor_plazo}'")
+                                self.ritmo.record_failure("PLAZO no coincide")
                     except Exception as e:
                         logger.info(f"No se pudo verificar PLAZO via MSAA: {e}")
             except Exception as e:
@@ -2448,7 +6552,7 @@ class RSIRATAutomation32:
             
             logger.info("Presionando ALT+A...")
             pyautogui.hotkey('alt', 'a')
-            time.sleep(1)
+            self._pausa(1)
             logger.info(" ALT+A presionado correctamente")
             
             # ============================================================
@@ -2473,7 +6577,7 @@ class RSIRATAutomation32:
             logger.info("Presionando ALT+S para cerrar el aviso (ya sea 'El Expediente' o '¿Desea Ud. grabar la Resolución?')...")
             time.sleep(0.5)
             pyautogui.hotkey('alt', 's')
-            time.sleep(1)
+            self._pausa(1)
             logger.info(" ALT+S presionado correctamente (1er ALT+S)")
             
             # ============================================================
@@ -2495,7 +6599,7 @@ class RSIRATAutomation32:
             
             logger.info("Presionando ALT+S para continuar...")
             pyautogui.hotkey('alt', 's')
-            time.sleep(1)
+            self._pausa(1)
             logger.info(" ALT+S presionado correctamente (2do ALT+S)")
             
             # ============================================================
@@ -2505,16 +6609,12 @@ class RSIRATAutomation32:
             logger.info("PASO 9: Verificando si aparece mensaje de Resolución Coactiva")
             logger.info("=" * 70)
             
-            rc_detected, rc_mensaje = self.detect_resolucion_coactiva_aviso(timeout=2)
+            rc_detected, rc_mensaje, rc_number = self.detect_resolucion_coactiva_aviso(timeout=2)
             
             if rc_detected:
                 logger.warning(" MENSAJE DE RESOLUCIÓN COACTIVA DETECTADO")
                 logger.warning(f"Contenido: {rc_mensaje[:100]}...")
                 
-                # Extraer el número de Resolución Coactiva
-                logger.info("Extrayendo número de Resolución Coactiva...")
-                rc_number = self.extract_resolucion_coactiva_number(rc_mensaje)
-                
                 if rc_number:
                     logger.info(f" Número de RC EXTRAÍDO EXITOSAMENTE: {rc_number}")
                     
@@ -2539,7 +6639,7 @@ class RSIRATAutomation32:
             
             logger.info("Presionando ENTER...")
             pyautogui.press('return')
-            time.sleep(1)
+            self._pausa(1)
             logger.info(" ENTER presionado correctamente")
             
             # ============================================================
@@ -2552,7 +6652,7 @@ class RSIRATAutomation32:
             logger.info("Presionando ALT+C para regresar al menú...")
             time.sleep(0.5)
             pyautogui.hotkey('alt', 'c')
-            time.sleep(1)
+            self._pausa(1)
             logger.info(" ALT+C presionado correctamente")
             
             # ============================================================
@@ -2642,7 +6742,7 @@ class RSIRATAutomation32:
             if self.trabar_embargo_coords:
                 logger.info(f"Paso 1: Haciendo clic en 'Trabar Embargo' (coordenadas: {self.trabar_embargo_coords})")
                 pyautogui.click(self.trabar_embargo_coords[0], self.trabar_embargo_coords[1])
-                time.sleep(1)
+                self._pausa(1)
                 logger.info(" Clic en 'Trabar Embargo' completado")
             else:
                 logger.warning("Coordenadas de 'Trabar Embargo' no disponibles, buscando nuevamente...")
@@ -2654,7 +6754,7 @@ class RSIRATAutomation32:
             if self.proceso_embargo_coords:
                 logger.info(f"Paso 2: Haciendo clic en 'Proceso de Embargo' (coordenadas: {self.proceso_embargo_coords})")
                 pyautogui.click(self.proceso_embargo_coords[0], self.proceso_embargo_coords[1])
-                time.sleep(1)
+                self._pausa(1)
                 logger.info(" Clic en 'Proceso de Embargo' completado")
             else:
                 logger.warning("Coordenadas de 'Proceso de Embargo' no disponibles, buscando nuevamente...")
@@ -2699,13 +6799,13 @@ class RSIRATAutomation32:
             # Buscar ventana SIRAT
             app = None
             try:
-                app = desktop.window(title_re=".*SIRAT.*", class_name="TApplication")
+                app = desktop.window(title_re=VENTANA_SIRAT, class_name=CLASE_APLICACION)
             except:
                 pass
             
             if not app:
                 try:
-                    app = desktop.window(title_re=".*Menú.*", class_name="TApplication")
+                    app = desktop.window(title_re=VENTANA_MENU, class_name=CLASE_APLICACION)
                 except:
                     pass
             
@@ -2713,9 +6813,8 @@ class RSIRATAutomation32:
                 logger.info("Ventana SIRAT encontrada, buscando 'Accesos'...")
                 
                 try:
-                    # Buscar descendientes del árbol de controles (patrón probado)
-                    descendants = app.descendants()
-                    logger.info(f"Total de descendientes: {len(descendants)}")
+                    # Recorrido perezoso del árbol de controles (corta en el primer resultado)
+                    descendants = self.walk_uia(app, "Accesos")
                     
                     for i, descendant in enumerate(descendants):
                         try:
@@ -2724,6 +6823,7 @@ class RSIRATAutomation32:
                             # Búsqueda exacta con strip()
                             if desc_text == "Accesos":
                                 logger.info(f" 'Accesos' encontrado (exacto) en índice {i}")
+                                self.navegacion.learn("Accesos", descendant)
                                 rect = descendant.rectangle()
                                 
                                 if rect.width() > 0 and rect.height() > 0:
@@ -2733,7 +6833,7 @@ class RSIRATAutomation32:
                                     
                                     logger.info(f"Haciendo clic en: ({click_x}, {click_y})")
                                     pyautogui.click(click_x, click_y)
-                                    time.sleep(1)
+                                    self._pausa(1)
                                     logger.info(" Clic completado exitosamente")
                                     return True
                                 else:
@@ -2741,12 +6841,12 @@ class RSIRATAutomation32:
                                     logger.info("Coordenadas inválidas, intentando invoke...")
                                     try:
                                         descendant.invoke()
-                                        time.sleep(1)
+                                        self._pausa(1)
                                         logger.info(" Invocado correctamente")
                                         return True
                                     except:
                                         pyautogui.press('return')
-                                        time.sleep(1)
+                                        self._pausa(1)
                                         logger.info(" Enter presionado")
                                         return True
                         
@@ -2774,19 +6874,22 @@ class RSIRATAutomation32:
         """
         logger.info("Buscando 'Cambio de Expediente' en el menú...")
         
+        if self.navigate("Cambio de Expediente"):
+            return True
+        
         try:
             desktop = Desktop(backend="uia")
             
             # Buscar ventana SIRAT
             app = None
             try:
-                app = desktop.window(title_re=".*SIRAT.*", class_name="TApplication")
+                app = desktop.window(title_re=VENTANA_SIRAT, class_name=CLASE_APLICACION)
             except:
                 pass
             
             if not app:
                 try:
-                    app = desktop.window(title_re=".*Menú.*", class_name="TApplication")
+                    app = desktop.window(title_re=VENTANA_MENU, class_name=CLASE_APLICACION)
                 except:
                     pass
             
@@ -2794,9 +6897,8 @@ class RSIRATAutomation32:
                 logger.info("Ventana SIRAT encontrada, buscando 'Cambio de Expediente'...")
                 
                 try:
-                    # Buscar descendientes del árbol de controles (patrón probado)
-                    descendants = app.descendants()
-                    logger.info(f"Total de descendientes: {len(descendants)}")
+                    # Recorrido perezoso del árbol de controles (corta en el primer resultado)
+                    descendants = self.walk_uia(app, "Cambio de Expediente")
                     
                     for i, descendant in enumerate(descendants):
                         try:
@@ -2805,6 +6907,7 @@ class RSIRATAutomation32:
                             # Búsqueda exacta con strip()
                             if desc_text == "Cambio de Expediente":
                                 logger.info(f" 'Cambio de Expediente' encontrado (exacto) en índice {i}")
+                                self.navegacion.learn("Cambio de Expediente", descendant)
                                 rect = descendant.rectangle()
                                 
                                 if rect.width() > 0 and rect.height() > 0:
@@ -2814,7 +6917,7 @@ class RSIRATAutomation32:
                                     
                                     logger.info(f"Haciendo DOBLE CLIC en: ({click_x}, {click_y})")
                                     pyautogui.doubleClick(click_x, click_y)
-                                    time.sleep(1)
+                                    self._pausa(1)
                                     logger.info(" Doble clic completado exitosamente")
                                     return True
                                 else:
@@ -2822,12 +6925,12 @@ class RSIRATAutomation32:
                                     logger.info("Coordenadas inválidas, intentando invoke...")
                                     try:
                                         descendant.invoke()
-                                        time.sleep(1)
+                                        self._pausa(1)
                                         logger.info(" Invocado correctamente")
                                         return True
                                     except:
                                         pyautogui.press('return')
-                                        time.sleep(1)
+                                        self._pausa(1)
                                         logger.info(" Enter presionado")
                                         return True
                         
@@ -2854,19 +6957,22 @@ class RSIRATAutomation32:
         """
         logger.info("Buscando 'Accesos' (sin desplazamiento previo)...")
         
+        if self.navigate("Accesos"):
+            return True
+        
         try:
             desktop = Desktop(backend="uia")
             
             # Buscar ventana SIRAT
             app = None
             try:
-                app = desktop.window(title_re=".*SIRAT.*", class_name="TApplication")
+                app = desktop.window(title_re=VENTANA_SIRAT, class_name=CLASE_APLICACION)
             except:
                 pass
             
             if not app:
                 try:
-                    app = desktop.window(title_re=".*Menú.*", class_name="TApplication")
+                    app = desktop.window(title_re=VENTANA_MENU, class_name=CLASE_APLICACION)
                 except:
                     pass
             
@@ -2874,7 +6980,7 @@ class RSIRATAutomation32:
                 logger.info("Ventana SIRAT encontrada, buscando 'Accesos'...")
                 
                 try:
-                    descendants = app.descendants()
+                    descendants = self.walk_uia(app, "Accesos")
                     
                     for descendant in descendants:
                         try:
@@ -2882,6 +6988,7 @@ class RSIRATAutomation32:
                             
                             if desc_text == "Accesos":
                                 logger.info(f" 'Accesos' encontrado")
+                                self.navegacion.learn("Accesos", descendant)
                                 rect = descendant.rectangle()
                                 
                                 if rect.width() > 0 and rect.height() > 0:
@@ -2889,7 +6996,7 @@ class RSIRATAutomation32:
                                     click_y = (rect.top + rect.bottom) // 2
                                     logger.info(f"Haciendo clic en 'Accesos': ({click_x}, {click_y})")
                                     pyautogui.click(click_x, click_y)
-                                    time.sleep(1)
+                                    self._pausa(1)
                                     logger.info(" Clic en 'Accesos' completado")
                                     return True
                         
@@ -2941,16 +7048,20 @@ class RSIRATAutomation32:
         
         try:
             # Cargar datos del Excel
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+            expedientes = self.load_expedientes()
             
             logger.info(f"Total de expedientes en Excel: {len(expedientes)}")
             logger.info(f"Procesados hasta ahora: {self.primer_expediente_idx + 1} expediente(s)")
             logger.info(f"Expedientes restantes a procesar: {len(expedientes) - (self.primer_expediente_idx + 1)}")
             
-            # Procesar expedientes restantes (comenzando desde el siguiente al primer expediente válido)
-            for idx in range(self.primer_expediente_idx + 1, len(expedientes)):
+            # Procesar expedientes restantes del lote (omitiendo los que ya tienen resultado)
+            for idx in self.filas_pendientes(len(expedientes), excluir=self.primer_expediente_idx):
+                if self.sesion_caida():
+                    logger.error("Sesión de SIRAT caída, interrumpiendo bucle de expedientes")
+                    return False
+                
                 exp_actual = str(expedientes.iloc[idx]["EXPEDIENTE"]).strip()
+                self.start_row(idx)
                 
                 logger.info(f"\n{'=' * 70}")
                 logger.info(f"EXPEDIENTE {idx + 1}/{len(expedientes)}: {exp_actual}")
@@ -2965,15 +7076,15 @@ class RSIRATAutomation32:
                     # ============================================================
                     logger.info("PASO 1: Digitando expediente...")
                     time.sleep(0.3)
-                    pyautogui.write(exp_actual, interval=0.05)
-                    time.sleep(0.3)
+                    self._escribir(exp_actual)
+                    self._pausa(0.3)
                     
                     # ============================================================
                     # PASO 2: Presionar ENTER
                     # ============================================================
                     logger.info("PASO 2: Presionando ENTER...")
                     pyautogui.press('return')
-                    time.sleep(0.5)
+                    self._pausa(0.5)
                     
                     # ============================================================
                     # PASO 3: Verificar si el expediente es válido
@@ -2997,7 +7108,7 @@ class RSIRATAutomation32:
                         # Limpiar campo y continuar con el siguiente
                         logger.info("Limpiando campo de expediente...")
                         pyautogui.hotkey('ctrl', 'backspace')
-                        time.sleep(0.2)
+                        self._pausa(0.2)
                         
                         logger.info("Continuando con el siguiente expediente...")
                         continue
@@ -3005,18 +7116,24 @@ class RSIRATAutomation32:
                     # Expediente válido
                     logger.info(f" Expediente válido: {exp_actual}")
                     
+                    # Precheck en la grilla (Grupo vacío / MONTO MAYOR): sin ALT+A, se pasa al siguiente
+                    if not self.precheck_seleccion(idx):
+                        logger.info("Continuando con el siguiente expediente...")
+                        continue
+                    
                     # ============================================================
                     # PASO 4: Presionar ALT+A para validar ejecutor
                     # ============================================================
                     logger.info("PASO 4: Presionando ALT+A para validar ejecutor...")
                     pyautogui.hotkey('alt', 'a')
-                    time.sleep(1)
+                    self._pausa(1)
                     
                     # ============================================================
                     # PASO 5: Validar que el expediente tenga todos los datos necesarios
                     # ============================================================
                     logger.info("PASO 5: Validando datos del expediente...")
-                    es_valido, mensaje_error = self.validate_expediente_row(expedientes, idx)
+                    registro = self.row_record(idx)
+                    es_valido, mensaje_error = registro["valido"], registro["motivo"]
                     
                     if not es_valido:
                         logger.warning(f"✗ Expediente incompleto: {mensaje_error}")
@@ -3027,7 +7144,7 @@ class RSIRATAutomation32:
                         # Limpiar campo y continuar
                         logger.info("Limpiando campo de expediente...")
                         pyautogui.hotkey('ctrl', 'backspace')
-                        time.sleep(0.2)
+                        self._pausa(0.2)
                         
                         logger.info("Continuando con el siguiente expediente...")
                         continue
@@ -3161,8 +7278,7 @@ class RSIRATAutomation32:
         
         try:
             # Cargar datos del Excel
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+            expedientes = self.load_expedientes()
             
             logger.info(f"Total de expedientes a procesar: {len(expedientes)}")
             
@@ -3195,16 +7311,16 @@ class RSIRATAutomation32:
                 logger.info("=" * 70)
                 logger.info(f"Digitando expediente: '{exp_actual}'")
                 time.sleep(0.5)
-                pyautogui.write(exp_actual, interval=0.05)
+                self._escribir(exp_actual)
                 logger.info(" Expediente ingresado")
-                time.sleep(0.5)
+                self._pausa(0.5)
                 
                 # PASO 3: Presionar ENTER para validar expediente
                 logger.info("=" * 70)
                 logger.info("PASO 3: Presionando ENTER para validar expediente")
                 logger.info("=" * 70)
                 pyautogui.press('return')
-                time.sleep(1)
+                self._pausa(1)
                 
                 # PASO 4: Detectar si expediente es válido o inválido
                 logger.info("=" * 70)
@@ -3220,26 +7336,31 @@ class RSIRATAutomation32:
                     # Presionar ENTER para cerrar el diálogo de error
                     logger.info("Presionando ENTER para cerrar el diálogo de error...")
                     pyautogui.press('return')
-                    time.sleep(0.5)
+                    self._pausa(0.5)
                     
                     # Borrar el expediente que quedó en el campo
                     logger.info("Borrando el expediente del campo...")
                     pyautogui.hotkey('ctrl', 'a')  # Seleccionar todo
-                    time.sleep(0.2)
+                    self._pausa(0.2)
                     pyautogui.press('delete')  # Borrar
-                    time.sleep(0.5)
+                    self._pausa(0.5)
                     
                     logger.info("Pasando al siguiente expediente...")
                     continue
                 
                 logger.info(" Expediente válido")
                 
+                # Precheck en la grilla (Grupo vacío / MONTO MAYOR): sin ALT+A, se pasa al siguiente
+                if not self.precheck_seleccion(idx):
+                    logger.info("Pasando al siguiente expediente...")
+                    continue
+                
                 # PASO 5: Presionar ALT+A para validar y pasar al formulario
                 logger.info("=" * 70)
                 logger.info("PASO 5: Presionando ALT+A para validar")
                 logger.info("=" * 70)
                 pyautogui.hotkey('alt', 'a')
-                time.sleep(1)
+                self._pausa(1)
                 logger.info(" ALT+A presionado")
                 
                 # PASO 6: Rellenar campos INTERVENTOR y PLAZO (sin navegación extra, directo en el formulario)
@@ -3248,8 +7369,7 @@ class RSIRATAutomation32:
                 logger.info("=" * 70)
                 
                 # Cargar datos del Excel
-                excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-                expedientes_data = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+                expedientes_data = self.load_expedientes()
                 
                 # Obtener valores de INTERVENTOR y PLAZO de la fila actual
                 interventor = None
@@ -3270,23 +7390,23 @@ class RSIRATAutomation32:
                 # Esperar 0.5 segundos y digitar INTERVENTOR
                 logger.info(f"Digitando INTERVENTOR: '{interventor}'")
                 time.sleep(0.5)
-                pyautogui.write(interventor, interval=0.05)
-                time.sleep(0.2)
+                self._escribir(interventor)
+                self._pausa(0.2)
                 
                 # Presionar TAB para pasar a PLAZO
                 logger.info("Presionando TAB para pasar a PLAZO...")
                 pyautogui.press('tab')
-                time.sleep(0.2)
+                self._pausa(0.2)
                 
                 # Digitar PLAZO
                 logger.info(f"Digitando PLAZO: '{plazo}'")
-                pyautogui.write(plazo, interval=0.05)
-                time.sleep(0.3)
+                self._escribir(plazo)
+                self._pausa(0.3)
                 
                 # Presionar ALT+A para confirmar INTERVENTOR y PLAZO
                 logger.info("Presionando ALT+A para confirmar INTERVENTOR y PLAZO...")
                 pyautogui.hotkey('alt', 'a')
-                time.sleep(1)
+                self._pausa(1)
                 
                 # Detectar mensaje de aviso
                 logger.info("Detectando posible mensaje de aviso...")
@@ -3299,18 +7419,17 @@ class RSIRATAutomation32:
                 logger.info("Presionando ALT+S...")
                 time.sleep(0.5)
                 pyautogui.hotkey('alt', 's')
-                time.sleep(1)
+                self._pausa(1)
                 
                 logger.info("Presionando ALT+S (2do)...")
                 pyautogui.hotkey('alt', 's')
-                time.sleep(1)
+                self._pausa(1)
                 
                 # Detectar y extraer RC
                 logger.info("Detectando mensaje de Resolución Coactiva...")
-                rc_detected, rc_mensaje = self.detect_resolucion_coactiva_aviso(timeout=2)
+                rc_detected, rc_mensaje, rc_number = self.detect_resolucion_coactiva_aviso(timeout=2)
                 
                 if rc_detected:
-                    rc_number = self.extract_resolucion_coactiva_number(rc_mensaje)
                     logger.info(f"RC extraído: {rc_number}")
                     
                     # Guardar en Excel
@@ -3321,13 +7440,13 @@ class RSIRATAutomation32:
                 # Presionar ENTER para aceptar
                 logger.info("Presionando ENTER...")
                 pyautogui.press('return')
-                time.sleep(1)
+                self._pausa(1)
                 
                 # Presionar ALT+C para regresar al menú
                 logger.info("Presionando ALT+C para regresar al menú...")
                 time.sleep(0.5)
                 pyautogui.hotkey('alt', 'c')
-                time.sleep(1)
+                self._pausa(1)
                 logger.info(" ALT+C presionado")
                 
                 logger.info(f" Expediente {idx + 1} procesado exitosamente")
@@ -3353,8 +7472,7 @@ class RSIRATAutomation32:
         
         try:
             # Cargar datos del Excel
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+            expedientes = self.load_expedientes()
             
             # Obtener valores de INTERVENTOR y PLAZO de la fila actual
             interventor = None
@@ -3375,23 +7493,23 @@ class RSIRATAutomation32:
             # Esperar 0.5 segundos y digitar INTERVENTOR
             logger.info(f"Digitando INTERVENTOR: '{interventor}'")
             time.sleep(0.5)
-            pyautogui.write(interventor, interval=0.05)
-            time.sleep(0.2)
+            self._escribir(interventor)
+            self._pausa(0.2)
             
             # Presionar TAB para pasar a PLAZO
             logger.info("Presionando TAB para pasar a PLAZO...")
             pyautogui.press('tab')
-            time.sleep(0.2)
+            self._pausa(0.2)
             
             # Digitar PLAZO
             logger.info(f"Digitando PLAZO: '{plazo}'")
-            pyautogui.write(plazo, interval=0.05)
-            time.sleep(0.3)
+            self._escribir(plazo)
+            self._pausa(0.3)
             
             # Presionar ALT+A para confirmar
             logger.info("Presionando ALT+A para confirmar...")
             pyautogui.hotkey('alt', 'a')
-            time.sleep(1)
+            self._pausa(1)
             
             # Detectar mensaje de aviso
             logger.info("Detectando posible mensaje de aviso...")
@@ -3404,18 +7522,17 @@ class RSIRATAutomation32:
             logger.info("Presionando ALT+S...")
             time.sleep(0.5)
             pyautogui.hotkey('alt', 's')
-            time.sleep(1)
+            self._pausa(1)
             
             logger.info("Presionando ALT+S (2do)...")
             pyautogui.hotkey('alt', 's')
-            time.sleep(1)
+            self._pausa(1)
             
             # Detectar y extraer RC
             logger.info("Detectando mensaje de Resolución Coactiva...")
-            rc_detected, rc_mensaje = self.detect_resolucion_coactiva_aviso(timeout=2)
+            rc_detected, rc_mensaje, rc_number = self.detect_resolucion_coactiva_aviso(timeout=2)
             
             if rc_detected:
-                rc_number = self.extract_resolucion_coactiva_number(rc_mensaje)
                 logger.info(f"RC extraído: {rc_number}")
                 
                 # Guardar en Excel
@@ -3424,12 +7541,12 @@ class RSIRATAutomation32:
             # Presionar ENTER y ALT+C para regresar
             logger.info("Presionando ENTER...")
             pyautogui.press('return')
-            time.sleep(1)
+            self._pausa(1)
             
             logger.info("Presionando ALT+C para regresar al menú...")
-            time.sleep(0.5)
+            self._pausa(0.5)
             pyautogui.hotkey('alt', 'c')
-            time.sleep(1)
+            self._pausa(1)
             
             # ================================================================
             # FLUJO POST-RC: Eliminar desplazamientos y preparar para siguiente expediente
@@ -3456,132 +7573,43 @@ class RSIRATAutomation32:
                 logger.warning("No se pudo hacer clic en 'Accesos'")
             time.sleep(0.5)
             
-            # PASO 4: Hacer doble clic en "Cambio de Expediente"
-            logger.info("Haciendo doble clic en 'Cambio de Expediente'...")
-            if not self.click_cambio_expediente():
-                logger.warning("No se pudo hacer clic en 'Cambio de Expediente'")
-            time.sleep(0.5)
-            
-            logger.info("=" * 70)
-            logger.info(" Campos completados exitosamente")
-            logger.info("= Listo para siguiente expediente =")
-            logger.info("=" * 70)
-            return True
-        
-        except Exception as e:
-            logger.error(f"Error en fill_interventor_and_plazo_loop: {str(e)}")
-            return False
-    
-    def detect_desea_continuar_aviso(self, timeout=2):
-        """
-        Detecta si aparece el mensaje "¿ Desea Continuar ?" (con espacios).
-        Este aviso es específico de DSE cuando hay embargos activos.
-        
-        Usa MSAA para inspeccionar controles de tipo Text.
-        
-        Retorna:
-            - Tupla (True, mensaje) si se detecta el mensaje
-            - Tupla (False, "") si no hay mensaje
-        """
-        try:
-            logger.info("Verificando si hay mensaje '¿ Desea Continuar ?'...")
-            desktop = Desktop(backend="uia")
-            end_time = time.time() + timeout
-            
-            while time.time() < end_time:
-                try:
-                    # Buscar ventanas de diálogo
-                    dlgs = desktop.windows()
-                    
-                    for dlg in dlgs:
-                        try:
-                            # Buscar controles de tipo Text en descendientes
-                            descendants = dlg.descendants()
-                            
-                            for desc in descendants:
-                                try:
-                                    texto = desc.window_text()
-                                    
-                                    # Búsqueda ROBUSTA: múltiples palabras clave
-                                    # Patrón: "¿ Desea Continuar ?" - requiere AMBAS palabras
-                                    texto_lower = texto.lower()
-                                    if "desea" in texto_lower and "continuar" in texto_lower:
-                                        logger.warning(f"Aviso '¿ Desea Continuar ?' detectado")
-                                        return (True, texto)
-                                
-                                except Exception:
-                                    pass
-                        
-                        except Exception:
-                            pass
-                
-                except Exception:
-                    pass
-                
-                time.sleep(0.1)
-            
-            return (False, "")
+            # PASO 4: Hacer doble clic en "Cambio de Expediente"
+            logger.info("Haciendo doble clic en 'Cambio de Expediente'...")
+            if not self.click_cambio_expediente():
+                logger.warning("No se pudo hacer clic en 'Cambio de Expediente'")
+            time.sleep(0.5)
+            
+            logger.info("=" * 70)
+            logger.info(" Campos completados exitosamente")
+            logger.info("= Listo para siguiente expediente =")
+            logger.info("=" * 70)
+            return True
         
         except Exception as e:
-            logger.error(f"Error en detect_desea_continuar_aviso: {e}")
-            return (False, "")
+            logger.error(f"Error en fill_interventor_and_plazo_loop: {str(e)}")
+            return False
+    
+    def detect_desea_continuar_aviso(self, timeout=2):
+        """
+        Detecta el mensaje "¿ Desea Continuar ?" (DSE con embargos activos).
+
+        Retorna:
+            - Tupla (True, mensaje) si se detecta el mensaje
+            - Tupla (False, "") si no hay mensaje
+        """
+        encontrado, texto, _ = self.match_dialogs("desea_continuar", timeout)
+        return (True, texto) if encontrado else (False, "")
     
     def detect_grabar_resolucion_aviso(self, timeout=2):
         """
-        Detecta si aparece el mensaje "¿Desea Ud. grabar la Resolución Coactiva?"
-        Este aviso es opcional y puede aparecer en DSE.
-        
-        Usa MSAA para inspeccionar controles de tipo Text.
-        
+        Detecta el mensaje opcional "¿Desea Ud. grabar la Resolución Coactiva?" (DSE).
+
         Retorna:
             - Tupla (True, mensaje) si se detecta el mensaje
             - Tupla (False, "") si no hay mensaje
         """
-        try:
-            logger.info("Verificando si hay mensaje '¿Desea Ud. grabar la Resolución?'...")
-            desktop = Desktop(backend="uia")
-            end_time = time.time() + timeout
-            
-            while time.time() < end_time:
-                try:
-                    # Buscar ventanas de diálogo
-                    dlgs = desktop.windows()
-                    
-                    for dlg in dlgs:
-                        try:
-                            # Buscar controles de tipo Text en descendientes
-                            descendants = dlg.descendants()
-                            
-                            for desc in descendants:
-                                try:
-                                    texto = desc.window_text()
-                                    
-                                    # Búsqueda ROBUSTA: múltiples palabras clave
-                                    # Patrón: "¿Desea Ud. grabar la Resolución Coactiva?"
-                                    # Requiere: "desea" + "grabar" + ("resolucion" OR "coactiva")
-                                    texto_lower = texto.lower()
-                                    if ("desea" in texto_lower and 
-                                        "grabar" in texto_lower and 
-                                        ("resolucion" in texto_lower or "coactiva" in texto_lower)):
-                                        logger.warning(f"Aviso '¿Desea Ud. grabar Resolución?' detectado")
-                                        return (True, texto)
-                                
-                                except Exception:
-                                    pass
-                        
-                        except Exception:
-                            pass
-                
-                except Exception:
-                    pass
-                
-                time.sleep(0.1)
-            
-            return (False, "")
-        
-        except Exception as e:
-            logger.error(f"Error en detect_grabar_resolucion_aviso: {e}")
-            return (False, "")
+        encontrado, texto, _ = self.match_dialogs("grabar_resolucion", timeout)
+        return (True, texto) if encontrado else (False, "")
     
     def fill_monto(self):
         """
@@ -3616,8 +7644,7 @@ class RSIRATAutomation32:
         
         try:
             # Cargar datos del Excel
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+            expedientes = self.load_expedientes()
             
             # Obtener valor de MONTO del expediente actual (self.primer_expediente_idx)
             monto = None
@@ -3640,8 +7667,8 @@ class RSIRATAutomation32:
             time.sleep(0.5)
             
             logger.info(f"Digitando MONTO: '{monto}'")
-            pyautogui.write(monto, interval=0.05)
-            time.sleep(0.3)
+            self._escribir(monto)
+            self._pausa(0.3)
             
             # ============================================================
             # PASO 2: Presionar ALT+A para confirmar MONTO
@@ -3652,7 +7679,7 @@ class RSIRATAutomation32:
             
             logger.info("Presionando ALT+A...")
             pyautogui.hotkey('alt', 'a')
-            time.sleep(1)
+            self._pausa(1)
             logger.info(" ALT+A presionado correctamente")
             
             # ============================================================
@@ -3675,7 +7702,7 @@ class RSIRATAutomation32:
                 # Presionar ENTER para cerrar el aviso de MONTO MAYOR
                 logger.info("Presionando ENTER para cerrar aviso de MONTO MAYOR...")
                 pyautogui.press('return')
-                time.sleep(1)
+                self._pausa(1)
                 logger.info(" ENTER presionado")
                 
                 # Detectar el segundo aviso de MONTO MAYOR
@@ -3687,7 +7714,7 @@ class RSIRATAutomation32:
                     logger.warning(f"Segundo aviso detectado: {segundo_aviso_msg}")
                     logger.info("Presionando ENTER para cerrar segundo aviso...")
                     pyautogui.press('return')
-                    time.sleep(1)
+                    self._pausa(1)
                     logger.info(" ENTER presionado")
                 
                 logger.info("=" * 70)
@@ -3704,7 +7731,7 @@ class RSIRATAutomation32:
                 logger.info("Presionando ALT+C para regresar al menú...")
                 time.sleep(0.5)
                 pyautogui.hotkey('alt', 'c')
-                time.sleep(1)
+                self._pausa(1)
                 logger.info(" ALT+C presionado correctamente")
                 
                 # ============================================================
@@ -3780,10 +7807,7 @@ class RSIRATAutomation32:
             
             if embargo_detectado:
                 logger.warning(f"Aviso de embargos detectado: {embargo_msg}")
-                logger.info("Presionando ALT+S...")
-                pyautogui.hotkey('alt', 's')
-                time.sleep(1)
-                logger.info(" ALT+S presionado")
+                self.respond_dialog("expediente_aviso")
             else:
                 logger.info("No se detectó aviso de embargos (continuando...)")
             
@@ -3793,10 +7817,7 @@ class RSIRATAutomation32:
             
             if desea_continuar_detectado:
                 logger.warning(f"Aviso '¿ Desea Continuar ?' detectado: {desea_continuar_msg}")
-                logger.info("Presionando ALT+S...")
-                pyautogui.hotkey('alt', 's')
-                time.sleep(1)
-                logger.info(" ALT+S presionado")
+                self.respond_dialog("desea_continuar")
             else:
                 logger.info("No se detectó '¿ Desea Continuar ?' (continuando...)")
             
@@ -3811,10 +7832,7 @@ class RSIRATAutomation32:
             
             if grabar_resolucion_detectado:
                 logger.warning(f"Aviso '¿Desea Ud. grabar Resolución?' detectado: {grabar_resolucion_msg}")
-                logger.info("Presionando ALT+S...")
-                pyautogui.hotkey('alt', 's')
-                time.sleep(1)
-                logger.info(" ALT+S presionado")
+                self.respond_dialog("grabar_resolucion")
             else:
                 logger.info("No se detectó '¿Desea Ud. grabar Resolución?' (continuando...)")
             
@@ -3825,14 +7843,11 @@ class RSIRATAutomation32:
             logger.info("PASO 6: Detectando mensaje de Resolución Coactiva (OBLIGATORIO)")
             logger.info("=" * 70)
             
-            rc_detectado, rc_msg = self.detect_resolucion_coactiva_aviso(timeout=2)
+            rc_detectado, rc_msg, rc_number = self.detect_resolucion_coactiva_aviso(timeout=2)
             
             if rc_detectado:
                 logger.warning(f"RC detectado: {rc_msg}")
                 
-                # Extraer número de RC
-                rc_number = self.extract_resolucion_coactiva_number(rc_msg)
-                
                 if rc_number:
                     logger.info(f"RC extraído: {rc_number}")
                     logger.info("Guardando RC en Excel...")
@@ -3845,7 +7860,7 @@ class RSIRATAutomation32:
                 # Presionar ENTER para cerrar el mensaje de RC
                 logger.info("Presionando ENTER para cerrar mensaje de RC...")
                 pyautogui.press('return')
-                time.sleep(1)
+                self._pausa(1)
                 logger.info(" ENTER presionado")
             else:
                 logger.warning("No se detectó mensaje de RC")
@@ -3865,7 +7880,7 @@ class RSIRATAutomation32:
             logger.info("Presionando ALT+C para regresar al menú...")
             time.sleep(0.5)
             pyautogui.hotkey('alt', 'c')
-            time.sleep(1)
+            self._pausa(1)
             logger.info(" ALT+C presionado correctamente")
             
             # ============================================================
@@ -3939,34 +7954,31 @@ class RSIRATAutomation32:
         Agrega o actualiza la columna RESULTADO en la fila actual.
         """
         try:
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            
-            # Leer el Excel preservando formato original
-            expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
-            
-            # Crear columna si no existe
-            if "RESULTADO" not in expedientes.columns:
-                logger.info("Creando columna 'RESULTADO' en el Excel")
-                expedientes["RESULTADO"] = None
-            
-            # Actualizar la primera fila (la que procesamos)
-            expedientes.at[0, "RESULTADO"] = resultado
+            if self.resultado_descartado(self.primer_expediente_idx, resultado):
+                return False
+            excel_file = self.excel_entrada
             
-            # Guardar el Excel preservando formato
-            expedientes.to_excel(excel_file, engine="openpyxl", index=False)
-            logger.info(f"Excel actualizado: RESULTADO = '{resultado}'")
-            # Si se escribió un RC o MONTO MAYOR, marcar como completado
-            try:
-                if isinstance(resultado, str):
-                    res_up = resultado.strip().upper()
-                    if resultado.isdigit() or res_up == 'MONTO MAYOR':
-                        self.last_exp_completed = True
-                    else:
-                        self.last_exp_completed = False
-                else:
-                    self.last_exp_completed = False
-            except Exception:
-                pass
+            # Modo worker: varios procesos comparten el Excel, los resultados los escribe el coordinador
+            if not self.modo_worker:
+                with self.metricas.medir("excel_io"):
+                    # Este método reescribe el Excel completo: primero escribir los resultados encolados
+                    self.prefetcher.flush()
+                    
+                    # Leer el Excel preservando formato original
+                    expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+                    
+                    # Crear columna si no existe
+                    if "RESULTADO" not in expedientes.columns:
+                        logger.info("Creando columna 'RESULTADO' en el Excel")
+                        expedientes["RESULTADO"] = None
+                    
+                    # Actualizar la primera fila (la que procesamos)
+                    expedientes.at[0, "RESULTADO"] = resultado
+                    
+                    # Guardar el Excel preservando formato
+                    expedientes.to_excel(excel_file, engine="openpyxl", index=False)
+                logger.info(f"Excel actualizado: RESULTADO = '{resultado}'")
+            self.estado_sesion.record_result(resultado)
             
             return True
         
@@ -3984,56 +7996,17 @@ class RSIRATAutomation32:
             resultado: Valor a guardar en la columna RESULTADO
         """
         try:
+            if self.resultado_descartado(row_idx, resultado):
+                return False
             logger.info(f"Actualizando Excel para fila {row_idx + 1} con resultado: {resultado}")
             
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            from openpyxl import load_workbook
-            
-            # Leer el archivo con openpyxl para preservar formatos
-            wb = load_workbook(excel_file)
-            ws = wb.active
-            
-            # Encontrar la columna RESULTADO
-            headers = {}
-            for col_idx, cell in enumerate(ws[1], 1):
-                headers[cell.value] = col_idx
-            
-            # Si no existe la columna RESULTADO, crearla
-            if "RESULTADO" not in headers:
-                resultado_col = len(headers) + 1
-                ws.cell(row=1, column=resultado_col, value="RESULTADO")
-            else:
-                resultado_col = headers["RESULTADO"]
-            
-            # Escribir el resultado en la fila especificada (sumando 2 porque: 1 es header, +1 para 0-based)
-            celda_resultado = ws.cell(row=row_idx + 2, column=resultado_col, value=resultado)
-            
-            # Aplicar formato de texto si es un número con leading zero
-            if isinstance(resultado, str) and resultado.isdigit():
-                celda_resultado.number_format = '@'
-                
-                # Si comienza con 0, anteponer apóstrofe
-                if resultado.startswith('0'):
-                    celda_resultado.value = "'" + resultado
+            excel_file = self.excel_entrada
             
-            # Guardar el archivo
-            wb.save(excel_file)
-            logger.info(f" Excel actualizado para fila {row_idx + 1}")
-            # Si escribimos un RC (número) o un indicador de MONTO MAYOR,
-            # consideramos que el expediente quedó completado y por lo
-            # tanto habilitamos el cambio de expediente.
-            try:
-                if isinstance(resultado, str):
-                    res_up = resultado.strip().upper()
-                    if resultado.isdigit() or res_up == 'MONTO MAYOR':
-                        self.last_exp_completed = True
-                    else:
-                        # Otros mensajes no implican completar el flujo
-                        self.last_exp_completed = False
-                else:
-                    self.last_exp_completed = False
-            except Exception:
-                pass
+            # Escribir el resultado en la fila especificada con formato de texto
+            # (apóstrofe si comienza con 0); el guardado se hace en el hilo de prefetch
+            self.write_result(excel_file, row_idx, resultado, apostrofe=True)
+            logger.info(f" Resultado encolado para fila {row_idx + 1}")
+            self.record_row_result(row_idx, resultado)
             return True
         
         except Exception as e:
@@ -4054,8 +8027,7 @@ class RSIRATAutomation32:
         
         try:
             # Cargar datos del Excel
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+            expedientes = self.load_expedientes()
             
             # Obtener valor de MONTO de la fila especificada
             monto = None
@@ -4078,8 +8050,8 @@ class RSIRATAutomation32:
             time.sleep(0.5)
             
             logger.info(f"Digitando MONTO: '{monto}'")
-            pyautogui.write(monto, interval=0.05)
-            time.sleep(0.3)
+            self._escribir(monto)
+            self._pausa(0.3)
             
             # ============================================================
             # PASO 2: Presionar ALT+A para confirmar MONTO
@@ -4090,7 +8062,7 @@ class RSIRATAutomation32:
             
             logger.info("Presionando ALT+A...")
             pyautogui.hotkey('alt', 'a')
-            time.sleep(1)
+            self._pausa(1)
             logger.info(" ALT+A presionado correctamente")
             
             # ============================================================
@@ -4113,7 +8085,7 @@ class RSIRATAutomation32:
                 # Presionar ENTER para cerrar el aviso de MONTO MAYOR
                 logger.info("Presionando ENTER para cerrar aviso de MONTO MAYOR...")
                 pyautogui.press('return')
-                time.sleep(1)
+                self._pausa(1)
                 logger.info(" ENTER presionado")
                 
                 # Detectar el segundo aviso de MONTO MAYOR
@@ -4125,7 +8097,7 @@ class RSIRATAutomation32:
                     logger.warning(f"Segundo aviso detectado: {segundo_aviso_msg}")
                     logger.info("Presionando ENTER para cerrar segundo aviso...")
                     pyautogui.press('return')
-                    time.sleep(1)
+                    self._pausa(1)
                     logger.info(" ENTER presionado")
                 
                 logger.info("=" * 70)
@@ -4142,7 +8114,7 @@ class RSIRATAutomation32:
                 logger.info("Presionando ALT+C para regresar al menú...")
                 time.sleep(0.5)
                 pyautogui.hotkey('alt', 'c')
-                time.sleep(1)
+                self._pausa(1)
                 logger.info(" ALT+C presionado correctamente")
                 
                 # ============================================================
@@ -4218,10 +8190,7 @@ class RSIRATAutomation32:
             
             if embargo_detectado:
                 logger.warning(f"Aviso de embargos detectado: {embargo_msg}")
-                logger.info("Presionando ALT+S...")
-                pyautogui.hotkey('alt', 's')
-                time.sleep(1)
-                logger.info(" ALT+S presionado")
+                self.respond_dialog("expediente_aviso")
             else:
                 logger.info("No se detectó aviso de embargos (continuando...)")
             
@@ -4231,10 +8200,7 @@ class RSIRATAutomation32:
             
             if desea_continuar_detectado:
                 logger.warning(f"Aviso '¿ Desea Continuar ?' detectado: {desea_continuar_msg}")
-                logger.info("Presionando ALT+S...")
-                pyautogui.hotkey('alt', 's')
-                time.sleep(1)
-                logger.info(" ALT+S presionado")
+                self.respond_dialog("desea_continuar")
             else:
                 logger.info("No se detectó '¿ Desea Continuar ?' (continuando...)")
             
@@ -4249,10 +8215,7 @@ class RSIRATAutomation32:
             
             if grabar_resolucion_detectado:
                 logger.warning(f"Aviso '¿Desea Ud. grabar Resolución?' detectado: {grabar_resolucion_msg}")
-                logger.info("Presionando ALT+S...")
-                pyautogui.hotkey('alt', 's')
-                time.sleep(1)
-                logger.info(" ALT+S presionado")
+                self.respond_dialog("grabar_resolucion")
             else:
                 logger.info("No se detectó '¿Desea Ud. grabar Resolución?' (continuando...)")
             
@@ -4263,14 +8226,11 @@ class RSIRATAutomation32:
             logger.info("PASO 6: Detectando mensaje de Resolución Coactiva (OBLIGATORIO)")
             logger.info("=" * 70)
             
-            rc_detectado, rc_msg = self.detect_resolucion_coactiva_aviso(timeout=2)
+            rc_detectado, rc_msg, rc_number = self.detect_resolucion_coactiva_aviso(timeout=2)
             
             if rc_detectado:
                 logger.warning(f"RC detectado: {rc_msg}")
                 
-                # Extraer número de RC
-                rc_number = self.extract_resolucion_coactiva_number(rc_msg)
-                
                 if rc_number:
                     logger.info(f"RC extraído: {rc_number}")
                     logger.info("Guardando RC en Excel...")
@@ -4283,7 +8243,7 @@ class RSIRATAutomation32:
                 # Presionar ENTER para cerrar el mensaje de RC
                 logger.info("Presionando ENTER para cerrar mensaje de RC...")
                 pyautogui.press('return')
-                time.sleep(1)
+                self._pausa(1)
                 logger.info(" ENTER presionado")
             else:
                 logger.warning("No se detectó mensaje de RC")
@@ -4303,7 +8263,7 @@ class RSIRATAutomation32:
             logger.info("Presionando ALT+C para regresar al menú...")
             time.sleep(0.5)
             pyautogui.hotkey('alt', 'c')
-            time.sleep(1)
+            self._pausa(1)
             logger.info(" ALT+C presionado correctamente")
             
             # ============================================================
@@ -4402,12 +8362,16 @@ class RSIRATAutomation32:
         logger.info("=" * 70)
         
         try:
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+            expedientes = self.load_expedientes()
             
-            # Empezar desde el segundo expediente (índice 1)
-            for idx in range(self.primer_expediente_idx + 1, len(expedientes)):
+            # Procesar expedientes restantes del lote (omitiendo los que ya tienen resultado)
+            for idx in self.filas_pendientes(len(expedientes), excluir=self.primer_expediente_idx):
+                if self.sesion_caida():
+                    logger.error("Sesión de SIRAT caída, interrumpiendo bucle de expedientes")
+                    return False
+                
                 exp_actual = str(expedientes.iloc[idx]["EXPEDIENTE"]).strip()
+                self.start_row(idx)
                 
                 logger.info(f"\n{'=' * 70}")
                 logger.info(f"PROCESANDO EXPEDIENTE {idx + 1} DE {len(expedientes)}: {exp_actual}")
@@ -4418,15 +8382,15 @@ class RSIRATAutomation32:
                 # ============================================================
                 logger.info("PASO 1: Digitando expediente...")
                 logger.info(f"Expediente: {exp_actual}")
-                pyautogui.write(exp_actual, interval=0.05)
-                time.sleep(0.5)
+                self._escribir(exp_actual)
+                self._pausa(0.5)
                 
                 # ============================================================
                 # PASO 2: Presionar ENTER para validar el expediente
                 # ============================================================
                 logger.info("PASO 2: Presionando ENTER para validar expediente...")
                 pyautogui.press('return')
-                time.sleep(1)
+                self._pausa(1)
                 logger.info(" ENTER presionado")
                 
                 # ============================================================
@@ -4447,14 +8411,14 @@ class RSIRATAutomation32:
                     # Presionar ENTER para cerrar diálogo de error
                     logger.info("Presionando ENTER para cerrar diálogo de error...")
                     pyautogui.press('return')
-                    time.sleep(1)
+                    self._pausa(1)
                     
                     # Borrar el expediente inválido (Ctrl+A, Delete)
                     logger.info("Borrando expediente inválido...")
                     pyautogui.hotkey('ctrl', 'a')
-                    time.sleep(0.2)
+                    self._pausa(0.2)
                     pyautogui.press('delete')
-                    time.sleep(0.5)
+                    self._pausa(0.5)
                     
                     # Continuar con el siguiente expediente
                     logger.info("Continuando con el siguiente expediente...")
@@ -4462,12 +8426,17 @@ class RSIRATAutomation32:
                 else:
                     logger.info(" Expediente es VÁLIDO")
                 
+                # Precheck en la grilla (Grupo vacío / MONTO MAYOR): sin ALT+A, se pasa al siguiente
+                if not self.precheck_seleccion(idx):
+                    logger.info("Continuando con el siguiente expediente...")
+                    continue
+                
                 # ============================================================
                 # PASO 4: Presionar ALT+A para validar ejecutor
                 # ============================================================
                 logger.info("PASO 4: Presionando ALT+A para validar ejecutor...")
                 pyautogui.hotkey('alt', 'a')
-                time.sleep(1)
+                self._pausa(1)
                 logger.info(" ALT+A presionado correctamente")
                 
                 # ============================================================
@@ -4477,7 +8446,8 @@ class RSIRATAutomation32:
                 logger.info("PASO 5: VALIDANDO DATOS DEL EXPEDIENTE")
                 logger.info("=" * 70)
                 
-                es_valido, mensaje_error = self.validate_expediente_row(expedientes, idx)
+                registro = self.row_record(idx)
+                es_valido, mensaje_error = registro["valido"], registro["motivo"]
                 
                 if not es_valido:
                     logger.error(f"Datos incompletos: {mensaje_error}")
@@ -4488,7 +8458,7 @@ class RSIRATAutomation32:
                     # Limpiar campo y continuar
                     logger.info("Limpiando campo de expediente...")
                     pyautogui.hotkey('ctrl', 'backspace')
-                    time.sleep(0.2)
+                    self._pausa(0.2)
                     
                     logger.info("Continuando con el siguiente expediente...")
                     continue
@@ -4589,9 +8559,9 @@ class RSIRATAutomation32:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return False
     
-    def get_expedientes_grouped_by_dependencia(self):
+    def get_expedientes_grouped_by_dependencia(self, filas=None):
         """
-        Lee el Excel y agrupa expedientes por dependencia.
+        Lee el Excel y agrupa expedientes por dependencia (todas las filas o solo `filas`).
 
         Retorna:
             - dict con estructura: {
@@ -4606,14 +8576,16 @@ class RSIRATAutomation32:
             el orden devuelto será ["23", "21"] (23 inicia porque tiene más expedientes).
         """
         try:
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            expedientes = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+            expedientes = self.load_expedientes()
             
             grupos = {}
             # registro del primer indice donde aparece cada dependencia (para desempates)
             primera_aparicion = {}
 
+            seleccionadas = None if filas is None else set(filas)
             for idx, fila in expedientes.iterrows():
+                if seleccionadas is not None and idx not in seleccionadas:
+                    continue
                 dependencia = str(fila.get("DEPENDENCIA", "")).strip()
 
                 # Extraer "21" o "23" de la dependencia
@@ -4655,24 +8627,32 @@ class RSIRATAutomation32:
         Procesa un lote de expedientes de una dependencia.
         
         Flujo:
-        1. Si es PRIMER lote: Abre app + Login
+        1. Deja lista la sesión de la dependencia (ensure_session):
+           - Primer lote: abre app + Login (o reutiliza un SIRAT ya abierto)
+           - Lotes siguientes: cambia de dependencia dentro de SIRAT; si no se puede,
+             ALT+F4 + abre app + Login
         2. Para CADA expediente:
-           a. Valida si el expediente tiene datos completos
-           b. Si es inválido: Marca en Excel y continúa al siguiente
-           c. Si es válido:
-              - PRIMER expediente del lote: Ejecuta click_cobranza_coactiva() (desde cero)
-              - SIGUIENTES expedientes del lote: Ejecuta click_cambio_expediente() (reusa flujo)
-        3. ALT+F4 para cerrar app (SIEMPRE)
+           (el lote se reordena con TransitionScheduler para agrupar IEI / DSE)
+           a. Si ya tiene resultado (p. ej. procesado antes de un reinicio): se omite
+           b. Valida si el expediente tiene datos completos
+           c. Si es inválido: Marca en Excel y continúa al siguiente
+           d. Si es válido:
+              - PRIMER expediente de la sesión: Ejecuta click_cobranza_coactiva() (desde cero)
+              - SIGUIENTES expedientes: el camino más barato según el estado de la sesión
+                (Cambio de Expediente o ingreso directo en la selección, ver process_batch_row)
+           e. Si el watchdog detectó SIRAT colgado: reinicia la sesión y reanuda
+              en la fila en curso (desde cero), sin reprocesar las ya terminadas
+        3. ALT+F4 para cerrar app (solo en el último lote)
         
         IMPORTANTE: 
         - ALT+F4 SIEMPRE cierra la app completamente
-        - Esto permite loguear nuevamente con la siguiente dependencia
-        - "Desde cero" SOLO aplica al PRIMER expediente de cada lote (después de ALT+F4)
+        - El login usa la dependencia del lote (no la más usada del Excel)
+        - "Desde cero" SOLO aplica al PRIMER expediente de cada sesión (después de login)
         
         Args:
             dependencia: "21" o "23"
             expedientes_grupo: Lista de tuplas (idx, fila) del Excel
-            is_first: True si es el primer lote (abre app + login)
+            is_first: True si es el primer lote
             is_last: True si es el último lote
         """
         try:
@@ -4683,42 +8663,40 @@ class RSIRATAutomation32:
             logger.info("=" * 70)
             
             # Cargar datos del Excel para validación
-            excel_file = SCRIPT_DIR / "EXPEDIENTES.xlsx"
-            expedientes_df = pd.read_excel(excel_file, engine="openpyxl", dtype=str)
+            expedientes_df = self.load_expedientes()
+            
+            # Reordenar el lote para agrupar por tipo de medida (menos cambios de formulario).
+            # Las tuplas conservan el índice original de fila para escribir resultados.
+            self.scheduler = TransitionScheduler()
+            expedientes_grupo = self.scheduler.plan(expedientes_grupo, expedientes_df, self.validate_expediente_row)
             
-            # PASO 1: Si es el primer lote, abrir app y hacer login
+            # Los bucles de SIRAT solo recorren las filas de este lote, en el orden planificado
+            self.orden_filas = [row_idx for row_idx, _ in expedientes_grupo]
+            self.watchdog.start()
+            
+            # Preparar los primeros expedientes mientras se abre SIRAT y se hace login
+            self.prefetcher.start(self.validate_expediente_row)
+            self.prefetcher.prefetch(self.filas_pendientes(len(expedientes_df)))
+            
+            # PASO 1: Abrir app y hacer login
             if is_first:
                 logger.info("\n[PRIMER LOTE] Abriendo aplicación...")
-                if not self.open_application():
-                    logger.error("No se pudo abrir la aplicación")
-                    return False
-                
-                logger.info("Esperando carga de la aplicación...")
-                time.sleep(3)
-                
-                logger.info("Procediendo con el login...")
-                if not self.login():
-                    logger.warning("No se pudo completar el login")
-                    return False
             else:
                 # Para lotes posteriores, app será abierta nuevamente después de ALT+F4
                 logger.info("\n[LOTE POSTERIOR] La app fue cerrada, reabriendo...")
-                if not self.open_application():
-                    logger.error("No se pudo abrir la aplicación")
-                    return False
-                
-                logger.info("Esperando carga de la aplicación...")
-                time.sleep(3)
-                
-                logger.info("Procediendo con el login...")
-                if not self.login():
-                    logger.warning("No se pudo completar el login")
+            
+            if not self.ensure_session(dependencia):
+                if not (self.sesion_caida() and self.restart_sirat_session()):
                     return False
             
             # PASO 2: Procesar cada expediente del grupo
             logger.info(f"\nProcesando {len(expedientes_grupo)} expedientes de dependencia {dependencia}...")
             
             for idx, (row_idx, fila) in enumerate(expedientes_grupo, 1):
+                if row_idx in self.filas_terminadas:
+                    logger.info(f"[{idx}/{len(expedientes_grupo)}] Fila {row_idx + 2} ya procesada, omitiendo")
+                    continue
+                
                 logger.info(f"\n" + "=" * 70)
                 logger.info(f"EXPEDIENTE [{idx}/{len(expedientes_grupo)}] - Fila {row_idx + 2}")
                 logger.info("=" * 70)
@@ -4726,7 +8704,8 @@ class RSIRATAutomation32:
                 # ============================================================
                 # VALIDAR EXPEDIENTE PRIMERO
                 # ============================================================
-                es_valido, error_msg = self.validate_expediente_row(expedientes_df, row_idx)
+                registro = self.row_record(row_idx)
+                es_valido, error_msg = registro["valido"], registro["motivo"]
                 
                 if not es_valido:
                     # Marcar como inválido en Excel y continuar
@@ -4735,51 +8714,12 @@ class RSIRATAutomation32:
                     continue
                 
                 # ============================================================
-                # EXPEDIENTE VÁLIDO: Procesar según posición en lote
+                # EXPEDIENTE VÁLIDO: Procesar según estado de la sesión
                 # ============================================================
-                if idx == 1:
-                    # PRIMER expediente del lote: Cobranza Coactiva (DESDE CERO)
-                    logger.info("→ PRIMER expediente del lote: Ejecutando desde Cobranza Coactiva...")
-                    resultado = self.click_cobranza_coactiva()
-                else:
-                    # SIGUIENTES expedientes: decidir modo de ingreso según
-                    # si el expediente anterior quedó completamente procesado.
-                    logger.info("→ Expediente siguiente en mismo lote: Decidiendo modo de ingreso...")
-                    # Si el expediente anterior finalizó correctamente (RC o MONTO MAYOR),
-                    # podemos usar el flujo de cambio de expediente en la UI.
-                    if getattr(self, 'last_exp_completed', False):
-                        logger.info("Expediente anterior completado → usando click_cambio_expediente()")
-                        resultado = self.click_cambio_expediente()
-                        if resultado:
-                            # Tras el cambio, ingresar y validar el expediente concreto
-                            enter_ok = self.enter_specific_expediente(row_idx)
-                            if enter_ok:
-                                resultado = self.validate_executor()
-                                if resultado:
-                                    resultado = self.handle_post_embargo_flow()
-                            else:
-                                resultado = False
-                        else:
-                            logger.warning("No se pudo ejecutar click_cambio_expediente()")
-                            # Intentar ingresar directamente sin cambio como fallback
-                            enter_ok = self.enter_specific_expediente(row_idx)
-                            if enter_ok:
-                                resultado = self.validate_executor()
-                                if resultado:
-                                    resultado = self.handle_post_embargo_flow()
-                            else:
-                                resultado = False
-                    else:
-                        # Si el anterior NO completó su flujo (p. ej. fue inválido),
-                        # NO debemos hacer click de cambio de expediente en la UI.
-                        logger.info("Expediente anterior NO completado → ingresando directamente sin cambio de UI")
-                        enter_ok = self.enter_specific_expediente(row_idx)
-                        if enter_ok:
-                            resultado = self.validate_executor()
-                            if resultado:
-                                resultado = self.handle_post_embargo_flow()
-                        else:
-                            resultado = False
+                resultado = self.process_row(row_idx, len(expedientes_df))
+                if resultado is None:
+                    logger.error("No se pudo reiniciar la sesión de SIRAT, abortando lote")
+                    return False
                 
                 if resultado:
                     logger.info(f"✓ [{idx}/{len(expedientes_grupo)}] Expediente procesado")
@@ -4787,21 +8727,317 @@ class RSIRATAutomation32:
                     logger.warning(f"✗ [{idx}/{len(expedientes_grupo)}] Error procesando expediente")
             
             logger.info(f"\n✓ Lote de dependencia {dependencia} completado")
+            self.scheduler.report()
             
-            # PASO 3: Cerrar app con ALT+F4 (SIEMPRE, incluso en último lote)
-            logger.info("\nCerrando aplicación con ALT+F4...")
-            try:
-                pyautogui.hotkey('alt', 'f4')
-                time.sleep(2)
-                logger.info(" ✓ Aplicación cerrada")
-            except Exception as e:
-                logger.warning(f" Error en ALT+F4: {e}")
+            # Asegurar que los resultados del lote estén en disco antes de cerrar SIRAT
+            self.prefetcher.flush()
+            self.reclaim_failed_writes()
+            self.prefetcher.report()
+            
+            # PASO 3: Cerrar app con ALT+F4 en el último lote; en los demás la sesión
+            # queda abierta para cambiar de dependencia sin relanzar
+            if is_last:
+                self.close_session()
             
             return True
         
         except Exception as e:
             logger.error(f"Error en process_dependencia_batch: {str(e)}")
             return False
+        
+        finally:
+            self.watchdog.stop()
+    
+    def process_row(self, row_idx, total):
+        """
+        Procesa UN expediente con process_batch_row(). Si el watchdog detectó SIRAT
+        colgado, reinicia la sesión y reanuda en la fila en curso.
+
+        Retorna:
+            - True / False según el resultado del expediente
+            - None si no se pudo reiniciar la sesión de SIRAT
+        """
+        resultado = self.process_batch_row(row_idx)
+        
+        # ============================================================
+        # WATCHDOG: si SIRAT se colgó, reiniciar y reanudar en la fila en curso
+        # ============================================================
+        while self.sesion_caida():
+            if not self.restart_sirat_session():
+                return None
+            
+            pendientes = self.filas_pendientes(total)
+            if not pendientes:
+                break
+            
+            logger.info(f"Reanudando en la fila {pendientes[0] + 2}...")
+            resultado = self.process_batch_row(pendientes[0])
+        
+        self.watchdog.idle()
+        self.budget.stop()
+        return resultado
+    
+    def run_worker(self, cola, worker_id, simulador=None):
+        """
+        Modo worker: toma expedientes de la cola compartida, de la dependencia
+        en la que está logueada su sesión de SIRAT, y reporta cada resultado a la cola.
+
+        Flujo:
+        1. Adjunta la sesión de SIRAT abierta (si hay) para conocer su dependencia
+        2. Toma una fila de esa dependencia (lease renovado por un hilo de latidos)
+        3. La procesa SOLO a ella (orden_filas = [fila]): el primer expediente de la
+           sesión entra desde Cobranza Coactiva, los siguientes con Cambio de Expediente
+        4. Sin filas de su dependencia: cambia de dependencia (ensure_session)
+        5. Termina cuando la cola no tiene filas que se puedan tomar (las que agotaron
+           sus intentos se cierran aunque el coordinador ya no esté)
+
+        Args:
+            cola: ColaExpedientes compartida
+            worker_id: Identificador del worker (dueño de los leases)
+            simulador: SimuladorSIRAT para pruebas sin GUI (None = SIRAT real)
+        """
+        self.cola = cola
+        self.worker_id = worker_id
+        self.modo_worker = True
+        # Simulado (bench, pruebas): el informe va junto a la cola y el ritmo aprendido no se guarda
+        informe = f"{INFORME_ARCHIVO.name}_{worker_id}"
+        self.informe = RunReport(Path(cola.ruta).with_name(informe) if simulador else INFORME_ARCHIVO.with_name(informe))
+        
+        logger.info("\n" + "=" * 70)
+        logger.info(f"WORKER {worker_id}: cola {cola.ruta}{' (SIMULADO)' if simulador else ''}")
+        logger.info("=" * 70)
+        
+        expedientes = self.load_expedientes()
+        self.prefetcher.validar = self.validate_expediente_row
+        
+        # Hilo de latidos: renueva los leases del worker mientras procesa
+        detener = threading.Event()
+        
+        def _latidos():
+            while not detener.wait(COLA_LATIDO):
+                try:
+                    cola.renovar(worker_id)
+                except Exception as e:
+                    logger.warning(f"No se pudo renovar el lease: {e}")
+        
+        threading.Thread(target=_latidos, name="LatidosCola", daemon=True).start()
+        
+        if not simulador:
+            self.warm_gui_modules()
+            if self.adjuntar and find_sirat_windows():
+                self.sesion_adjunta = self.find_existing_session()
+            self.watchdog.start()
+            logger.addHandler(self.diagnostico.handler)
+        
+        dependencia = self.sesion_adjunta if self.sesion_adjunta in DEPENDENCIAS else None
+        if dependencia and not self.ensure_session(dependencia):
+            dependencia = None
+        procesados = 0
+        
+        try:
+            while cola.tomables() > 0:
+                fila = cola.tomar(worker_id, dependencia) if dependencia else None
+                
+                if fila is None:
+                    disponibles = cola.dependencias_pendientes()
+                    if dependencia in disponibles:
+                        continue
+                    if not disponibles:
+                        # Filas en curso en otros workers: esperar por si algún lease vence
+                        time.sleep(COLA_LATIDO / 3)
+                        continue
+                    
+                    dependencia = disponibles[0]
+                    logger.info(f"Worker {worker_id}: tomando expedientes de la dependencia {dependencia}")
+                    if not simulador and not self.ensure_session(dependencia):
+                        logger.error("No se pudo abrir la sesión de SIRAT, deteniendo worker")
+                        return False
+                    continue
+                
+                logger.info(f"\nWorker {worker_id}: fila {fila + 2} (dependencia {dependencia})")
+                self.orden_filas = [fila]
+                
+                if simulador:
+                    self.metricas.start(fila)
+                    resultado = simulador.procesar(self.row_record(fila))
+                    if resultado is not None:
+                        self.record_row_result(fila, resultado)
+                elif self.process_row(fila, len(expedientes)) is None:
+                    logger.error("No se pudo reiniciar la sesión de SIRAT, deteniendo worker")
+                    cola.liberar(fila, worker_id)
+                    return False
+                
+                # Sin resultado escrito: devolver la fila para que se reintente
+                if fila not in self.filas_terminadas:
+                    logger.warning(f"Fila {fila + 2} sin resultado, se devuelve a la cola")
+                    cola.liberar(fila, worker_id)
+                else:
+                    procesados += 1
+            
+            # Filas que agotaron sus intentos: cerrarlas aquí por si el coordinador ya no corre
+            agotadas = cola.cerrar_agotados()
+            if agotadas:
+                logger.warning(f"Worker {worker_id}: {agotadas} expediente(s) agotaron sus intentos sin resultado")
+            
+            logger.info(f"Worker {worker_id}: cola terminada ({procesados} expedientes procesados)")
+            return True
+        
+        finally:
+            detener.set()
+            if not simulador:
+                self.ritmo.save()
+            self.estado_sesion.report()
+            self.informe.report()
+            if not simulador:
+                self.watchdog.stop()
+                logger.removeHandler(self.diagnostico.handler)
+                if self.sesion_activa is not None:
+                    self.close_session()
+    
+    def process_batch_row(self, row_idx):
+        """
+        Procesa UN expediente del lote eligiendo el modo de ingreso según
+        self.estado_sesion (SessionState.next_path):
+        - Sesión recién abierta (menú): desde Cobranza Coactiva (click_cobranza_coactiva)
+        - Dentro del expediente anterior (RC, MONTO MAYOR o flujo interrumpido después
+          de ALT+A): click_cambio_expediente() + ingreso directo
+        - Selección abierta (el anterior fue rechazado antes de ALT+A): ingreso directo,
+          borrando antes el campo Número si quedó texto
+        
+        Args:
+            row_idx: Fila (0-based) del Excel
+        """
+        self.fila_en_curso = row_idx
+        
+        camino = self.estado_sesion.next_path()
+        logger.info(f"→ Ingreso por {camino} ({self.estado_sesion.describe()})")
+        self.estado_sesion.record_path(camino)
+        
+        if camino == "cobranza coactiva":
+            # PRIMER expediente de la sesión: Cobranza Coactiva (DESDE CERO)
+            return self.click_cobranza_coactiva()
+        
+        if camino == "cambio de expediente":
+            if not self.click_cambio_expediente():
+                logger.warning("No se pudo ejecutar click_cambio_expediente(), ingresando directo")
+                self.estado_sesion.record_fallback(camino)
+        elif camino == "limpiar + directo":
+            self.clear_expediente_field()
+        
+        # Ingresar y validar el expediente concreto
+        if not self.enter_specific_expediente(row_idx):
+            return False
+        
+        if not self.validate_executor():
+            return False
+        
+        return self.handle_post_embargo_flow()
+    
+    def run_preflight(self):
+        """
+        Preflight de arranque (corre en un hilo mientras SIRAT se abre):
+        importa pandas/openpyxl, lee EXPEDIENTES.xlsx, valida columnas y filas,
+        y agrupa los expedientes por dependencia.
+
+        Deja el resultado en self.arranque ("ok", "grupos", "orden" o "error").
+        """
+        try:
+            inicio = time.time()
+            expedientes = self.load_expedientes()
+            
+            self.preflight = self.validate_excel_columns(expedientes)
+            columnas_validas, tipo_o_error = self.preflight
+            if not columnas_validas:
+                self.arranque = {"ok": False, "error": tipo_o_error}
+                return
+            
+            # Validar las filas de la corrida (quedan preparadas para el prefetch)
+            filas = self.selected_rows(expedientes)
+            self.prefetcher.validar = self.validate_expediente_row
+            registros = self.prefetcher.preload(filas)
+            incompletos = sum(1 for registro in registros if not registro["valido"])
+            mal_formados = sum(
+                1 for registro in registros
+                if registro["motivo"] in ("NRO EXPEDIENTE INVALIDO", "RUC INVALIDO")
+            )
+            
+            grupos, orden = self.get_expedientes_grouped_by_dependencia(filas)
+            self.arranque = {"ok": True, "grupos": grupos, "orden": orden, "filas": filas, "registros": registros}
+            
+            logger.info(
+                f"Preflight completado en {time.time() - inicio:.1f}s: {len(filas)} de {len(expedientes)} expedientes, "
+                f"{incompletos} con datos incompletos ({mal_formados} con expediente/RUC mal formado)"
+            )
+        
+        except Exception as e:
+            logger.error(f"Error en preflight: {str(e)}")
+            self.arranque = {"ok": False, "error": str(e)}
+    
+    def validate_campaign(self):
+        """
+        Subcomando validate: preflight de la campaña sin abrir SIRAT.
+
+        Valida columnas y filas del Excel, agrupa por dependencia y tipo de medida,
+        descuenta lo ya cerrado en el almacén y estima la duración con la media
+        histórica por expediente.
+
+        Retorna:
+            - True si el Excel es procesable
+            - False si faltan columnas o no se pudo leer
+        """
+        self.run_preflight()
+        if not self.arranque.get("ok"):
+            logger.error(f"Preflight fallido: {self.arranque.get('error')}")
+            return False
+
+        registros = self.arranque["registros"]
+        expedientes = self.load_expedientes()
+        cerradas = ColaExpedientes(self.archivo_cola).filas_cerradas() if self.archivo_cola.exists() else set()
+
+        logger.info("\n" + "=" * 70)
+        logger.info(f"VALIDACIÓN DE LA CAMPAÑA: {self.excel_entrada}")
+        logger.info("=" * 70)
+
+        motivos = {}
+        por_dependencia = {}
+        for registro in registros:
+            dependencia = dependencia_de_fila(expedientes, registro["fila"]) or "-"
+            conteo = por_dependencia.setdefault(dependencia, {"IEI": 0, "DSE": 0, "inválidos": 0, "cerrados": 0})
+            if registro["fila"] in cerradas:
+                conteo["cerrados"] += 1
+            elif not registro["valido"]:
+                conteo["inválidos"] += 1
+                motivo = registro["motivo"].split(" | ")[0]
+                motivos[motivo] = motivos.get(motivo, 0) + 1
+            elif registro["medida_tipo"] in ("IEI", "DSE"):
+                conteo[registro["medida_tipo"]] += 1
+
+        for dependencia, conteo in sorted(por_dependencia.items()):
+            logger.info(f"  • Dependencia {dependencia}: {conteo}")
+
+        if motivos:
+            logger.info("Filas que se resuelven sin SIRAT:")
+            for motivo, cantidad in sorted(motivos.items(), key=lambda item: -item[1]):
+                logger.info(f"   {cantidad:5d}  {motivo}")
+
+        a_procesar = sum(conteo["IEI"] + conteo["DSE"] for conteo in por_dependencia.values())
+        if self.seleccion.get("maximo") is not None:
+            a_procesar = min(a_procesar, self.seleccion["maximo"])
+        logger.info(f"Expedientes a procesar en SIRAT: {a_procesar} ({len(cerradas & set(self.arranque['filas']))} ya cerrados)")
+
+        media = ColaExpedientes(self.archivo_cola).duracion_media() if self.archivo_cola.exists() else None
+        if media:
+            logger.info(f"Duración estimada: {a_procesar * media / 3600:.1f} h ({media:.0f}s por expediente, según el almacén)")
+        logger.info("=" * 70)
+        return True
+    
+    def warm_gui_modules(self):
+        """Importa pyautogui y pywinauto en el hilo principal (COM de UIA queda en este hilo)"""
+        try:
+            pyautogui._cargar()
+            importlib.import_module("pywinauto")
+        except Exception as e:
+            logger.warning(f"No se pudieron precargar los módulos de GUI: {e}")
     
     def run(self):
         """
@@ -4816,19 +9052,79 @@ class RSIRATAutomation32:
            b. Procesa todos sus expedientes
            c. Cierra sesión (ALT+F4) si hay más dependencias después
         4. Al final cierra completamente la aplicación
+        
+        ARRANQUE CONCURRENTE: SIRAT se lanza de inmediato; mientras abre, un hilo
+        carga el Excel y corre el preflight, y el hilo principal importa los módulos de GUI.
         """
+        logger.addHandler(self.diagnostico.handler)
         try:
             logger.info("\n" + "=" * 70)
             logger.info("INICIALIZANDO PROCESAMIENTO MULTI-DEPENDENCIA (UNA APP)")
             logger.info("=" * 70)
             
-            # PASO 1: Agrupar expedientes por dependencia
-            grupos_expedientes, orden_deps = self.get_expedientes_grouped_by_dependencia()
+            # PASO 0: Reutilizar SIRAT si ya está abierto (modo adjuntar); si no, lanzarlo ya
+            # (el primer lote lo recibe sin relanzar)
+            ventanas_previas = find_sirat_windows()
+            sirat_abierto = self.adjuntar and bool(ventanas_previas)
+            if not sirat_abierto:
+                self.pids_previos = {pid for hwnd, pid, titulo, colgada in ventanas_previas}
+                self.lanzamiento_pendiente = self.launch_sirat()
+            
+            preflight = threading.Thread(target=self.run_preflight, name="Preflight", daemon=True)
+            preflight.start()
+            self.warm_gui_modules()
+            if sirat_abierto:
+                self.sesion_adjunta = self.find_existing_session()
+            preflight.join()
+            
+            if not self.arranque.get("ok"):
+                logger.error(f"Preflight fallido: {self.arranque.get('error')}")
+                self.cancel_launch()
+                return False
+            
+            # PASO 1: Expedientes agrupados por dependencia (calculado en el preflight)
+            grupos_expedientes, orden_deps = self.arranque["grupos"], self.arranque["orden"]
+            
+            # Almacén de la campaña: las filas ya cerradas en corridas anteriores no se reprocesan
+            self.cola = ColaExpedientes(self.archivo_cola)
+            self.cola.cargar(filas_para_almacen(self.load_expedientes(), self.arranque["filas"]))
+            self.filas_terminadas |= self.cola.filas_cerradas()
+            logger.info(f"Almacén de la campaña: {self.cola.resumen()} ({len(self.filas_terminadas)} ya cerradas)")
+            
+            # --max: como máximo N filas pendientes que van a SIRAT, en el orden de procesamiento
+            # (las incompletas se resuelven sin SIRAT y no cuentan, igual que en el coordinador)
+            maximo = self.seleccion.get("maximo")
+            if maximo is not None:
+                validas = {registro["fila"] for registro in self.arranque["registros"] if registro["valido"]}
+                for dependencia in orden_deps:
+                    pendientes = []
+                    for item in grupos_expedientes[dependencia]:
+                        if item[0] in self.filas_terminadas:
+                            continue
+                        if item[0] in validas:
+                            if maximo <= 0:
+                                break
+                            maximo -= 1
+                        pendientes.append(item)
+                    grupos_expedientes[dependencia] = pendientes
+                orden_deps = [dependencia for dependencia in orden_deps if grupos_expedientes[dependencia]]
+                a_procesar = sum(1 for d in orden_deps for item in grupos_expedientes[d] if item[0] in validas)
+                logger.info(f"Límite de filas: {self.seleccion['maximo']} ({a_procesar} a procesar en SIRAT)")
             
             if not orden_deps:
                 logger.error("No se encontraron expedientes válidos")
+                self.cancel_launch()
                 return False
             
+            # Modo adjuntar: empezar por la dependencia de la sesión abierta;
+            # si no sirve para ningún lote, cerrarla
+            if self.sesion_adjunta in orden_deps:
+                logger.info(f"Sesión de SIRAT abierta con dependencia {self.sesion_adjunta}: se procesa primero")
+                orden_deps = [self.sesion_adjunta] + [dep for dep in orden_deps if dep != self.sesion_adjunta]
+            elif self.sesion_adjunta not in (None, "login"):
+                logger.info("La sesión de SIRAT abierta no corresponde a ningún lote, cerrándola...")
+                self.close_attached_session()
+            
             # PASO 2: Procesar cada dependencia en orden
             total_grupos = len(orden_deps)
             
@@ -4857,17 +9153,187 @@ class RSIRATAutomation32:
             logger.info("\n" + "=" * 70)
             logger.info("PROCESAMIENTO COMPLETADO")
             logger.info(f"Se procesaron {total_grupos} dependencia(s)")
+            logger.info(f"Estado de la campaña: {self.cola.resumen()}")
+            self.report_dependencia_switches()
+            if self.montos_mayores_precheck:
+                logger.info(f"MONTO MAYOR resueltos en el precheck (sin formulario DSE): {self.montos_mayores_precheck}")
+            self.navegacion.report()
+            self.estado_sesion.report()
+            self.report_uia_lookups()
+            self.ritmo.report()
+            self.diagnostico.report()
+            self.informe.report()
             logger.info("=" * 70)
             return True
         
         except Exception as e:
             logger.error(f"Error en run (multi-dependencia): {str(e)}")
             return False
+        
+        finally:
+            logger.removeHandler(self.diagnostico.handler)
+            self.informe.save()
+            self.ritmo.save()
+            # Escribir los resultados que aún estén encolados y exportar el almacén a R_EXPEDIENTES.xlsx
+            self.prefetcher.stop()
+            self.reclaim_failed_writes()
+            if self.cola is not None:
+                try:
+                    exportadas = self.cola.exportar(self.excel_resultados, self.excel_entrada, completo=True)
+                    logger.info(f"{self.excel_resultados.name} exportado desde el almacén ({exportadas} filas)")
+                except Exception as e:
+                    logger.error(f"Error exportando el almacén a R_EXPEDIENTES.xlsx: {e}")
+
+SUBCOMANDOS = ("run", "worker", "validate", "report", "bench")
 
-def main():
+
+def _argumentos_legados(argv):
+    """
+    Traduce la línea de comandos anterior (solo flags) a subcomandos:
+    sin subcomando = run, --worker ID = worker ID, --reproducir = bench --reproducir.
+    """
+    if not argv:
+        return ["run"]
+    if argv[0] in SUBCOMANDOS or argv[0] in ("-h", "--help"):
+        return argv
+    if "--worker" in argv:
+        posicion = argv.index("--worker")
+        return ["worker"] + argv[posicion + 1:posicion + 2] + argv[:posicion] + argv[posicion + 2:]
+    if "--reproducir" in argv:
+        return ["bench"] + argv
+    return ["run"] + argv
+
+
+def main(argv=None):
     """Función principal"""
-    automation = RSIRATAutomation32()
-    result = automation.run()
+    import argparse
+    
+    archivos = argparse.ArgumentParser(add_help=False)
+    archivos.add_argument("--entrada", help="Excel de expedientes (por defecto EXPEDIENTES.xlsx junto al ejecutable)")
+    archivos.add_argument("--cola", default=str(COLA_ARCHIVO), help="Archivo SQLite del almacén / cola compartida")
+    archivos.add_argument("--perfil", default=str(PERFIL_ARCHIVO),
+                          help="Perfil JSON de tiempos y localizadores del sitio (por defecto perfil_sirat.json)")
+    
+    seleccion = argparse.ArgumentParser(add_help=False)
+    seleccion.add_argument("--dependencia", choices=DEPENDENCIAS, help="Procesar solo esta dependencia")
+    seleccion.add_argument("--desde", type=int, metavar="FILA", help="Primera fila del Excel (la 2 es el primer expediente)")
+    seleccion.add_argument("--hasta", type=int, metavar="FILA", help="Última fila del Excel (inclusive)")
+    seleccion.add_argument("--max", type=int, dest="maximo", metavar="N", help="Como máximo N filas pendientes")
+    
+    parser = argparse.ArgumentParser(description="Automatización de RSIRAT (32-bit)")
+    subcomandos = parser.add_subparsers(dest="subcomando")
+    
+    run = subcomandos.add_parser("run", parents=[archivos, seleccion], help="Procesa la campaña en SIRAT (por defecto)")
+    run.add_argument("--salida", help="Excel de resultados (por defecto R_EXPEDIENTES.xlsx junto al ejecutable)")
+    run.add_argument("--contrasena", help="Archivo con la contraseña (por defecto contrasena.txt)")
+    run.add_argument("--coordinador", action="store_true",
+                     help="Carga la cola compartida y vuelca los resultados a R_EXPEDIENTES.xlsx")
+    run.add_argument("--workers", type=int, default=0, help="Workers locales que lanza el coordinador")
+    run.add_argument("--lease", type=float, default=COLA_LEASE,
+                     help="Segundos que un worker retiene un expediente sin latido")
+    run.add_argument("--simulado", metavar="GUION", nargs="?", const="",
+                     help="Usa SimuladorSIRAT (guion JSON opcional) en lugar de SIRAT (con --coordinador)")
+    run.add_argument("--grabar", metavar="ARCHIVO",
+                     help="Graba los árboles UIA de SIRAT durante la corrida (JSON gzip)")
+    run.add_argument("--perfilado", metavar="CARPETA", nargs="?", const=str(PERFILADO_DIR),
+                     help="Perfila la corrida (cProfile y muestreo de tiempo real) en CARPETA "
+                          "(con --coordinador, los workers locales en CARPETA/worker_ID)")
+    run.add_argument("--perfilado-modo", choices=("ambos", "cprofile", "muestreo"), default="ambos",
+                     help="Qué perfilador usar con --perfilado (por defecto ambos)")
+    
+    worker = subcomandos.add_parser("worker", parents=[archivos],
+                                    help="Procesa expedientes de la cola con la sesión de SIRAT de esta máquina")
+    worker.add_argument("id", metavar="ID", help="Identificador del worker")
+    worker.add_argument("--lease", type=float, default=COLA_LEASE,
+                        help="Segundos que un worker retiene un expediente sin latido")
+    worker.add_argument("--simulado", metavar="GUION", nargs="?", const="",
+                        help="Usa SimuladorSIRAT (guion JSON opcional) en lugar de SIRAT")
+    worker.add_argument("--perfilado", metavar="CARPETA", nargs="?", const=str(PERFILADO_DIR),
+                        help="Perfila el worker (en CARPETA/worker_ID)")
+    worker.add_argument("--perfilado-modo", choices=("ambos", "cprofile", "muestreo"), default="ambos",
+                        help="Qué perfilador usar con --perfilado (por defecto ambos)")
+    
+    validate = subcomandos.add_parser("validate", parents=[archivos, seleccion],
+                                      help="Preflight del Excel sin abrir SIRAT (validación y tamaño de la campaña)")
+    validate.add_argument("--exportar-perfil", metavar="ARCHIVO",
+                          help="Escribe el perfil vigente (plantilla para ajustar el sitio)")
+    subcomandos.add_parser("report", parents=[archivos], help="Resume los resultados de la campaña desde el almacén")
+    
+    bench = subcomandos.add_parser("bench", parents=[archivos, seleccion],
+                                   help="Corrida simulada de rendimiento (no toca la campaña real)")
+    bench.add_argument("--workers", type=int, default=2, help="Workers simulados")
+    bench.add_argument("--simulado", metavar="GUION", default="", help="Guion JSON de SimuladorSIRAT")
+    bench.add_argument("--conservar", action="store_true", help="No borrar la cola y el Excel temporales")
+    bench.add_argument("--reproducir", metavar="ARCHIVO",
+                       help="Benchmark offline de los detectores sobre una grabación UIA")
+    
+    args = parser.parse_args(_argumentos_legados(sys.argv[1:] if argv is None else list(argv)))
+    # Sin --coordinador, run maneja el SIRAT real: una simulación pedida no puede caer ahí
+    if args.subcomando == "run" and not args.coordinador:
+        if args.simulado is not None:
+            parser.error("--simulado requiere --coordinador (o usar worker --simulado / bench)")
+        if args.workers:
+            parser.error("--workers requiere --coordinador")
+    
+    # Un perfil inválido no se reemplaza por los valores por defecto: pueden no servir en esta sede
+    if cargar_perfil(args.perfil) is False:
+        logger.error("\nEl proceso finalizó con errores. Revisa el log para más detalles.")
+        return False
+    
+    automation = RSIRATAutomation32(
+        entrada=args.entrada,
+        salida=getattr(args, "salida", None),
+        contrasena=getattr(args, "contrasena", None),
+        cola=args.cola,
+        seleccion={
+            clave: getattr(args, clave)
+            for clave in ("dependencia", "desde", "hasta", "maximo")
+            if getattr(args, clave, None) is not None
+        },
+    )
+    
+    if args.subcomando == "validate":
+        if args.exportar_perfil:
+            Path(args.exportar_perfil).write_text(
+                json.dumps(perfil_actual(), ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+            logger.info(f"Perfil vigente exportado a {args.exportar_perfil}")
+        result = automation.validate_campaign()
+    elif args.subcomando == "report":
+        result = report_campaign(args.cola)
+    elif args.subcomando == "bench":
+        if args.reproducir:
+            result = bool(replay_benchmark(args.reproducir))
+        else:
+            result = run_bench(automation, workers=args.workers, simulado=args.simulado, conservar=args.conservar)
+    elif args.subcomando == "worker":
+        simulador = SimuladorSIRAT(args.simulado or None) if args.simulado is not None else None
+        cola = ColaExpedientes(args.cola, lease=args.lease)
+        if args.perfilado:
+            result = run_profiled(Path(args.perfilado) / f"worker_{args.id}", args.perfilado_modo,
+                                  automation.run_worker, cola, args.id, simulador)
+        else:
+            result = automation.run_worker(cola, args.id, simulador)
+    elif args.coordinador:
+        if args.perfilado and not args.workers:
+            logger.warning("--perfilado con --coordinador solo perfila los workers locales (--workers); "
+                           "en otras sesiones usar worker --perfilado")
+        result = run_coordinator(
+            ColaExpedientes(args.cola, lease=args.lease), workers=args.workers, simulado=args.simulado,
+            automatizacion=automation, perfilado=args.perfilado, perfilado_modo=args.perfilado_modo,
+        )
+    else:
+        global UIA_GRABADOR
+        if args.grabar:
+            UIA_GRABADOR = UIARecorder(args.grabar)
+        try:
+            if args.perfilado:
+                result = run_profiled(args.perfilado, args.perfilado_modo, automation.run)
+            else:
+                result = automation.run()
+        finally:
+            if UIA_GRABADOR is not None:
+                UIA_GRABADOR.save()
     
     if result:
         logger.info("\nEl proceso se completó sin errores.")
@@ -4878,4 +9344,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,41 @@
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parent.parent / "rsi_32_expinv copy123.py"
+
+
+@pytest.fixture(scope="session")
+def rsi(tmp_path_factory):
+    """El script como módulo (pandas, pyautogui y pywinauto se importan recién en su primer uso)"""
+    if "rsi_32_expinv" in sys.modules:
+        return sys.modules["rsi_32_expinv"]
+    # El log (proceso_log32.txt) se crea en el directorio actual al importar
+    anterior = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("log"))
+    try:
+        spec = importlib.util.spec_from_file_location("rsi_32_expinv", SCRIPT)
+        modulo = importlib.util.module_from_spec(spec)
+        sys.modules["rsi_32_expinv"] = modulo
+        spec.loader.exec_module(modulo)
+    finally:
+        os.chdir(anterior)
+    return modulo
+
+
+@pytest.fixture
+def automatizacion(rsi, tmp_path):
+    """RSIRATAutomation32 con todos sus archivos en tmp_path (no abre SIRAT)"""
+    automatizacion = rsi.RSIRATAutomation32(
+        entrada=tmp_path / "EXPEDIENTES.xlsx",
+        salida=tmp_path / "R_EXPEDIENTES.xlsx",
+        cola=tmp_path / "cola.db",
+    )
+    automatizacion.ritmo = rsi.PacingGovernor(tmp_path / "ritmo.json")
+    automatizacion.informe = rsi.RunReport(tmp_path / "informe")
+    automatizacion.diagnostico = rsi.DiagnosticsRecorder(tmp_path / "diagnostico")
+    automatizacion.navegacion = rsi.NavigationCache(tmp_path / "navegacion.json")
+    return automatizacion
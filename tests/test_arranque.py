@@ -0,0 +1,36 @@
+import pytest
+
+
+@pytest.fixture
+def taskkill(rsi, monkeypatch):
+    """Registra los PID que se cerrarían con taskkill"""
+    cerrados = []
+    monkeypatch.setattr(rsi.subprocess, "run", lambda comando, **kw: cerrados.append(int(comando[2])))
+    return cerrados
+
+
+def test_preflight_fallido_cierra_el_sirat_lanzado(rsi, automatizacion, monkeypatch, taskkill):
+    automatizacion.adjuntar = False
+    ventanas = [(1, 100, "SIRAT", False)]  # SIRAT ajeno ya abierto antes de la corrida
+
+    def lanzar():
+        ventanas.append((2, 200, "SIRAT", False))
+        automatizacion.sirat_lanzado = rsi.time.time()
+        return True
+
+    def preflight():
+        automatizacion.arranque = {"ok": False, "error": "Faltan columnas"}
+
+    monkeypatch.setattr(rsi, "find_sirat_windows", lambda: list(ventanas))
+    monkeypatch.setattr(automatizacion, "launch_sirat", lanzar)
+    monkeypatch.setattr(automatizacion, "run_preflight", preflight)
+    monkeypatch.setattr(automatizacion, "warm_gui_modules", lambda: None)
+
+    assert automatizacion.run() is False
+    assert taskkill == [200]
+    assert automatizacion.lanzamiento_pendiente is False
+
+
+def test_sin_lanzamiento_pendiente_no_cierra_nada(automatizacion, taskkill):
+    automatizacion.cancel_launch()
+    assert taskkill == []
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import SCRIPT
+
+
+@pytest.mark.parametrize("argumentos", [
+    ["run", "--simulado"],
+    ["run", "--simulado", "guion.json"],
+    ["run", "--workers", "2"],
+    ["--simulado"],  # Línea de comandos anterior: sin subcomando es run
+])
+def test_simulado_y_workers_sin_coordinador_se_rechazan(rsi, argumentos, capsys):
+    with pytest.raises(SystemExit) as salida:
+        rsi.main(argumentos)
+    assert salida.value.code == 2
+    assert "requiere --coordinador" in capsys.readouterr().err
+
+
+def test_el_resultado_de_main_es_el_codigo_de_salida(tmp_path):
+    proceso = subprocess.run(
+        [sys.executable, str(SCRIPT), "report", "--cola", str(tmp_path / "no_existe.db")],
+        cwd=tmp_path, capture_output=True, timeout=60,
+    )
+    assert proceso.returncode == 1
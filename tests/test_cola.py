@@ -0,0 +1,163 @@
+import json
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+
+@pytest.fixture
+def cola(rsi, tmp_path):
+    cola = rsi.ColaExpedientes(tmp_path / "cola.db", lease=600, max_intentos=2)
+    cola.cargar([(0, "0000000000001", "0021"), (1, "0000000000002", "0021"), (2, "0000000000003", "0023")])
+    return cola
+
+
+def _vencer_leases(cola):
+    with cola._conectar() as conn:
+        conn.execute("UPDATE expedientes SET lease_hasta = 0 WHERE estado = 'in_progress'")
+
+
+def _excel(ruta, expedientes):
+    libro = Workbook()
+    hoja = libro.active
+    hoja.append(["EXPEDIENTE", "DEPENDENCIA", "TIPO DE MEDIDA", "INTERVENTOR", "PLAZO", "MONTO"])
+    for expediente, dependencia in expedientes:
+        hoja.append([expediente, dependencia, "DSE", "X", "3", "100"])
+    libro.save(ruta)
+
+
+def test_tomar_respeta_dependencia_y_orden(cola):
+    assert cola.tomar("w1", "0021") == 0
+    assert cola.tomar("w2", "0021") == 1
+    assert cola.tomar("w3", "0021") is None
+    assert cola.dependencias_pendientes() == ["0023"]
+    assert cola.resumen() == {"in_progress": 2, "pending": 1}
+
+
+def test_lease_vencido_pasa_a_otro_worker(cola):
+    assert cola.tomar("w1", "0023") == 2
+    assert cola.tomar("w2", "0023") is None
+
+    _vencer_leases(cola)
+    assert cola.tomar("w2", "0023") == 2
+    # El worker que perdió el lease ya no puede escribir el resultado
+    assert cola.completar(2, "w1", "12345678") is False
+    assert cola.completar(2, "w2", "12345678") is True
+    assert cola.resumen()["done"] == 1
+
+
+def test_renovar_mantiene_el_lease(cola):
+    cola.tomar("w1", "0023")
+    _vencer_leases(cola)
+    cola.renovar("w1")
+    assert cola.tomar("w2", "0023") is None
+
+
+def test_filas_que_agotan_sus_intentos_pasan_a_verify(cola):
+    for _ in range(2):
+        assert cola.tomar("w1", "0023") == 2
+        _vencer_leases(cola)
+    assert cola.tomar("w2", "0023") is None
+    assert cola.tomables() == 2  # Solo quedan las de 0021
+    assert cola.cerrar_agotados() == 1
+    assert cola.detalle()[2][2:4] == ("verify", 2)
+
+
+def test_liberar_devuelve_la_fila_sin_recuperar_el_intento(cola):
+    cola.tomar("w1", "0023")
+    cola.liberar(2, "w1")
+    assert cola.tomar("w1", "0023") == 2
+    assert cola.detalle()[2][3] == 2
+
+
+def test_recargar_otro_expediente_en_la_fila_la_reinicia(cola):
+    cola.completar(0, None, "12345678")
+    cola.cargar([(0, "0000000000001", "0021"), (1, "0000000000009", "0021")])
+    assert cola.filas_cerradas() == {0}
+    cola.completar(1, None, "87654321")
+    cola.cargar([(0, "0000000000099", "0021")])
+    assert cola.filas_cerradas() == {1}
+
+
+def test_exportar_solo_lo_nuevo_salvo_completo(rsi, cola, tmp_path):
+    plantilla = tmp_path / "EXPEDIENTES.xlsx"
+    salida = tmp_path / "R_EXPEDIENTES.xlsx"
+    _excel(plantilla, [("0000000000001", "0021"), ("0000000000002", "0021"), ("0000000000003", "0023")])
+
+    cola.completar(0, None, "01234567")
+    cola.completar(2, None, "EXP. INVALIDO")
+    assert cola.exportar(salida, plantilla) == 2
+    assert cola.exportar(salida, plantilla) == 0
+    assert cola.resultados_sin_exportar() == []
+
+    hoja = load_workbook(salida).active
+    columna = [celda.value for celda in hoja[1]].index("RESULTADO") + 1
+    assert hoja.cell(row=2, column=columna).value == "01234567"
+    assert hoja.cell(row=4, column=columna).value == "EXP. INVALIDO"
+
+    cola.marcar_sin_exportar([0])
+    assert cola.exportar(salida, plantilla) == 1
+    assert cola.exportar(salida, plantilla, completo=True) == 2
+
+
+def test_simulador_sigue_el_guion(rsi, tmp_path):
+    guion = tmp_path / "guion.json"
+    guion.write_text(json.dumps({"0000000000001": "MONTO MAYOR", "0000000000002": "__SIN_RESULTADO__"}))
+    simulador = rsi.SimuladorSIRAT(guion, demora=0)
+
+    assert simulador.procesar({"expediente": "0000000000001"}) == "MONTO MAYOR"
+    assert simulador.procesar({"expediente": "0000000000002"}) is None
+    sintetico = simulador.procesar({"expediente": "0000000000003"})
+    assert len(sintetico) == 8 and sintetico.isdigit()
+    assert simulador.procesar({"expediente": "0000000000003"}) == sintetico
+
+
+def test_worker_termina_la_cola(rsi, automatizacion, cola, tmp_path, monkeypatch):
+    monkeypatch.setattr(rsi, "INFORME_ARCHIVO", tmp_path / "informe")
+    _excel(automatizacion.excel_entrada, [("0000000000001", "0021"), ("0000000000002", "0021"), ("0000000000003", "0023")])
+
+    assert automatizacion.run_worker(cola, "w1", simulador=rsi.SimuladorSIRAT(demora=0)) is True
+    assert cola.resumen() == {"done": 3}
+
+
+def test_worker_sin_coordinador_termina_con_filas_agotadas(rsi, automatizacion, cola, tmp_path, monkeypatch):
+    monkeypatch.setattr(rsi, "INFORME_ARCHIVO", tmp_path / "informe")
+    _excel(automatizacion.excel_entrada, [("0000000000001", "0021"), ("0000000000002", "0021"), ("0000000000003", "0023")])
+    for fila in (0, 1):
+        cola.completar(fila, None, "12345678")
+    for _ in range(2):
+        cola.tomar("caido", "0023")
+        _vencer_leases(cola)
+
+    # Antes, la única fila restante (sin intentos) dejaba al worker esperando para siempre
+    assert automatizacion.run_worker(cola, "w1", simulador=rsi.SimuladorSIRAT(demora=0)) is True
+    assert cola.resumen() == {"done": 2, "verify": 1}
+
+
+def test_worker_simulado_no_toca_ritmo_ni_informe_reales(rsi, automatizacion, tmp_path, monkeypatch):
+    monkeypatch.setattr(rsi, "INFORME_ARCHIVO", tmp_path / "real" / "informe_corrida")
+    _excel(automatizacion.excel_entrada, [("0000000000001", "0021")])
+    carpeta = tmp_path / "bench"
+    carpeta.mkdir()
+    cola = rsi.ColaExpedientes(carpeta / "cola.db")
+    cola.cargar([(0, "0000000000001", "0021")])
+
+    assert automatizacion.run_worker(cola, "w1", simulador=rsi.SimuladorSIRAT(demora=0)) is True
+    assert not automatizacion.ritmo.ruta.exists()
+    assert automatizacion.informe.base == carpeta / "informe_corrida_w1"
+    assert not (tmp_path / "real").exists()
+
+
+def test_coordinador_max_no_cuenta_las_filas_incompletas(rsi, automatizacion, tmp_path, monkeypatch):
+    _excel(automatizacion.excel_entrada, [
+        ("12A", "0021"), ("0000000000001", "0021"), ("45B", "0021"), ("0000000000002", "0021"),
+    ])
+    automatizacion.seleccion["maximo"] = 1
+    cola = rsi.ColaExpedientes(tmp_path / "cola.db")
+    # Sin workers la cola no termina: la primera espera corta el coordinador
+    def _interrumpir(segundos):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(rsi.time, "sleep", _interrumpir)
+
+    rsi.run_coordinator(cola, automatizacion=automatizacion)
+    estados = {fila: estado for fila, _, estado, *_ in cola.detalle()}
+    assert estados == {0: "invalid", 1: "pending", 2: "invalid"}
@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import pytest
+
+
+class _Llamadas:
+    """Registra las llamadas a login / open_session / switch_dependencia / teclado"""
+
+    def __init__(self):
+        self.registro = []
+
+    def metodo(self, nombre, resultado=True):
+        def _llamada(*args, **kwargs):
+            self.registro.append(nombre)
+            return resultado
+        return _llamada
+
+    def __getattr__(self, nombre):
+        # pyautogui: cualquier tecla o atajo queda registrado
+        return self.metodo(nombre, None)
+
+
+@pytest.fixture
+def sesion(rsi, automatizacion, monkeypatch):
+    llamadas = _Llamadas()
+    ventanas = []
+    monkeypatch.setattr(rsi, "find_sirat_windows", lambda: list(ventanas))
+    monkeypatch.setattr(rsi, "pyautogui", llamadas)
+    monkeypatch.setattr(rsi.time, "sleep", lambda segundos: None)
+    monkeypatch.setattr(automatizacion, "login", llamadas.metodo("login"))
+    monkeypatch.setattr(automatizacion, "open_session", llamadas.metodo("open_session"))
+    monkeypatch.setattr(automatizacion, "switch_dependencia", llamadas.metodo("switch_dependencia"))
+    monkeypatch.setattr(automatizacion, "terminate_processes",
+                        lambda pids, motivo: (llamadas.registro.append(("taskkill", sorted(pids))), ventanas.clear()))
+    return SimpleNamespace(llamadas=llamadas.registro, ventanas=ventanas, metodo=llamadas.metodo)
+
+
+def test_sesion_adjunta_con_la_misma_dependencia_se_reutiliza(automatizacion, sesion):
+    automatizacion.sesion_adjunta = "21"
+    assert automatizacion.ensure_session("21") is True
+    assert sesion.llamadas == []
+    assert (automatizacion.sesion_activa, automatizacion.sesion_adjunta) == ("21", None)
+
+
+def test_sirat_adjunto_en_el_login_solo_hace_login(automatizacion, sesion):
+    automatizacion.sesion_adjunta = "login"
+    assert automatizacion.ensure_session("23") is True
+    assert sesion.llamadas == ["login"]
+    assert automatizacion.sesion_activa == "23"
+
+
+def test_login_fallido_no_deja_sesion_activa(automatizacion, sesion, monkeypatch):
+    automatizacion.sesion_adjunta = "login"
+    monkeypatch.setattr(automatizacion, "login", sesion.metodo("login", False))
+    assert automatizacion.ensure_session("23") is False
+    assert automatizacion.sesion_activa is None
+
+
+def test_otra_dependencia_cambia_en_la_misma_sesion(automatizacion, sesion):
+    automatizacion.sesion_activa = "21"
+    assert automatizacion.ensure_session("23") is True
+    assert sesion.llamadas == ["switch_dependencia"]
+    assert automatizacion.cambios_dependencia[-1][0] == "en_sesion"
+
+
+def test_sin_volver_al_login_cierra_los_procesos_de_sirat_y_relanza(automatizacion, sesion, monkeypatch):
+    automatizacion.sesion_activa = "21"
+    sesion.ventanas.extend([(1, 100, "SIRAT - Menú", False), (2, 100, "Diálogo", False), (3, 200, "SIRAT", False)])
+    monkeypatch.setattr(automatizacion, "switch_dependencia", sesion.metodo("switch_dependencia", False))
+
+    assert automatizacion.ensure_session("23") is True
+    # Sin ALT+F4 a ciegas: se cierran los PID de SIRAT conocidos y recién entonces se relanza
+    assert sesion.llamadas == ["switch_dependencia", ("taskkill", [100, 200]), "open_session"]
+    assert automatizacion.cambios_dependencia[-1][0] == "relanzamiento"
+
+
+def test_sin_sesion_previa_abre_sirat(automatizacion, sesion, monkeypatch):
+    assert automatizacion.ensure_session("21") is True
+    assert sesion.llamadas == ["open_session"]
+    assert automatizacion.duracion_apertura is not None
+
+    monkeypatch.setattr(automatizacion, "open_session", sesion.metodo("open_session", False))
+    automatizacion.sesion_activa = None
+    assert automatizacion.ensure_session("21") is False
+
+
+@pytest.mark.parametrize("ventanas, esperado", [
+    ([], None),
+    ([(1, 100, "SIRAT", False)], "login"),
+    ([(1, 100, "SIRAT - Menú Principal - 0021 PRICO", False)], "21"),
+    ([(1, 100, "SIRAT", False), (2, 100, "Menú Principal MEPECO", False)], "23"),
+])
+def test_find_existing_session_por_titulo(rsi, automatizacion, monkeypatch, ventanas, esperado):
+    monkeypatch.setattr(rsi, "find_sirat_windows", lambda: ventanas)
+    assert automatizacion.find_existing_session() == esperado
+
+
+def test_find_existing_session_lee_la_dependencia_de_la_ventana(rsi, automatizacion, monkeypatch):
+    monkeypatch.setattr(rsi, "find_sirat_windows", lambda: [(7, 100, "SIRAT - Menú", False)])
+    monkeypatch.setattr(rsi, "Desktop", lambda backend=None: SimpleNamespace(window=lambda handle: handle))
+    textos = {7: ["Usuario: COBRANZA", "Dependencia: 0023 - IR MEPECO"]}
+    monkeypatch.setattr(automatizacion, "walk_uia", lambda ventana, motivo: [
+        SimpleNamespace(window_text=lambda texto=texto: texto) for texto in textos[ventana]
+    ])
+    assert automatizacion.find_existing_session() == "23"
+
+    textos[7] = ["Usuario: COBRANZA"]
+    assert automatizacion.find_existing_session() == "?"
+
+
+def test_find_existing_session_cierra_un_sirat_colgado(rsi, automatizacion, monkeypatch):
+    monkeypatch.setattr(rsi, "find_sirat_windows", lambda: [(1, 100, "SIRAT - Menú 0021", True)])
+    cerrados = []
+    monkeypatch.setattr(automatizacion, "kill_sirat", lambda motivo="": cerrados.append(motivo))
+    assert automatizacion.find_existing_session() is None
+    assert cerrados == ["Ventana de SIRAT colgada al adjuntar"]
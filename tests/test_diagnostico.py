@@ -0,0 +1,49 @@
+import time
+
+
+def _capturas_simuladas(automatizacion, monkeypatch, duracion):
+    """Reemplaza la captura real por una que tarda `duracion` segundos"""
+    hechas = []
+
+    def capture(paso, hwnd=None):
+        inicio = time.time()
+        automatizacion.diagnostico._ultima_captura = inicio
+        time.sleep(duracion)
+        automatizacion.diagnostico.capturas += 1
+        automatizacion.diagnostico.tiempo_captura += time.time() - inicio
+        hechas.append(paso)
+
+    monkeypatch.setattr(automatizacion.diagnostico, "capture", capture)
+    monkeypatch.setattr(automatizacion, "foreground_sirat_window", lambda: None)
+    automatizacion._marca_paso = time.time()
+    return hechas
+
+
+def test_costo_inicial_y_medido(rsi, tmp_path):
+    diagnostico = rsi.DiagnosticsRecorder(tmp_path)
+    assert diagnostico.cost() == rsi.DIAGNOSTICO_COSTO_INICIAL
+    diagnostico.capturas, diagnostico.tiempo_captura = 4, 0.2
+    assert diagnostico.cost() == 0.05
+
+
+def test_pausa_corta_no_captura_ni_se_alarga(automatizacion, monkeypatch):
+    hechas = _capturas_simuladas(automatizacion, monkeypatch, 0.3)
+    automatizacion.ritmo.factor = 1.0
+
+    inicio = time.time()
+    automatizacion._pausa(0.02)
+    assert time.time() - inicio < 0.2
+    assert hechas == []
+
+
+def test_pausa_larga_absorbe_la_captura(automatizacion, monkeypatch):
+    hechas = _capturas_simuladas(automatizacion, monkeypatch, 0.1)
+    automatizacion.ritmo.factor = 1.0
+
+    inicio = time.time()
+    automatizacion._pausa(0.4)
+    assert time.time() - inicio < 0.55
+    assert len(hechas) == 1
+    # Ya tocó una captura: la siguiente pausa no captura hasta DIAGNOSTICO_INTERVALO
+    automatizacion._pausa(0.4)
+    assert len(hechas) == 1
@@ -0,0 +1,29 @@
+import pytest
+
+
+@pytest.fixture
+def pantalla(automatizacion, monkeypatch):
+    """Fija los textos que "muestra" SIRAT (sin UIA)"""
+    textos = []
+    monkeypatch.setattr(
+        automatizacion, "snapshot_dialog_texts",
+        lambda solo_texto: [("Text", texto, texto.lower()) for texto in textos],
+    )
+    return textos
+
+
+def test_numero_de_rc_extraido_una_sola_vez(automatizacion, pantalla):
+    pantalla.append("Se grabó la Resolución Coactiva con el número 0290079364147 de fecha 01/02/2026")
+    detectado, mensaje, rc = automatizacion.detect_resolucion_coactiva_aviso(timeout=0.1)
+    assert detectado is True
+    assert rc == "0290079364147"
+    assert automatizacion.metricas.ruta == ["resolucion_coactiva"]
+
+
+def test_mensaje_sin_numero(automatizacion, pantalla):
+    pantalla.append("Se grabó la Resolución Coactiva")
+    assert automatizacion.detect_resolucion_coactiva_aviso(timeout=0.1)[::2] == (True, "")
+
+
+def test_sin_mensaje(automatizacion, pantalla):
+    assert automatizacion.detect_resolucion_coactiva_aviso(timeout=0.1) == (False, "", "")
@@ -0,0 +1,91 @@
+import gzip
+import json
+from types import SimpleNamespace
+
+import pytest
+
+
+class _Elemento:
+    """Elemento UIA mínimo (lo que UIARecorder serializa)"""
+
+    def __init__(self, nombre, tipo, rect, hijos=(), clase="", auto_id="", handle=None, pid=4321):
+        self.element_info = SimpleNamespace(
+            name=nombre, control_type=tipo, class_name=clase, automation_id=auto_id, handle=handle, process_id=pid
+        )
+        self._rect = SimpleNamespace(left=rect[0], top=rect[1], right=rect[2], bottom=rect[3])
+        self._hijos = list(hijos)
+
+    def rectangle(self):
+        return self._rect
+
+    def children(self):
+        return self._hijos
+
+
+def _escritorio():
+    dialogo = _Elemento("Confirmación", "Window", (100, 100, 400, 250), clase="#32770", handle=77, hijos=[
+        _Elemento("Se generó la resolución coactiva número 12345678", "Text", (110, 120, 390, 140)),
+        _Elemento("Aceptar", "Button", (200, 200, 280, 230), auto_id="2"),
+    ])
+    return SimpleNamespace(windows=lambda: [dialogo])
+
+
+@pytest.fixture
+def grabacion(rsi, tmp_path, monkeypatch):
+    monkeypatch.setattr(rsi, "find_sirat_windows", lambda: [])
+    grabador = rsi.UIARecorder(tmp_path / "grabacion.json.gz", intervalo=0)
+    grabador.capture(_escritorio(), "windows")
+    grabador.capture(_escritorio(), "windows")  # Sin cambios: no se repite el evento
+    grabador.save()
+    return grabador.ruta
+
+
+def test_formato_de_la_grabacion(grabacion):
+    with gzip.open(grabacion, "rt", encoding="utf-8") as f:
+        datos = json.load(f)
+    assert datos["version"] == 1
+    assert len(datos["eventos"]) == 1
+    evento = datos["eventos"][0]
+    assert (evento["q"], evento["v"]) == ("windows", [0])
+    raiz = datos["arboles"][0]
+    assert {clave: raiz[clave] for clave in ("n", "t", "c", "h", "p", "r")} == {
+        "n": "Confirmación", "t": "Window", "c": "#32770", "h": 77, "p": 4321, "r": [100, 100, 400, 250],
+    }
+    assert [hijo["n"] for hijo in raiz["k"]] == ["Se generó la resolución coactiva número 12345678", "Aceptar"]
+    assert raiz["k"][1]["a"] == "2" and "k" not in raiz["k"][1]
+
+
+def test_la_reproduccion_devuelve_el_arbol_grabado(rsi, grabacion):
+    reproduccion = rsi.UIAReplay(grabacion)
+    reproduccion.start(0.0)
+    escritorio = reproduccion.desktop()
+
+    ventanas = escritorio.windows(class_name="#32770")
+    assert [ventana.window_text() for ventana in ventanas] == ["Confirmación"]
+    ventana = ventanas[0]
+    assert (ventana.element_info.handle, ventana.element_info.process_id) == (77, 4321)
+    rect = ventana.rectangle()
+    assert (rect.left, rect.top, rect.right, rect.bottom) == (100, 100, 400, 250)
+    assert [texto.window_text() for texto in ventana.descendants(control_type="Text")] == [
+        "Se generó la resolución coactiva número 12345678"
+    ]
+
+    boton = escritorio.window(title="Confirmación").child_window(title="Aceptar", control_type="Button")
+    assert boton.exists(timeout=0)
+    boton.invoke()
+    assert [accion[1:] for accion in reproduccion.acciones] == [("invoke", "Aceptar")]
+    assert not escritorio.window(title="Otra").exists(timeout=0)
+
+
+def test_replay_benchmark_restaura_escritorio_y_teclado(rsi, grabacion, monkeypatch):
+    teclado = rsi.pyautogui
+    assert rsi.replay_benchmark(grabacion) == {}
+    assert rsi.pyautogui is teclado and rsi.UIA_REPRODUCCION is None
+
+    def _falla():
+        raise RuntimeError("sin SIRAT")
+
+    monkeypatch.setattr(rsi, "RSIRATAutomation32", _falla)
+    with pytest.raises(RuntimeError):
+        rsi.replay_benchmark(grabacion)
+    assert rsi.pyautogui is teclado and rsi.UIA_REPRODUCCION is None
@@ -0,0 +1,45 @@
+import pytest
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("1,234.50", 1234.5),
+    ("1.234,50", 1234.5),
+    ("1234,50", 1234.5),
+    ("1234.5", 1234.5),
+    ("1,234", 1234.0),
+    ("1.234", 1234.0),
+    ("1.234.567", 1234567.0),
+    ("1,234,567.89", 1234567.89),
+    ("1.234.567,89", 1234567.89),
+    ("S/ 1 234", 1234.0),
+    ("S/. 1,234.50", 1234.5),
+    ("S/. 1234", 1234.0),
+    ("S/.1.234,50", 1234.5),
+    ("S/. 500.00", 500.0),
+    ("1.234,50.", 1234.5),
+    ("-1.234,50", -1234.5),
+    ("12,5", 12.5),
+    (1234.5, 1234.5),
+    (100, 100.0),
+])
+def test_parse_importe(rsi, texto, esperado):
+    assert rsi.parse_importe(texto) == pytest.approx(esperado)
+
+
+@pytest.mark.parametrize("texto", [None, "", "S/", ".", "abc", float("nan")])
+def test_parse_importe_ilegible(rsi, texto):
+    assert rsi.parse_importe(texto) is None
+
+
+@pytest.mark.parametrize("monto, saldo, esperado", [
+    ("1,200.00", "1.000,00", None),  # Justo en el 20%
+    ("1,200.01", "1.000,00", "MONTO MAYOR"),
+    ("1.500,00", "1,234.50", "MONTO MAYOR"),
+    (100, "", None),  # Saldo ilegible: no se decide
+    ("", "1,000.00", None),
+    (100, "-5.00", None),
+    ("600", "S/. 1234", None),
+    ("S/. 600.00", "1,000.00", None),
+])
+def test_evaluar_monto(rsi, monto, saldo, esperado):
+    assert rsi.evaluar_monto(monto, saldo) == esperado
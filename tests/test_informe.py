@@ -0,0 +1,73 @@
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+
+def _metricas(segundos, pausas, dialogos):
+    return SimpleNamespace(inicio=time.time() - segundos, pausas=pausas, espera_dialogos=dialogos)
+
+
+@pytest.mark.parametrize("resultado, categoria", [
+    ("01234567", "RC"),
+    ("'01234567", "RC"),
+    ("FALTA INTERVENTOR", "FALTA *"),
+    ("EXP. INVALIDO | detalle", "EXP. INVALIDO"),
+    ("VERIFICAR: sin diálogo", "VERIFICAR"),
+    (None, "(vacío)"),
+])
+def test_categoria_resultado(rsi, resultado, categoria):
+    assert rsi.categoria_resultado(resultado) == categoria
+
+
+def test_snapshot_acumula_grupos_resultados_y_tiempos(rsi, tmp_path):
+    informe = rsi.RunReport(tmp_path / "informe")
+    informe.record_row("0021", "DSE", "01234567", _metricas(10, 4, 3))
+    informe.record_row("0021", "DSE", "MONTO MAYOR", _metricas(20, 6, 2))
+    informe.record_row("0023", None, "EXP. INVALIDO", None)
+    informe.record_session("login", 5)
+    informe.record_session("login", 3)
+
+    datos = informe.snapshot()
+    assert datos["expedientes"] == 3
+    assert datos["resultados"] == {"RC": 1, "MONTO MAYOR": 1, "EXP. INVALIDO": 1}
+    grupos = {(g["dependencia"], g["medida"]): g for g in datos["por_grupo"]}
+    assert grupos[("0021", "DSE")]["expedientes"] == 2
+    assert grupos[("0021", "DSE")]["segundos"] == pytest.approx(30, abs=0.5)
+    assert grupos[("0023", "-")]["expedientes_hora"] is None
+    tiempos = datos["tiempo_expedientes"]
+    assert (tiempos["pausas_fijas"], tiempos["esperas_dialogos"]) == (10, 5)
+    assert tiempos["resto"] == pytest.approx(15, abs=0.5)
+    assert datos["sesion"] == {"login": {"veces": 2, "segundos": 8}}
+
+
+def test_pasos_mas_lentos_con_percentiles(rsi, tmp_path, monkeypatch):
+    monkeypatch.setattr(rsi, "INFORME_PASOS_TOP", 2)
+    informe = rsi.RunReport(tmp_path / "informe")
+    for segundos in range(1, 11):
+        informe.record_step("click_cambio_expediente", float(segundos))
+    informe.record_step("type_expediente", 100.0)
+    informe.record_step("enter_plazo", 0.1)
+
+    pasos = informe.snapshot()["pasos_mas_lentos"]
+    assert [paso["paso"] for paso in pasos] == ["type_expediente", "click_cambio_expediente"]
+    assert pasos[1] == {"paso": "click_cambio_expediente", "veces": 10, "total": 55.0, "p50": 6.0, "p90": 10.0, "max": 10.0}
+
+
+def test_se_escribe_cada_intervalo_y_al_final(rsi, tmp_path):
+    base = tmp_path / "informe"
+    informe = rsi.RunReport(base)
+    informe.record_row("0021", "IEI", "01234567", None)
+    assert not base.with_suffix(".json").exists()
+
+    informe._ultima_escritura -= rsi.INFORME_INTERVALO
+    informe.record_row("0021", "IEI", "01234567", None)
+    assert json.loads(base.with_suffix(".json").read_text(encoding="utf-8"))["expedientes"] == 2
+
+    informe.record_row("0021", "IEI", "<b>FALTA PLAZO</b>", None)
+    informe.report()
+    assert json.loads(base.with_suffix(".json").read_text(encoding="utf-8"))["expedientes"] == 3
+    documento = base.with_suffix(".html").read_text(encoding="utf-8")
+    assert "&lt;b&gt;FALTA PLAZO" in documento and "<b>FALTA" not in documento
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.workbook.workbook import Workbook as LibroOpenpyxl
+
+
+def test_columnas_metricas(rsi):
+    inicio = time.mktime((2026, 3, 2, 9, 0, 0, 0, 0, -1))
+    columnas = rsi.columnas_metricas(
+        inicio, inicio + 42.26, 2, '{"excel_io": 0.4, "espera_dialogos": 12.5, "ruta": "RC"}'
+    )
+    assert list(columnas) == list(rsi.COLUMNAS_METRICAS)
+    assert columnas == {
+        "INICIO": "2026-03-02 09:00:00", "FIN": "2026-03-02 09:00:42", "DURACION (s)": 42.3,
+        "EXCEL I/O (s)": 0.4, "ESPERA DIALOGOS (s)": 12.5, "INTENTOS": 2, "RUTA DE DIALOGOS": "RC",
+    }
+
+
+def test_columnas_metricas_sin_medir(rsi):
+    columnas = rsi.columnas_metricas(None, None, 0)
+    assert set(columnas.values()) == {None}
+
+
+def test_expediente_metrics_mide_y_cuenta_intentos(rsi):
+    metricas = rsi.ExpedienteMetrics()
+    metricas.start(3)
+    with metricas.medir("espera_dialogos"):
+        time.sleep(0.05)
+    metricas.ruta += ["Confirmación", "RC"]
+    assert metricas.as_dict()["espera_dialogos"] == pytest.approx(0.05, abs=0.03)
+    assert metricas.as_dict()["ruta"] == "Confirmación → RC"
+
+    metricas.start(3)
+    metricas.start(4)
+    assert metricas.intentos == {3: 2, 4: 1}
+    assert metricas.as_dict() == {"excel_io": 0.0, "espera_dialogos": 0.0, "ruta": ""}
+
+
+def test_columnas_de_tiempos_en_el_mismo_guardado_que_resultado(rsi, automatizacion, monkeypatch):
+    libro = Workbook()
+    libro.active.append(["EXPEDIENTE", "DEPENDENCIA"])
+    libro.active.append(["0000000000001", "0021"])
+    libro.active.append(["0000000000002", "0021"])
+    libro.save(automatizacion.excel_entrada)
+
+    guardados = []
+    guardar = LibroOpenpyxl.save
+    monkeypatch.setattr(LibroOpenpyxl, "save", lambda libro, archivo: (guardados.append(archivo), guardar(libro, archivo)))
+
+    automatizacion.metricas.start(1)
+    automatizacion.metricas.espera_dialogos = 7.25
+    automatizacion.metricas.ruta.append("RC")
+    automatizacion.write_result(
+        automatizacion.excel_resultados, 1, "01234567", apostrofe=True, plantilla=automatizacion.excel_entrada
+    )
+    assert len(guardados) == 1
+
+    hoja = load_workbook(automatizacion.excel_resultados).active
+    encabezados = [celda.value for celda in hoja[1]]
+    fila = {encabezado: hoja.cell(row=3, column=columna).value for columna, encabezado in enumerate(encabezados, 1)}
+    assert fila["RESULTADO"] == "'01234567"
+    assert fila["ESPERA DIALOGOS (s)"] == 7.25
+    assert fila["INTENTOS"] == 1
+    assert fila["RUTA DE DIALOGOS"] == "RC"
+    assert fila["INICIO"] and fila["FIN"] and fila["DURACION (s)"] is not None
+    # La otra fila no recibe columnas
+    assert hoja.cell(row=2, column=encabezados.index("INTENTOS") + 1).value is None
+
+
+def test_otro_archivo_no_lleva_columnas_de_tiempos(rsi, automatizacion, tmp_path):
+    libro = Workbook()
+    libro.active.append(["EXPEDIENTE"])
+    libro.active.append(["0000000000001"])
+    libro.save(automatizacion.excel_entrada)
+
+    automatizacion.metricas.start(0)
+    automatizacion.write_result(automatizacion.excel_entrada, 0, "MONTO MAYOR")
+    encabezados = [celda.value for celda in load_workbook(automatizacion.excel_entrada).active[1]]
+    assert encabezados == ["EXPEDIENTE", "RESULTADO"]
@@ -0,0 +1,66 @@
+import pytest
+
+
+class _Opcion:
+    def __init__(self, rsi, rect, invocable=True):
+        self.rect = rsi._Rectangulo(rect)
+        self.invocable = invocable
+        self.invocada = False
+
+    def rectangle(self):
+        return self.rect
+
+    def invoke(self):
+        if not self.invocable:
+            raise RuntimeError("invoke no disponible")
+        self.invocada = True
+
+
+class _Mouse:
+    def __init__(self):
+        self.clics = []
+
+    def onScreen(self, x, y):
+        return 0 <= x < 1920 and 0 <= y < 1080
+
+    def click(self, x, y):
+        self.clics.append((x, y))
+
+
+@pytest.fixture
+def navegar(rsi, automatizacion, monkeypatch):
+    mouse = _Mouse()
+    monkeypatch.setattr(rsi, "pyautogui", mouse)
+    monkeypatch.setattr(rsi.time, "sleep", lambda segundos: None)
+    automatizacion.navegacion.rutas["Trabar Embargo"] = {"ventana": "SIRAT", "clase": "TFrmMenu", "indices": [0, 2]}
+
+    def _navegar(opcion):
+        monkeypatch.setattr(automatizacion.navegacion, "resolve", lambda destino: opcion)
+        return automatizacion.navigate("Trabar Embargo"), mouse.clics
+
+    return _navegar
+
+
+def test_opcion_visible_se_clica(rsi, navegar):
+    assert navegar(_Opcion(rsi, (100, 200, 180, 220))) == ((140, 210), [(140, 210)])
+
+
+@pytest.mark.parametrize("rect", [(0, 0, 0, 0), (-500, 200, -420, 220), (100, 5000, 180, 5020)])
+def test_opcion_sin_rectangulo_o_fuera_de_pantalla_se_invoca(rsi, automatizacion, navegar, rect):
+    opcion = _Opcion(rsi, rect)
+    assert navegar(opcion) == (True, [])
+    assert opcion.invocada
+    assert "Trabar Embargo" in automatizacion.navegacion.rutas
+
+
+def test_fallo_olvida_la_ruta(rsi, automatizacion, navegar):
+    assert navegar(_Opcion(rsi, (0, 0, 0, 0), invocable=False)) == (None, [])
+    assert "Trabar Embargo" not in automatizacion.navegacion.rutas
+    assert automatizacion.navegacion.fallos == 1
+
+
+def test_invoke_no_deja_coordenadas_para_reutilizar(rsi, automatizacion, navegar):
+    automatizacion.trabar_embargo_coords = (1, 1)
+    navegar(_Opcion(rsi, (0, 0, 0, 0)))
+    assert automatizacion.click_trabar_embargo() is True
+    assert automatizacion.trabar_embargo_coords is None
@@ -0,0 +1,20 @@
+import json
+
+
+def test_perfil_invalido_cancela_la_corrida(rsi, tmp_path, caplog):
+    perfil = tmp_path / "perfil.json"
+    perfil.write_text(json.dumps({"version": rsi.PERFIL_VERSION, "tiempos": {"NO_EXISTE": 1}}))
+    intervalo = rsi.RITMO_INTERVALO_INICIAL
+
+    assert rsi.cargar_perfil(perfil) is False
+    assert rsi.PERFIL_ACTIVO is None
+    assert rsi.RITMO_INTERVALO_INICIAL == intervalo
+
+    assert rsi.main(["report", "--perfil", str(perfil), "--cola", str(tmp_path / "cola.db")]) is False
+    mensajes = [registro.getMessage() for registro in caplog.records]
+    assert any("se cancela la corrida" in mensaje for mensaje in mensajes)
+    assert "finalizó con errores" in mensajes[-1]
+
+
+def test_perfil_inexistente_usa_los_valores_por_defecto(rsi, tmp_path):
+    assert rsi.cargar_perfil(tmp_path / "no_existe.json") is None
@@ -0,0 +1,57 @@
+import json
+import pstats
+import threading
+import time
+from types import SimpleNamespace
+
+from openpyxl import Workbook
+
+
+def _escritor_ocupado(detener):
+    while not detener.is_set():
+        sum(i * i for i in range(2000))
+
+
+def test_muestreo_incluye_el_hilo_escritor(rsi, tmp_path):
+    detener = threading.Event()
+
+    def _corrida():
+        escritor = threading.Thread(target=_escritor_ocupado, args=(detener,), name="ExpedientePrefetcher")
+        escritor.start()
+        time.sleep(0.3)
+        detener.set()
+        escritor.join()
+        return "listo"
+
+    assert rsi.run_profiled(tmp_path, "ambos", _corrida) == "listo"
+
+    muestreo = json.loads((tmp_path / "muestreo.json").read_text(encoding="utf-8"))
+    assert "espera (sleep)" in muestreo["categorias"]
+    assert muestreo["hilos"]["ExpedientePrefetcher"]
+    plegado = (tmp_path / "muestreo.folded").read_text(encoding="utf-8")
+    assert any(linea.startswith("ExpedientePrefetcher;") for linea in plegado.splitlines())
+
+    funciones = {funcion for _, _, funcion in pstats.Stats(str(tmp_path / "cprofile.pstats")).stats}
+    assert "_escritor_ocupado" in funciones
+
+
+def test_coordinador_pasa_el_perfilado_a_los_workers(rsi, automatizacion, tmp_path, monkeypatch):
+    libro = Workbook()
+    libro.active.append(["EXPEDIENTE", "DEPENDENCIA", "TIPO DE MEDIDA", "INTERVENTOR", "PLAZO", "MONTO"])
+    libro.active.append(["0000000000001", "0021", "DSE", "X", "3", "100"])
+    libro.save(automatizacion.excel_entrada)
+    lanzados = []
+
+    def _popen(argumentos):
+        lanzados.append(argumentos)
+        return SimpleNamespace(pid=1, poll=lambda: 0, wait=lambda timeout=None: 0)
+
+    monkeypatch.setattr(rsi.subprocess, "Popen", _popen)
+    cola = rsi.ColaExpedientes(tmp_path / "cola.db")
+    rsi.run_coordinator(cola, workers=2, simulado="", intervalo=0, automatizacion=automatizacion,
+                        perfilado=tmp_path / "perfilado", perfilado_modo="muestreo")
+
+    assert len(lanzados) == 2
+    for argumentos in lanzados:
+        posicion = argumentos.index("--perfilado")
+        assert argumentos[posicion:posicion + 4] == ["--perfilado", str(tmp_path / "perfilado"), "--perfilado-modo", "muestreo"]
@@ -0,0 +1,43 @@
+import pytest
+
+
+def _lote(*tipos):
+    """Tuplas (idx, fila) como las de get_expedientes_grouped_by_dependencia, desde la fila 10 del Excel"""
+    return [(10 + posicion, {"TIPO DE MEDIDA": tipo}) for posicion, tipo in enumerate(tipos)]
+
+
+def _validar(invalidas=()):
+    return lambda expedientes, idx: (idx not in invalidas, "FALTA PLAZO" if idx in invalidas else "")
+
+
+@pytest.fixture
+def planificador(rsi):
+    return rsi.TransitionScheduler(costo_cambio=4.0)
+
+
+def test_invalidas_primero_con_su_indice_original(planificador):
+    lote = _lote("DSE", "IEI", "DSE", "", "IEI")
+    plan = planificador.plan(lote, None, _validar({12}))
+
+    # La fila 13 no tiene tipo de medida reconocible: también se resuelve sin SIRAT
+    assert [idx for idx, _ in plan[:2]] == [12, 13]
+    assert plan[:2] == [lote[2], lote[3]]
+    assert sorted(idx for idx, _ in plan) == [idx for idx, _ in lote]
+
+
+def test_tipo_mas_frecuente_primero_y_orden_del_excel_dentro_del_tipo(planificador):
+    plan = planificador.plan(_lote("DSE", "IEI", "IEI", "DSE", "IEI"), None, _validar())
+    assert [idx for idx, _ in plan] == [11, 12, 14, 10, 13]
+
+
+def test_empate_lo_gana_el_tipo_de_la_primera_fila(planificador):
+    plan = planificador.plan(_lote("DSE", "IEI", "IEI", "DSE"), None, _validar())
+    assert [idx for idx, _ in plan] == [10, 13, 11, 12]
+
+
+def test_cuenta_transiciones_original_y_planificada(planificador):
+    planificador.plan(_lote("DSE", "IEI", "DSE", "IEI", "DSE"), None, _validar({11}))
+    # Orden Excel sin la inválida: DSE DSE IEI DSE = 2 cambios; planificado: DSE DSE DSE IEI = 1
+    assert (planificador.transiciones_original, planificador.transiciones_plan) == (2, 1)
+    assert planificador.count_transitions([10, 12, 14, 13]) == 1
+    assert planificador.count_transitions([]) == 0
@@ -0,0 +1,138 @@
+import pytest
+
+
+class _Teclado:
+    """Sustituto de pyautogui que solo registra las teclas"""
+
+    def __init__(self):
+        self.teclas = []
+
+    def press(self, tecla):
+        self.teclas.append((tecla,))
+
+    def hotkey(self, *teclas):
+        self.teclas.append(teclas)
+
+    def write(self, texto, interval=0):
+        pass
+
+
+@pytest.fixture
+def bucle(rsi, automatizacion, monkeypatch):
+    """Automatización lista para correr un bucle encadenado sin GUI"""
+    import pandas as pd
+
+    teclado = _Teclado()
+    monkeypatch.setattr(rsi, "pyautogui", teclado)
+    monkeypatch.setattr(rsi.time, "sleep", lambda segundos: None)
+    expedientes = pd.DataFrame({
+        "EXPEDIENTE": ["0000000000001", "0000000000002", "0000000000003"],
+        "DEPENDENCIA": ["0021"] * 3,
+        "TIPO DE MEDIDA": ["DSE", "IEI", "DSE"],
+        "INTERVENTOR": ["X"] * 3, "PLAZO": ["3"] * 3, "MONTO": ["100"] * 3,
+    })
+    monkeypatch.setattr(automatizacion, "load_expedientes", lambda: expedientes)
+    monkeypatch.setattr(automatizacion, "_pausa", lambda segundos: None)
+    monkeypatch.setattr(automatizacion, "detect_expediente_error", lambda timeout=2: (False, None))
+    monkeypatch.setattr(automatizacion, "check_expediente_error_screen", lambda: True)
+    monkeypatch.setattr(automatizacion, "click_cambio_expediente", lambda: True)
+    revisadas = []
+
+    def rechazar(idx):
+        revisadas.append(idx)
+        automatizacion.record_row_result(idx, rsi.RESULTADO_SIN_EJECUTOR)
+        return False
+
+    monkeypatch.setattr(automatizacion, "precheck_seleccion", rechazar)
+    automatizacion.primer_expediente_idx = 0
+    automatizacion.filas_terminadas.add(0)
+    automatizacion.revisadas = revisadas
+    automatizacion.teclado = teclado
+    return automatizacion
+
+
+@pytest.mark.parametrize("metodo", ["expediente_loop_iei", "expediente_loop_dse", "expediente_loop"])
+def test_bucles_encadenados_no_presionan_alt_a_si_el_precheck_rechaza(bucle, metodo):
+    getattr(bucle, metodo)()
+    assert bucle.revisadas == [1, 2]
+    assert ("alt", "a") not in bucle.teclado.teclas
+
+
+def _rect(rsi, izquierda, arriba, derecha, abajo):
+    return rsi._Rectangulo((izquierda, arriba, derecha, abajo))
+
+
+@pytest.fixture
+def encabezados(rsi):
+    return [
+        ("Número", _rect(rsi, 0, 0, 100, 20)),
+        ("Saldos", _rect(rsi, 100, 0, 300, 10)),
+        ("Total", _rect(rsi, 100, 10, 200, 20)),
+        ("Exigible", _rect(rsi, 200, 10, 300, 20)),
+        ("Grupo", _rect(rsi, 300, 0, 400, 20)),
+    ]
+
+
+def test_la_columna_es_el_encabezado_mas_angosto(rsi, encabezados):
+    assert rsi.columna_por_geometria(encabezados, _rect(rsi, 110, 30, 190, 50)) == "Total"
+    assert rsi.columna_por_geometria(encabezados, _rect(rsi, 500, 30, 550, 50)) is None
+
+
+def test_registros_por_fila_de_la_grilla(rsi, encabezados):
+    filas = [
+        [(_rect(rsi, 0, 30, 100, 50), "0000000000001"), (_rect(rsi, 100, 30, 200, 50), "1,500.00"),
+         (_rect(rsi, 300, 30, 400, 50), "")],
+        # Celda con un Text interno del mismo tamaño: gana el que tiene contenido
+        [(_rect(rsi, 0, 52, 100, 72), ""), (_rect(rsi, 0, 52, 100, 72), "0000000000002"),
+         (_rect(rsi, 300, 52, 400, 72), "G01")],
+    ]
+    assert rsi.registros_seleccion(encabezados, filas) == [
+        {"Número": "0000000000001", "Total": "1,500.00", "Grupo": ""},
+        {"Número": "0000000000002", "Grupo": "G01"},
+    ]
+
+
+def test_celdas_sueltas_se_agrupan_por_altura(rsi):
+    celdas = [
+        (_rect(rsi, 300, 53, 400, 71), "G01"),
+        (_rect(rsi, 0, 30, 100, 50), "0000000000001"),
+        (_rect(rsi, 0, 52, 100, 72), "0000000000002"),
+        (_rect(rsi, 300, 31, 400, 49), ""),
+    ]
+    filas = rsi.agrupar_por_renglon(celdas)
+    assert [[texto for _, texto in fila] for fila in filas] == [["0000000000001", ""], ["0000000000002", "G01"]]
+
+
+@pytest.fixture
+def precheck(rsi, automatizacion, monkeypatch):
+    import pandas as pd
+
+    expedientes = pd.DataFrame({"EXPEDIENTE": ["0000000000001"], "TIPO DE MEDIDA": ["IEI"], "MONTO": ["100"]})
+    monkeypatch.setattr(automatizacion, "load_expedientes", lambda: expedientes)
+    monkeypatch.setattr(automatizacion, "clear_expediente_field", lambda: None)
+    automatizacion.invalidas = []
+    monkeypatch.setattr(
+        automatizacion, "mark_invalid_expediente_in_results",
+        lambda fila, motivo=None: automatizacion.invalidas.append((fila, motivo)),
+    )
+
+    def con_grilla(registros):
+        monkeypatch.setattr(automatizacion, "read_seleccion_grid", lambda: registros)
+        return automatizacion.precheck_seleccion(0)
+
+    return con_grilla
+
+
+def test_grupo_leido_vacio_rechaza(rsi, automatizacion, precheck):
+    assert precheck([{"Número": "0000000000002", "Grupo": "G01"}, {"Número": "0000000000001", "Grupo": ""}]) is False
+    assert automatizacion.invalidas == [(0, rsi.RESULTADO_SIN_EJECUTOR)]
+
+
+def test_sin_columna_grupo_no_rechaza(automatizacion, precheck):
+    assert precheck([{"Número": "0000000000001", "Total": "100.00"}]) is True
+    assert automatizacion.invalidas == []
+
+
+def test_expediente_que_no_figura_en_la_grilla_no_usa_otra_fila(automatizacion, precheck):
+    assert precheck([{"Número": "0000000000099", "Grupo": ""}]) is True
+    assert automatizacion.invalidas == []
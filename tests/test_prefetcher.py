@@ -0,0 +1,66 @@
+import threading
+import time
+
+
+def test_flush_espera_los_guardados_encolados(rsi, tmp_path, monkeypatch):
+    guardados = []
+
+    def _lento(archivo, celdas, plantilla=None):
+        time.sleep(0.2)
+        guardados.extend(celdas)
+
+    monkeypatch.setattr(rsi, "write_result_cells", _lento)
+    prefetcher = rsi.ExpedientePrefetcher(tmp_path / "EXPEDIENTES.xlsx")
+    prefetcher.start(None)
+    try:
+        prefetcher.write_result(tmp_path / "R.xlsx", 0, "0123456")
+        prefetcher.write_result(tmp_path / "R.xlsx", 1, "MONTO MAYOR")
+        assert prefetcher.flush(timeout=5)
+        assert [(fila, valor) for fila, valor, _a, _e in guardados] == [(0, "0123456"), (1, "MONTO MAYOR")]
+    finally:
+        prefetcher.stop()
+
+
+def test_flush_con_timeout_retorna_false(rsi, tmp_path, monkeypatch):
+    liberar = threading.Event()
+    monkeypatch.setattr(rsi, "write_result_cells", lambda *args, **kwargs: liberar.wait(5))
+    prefetcher = rsi.ExpedientePrefetcher(tmp_path / "EXPEDIENTES.xlsx")
+    prefetcher.start(None)
+    try:
+        prefetcher.write_result(tmp_path / "R.xlsx", 0, "0123456")
+        assert not prefetcher.flush(timeout=0.1)
+    finally:
+        liberar.set()
+        prefetcher.stop()
+
+
+def test_guardado_fallido_se_reporta(rsi, tmp_path, monkeypatch):
+    def _bloqueado(archivo, celdas, plantilla=None):
+        raise PermissionError("R.xlsx está abierto en Excel")
+
+    monkeypatch.setattr(rsi, "write_result_cells", _bloqueado)
+    prefetcher = rsi.ExpedientePrefetcher(tmp_path / "EXPEDIENTES.xlsx")
+    prefetcher.start(None)
+    try:
+        prefetcher.write_result(tmp_path / "R.xlsx", 3, "0123456")
+        prefetcher.flush(timeout=5)
+    finally:
+        prefetcher.stop()
+
+    assert prefetcher.failed_writes() == [(tmp_path / "R.xlsx", 3, "0123456")]
+    assert prefetcher.failed_writes() == []
+    assert prefetcher.escrituras == 0
+
+
+def test_reclamo_de_guardados_fallidos(rsi, automatizacion, tmp_path):
+    cola = rsi.ColaExpedientes(tmp_path / "cola.db")
+    cola.cargar([(3, "0000000000003", "21"), (4, "0000000000004", "21")])
+    cola.completar(4, None, "0123456")
+    cola.marcar_exportados([4])
+    automatizacion.cola = cola
+    automatizacion.filas_terminadas = {3, 4}
+    automatizacion.prefetcher.fallidas = [(tmp_path / "R.xlsx", 3, "RC NO DETECTADO"), (tmp_path / "R.xlsx", 4, "0123456")]
+
+    assert automatizacion.filas_pendientes(6) == [0, 1, 2, 3, 5]
+    assert automatizacion.filas_terminadas == {4}
+    assert cola.resultados_sin_exportar() == [(4, "0123456")]
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+
+def test_breaker_abre_tras_fallos_consecutivos_y_duplica_la_espera(rsi):
+    breaker = rsi.CircuitBreaker(umbral=2, backoff_inicial=10, backoff_maximo=35)
+    breaker.record_failure()
+    assert not breaker.is_open()
+    breaker.record_failure()
+    assert breaker.is_open() and breaker.backoff() == 10
+
+    breaker.record_failed_probe()
+    assert breaker.is_open() and breaker.backoff() == 20
+    breaker.record_failed_probe()
+    assert breaker.backoff() == 35
+
+    breaker.record_pause(10)
+    breaker.record_pause(20)
+    assert breaker.tiempo_en_pausa == 30
+
+
+def test_breaker_en_prueba_reabre_con_un_fallo_y_cierra_con_un_exito(rsi):
+    breaker = rsi.CircuitBreaker(umbral=3)
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.half_open()
+    breaker.record_failure()
+    assert breaker.is_open() and breaker.aperturas == 2
+
+    breaker.half_open()
+    breaker.record_success()
+    assert breaker.estado == "cerrado" and breaker.aperturas == 0 and breaker.fallos_consecutivos == 0
+
+
+def test_start_row_aborta_si_el_breaker_dispara_el_watchdog(rsi, automatizacion, monkeypatch):
+    monkeypatch.setattr(rsi, "BREAKER_MAX_SONDEOS", 2)
+    monkeypatch.setattr(automatizacion, "probe_sirat_health", lambda: False)
+    automatizacion.breaker = rsi.CircuitBreaker(umbral=1, backoff_inicial=0)
+    automatizacion.breaker.record_failure()
+
+    with pytest.raises(rsi.ExpedienteAbortado):
+        automatizacion.start_row(4)
+
+    assert automatizacion.sesion_caida()
+    assert automatizacion.breaker.aperturas == 3
+    assert automatizacion.budget.fila is None
+
+
+def test_presupuesto_agotado_registra_el_resultado_una_vez_y_corta_la_gui(rsi, automatizacion):
+    pd.DataFrame({"EXPEDIENTE": ["1", "2", "3"]}).to_excel(automatizacion.excel_entrada, index=False)
+    automatizacion.budget = rsi.ExpedienteBudget(presupuesto=0)
+    automatizacion.budget.start(1)
+    escritos = []
+    automatizacion.write_result = lambda archivo, fila, valor, **kwargs: escritos.append((fila, valor))
+
+    with pytest.raises(rsi.ExpedienteAbortado):
+        automatizacion._pausa(0.1)
+    with pytest.raises(rsi.ExpedienteAbortado):
+        automatizacion._escribir("0123")
+
+    assert escritos == [(1, rsi.RESULTADO_PRESUPUESTO)]
+    assert 1 in automatizacion.filas_terminadas
+    assert automatizacion.breaker.fallos_consecutivos == 1
+
+    automatizacion.budget.stop()
+    automatizacion._pausa(0)
+
+
+def test_resultado_escrito_detiene_el_presupuesto_de_la_fila(automatizacion):
+    automatizacion.budget.start(2)
+    automatizacion.record_row_result(2, "0123456")
+    assert automatizacion.budget.remaining() is None
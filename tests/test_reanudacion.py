@@ -0,0 +1,18 @@
+def test_resultado_con_sesion_caida_no_termina_la_fila(automatizacion):
+    automatizacion.watchdog.disparado = True
+    automatizacion.watchdog.motivo = "El paso 'expediente' excedió su presupuesto de 240s"
+
+    assert automatizacion.update_excel_result_for_row(3, "RC NO DETECTADO") is False
+    automatizacion.primer_expediente_idx = 4
+    assert automatizacion.update_excel_result("RC NO DETECTADO") is False
+    assert automatizacion.mark_invalid_expediente_in_results(5) is False
+    automatizacion.record_row_result(6, "ERROR")
+
+    assert automatizacion.filas_terminadas == set()
+    assert automatizacion.filas_pendientes(8) == list(range(8))
+
+
+def test_sin_cuelgue_el_resultado_termina_la_fila(automatizacion):
+    automatizacion.record_row_result(3, "0123456")
+    assert 3 in automatizacion.filas_terminadas
+    assert 3 not in automatizacion.filas_pendientes(8)
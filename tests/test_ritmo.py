@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+
+def test_aimd_acelera_de_a_un_paso_y_frena_multiplicando(rsi, tmp_path):
+    ritmo = rsi.PacingGovernor(tmp_path / "ritmo.json")
+    intervalo, factor = ritmo.intervalo, ritmo.factor
+
+    ritmo.record_success()
+    assert ritmo.intervalo == pytest.approx(intervalo - rsi.RITMO_PASO_INTERVALO)
+    assert ritmo.factor == pytest.approx(factor - rsi.RITMO_PASO_FACTOR)
+
+    antes = ritmo.intervalo
+    ritmo.record_failure("prueba")
+    assert ritmo.intervalo == pytest.approx(min(antes * rsi.RITMO_RETROCESO, rsi.RITMO_INTERVALO_LIMITES[1]))
+    assert (ritmo.avances, ritmo.retrocesos) == (1, 1)
+
+
+def test_limites(rsi, tmp_path):
+    ritmo = rsi.PacingGovernor(tmp_path / "ritmo.json")
+    for _ in range(1000):
+        ritmo.record_success()
+    assert (ritmo.intervalo, ritmo.factor) == (rsi.RITMO_INTERVALO_LIMITES[0], rsi.RITMO_FACTOR_LIMITES[0])
+    for _ in range(100):
+        ritmo.record_failure("prueba")
+    assert (ritmo.intervalo, ritmo.factor) == (rsi.RITMO_INTERVALO_LIMITES[1], rsi.RITMO_FACTOR_LIMITES[1])
+
+
+def test_se_guarda_solo_al_final_y_se_retoma(rsi, tmp_path):
+    ruta = tmp_path / "ritmo.json"
+    ritmo = rsi.PacingGovernor(ruta)
+    ritmo.record_success()
+    ritmo.record_failure("prueba")
+    assert not ruta.exists()
+
+    ritmo.save()
+    assert json.loads(ruta.read_text())["intervalo"] == round(ritmo.intervalo, 4)
+    retomado = rsi.PacingGovernor(ruta)
+    assert retomado.intervalo == pytest.approx(ritmo.intervalo, abs=1e-4)
+    assert retomado.inicial == (retomado.intervalo, retomado.factor)
+
+
+@pytest.mark.parametrize("resultado, avances, retrocesos", [
+    ("0123456", 1, 0),
+    ("MONTO MAYOR", 1, 0),
+    ("EXP. INVALIDO", 0, 0),  # SIRAT lo rechaza a cualquier ritmo
+    ("FALTA MONTO", 0, 0),
+    ("RC NO DETECTADO", 0, 1),
+    ("ERROR: No se detectó RC", 0, 1),
+])
+def test_senales_del_resultado(automatizacion, resultado, avances, retrocesos):
+    automatizacion.record_row_result(3, resultado)
+    assert (automatizacion.ritmo.avances, automatizacion.ritmo.retrocesos) == (avances, retrocesos)
+
+
+def test_presupuesto_agotado_frena(automatizacion):
+    automatizacion.budget.start(3)
+    automatizacion.budget.expire(3)
+    automatizacion.record_row_result(3, "0123456")
+    assert (automatizacion.ritmo.avances, automatizacion.ritmo.retrocesos) == (0, 1)
+
+
+def test_reinicio_por_watchdog_frena(rsi, automatizacion, monkeypatch):
+    monkeypatch.setattr(rsi.time, "sleep", lambda segundos: None)
+    monkeypatch.setattr(automatizacion, "open_session", lambda: True)
+    automatizacion.watchdog.disparado = True
+    automatizacion.watchdog.motivo = "El paso 'expediente' excedió su presupuesto de 240s"
+
+    assert automatizacion.restart_sirat_session() is True
+    assert automatizacion.ritmo.retrocesos == 1
+
+
+def test_perfil_con_otro_intervalo_inicial_descarta_el_ritmo_guardado(rsi, tmp_path, monkeypatch):
+    ruta = tmp_path / "ritmo.json"
+    ritmo = rsi.PacingGovernor(ruta)
+    for _ in range(3):
+        ritmo.record_success()
+    ritmo.save()
+    assert rsi.PacingGovernor(ruta).intervalo == pytest.approx(ritmo.intervalo, abs=1e-4)
+
+    monkeypatch.setattr(rsi, "RITMO_INTERVALO_INICIAL", 0.1)
+    assert (rsi.PacingGovernor(ruta).intervalo, rsi.PacingGovernor(ruta).factor) == (0.1, 1.0)
+
+
+def test_ritmo_guardado_sin_intervalo_inicial_se_retoma(rsi, tmp_path):
+    ruta = tmp_path / "ritmo.json"
+    ruta.write_text(json.dumps({"intervalo": 0.02, "factor": 0.5}))
+    assert (rsi.PacingGovernor(ruta).intervalo, rsi.PacingGovernor(ruta).factor) == (0.02, 0.5)
@@ -0,0 +1,66 @@
+import logging
+
+import pytest
+
+
+@pytest.fixture
+def sesion(rsi):
+    return rsi.SessionState()
+
+
+def test_sesion_nueva_entra_por_cobranza_coactiva(sesion):
+    assert sesion.pantalla == sesion.MENU
+    assert sesion.next_path() == "cobranza coactiva"
+
+
+def test_dentro_del_expediente_usa_cambio_de_expediente(sesion):
+    sesion.typed("0000000000001")
+    sesion.entered()
+    sesion.record_result("01234567")
+    assert sesion.next_path() == "cambio de expediente"
+    assert sesion.campo_numero == ""
+
+
+def test_rechazado_en_la_seleccion_limpia_el_campo_si_quedo_texto(sesion):
+    sesion.typed("0000000000001")
+    sesion.record_result("EXP. INVALIDO")
+    assert sesion.next_path() == "limpiar + directo"
+
+    sesion.field_cleared()
+    assert sesion.next_path() == "directo"
+
+
+def test_reset_vuelve_al_menu(sesion):
+    sesion.typed("0000000000001")
+    sesion.entered()
+    sesion.record_result("MONTO MAYOR")
+    sesion.reset()
+    assert sesion.next_path() == "cobranza coactiva"
+    assert sesion.anterior is None
+
+
+def test_describe_y_report(sesion, caplog):
+    caplog.set_level(logging.INFO)
+    sesion.typed("0000000000001")
+    assert sesion.describe() == "pantalla seleccion, anterior sin resultado, campo Número '0000000000001'"
+
+    sesion.report()
+    assert "Caminos" not in caplog.text
+    sesion.record_path("directo")
+    sesion.record_path("directo")
+    sesion.record_fallback("directo")
+    sesion.report()
+    assert "Caminos al siguiente expediente: directo 2 | fallidos: directo 1" in caplog.text
+
+
+@pytest.mark.parametrize("resultado", ["01234567", "MONTO MAYOR", "ERROR: sin diálogo"])
+def test_el_resultado_no_decide_el_camino(sesion, resultado):
+    # Resultado registrado antes de ALT+A: SIRAT sigue en la selección con el número digitado
+    sesion.typed("0000000000001")
+    sesion.record_result(resultado)
+    assert sesion.next_path() == "limpiar + directo"
+    # Flujo cortado después de ALT+A: se sale con Cambio de Expediente aunque no haya RC
+    sesion.entered()
+    sesion.record_result(resultado)
+    assert sesion.next_path() == "cambio de expediente"
+    assert sesion.describe() == f"pantalla expediente, anterior {resultado}"
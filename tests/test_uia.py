@@ -0,0 +1,155 @@
+import pytest
+
+
+class _Nodo:
+    """Elemento UIA de prueba: registra cada consulta de hijos"""
+
+    def __init__(self, nombre, hijos=(), control_type="Pane", consultas=None):
+        self.nombre = nombre
+        self.hijos = list(hijos)
+        self.element_info = self
+        self.control_type = control_type
+        self.consultas = consultas if consultas is not None else []
+
+    def children(self):
+        self.consultas.append(self.nombre)
+        return self.hijos
+
+    def descendants(self):
+        resultado = []
+        for hijo in self.hijos:
+            resultado.append(hijo)
+            resultado.extend(hijo.descendants())
+        return resultado
+
+
+@pytest.fixture
+def arbol():
+    consultas = []
+
+    def nodo(nombre, *hijos, control_type="Pane"):
+        return _Nodo(nombre, hijos, control_type, consultas)
+
+    raiz = nodo(
+        "raiz",
+        nodo("a", nodo("a1", control_type="Button"), nodo("a2", nodo("a2x", control_type="Button"))),
+        nodo("b", nodo("b1", control_type="Button")),
+    )
+    return raiz, consultas
+
+
+def _nombres(elementos):
+    return [elemento.nombre for elemento in elementos]
+
+
+def test_orden_de_documento_como_descendants(rsi, arbol):
+    raiz, _ = arbol
+    assert _nombres(rsi.iter_uia(raiz)) == _nombres(raiz.descendants())
+    assert _nombres(rsi.iter_uia(raiz, control_types=("Button",))) == ["a1", "a2x", "b1"]
+
+
+def test_corta_sin_pedir_el_resto_del_arbol(rsi, arbol):
+    raiz, consultas = arbol
+    primero = next(rsi.iter_uia(raiz, control_types=("Button",)))
+    assert primero.nombre == "a1"
+    assert "b" not in consultas and "a2" not in consultas
+
+
+def test_profundidad_maxima(rsi, arbol):
+    raiz, _ = arbol
+    assert _nombres(rsi.iter_uia(raiz, max_profundidad=1)) == ["a", "b"]
+    assert _nombres(rsi.iter_uia(raiz, max_profundidad=2)) == ["a", "a1", "a2", "b", "b1"]
+
+
+def test_contador_de_elementos_traidos(rsi, arbol):
+    raiz, _ = arbol
+    contador = [0]
+    next(rsi.iter_uia(raiz, control_types=("Button",), contador=contador))
+    # Hijos de raiz (a, b) y de a (a1, a2): lo que UIA entregó, no solo lo recorrido
+    assert contador == [4]
+
+
+class _Rect:
+    def __init__(self, left, top, right, bottom):
+        self.left, self.top, self.right, self.bottom = left, top, right, bottom
+
+
+class _ElementoUIA:
+    """IUIAutomationElement con propiedades cacheadas"""
+
+    def __init__(self, nombre, tipo, subarbol=()):
+        self.CachedName = nombre
+        self.CachedControlType = tipo
+        self.CachedAutomationId = ""
+        self.CachedClassName = ""
+        self.CachedBoundingRectangle = _Rect(0, 0, 10, 10)
+        self.subarbol = list(subarbol)
+        self.busquedas = 0
+
+    def FindAllBuildCache(self, alcance, condicion, cache):
+        self.busquedas += 1
+        return _Arreglo(self.subarbol)
+
+
+class _Arreglo:
+    def __init__(self, elementos):
+        self.elementos = elementos
+        self.Length = len(elementos)
+
+    def GetElement(self, indice):
+        return self.elementos[indice]
+
+
+@pytest.fixture
+def cache_request(monkeypatch):
+    """pywinauto.uia_defines.IUIA mínimo para recorrer el camino con CacheRequest"""
+    import sys
+    import types
+
+    class _CacheRequest:
+        def AddProperty(self, propiedad):
+            pass
+
+    class IUIA:
+        iuia = types.SimpleNamespace(CreateCacheRequest=_CacheRequest)
+        UIA_dll = types.SimpleNamespace(
+            UIA_NamePropertyId=1, UIA_ControlTypePropertyId=2, UIA_BoundingRectanglePropertyId=3,
+            UIA_AutomationIdPropertyId=4, UIA_ClassNamePropertyId=5,
+        )
+        tree_scope = {"descendants": 4}
+        true_condition = object()
+        known_control_type_ids = {50000: "Button", 50028: "DataGrid", 50029: "DataItem"}
+
+    modulo = types.ModuleType("pywinauto.uia_defines")
+    modulo.IUIA = IUIA
+    monkeypatch.setitem(sys.modules, "pywinauto", types.ModuleType("pywinauto"))
+    monkeypatch.setitem(sys.modules, "pywinauto.uia_defines", modulo)
+
+
+def test_bulk_uia_sobre_un_elemento_cacheado(rsi, cache_request):
+    fila = _ElementoUIA("Fila", 50029)
+    grilla = _ElementoUIA("Grilla", 50028, [fila, _ElementoUIA("0000000000001", 50000)])
+    cacheada = rsi.ElementoCacheado(grilla, {50028: "DataGrid"})
+
+    elementos = rsi.bulk_uia(cacheada)
+    assert elementos is not None
+    assert [(e.window_text(), e.element_info.control_type) for e in elementos] == [
+        ("Fila", "DataItem"), ("0000000000001", "Button"),
+    ]
+    assert grilla.busquedas == 1
+
+
+def test_walk_uia_cuenta_el_subarbol_traido(automatizacion, cache_request):
+    import types
+
+    raiz = _ElementoUIA("Ventana", 50000, [
+        _ElementoUIA("Aceptar", 50000), _ElementoUIA("Grilla", 50028), _ElementoUIA("Otra", 50000),
+    ])
+    ventana = types.SimpleNamespace(element_info=types.SimpleNamespace(element=raiz))
+
+    busqueda = automatizacion.walk_uia(ventana, "Botón", control_types=("Button",))
+    assert next(busqueda).window_text() == "Aceptar"
+    busqueda.close()
+    assert [e.name for e in automatizacion.walk_uia(ventana, "Grilla", control_types=("DataGrid",))] == ["Grilla"]
+    # El corte en el primer resultado no cambia lo que se trajo: el subárbol entero
+    assert automatizacion.busquedas_uia == {"Botón": [3], "Grilla": [3]}
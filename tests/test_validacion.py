@@ -0,0 +1,74 @@
+import pytest
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    ("0000000000123", "0000000000123"),
+    ("123", "0000000000123"),
+    (" 123-456 ", "0000000123456"),
+    ("123.0", "0000000000123"),
+    (123, "0000000000123"),
+    ("12345678901234", None),  # Más de 13 dígitos
+    ("0000000000000", None),
+    ("12A45", None),
+    ("", None),
+    (None, None),
+])
+def test_normalizar_expediente(rsi, valor, esperado):
+    assert rsi.normalizar_expediente(valor) == esperado
+
+
+@pytest.mark.parametrize("ruc, esperado", [
+    ("20131312955", True),
+    ("20131312955.0", True),
+    ("20100000050", True),  # Resto 10 -> dígito 0
+    ("20100000131", True),  # Resto 11 -> dígito 1
+    ("20131312954", False),  # Dígito verificador incorrecto
+    ("30131312955", False),  # Prefijo de contribuyente inexistente
+    ("2013131295", False),
+    ("2013131295X", False),
+])
+def test_ruc_valido(rsi, ruc, esperado):
+    assert rsi.ruc_valido(ruc) is esperado
+
+
+@pytest.fixture
+def validar(automatizacion):
+    import pandas as pd
+
+    def _validar(**columnas):
+        fila = {"EXPEDIENTE": "123", "DEPENDENCIA": "0021", "TIPO DE MEDIDA": "IEI", "INTERVENTOR": "X", "PLAZO": "3"}
+        fila.update(columnas)
+        fila = {columna: valor for columna, valor in fila.items() if valor is not None}
+        return automatizacion.validate_expediente_row(pd.DataFrame([fila]), 0)
+
+    return _validar
+
+
+@pytest.mark.parametrize("columnas, esperado", [
+    ({}, (True, "")),
+    ({"RUC": "20131312955"}, (True, "")),
+    ({"RUC": "nan"}, (True, "")),
+    ({"EXPEDIENTE": "12A"}, (False, "NRO EXPEDIENTE INVALIDO")),
+    ({"RUC": "20131312954"}, (False, "RUC INVALIDO")),
+    ({"DEPENDENCIA": ""}, (False, "FALTA DEPENDENCIA")),
+    ({"TIPO DE MEDIDA": None}, (False, "FALTA COLUMNA 'TIPO DE MEDIDA'")),
+    ({"TIPO DE MEDIDA": "XYZ"}, (False, "TIPO DE MEDIDA NO VÁLIDO: XYZ")),
+    ({"INTERVENTOR": "nan", "PLAZO": ""}, (False, "FALTA INTERVENTOR | FALTA PLAZO")),
+    ({"TIPO DE MEDIDA": "DSE"}, (False, "FALTA COLUMNA 'MONTO'")),
+    ({"TIPO DE MEDIDA": "dse", "MONTO": "100"}, (True, "")),
+])
+def test_validate_expediente_row(validar, columnas, esperado):
+    assert validar(**columnas) == esperado
+
+
+@pytest.mark.parametrize("resultado, esperado", [
+    ("'0123456", ("done", "0123456")),
+    ("MONTO MAYOR", ("done", None)),
+    ("RUC INVALIDO", ("invalid", None)),
+    ("NRO EXPEDIENTE INVALIDO", ("invalid", None)),
+    ("FALTA MONTO", ("invalid", None)),
+    ("RC NO DETECTADO", ("verify", None)),
+    (None, ("verify", None)),
+])
+def test_clasificar_resultado(rsi, resultado, esperado):
+    assert rsi.clasificar_resultado(resultado) == esperado
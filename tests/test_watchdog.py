@@ -0,0 +1,33 @@
+import os
+
+
+def _ventana(hwnd, pid, titulo, clase="TFrmMenu", visible=True, colgada=False):
+    return {"hwnd": hwnd, "pid": pid, "titulo": titulo, "clase": clase, "visible": visible, "colgada": colgada}
+
+
+def test_ventana_con_titulo_sirat_de_otro_programa_no_cuenta(rsi):
+    ventanas = [
+        _ventana(1, 100, "SIRAT - Explorador de archivos", clase="CabinetWClass"),
+        _ventana(2, 200, "Menú del día - Navegador", clase="Chrome_WidgetWin_1"),
+    ]
+    assert rsi.filtrar_ventanas_sirat(ventanas, lambda pid: "explorer.exe") == []
+
+
+def test_proceso_delphi_con_ventana_tapplication(rsi):
+    ventanas = [
+        _ventana(1, 300, "RSIRAT", clase=rsi.CLASE_APLICACION, visible=False),
+        _ventana(2, 300, "SIRAT - Menú de Opciones", colgada=True),
+        _ventana(3, 300, "Sin título que coincida"),
+    ]
+    assert rsi.filtrar_ventanas_sirat(ventanas) == [(2, 300, "SIRAT - Menú de Opciones", True)]
+
+
+def test_proceso_por_nombre_del_ejecutable(rsi):
+    ventanas = [_ventana(5, 400, "SIRAT"), _ventana(6, 500, "SIRAT")]
+    ejecutables = {400: "rsirat.exe", 500: "notepad.exe"}
+    assert rsi.filtrar_ventanas_sirat(ventanas, ejecutables.get) == [(5, 400, "SIRAT", False)]
+
+
+def test_el_propio_script_nunca_es_sirat(rsi):
+    ventanas = [_ventana(7, os.getpid(), "python rsi_32 SIRAT", clase=rsi.CLASE_APLICACION)]
+    assert rsi.filtrar_ventanas_sirat(ventanas, lambda pid: "rsirat.exe") == []